@@ -44,6 +44,10 @@ def create_app(test_config=None):
     from utils.logger import setup_logger
     setup_logger(app)
 
+    # PDF fonts: registered once per process from static/fonts/manifest.json
+    from services.printing.layout_utils import register_fonts
+    register_fonts()
+
     # Health Check (Validates DB connectivity)
     @app.route("/healthz")
     def healthz():
@@ -143,8 +147,8 @@ def create_app(test_config=None):
     #         print(f"[Startup] Migration Failed: {e}")
 
     # Template Helpers
-    from utils.template_helpers import get_storage_url
-    app.jinja_env.globals.update(get_storage_url=get_storage_url)
+    from utils.template_helpers import get_storage_url, get_storage_urls
+    app.jinja_env.globals.update(get_storage_url=get_storage_url, get_storage_urls=get_storage_urls)
 
     # Security Config
     app.config['SESSION_COOKIE_HTTPONLY'] = SESSION_COOKIE_HTTPONLY
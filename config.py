@@ -148,6 +148,15 @@ if not DATABASE_URL.startswith("postgresql://"):
         f"CRITICAL: DATABASE_URL must be a PostgreSQL URL (postgresql://...). Got: {got}. Non-Postgres DBs are forbidden."
     )
 
+# Per-process connection pool (database.get_db / database.connection).
+# Size it to the concurrency of one process: gunicorn threads + background
+# threads (ingest flusher, async worker pool). Each gunicorn worker has its own pool.
+DB_POOL_ENABLED = get_env_bool("DB_POOL_ENABLED", default=True)
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))  # seconds to wait when exhausted
+DB_POOL_RECYCLE_SECONDS = int(os.environ.get("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PING_AFTER_IDLE = float(os.environ.get("DB_POOL_PING_AFTER_IDLE", "5"))  # SELECT 1 on checkout if idle longer
+
 # -----------------------------------------------------------------------------
 # Storage Backend
 # -----------------------------------------------------------------------------
@@ -170,6 +179,19 @@ if " " in _region or not _region.replace("-", "").isalnum():
     _region = "us-east-1"
 AWS_REGION = _region
 
+# Shared S3 client (utils.storage.get_storage is a process-wide singleton)
+S3_MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "20"))
+# Presigned URL cache entries per process (reused for half the URL lifetime)
+STORAGE_URL_CACHE_MAXSIZE = int(os.environ.get("STORAGE_URL_CACHE_MAXSIZE", "20000"))
+
+# Downloads (utils.storage.send_stored_file)
+# Local: nginx internal location aliased to INSTANCE_DIR, e.g. "/_protected/" (empty = send_file)
+STORAGE_X_ACCEL_REDIRECT_PREFIX = get_env_str("STORAGE_X_ACCEL_REDIRECT_PREFIX", default="")
+# S3: redirect to a short-lived presigned URL instead of proxying bytes through the worker
+STORAGE_S3_REDIRECT_DOWNLOADS = get_env_bool("STORAGE_S3_REDIRECT_DOWNLOADS", default=True)
+STORAGE_DOWNLOAD_URL_EXPIRES = int(os.environ.get("STORAGE_DOWNLOAD_URL_EXPIRES", "300"))
+STORAGE_STREAM_CHUNK_SIZE = int(os.environ.get("STORAGE_STREAM_CHUNK_SIZE", str(256 * 1024)))
+
 if STORAGE_BACKEND == "s3":
     if not S3_BUCKET:
         raise RuntimeError("CRITICAL: S3_BUCKET must be set when STORAGE_BACKEND=s3.")
@@ -281,6 +303,12 @@ MAILJET_SECRET_KEY = os.environ.get("MAILJET_SECRET_KEY", "")
 # Upload limits
 # -----------------------------------------------------------------------------
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024
+# Image uploads are identified from this many leading bytes, then streamed to storage
+UPLOAD_VALIDATE_PREFIX_BYTES = int(os.environ.get("UPLOAD_VALIDATE_PREFIX_BYTES", str(256 * 1024)))
+# S3 uploads switch to multipart above this size, in parts of this size (S3 minimum is 5MB)
+UPLOAD_MULTIPART_CHUNK_BYTES = int(os.environ.get("UPLOAD_MULTIPART_CHUNK_BYTES", str(8 * 1024 * 1024)))
+# Files of one multi-photo submission uploaded concurrently
+UPLOAD_PARALLELISM = int(os.environ.get("UPLOAD_PARALLELISM", "4"))
 
 # -----------------------------------------------------------------------------
 # Feature Flags
@@ -288,4 +316,113 @@ MAX_CONTENT_LENGTH = 16 * 1024 * 1024
 ENABLE_SMART_RISER = get_env_bool("ENABLE_SMART_RISER", default=False)
 if IS_PRODUCTION or IS_STAGING:
     ENABLE_SMART_RISER = False
-ENABLE_QR_LOGO = get_env_bool("ENABLE_QR_LOGO", default=False)
\ No newline at end of file
+ENABLE_QR_LOGO = get_env_bool("ENABLE_QR_LOGO", default=False)
+# -----------------------------------------------------------------------------
+# QR Code Resolution Cache (/r/<code>)
+# -----------------------------------------------------------------------------
+# Per-process TTL/LRU tier. Disabled by default in tests, which mutate rows directly.
+QR_RESOLVE_CACHE_ENABLED = get_env_bool("QR_RESOLVE_CACHE_ENABLED", default=not IS_TEST)
+QR_RESOLVE_CACHE_TTL = int(os.environ.get("QR_RESOLVE_CACHE_TTL", "60"))
+QR_RESOLVE_CACHE_MAXSIZE = int(os.environ.get("QR_RESOLVE_CACHE_MAXSIZE", "10000"))
+# Optional shared tier (Redis). Requires the `redis` package when set.
+QR_RESOLVE_CACHE_REDIS_URL = get_env_str("QR_RESOLVE_CACHE_REDIS_URL", default="")
+QR_RESOLVE_CACHE_SHARED_TTL = int(os.environ.get("QR_RESOLVE_CACHE_SHARED_TTL", "3600"))
+
+# -----------------------------------------------------------------------------
+# Analytics Ingestion (qr_scans / property_views / app_events)
+# -----------------------------------------------------------------------------
+# Async buffered writes; disabled by default in tests so rows are visible immediately.
+INGEST_ASYNC_ENABLED = get_env_bool("INGEST_ASYNC_ENABLED", default=not IS_TEST)
+INGEST_MAX_BUFFER = int(os.environ.get("INGEST_MAX_BUFFER", "20000"))
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "500"))
+INGEST_FLUSH_INTERVAL = float(os.environ.get("INGEST_FLUSH_INTERVAL", "1.0"))
+INGEST_SPILL_DIR = get_env_str("INGEST_SPILL_DIR", default=os.path.join(INSTANCE_DIR, "ingest_spill"))
+# Per-process spill file cap; rows beyond it are dropped and counted (0 = unbounded)
+INGEST_SPILL_MAX_BYTES = int(os.environ.get("INGEST_SPILL_MAX_BYTES", str(256 * 1024 * 1024)))
+# track_event: distinct payload keys whose PII verdict is cached per process
+EVENTS_KEY_CACHE_SIZE = int(os.environ.get("EVENTS_KEY_CACHE_SIZE", "4096"))
+
+# -----------------------------------------------------------------------------
+# Render Cache (sign PDFs / WebP previews)
+# -----------------------------------------------------------------------------
+# Content-addressed: identical render inputs reuse the stored output. Disabled by default in tests.
+RENDER_CACHE_ENABLED = get_env_bool("RENDER_CACHE_ENABLED", default=not IS_TEST)
+RENDER_CACHE_MAX_AGE_DAYS = int(os.environ.get("RENDER_CACHE_MAX_AGE_DAYS", "30"))
+RENDER_CACHE_MAX_ENTRIES = int(os.environ.get("RENDER_CACHE_MAX_ENTRIES", "20000"))
+
+# -----------------------------------------------------------------------------
+# Async Worker (scripts/async_worker.py)
+# -----------------------------------------------------------------------------
+# "pool": concurrent (processes for render jobs, threads for the rest); "serial": one job at a time
+ASYNC_WORKER_MODE = get_env_str("ASYNC_WORKER_MODE", default="pool").strip().lower()
+# Max jobs of each type running at once, e.g. "generate_listing_kit=2,fulfill_order=2"
+ASYNC_WORKER_CONCURRENCY = get_env_str("ASYNC_WORKER_CONCURRENCY", default="generate_listing_kit=2,fulfill_order=2")
+# Lease renewal for running jobs (must stay well under the 5 minute stale-lock rule)
+ASYNC_WORKER_HEARTBEAT_SECONDS = int(os.environ.get("ASYNC_WORKER_HEARTBEAT_SECONDS", "60"))
+# How long SIGTERM waits for running jobs before exiting
+ASYNC_WORKER_DRAIN_SECONDS = int(os.environ.get("ASYNC_WORKER_DRAIN_SECONDS", "240"))
+# enqueue() sends pg_notify and idle workers LISTEN; disable behind transaction-mode poolers
+ASYNC_JOBS_NOTIFY_ENABLED = get_env_bool("ASYNC_JOBS_NOTIFY_ENABLED", default=True)
+# Fallback poll when idle (NOTIFY and the next_run_at scheduler normally wake the worker first)
+ASYNC_WORKER_POLL_SECONDS = float(os.environ.get("ASYNC_WORKER_POLL_SECONDS", "30"))
+
+# -----------------------------------------------------------------------------
+# Fast Previews (utils/pdf_preview.render_layout_preview)
+# -----------------------------------------------------------------------------
+# Resize / order flows draw a screen-size preview and defer the print PDF to
+# the async 'render_print_pdf' job; false renders the print PDF inline first
+PREVIEW_FAST_ENABLED = get_env_bool("PREVIEW_FAST_ENABLED", default=True)
+PREVIEW_FAST_MAX_DIMENSION = int(os.environ.get("PREVIEW_FAST_MAX_DIMENSION", "1600"))
+
+# -----------------------------------------------------------------------------
+# Decoded Image Cache (utils/image_cache.py)
+# -----------------------------------------------------------------------------
+# Per-process budget for prepared headshot / logo bytes (keyed by storage etag)
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Images larger than their draw box at this DPI are downscaled before embedding
+IMAGE_CACHE_PRINT_DPI = int(os.environ.get("IMAGE_CACHE_PRINT_DPI", "300"))
+
+# -----------------------------------------------------------------------------
+# QR Logo Renders (utils/qr_image.py)
+# -----------------------------------------------------------------------------
+# Verified logo QR PNGs, keyed by (url, logo hash, size_px), per process
+QR_LOGO_CACHE_MAXSIZE = int(os.environ.get("QR_LOGO_CACHE_MAXSIZE", "256"))
+QR_LOGO_CACHE_TTL = int(os.environ.get("QR_LOGO_CACHE_TTL", "86400"))
+# Logo ratios are decode-verified at this size first; 0 = full resolution only
+QR_LOGO_VERIFY_PX = int(os.environ.get("QR_LOGO_VERIFY_PX", "512"))
+
+# -----------------------------------------------------------------------------
+# Text Metrics (utils/text_metrics.py)
+# -----------------------------------------------------------------------------
+# Per-process LRU bounds for memoized string widths and text-fit results
+TEXT_METRICS_CACHE_SIZE = int(os.environ.get("TEXT_METRICS_CACHE_SIZE", "4096"))
+
+# -----------------------------------------------------------------------------
+# Property Photo Variants (services/photo_variants.py)
+# -----------------------------------------------------------------------------
+# Responsive widths derived after upload (never upscaled past the original)
+PHOTO_VARIANT_WIDTHS = [int(w) for w in get_env_str("PHOTO_VARIANT_WIDTHS", default="480,960,1600").split(",") if w.strip()]
+# Output formats; the property page uses webp srcsets ("webp,avif" adds AVIF <source> elements)
+PHOTO_VARIANT_FORMATS = [f.strip().lower() for f in get_env_str("PHOTO_VARIANT_FORMATS", default="webp").split(",") if f.strip()]
+PHOTO_VARIANT_QUALITY = int(os.environ.get("PHOTO_VARIANT_QUALITY", "80"))
+
+# -----------------------------------------------------------------------------
+# Expired Property Cleanup (services/cleanup.py)
+# -----------------------------------------------------------------------------
+# Properties deleted per DB transaction (storage keys go out in S3 batches of 1000)
+CLEANUP_BATCH_SIZE = int(os.environ.get("CLEANUP_BATCH_SIZE", "200"))
+# Threads unlinking files in parallel on the local storage backend
+CLEANUP_DELETE_WORKERS = int(os.environ.get("CLEANUP_DELETE_WORKERS", "8"))
+# Stop after this many seconds and resume from the saved cursor next run (0 = no limit)
+CLEANUP_TIME_BUDGET_SECONDS = int(os.environ.get("CLEANUP_TIME_BUDGET_SECONDS", "300"))
+
+# -----------------------------------------------------------------------------
+# Bulk SmartSign Provisioning (services/smartsign_batches.py)
+# -----------------------------------------------------------------------------
+# Largest batch one request may provision
+SMARTSIGN_BATCH_MAX_QUANTITY = int(os.environ.get("SMARTSIGN_BATCH_MAX_QUANTITY", "1000"))
+# Processes rendering sign PDFs for one batch (0 = render in the job's own process)
+SMARTSIGN_BATCH_RENDER_WORKERS = int(os.environ.get("SMARTSIGN_BATCH_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Imposition sheet (inches, WxH) and gap between signs on it
+SMARTSIGN_SHEET_SIZE = get_env_str("SMARTSIGN_SHEET_SIZE", default="48x96")
+SMARTSIGN_SHEET_GUTTER_IN = float(os.environ.get("SMARTSIGN_SHEET_GUTTER_IN", "0.25"))
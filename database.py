@@ -1,46 +1,295 @@
 import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import DictCursor
 from flask import g, current_app
+
+import config
+from config import IS_PRODUCTION, IS_STAGING
 from utils.redaction import redact_database_url
 
-def get_db():
-    if 'db' not in g:
-        db_url = os.environ.get("DATABASE_URL")
-        if not db_url:
-            raise RuntimeError("DATABASE_URL is required for Postgres connection.")
-
-        if db_url.startswith("postgres://"):
-            db_url = db_url.replace("postgres://", "postgresql://", 1)
-
-        if not db_url.startswith("postgresql://"):
-            redacted = redact_database_url(db_url)
-            raise ValueError(
-                "Only Postgres is supported. DATABASE_URL must start with postgresql:// "
-                f"(got {redacted})."
-            )
+logger = logging.getLogger(__name__)
+
+
+def _database_url():
+    db_url = os.environ.get("DATABASE_URL")
+    if not db_url:
+        raise RuntimeError("DATABASE_URL is required for Postgres connection.")
+
+    if db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql://", 1)
+
+    if not db_url.startswith("postgresql://"):
+        redacted = redact_database_url(db_url)
+        raise ValueError(
+            "Only Postgres is supported. DATABASE_URL must start with postgresql:// "
+            f"(got {redacted})."
+        )
+    return db_url
+
+
+class PoolExhausted(RuntimeError):
+    """No pooled connection became available within DB_POOL_TIMEOUT."""
+
+
+# Connections inherited across fork(). Never closed in the child: closing would
+# terminate the parent's session on the shared socket. Held here so GC doesn't either.
+_inherited_connections = []
+
+
+class ConnectionPool:
+    """
+    Per-process pool of psycopg2 connections.
+
+    - Checkout: LIFO reuse; connections past DB_POOL_RECYCLE_SECONDS are replaced,
+      and ones idle longer than DB_POOL_PING_AFTER_IDLE are pinged with SELECT 1.
+    - Return: any open transaction is rolled back and autocommit is reset;
+      broken connections are discarded.
+    - Exhaustion: callers wait up to `timeout`, then PoolExhausted is raised.
+      Waits, wait time and timeouts are counted in stats().
+    - Fork-safe: a child process starts with an empty pool.
+    """
+
+    def __init__(self, dsn, max_size=10, timeout=10.0, recycle_seconds=1800, ping_after_idle=5.0):
+        self.dsn = dsn
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.recycle_seconds = recycle_seconds
+        self.ping_after_idle = ping_after_idle
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = []        # [(conn, last_used)]
+        self._created = {}     # id(conn) -> created_at
+        self._size = 0         # open + being opened
+        self._in_use = 0
+        self._stats = {
+            "checkouts": 0,
+            "connects": 0,
+            "discarded": 0,
+            "health_check_failures": 0,
+            "peak_in_use": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+        }
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            _inherited_connections.extend(conn for conn, _ in self._idle)
+            self._reset()
+
+    # ------------------------------------------------------------ checkout
+
+    def getconn(self):
+        self._check_pid()
+        wait_started = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                if wait_started is None:
+                    wait_started = time.monotonic()
+                    self._stats["waits"] += 1
+                remaining = self.timeout - (time.monotonic() - wait_started)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    self._stats["wait_seconds"] += time.monotonic() - wait_started
+                    logger.warning(
+                        f"[DB] Pool exhausted: {self._in_use}/{self.max_size} connections in use "
+                        f"after waiting {self.timeout}s"
+                    )
+                    raise PoolExhausted(f"No database connection available within {self.timeout}s")
+                self._cond.wait(remaining)
+            if wait_started is not None:
+                self._stats["wait_seconds"] += time.monotonic() - wait_started
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._in_use)
 
         try:
-            conn = psycopg2.connect(db_url, cursor_factory=DictCursor)
-            g.db = PostgresDB(conn)
+            if conn is not None and not self._healthy(conn, last_used):
+                self._close(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, cursor_factory=DictCursor)
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+            self._stats["connects"] += 1
+        return conn
+
+    def _healthy(self, conn, last_used):
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        if now - self._created.get(id(conn), now) > self.recycle_seconds:
+            return False
+        if now - last_used <= self.ping_after_idle:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
         except Exception as e:
-            logger.error(
-                "[DB] Connection Failed (%s) while connecting to %s",
-                type(e).__name__,
-                redact_database_url(db_url),
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            logger.warning(f"[DB] Discarding pooled connection that failed health check: {type(e).__name__}")
+            return False
+
+    # -------------------------------------------------------------- return
+
+    def putconn(self, conn):
+        if self._pid != os.getpid():
+            _inherited_connections.append(conn)
+            return
+
+        keep = not conn.closed
+        if keep:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except Exception:
+                keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+        if not keep:
+            self._close(conn)
+
+    def _close(self, conn):
+        with self._cond:
+            self._created.pop(id(conn), None)
+            self._stats["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def closeall(self):
+        """Close idle connections (process shutdown / tests). Checked-out ones are closed on return."""
+        self._check_pid()
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s.update(
+                max_size=self.max_size,
+                size=self._size,
+                in_use=self._in_use,
+                idle=len(self._idle),
             )
-            raise
+        s["wait_seconds"] = round(s["wait_seconds"], 3)
+        return s
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool for DATABASE_URL (None when DB_POOL_ENABLED is off)."""
+    global _pool
+    if not config.DB_POOL_ENABLED:
+        return None
+    db_url = _database_url()
+    pool = _pool
+    if pool is None or pool.dsn != db_url:
+        with _pool_lock:
+            if _pool is None or _pool.dsn != db_url:
+                _pool = ConnectionPool(
+                    db_url,
+                    max_size=config.DB_POOL_MAX_SIZE,
+                    timeout=config.DB_POOL_TIMEOUT,
+                    recycle_seconds=config.DB_POOL_RECYCLE_SECONDS,
+                    ping_after_idle=config.DB_POOL_PING_AFTER_IDLE,
+                )
+            pool = _pool
+    return pool
+
+
+def pool_stats():
+    pool = _pool
+    return pool.stats() if pool is not None else None
+
+
+def _open():
+    db_url = _database_url()
+    pool = get_pool()
+    try:
+        if pool is not None:
+            return PostgresDB(pool.getconn(), pool=pool)
+        return PostgresDB(psycopg2.connect(db_url, cursor_factory=DictCursor))
+    except PoolExhausted:
+        raise
+    except Exception as e:
+        logger.error(
+            "[DB] Connection Failed (%s) while connecting to %s",
+            type(e).__name__,
+            redact_database_url(db_url),
+        )
+        raise
+
+
+def get_db():
+    if 'db' not in g:
+        g.db = _open()
     return g.db
 
+
 def close_connection(exception=None):
     db = g.pop('db', None)
     if db is not None:
         db.close()
 
-import logging
-from config import IS_PRODUCTION, IS_STAGING
 
-logger = logging.getLogger(__name__)
+@contextmanager
+def connection():
+    """
+    Pooled PostgresDB outside a Flask request (worker threads, CLI scripts).
+    Returned to the pool on exit; uncommitted work is rolled back.
+    """
+    db = _open()
+    try:
+        yield db
+    finally:
+        db.close()
+
 
 class PostgresDB:
     """
@@ -48,8 +297,9 @@ class PostgresDB:
     Passes SQL through to psycopg2 without modification.
     Expects %s placeholders.
     """
-    def __init__(self, conn):
+    def __init__(self, conn, pool=None):
         self._conn = conn
+        self._pool = pool
 
     def execute(self, sql, params=None):
         cur = self._conn.cursor()
@@ -71,11 +321,18 @@ class PostgresDB:
         self._conn.rollback()
 
     def close(self):
-        self._conn.close()
+        """Return the connection to the pool (or close it when unpooled). Idempotent."""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self._pool is not None:
+            self._pool.putconn(conn)
+        else:
+            conn.close()
 
     def cursor(self):
         return self._conn.cursor()
-    
+
     # Intentionally omitted: lastrowid (Use RETURNING id + fetchone)
     # Intentionally omitted: total_changes (Use explicit commit)
 
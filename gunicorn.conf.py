@@ -18,3 +18,16 @@ loglevel = "info"
 
 # Timeout
 timeout = 120
+
+
+def worker_exit(server, worker):
+    # Drain buffered analytics rows (qr_scans / property_views / app_events)
+    from services.ingest import shutdown
+    shutdown()
+
+    # Close this worker's pooled DB connections
+    from database import get_pool
+    pool = get_pool()
+    if pool is not None:
+        server.log.info(f"[DB] Pool stats at worker exit: {pool.stats()}")
+        pool.closeall()
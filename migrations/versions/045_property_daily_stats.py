@@ -0,0 +1,79 @@
+"""property_daily_stats rollup for per-property analytics
+
+Revision ID: 045
+Revises: 044
+Create Date: 2026-10-16 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "045"
+down_revision = "044"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # No FK to properties: app_events may reference deleted properties and the
+    # rollup is written in the same statement as the raw insert. Rows are
+    # removed explicitly by services.properties.delete_property_fully.
+    op.create_table(
+        "property_daily_stats",
+        sa.Column("property_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("scans", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("views", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("leads", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("ctas", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_scan_at", sa.DateTime(), nullable=True),
+        sa.Column("last_view_at", sa.DateTime(), nullable=True),
+        sa.Column("last_lead_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("property_id", "day", name="pk_property_daily_stats"),
+    )
+
+    # Backfill from raw history
+    op.execute(
+        """
+        WITH s AS (
+                 SELECT property_id, DATE(scanned_at) AS day, COUNT(*) AS scans, MAX(scanned_at) AS last_scan_at
+                 FROM qr_scans WHERE property_id IS NOT NULL GROUP BY 1, 2
+             ),
+             v AS (
+                 SELECT property_id, DATE(viewed_at) AS day,
+                        COUNT(*) FILTER (WHERE is_internal = 0) AS views, MAX(viewed_at) AS last_view_at
+                 FROM property_views WHERE property_id IS NOT NULL GROUP BY 1, 2
+             ),
+             l AS (
+                 SELECT property_id, DATE(created_at) AS day, COUNT(*) AS leads, MAX(created_at) AS last_lead_at
+                 FROM leads WHERE property_id IS NOT NULL GROUP BY 1, 2
+             ),
+             c AS (
+                 SELECT property_id, DATE(occurred_at) AS day, COUNT(*) AS ctas
+                 FROM app_events WHERE property_id IS NOT NULL AND event_type = 'cta_click' GROUP BY 1, 2
+             ),
+             k AS (
+                 SELECT property_id, day FROM s
+                 UNION SELECT property_id, day FROM v
+                 UNION SELECT property_id, day FROM l
+                 UNION SELECT property_id, day FROM c
+             )
+        INSERT INTO property_daily_stats
+            (property_id, day, scans, views, leads, ctas, last_scan_at, last_view_at, last_lead_at)
+        SELECT k.property_id, k.day,
+               COALESCE(s.scans, 0), COALESCE(v.views, 0), COALESCE(l.leads, 0), COALESCE(c.ctas, 0),
+               s.last_scan_at, v.last_view_at, l.last_lead_at
+        FROM k
+        LEFT JOIN s USING (property_id, day)
+        LEFT JOIN v USING (property_id, day)
+        LEFT JOIN l USING (property_id, day)
+        LEFT JOIN c USING (property_id, day)
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("property_daily_stats")
@@ -0,0 +1,36 @@
+"""render_cache index for content-addressed sign/preview renders
+
+Revision ID: 046
+Revises: 045
+Create Date: 2026-10-16 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "046"
+down_revision = "045"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "render_cache",
+        sa.Column("digest", sa.String(64), primary_key=True),
+        sa.Column("kind", sa.String(32), nullable=False),
+        sa.Column("storage_key", sa.Text(), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("hits", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("last_hit_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+    # LRU / age eviction scans
+    op.create_index("ix_render_cache_last_hit_at", "render_cache", ["last_hit_at"])
+
+
+def downgrade():
+    op.drop_index("ix_render_cache_last_hit_at", table_name="render_cache")
+    op.drop_table("render_cache")
@@ -0,0 +1,33 @@
+"""property_photos: responsive WebP/AVIF variants and LQIP placeholder
+
+Revision ID: 047
+Revises: 046
+Create Date: 2026-10-16 14:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "047"
+down_revision = "046"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # [{"width": 480, "format": "webp", "key": "..."}, ...]; NULL until generated
+    op.add_column("property_photos", sa.Column("variants", postgresql.JSONB(), nullable=True))
+    # Tiny blurred data: URI shown while the real image loads
+    op.add_column("property_photos", sa.Column("lqip", sa.Text(), nullable=True))
+    op.add_column("property_photos", sa.Column("width", sa.Integer(), nullable=True))
+    op.add_column("property_photos", sa.Column("height", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("property_photos", "height")
+    op.drop_column("property_photos", "width")
+    op.drop_column("property_photos", "lqip")
+    op.drop_column("property_photos", "variants")
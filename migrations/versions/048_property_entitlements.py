@@ -0,0 +1,70 @@
+"""property_entitlements: persisted paid/expiry projection per property
+
+Revision ID: 048
+Revises: 047
+Create Date: 2026-10-16 16:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "048"
+down_revision = "047"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "property_entitlements",
+        sa.Column("property_id", sa.Integer(),
+                  sa.ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("is_paid", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+        # 'subscription' | 'listing_unlock' | 'sign_order' | NULL
+        sa.Column("paid_via", sa.String(32), nullable=True),
+        sa.Column("paid_source_order_id", sa.Integer(), nullable=True),
+        # Mirror of properties.expires_at (same type)
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("max_photos", sa.Integer(), nullable=False, server_default=sa.text("1")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+    # Derivation probes paid orders per property
+    op.create_index("ix_orders_property_id", "orders", ["property_id"])
+
+    # Backfill with the same derivation services.property_entitlements.refresh() uses
+    op.execute("""
+        INSERT INTO property_entitlements
+            (property_id, is_paid, paid_via, paid_source_order_id, expires_at, max_photos)
+        SELECT d.property_id, d.is_paid, d.paid_via, d.paid_source_order_id, d.expires_at,
+               CASE WHEN d.is_paid THEN 50 ELSE 1 END
+        FROM (
+            SELECT p.id AS property_id, p.expires_at,
+                   (sub.active OR o.id IS NOT NULL) AS is_paid,
+                   CASE WHEN sub.active THEN 'subscription'
+                        WHEN o.id IS NULL THEN NULL
+                        WHEN o.order_type = 'listing_unlock' THEN 'listing_unlock'
+                        ELSE 'sign_order' END AS paid_via,
+                   CASE WHEN sub.active THEN NULL ELSE o.id END AS paid_source_order_id
+            FROM properties p
+            LEFT JOIN agents a ON p.agent_id = a.id
+            LEFT JOIN users u ON a.user_id = u.id
+            CROSS JOIN LATERAL (
+                SELECT COALESCE(LOWER(u.subscription_status) IN ('active', 'trialing'), FALSE) AS active
+            ) sub
+            LEFT JOIN LATERAL (
+                SELECT id, order_type FROM orders
+                WHERE property_id = p.id
+                  AND status IN ('paid', 'submitted_to_printer', 'fulfilled', 'print_failed')
+                  AND order_type IN ('listing_unlock', 'sign', 'smart_sign')
+                ORDER BY created_at DESC
+                LIMIT 1
+            ) o ON TRUE
+        ) d
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_orders_property_id", table_name="orders")
+    op.drop_table("property_entitlements")
@@ -0,0 +1,46 @@
+"""cleanup_runs: resumable cursor and progress counters for expired-property cleanup
+
+Revision ID: 049
+Revises: 048
+Create Date: 2026-10-16 18:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "049"
+down_revision = "048"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cleanup_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        # NULL while the run is incomplete; the next invocation resumes it
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        # Highest property id already processed (candidates are walked in id order)
+        sa.Column("cursor_property_id", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("batches", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("scanned", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("deleted", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("healed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("storage_keys", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("storage_failed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    # Expired-candidate scan
+    op.create_index(
+        "ix_properties_expires_at", "properties", ["expires_at"],
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_properties_expires_at", table_name="properties")
+    op.drop_table("cleanup_runs")
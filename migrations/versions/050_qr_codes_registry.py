@@ -0,0 +1,43 @@
+"""qr_codes: single registry of every allocated QR code
+
+Revision ID: 050
+Revises: 049
+Create Date: 2026-10-16 20:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "050"
+down_revision = "049"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "qr_codes",
+        # Primary key = the unique index allocation races resolve against
+        sa.Column("code", sa.Text(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+
+    # Backfill every namespace, plus codes held by SmartSign orders not yet activated
+    op.execute("""
+        INSERT INTO qr_codes (code)
+        SELECT code FROM sign_assets WHERE code IS NOT NULL
+        UNION
+        SELECT qr_code FROM properties WHERE qr_code IS NOT NULL
+        UNION
+        SELECT code FROM qr_variants WHERE code IS NOT NULL
+        UNION
+        SELECT design_payload->>'code' FROM orders
+        WHERE jsonb_typeof(design_payload) = 'object' AND design_payload->>'code' IS NOT NULL
+        ON CONFLICT (code) DO NOTHING
+    """)
+
+
+def downgrade():
+    op.drop_table("qr_codes")
@@ -0,0 +1,54 @@
+"""smartsign_batches: bulk SmartSign provisioning progress
+
+Revision ID: 051
+Revises: 050
+Create Date: 2026-10-16 22:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "051"
+down_revision = "050"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "smartsign_batches",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("print_size", sa.String(16), nullable=False),
+        sa.Column("layout_id", sa.String(64), nullable=False),
+        # queued -> rendering -> imposing -> submitted | failed
+        sa.Column("status", sa.String(16), nullable=False, server_default=sa.text("'queued'")),
+        sa.Column("rendered", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("sheets", sa.Integer(), nullable=True),
+        sa.Column("sheet_pdf_key", sa.Text(), nullable=True),
+        sa.Column("print_job_id", sa.String(64), nullable=True),
+        sa.Column("shipping_json", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("now()")),
+    )
+    op.create_index("ix_smartsign_batches_user_id", "smartsign_batches", ["user_id"])
+
+    op.add_column(
+        "sign_assets",
+        sa.Column("batch_id", sa.Integer(), sa.ForeignKey("smartsign_batches.id", ondelete="SET NULL"), nullable=True),
+    )
+    op.create_index(
+        "ix_sign_assets_batch_id", "sign_assets", ["batch_id"],
+        postgresql_where=sa.text("batch_id IS NOT NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_sign_assets_batch_id", table_name="sign_assets")
+    op.drop_column("sign_assets", "batch_id")
+    op.drop_index("ix_smartsign_batches_user_id", table_name="smartsign_batches")
+    op.drop_table("smartsign_batches")
@@ -73,6 +73,7 @@ def _handle_profile_update(db, agent):
                 flash(f"Photo upload error: {str(e)}", "error")
                 return redirect(url_for("account.index"))
 
+    claim = None
     try:
         if agent:
             db.execute(
@@ -123,6 +124,9 @@ def _handle_profile_update(db, agent):
                     )
         
         db.commit()
+        if claim:
+            from services.qr_resolution import invalidate_user
+            invalidate_user(claim.get("refreshed_user_id"), db=db)
         flash("Profile updated successfully.", "success")
     except Exception as e:
         flash(f"Error updating profile: {str(e)}", "error")
@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, abort, jsonify
 from flask_login import login_required, current_user
-from database import get_db
+from database import get_db, pool_stats
 from services.fulfillment import fulfill_order
+from services.render_cache import stats as render_cache_stats
+from services.events import stats as events_stats
 from constants import (
     ORDER_STATUS_PAID, 
         ORDER_STATUS_SUBMITTED_TO_PRINTER,
@@ -109,7 +111,10 @@ def metrics():
     
     return render_template("admin_metrics.html", 
                          counts=counts, 
-                         daily_breakdown=daily_breakdown)
+                         daily_breakdown=daily_breakdown,
+                         db_pool=pool_stats(),
+                         render_cache=render_cache_stats(),
+                         events=events_stats())
 
 @admin_bp.route("/admin/cron/cleanup-expired", methods=["POST"])
 def cron_cleanup_expired():
@@ -132,8 +137,10 @@ def cron_cleanup_expired():
         
     # Execute Cleanup
     from services.cleanup import cleanup_expired_properties
+    from services.render_cache import evict as evict_render_cache
     try:
         deleted_count = cleanup_expired_properties()
-        return jsonify({"success": True, "deleted": deleted_count})
+        evicted = evict_render_cache()
+        return jsonify({"success": True, "deleted": deleted_count, "render_cache_evicted": evicted})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -20,11 +20,12 @@ from constants import (
 )
 from utils.qr_generator import generate_qr
 from utils.qr_urls import property_scan_url
-from services.printing.yard_sign import generate_yard_sign_pdf, generate_yard_sign_pdf_from_order_row
-from utils.uploads import save_image_upload
-from utils.pdf_preview import render_pdf_to_web_preview
+from services.order_previews import refresh_order_preview
+from utils.uploads import save_image_upload, save_image_uploads
 from utils.sign_options import normalize_sign_size, validate_sign_color
 from utils.storage import get_storage
+from services.photo_variants import enqueue as enqueue_photo_variants
+from services import property_entitlements
 from utils.agent_identity import (
     normalize_agent_email,
     get_agent_by_normalized_email,
@@ -124,6 +125,7 @@ def submit():
             snapshot_logo_key = logo_key
             can_update_agent = False
             agent_id = None
+            claim = None
 
             should_claim_for_verified_user = (
                 current_user.is_authenticated
@@ -257,22 +259,22 @@ def submit():
             from utils.qr_codes import generate_unique_code
             qr_code = generate_unique_code(db, length=12)
             cursor.execute("UPDATE properties SET qr_code=%s WHERE id=%s", (qr_code, property_id))
+            property_entitlements.refresh(db, [property_id])
 
+            new_photo_ids = []
             if "property_photos" in request.files:
-                photos = request.files.getlist("property_photos")
-                for photo in photos:
-                    if photo and photo.filename != "":
-                         try:
-                            # Re-use existing upload (abbreviated here, assume imports valid)
-                            base_name = f"property_{property_id}"
-                            safe_key = save_image_upload(photo, PROPERTY_PHOTOS_KEY_PREFIX, base_name, validate_image=True)
-                            cursor.execute("INSERT INTO property_photos (property_id, filename) VALUES (%s, %s)", (property_id, safe_key))
-                         except Exception as e:
-                            current_app.logger.exception(
-                                "[Agent Submit] Failed to save property photo for property_id=%s: %s",
-                                property_id,
-                                e,
-                            )
+                photos = [p for p in request.files.getlist("property_photos") if p and p.filename != ""]
+                # Streamed to storage concurrently; rows inserted in upload order
+                for upload in save_image_uploads(photos, PROPERTY_PHOTOS_KEY_PREFIX, f"property_{property_id}"):
+                    if upload.error:
+                        current_app.logger.error(
+                            "[Agent Submit] Failed to save property photo for property_id=%s: %s",
+                            property_id,
+                            upload.error,
+                        )
+                        continue
+                    cursor.execute("INSERT INTO property_photos (property_id, filename) VALUES (%s, %s) RETURNING id", (property_id, upload.key))
+                    new_photo_ids.append(cursor.fetchone()['id'])
 
             full_url = property_scan_url(PUBLIC_BASE_URL, qr_code)
             
@@ -292,6 +294,10 @@ def submit():
             mode = request.form.get("mode")
             if mode == 'property_only':
                 db.commit() # Ensure insertion is persisted
+                if claim:
+                    from services.qr_resolution import invalidate_user
+                    invalidate_user(claim.get("refreshed_user_id"), db=db)
+                enqueue_photo_variants(new_photo_ids)
                 current_app.logger.info(f"Property-only mode: Created Property {property_id}")
                 # Skip order creation, PDF generation, and checkout
                 flash("Property created successfully. Now assign your SmartSign.", "success")
@@ -336,25 +342,8 @@ def submit():
                 logo_filename=final_logo_key, # NEW: Persist logo to snapshot (migration 026)
             )
 
-            # Step 2: Generate PDF
-            # Unified Path: Fetch full order row from DB (ensure consistency)
-            order_row = db.execute("SELECT * FROM orders WHERE id = %s", (order_id,)).fetchone()
-            
-            # Use unified generator
-            pdf_key = generate_yard_sign_pdf_from_order_row(order_row, db=db)
-
-            # Step 3: Generate WebP preview (returns storage key)
-            preview_key = render_pdf_to_web_preview(
-                pdf_key,
-                order_id=order_id,
-                sign_size=sign_size,
-            )
-
-            # Step 4: Update order with PDF key, print_size, and preview_key
-            cursor.execute(
-                "UPDATE orders SET sign_pdf_path = %s, print_size = %s, preview_key = %s WHERE id = %s",
-                (pdf_key, sign_size, preview_key, order_id),
-            )
+            # Step 2: Fast preview; the print PDF is rendered by the async worker
+            refresh_order_preview(db, order_id)
 
             # Save guest token(s) to session
             if guest_token:
@@ -366,6 +355,10 @@ def submit():
 
             session["pending_order_id"] = order_id
             db.commit()
+            if claim:
+                from services.qr_resolution import invalidate_user
+                invalidate_user(claim.get("refreshed_user_id"), db=db)
+            enqueue_photo_variants(new_photo_ids)
 
             # Build authenticated preview URL
             preview_url = url_for("orders.order_preview", order_id=order_id)
@@ -297,9 +297,10 @@ def login():
             # But the logic below handles redirection if UNVERIFIED. 
             # We must only link if user.is_verified is True.
             
+            claim = None
             if user_obj.is_verified:
                 try:
-                    claim_agent_for_verified_user(
+                    claim = claim_agent_for_verified_user(
                         db,
                         user_obj.id,
                         user_obj.email,
@@ -310,6 +311,9 @@ def login():
                     flash(str(e), "error")
                     return redirect(url_for("auth.login", next=next_url))
             db.commit()
+            if claim:
+                from services.qr_resolution import invalidate_user
+                invalidate_user(claim.get("refreshed_user_id"), db=db)
             
             login_user(user_obj)
             
@@ -370,7 +374,7 @@ def verify_email():
         # Success: verify user, then claim matching agent identity in one transaction.
         db.execute("UPDATE users SET is_verified = %s, verification_code = NULL WHERE id = %s", (True, current_user.id))
         try:
-            claim_agent_for_verified_user(
+            claim = claim_agent_for_verified_user(
                 db,
                 current_user.id,
                 current_user.email,
@@ -382,6 +386,8 @@ def verify_email():
             return redirect(url_for("auth.verify_email"))
         
         db.commit()
+        from services.qr_resolution import invalidate_user
+        invalidate_user(claim.get("refreshed_user_id"), db=db)
         
         # Update session user
         current_user.is_verified = True
@@ -14,13 +14,19 @@ import secrets
 
 campaigns_bp = Blueprint('campaigns', __name__)
 
-def generate_variant_code():
-    """Generate unique code for QR variant.
+# Upper bound for one bulk variant request
+MAX_VARIANTS_PER_REQUEST = 50
+
+def generate_variant_code(count=None):
+    """Generate unique code for QR variant (or a list of `count` codes in one round trip).
     
-    Single source of truth: utils/qr_codes.generate_unique_code
+    Single source of truth: utils/qr_codes.generate_unique_code / allocate_codes
     """
-    from utils.qr_codes import generate_unique_code
-    return generate_unique_code(get_db(), length=8)
+    if count is None:
+        from utils.qr_codes import generate_unique_code
+        return generate_unique_code(get_db(), length=8)
+    from utils.qr_codes import allocate_codes
+    return allocate_codes(get_db(), count, length=8)
 
 @campaigns_bp.route("/dashboard/properties/<int:property_id>/campaigns")
 @login_required
@@ -106,13 +112,26 @@ def create_variant(property_id):
     
     if not label:
         return jsonify({"success": False, "error": "Label required"}), 400
+
+    try:
+        count = int(request.form.get("count") or 1)
+    except ValueError:
+        count = 0
+    if not 1 <= count <= MAX_VARIANTS_PER_REQUEST:
+        return jsonify({"success": False, "error": f"Count must be 1-{MAX_VARIANTS_PER_REQUEST}"}), 400
         
-    code = generate_variant_code()
+    if count == 1:
+        codes, labels = [generate_variant_code()], [label]
+    else:
+        # Bulk: numbered labels, codes reserved and rows inserted in one statement each
+        codes = generate_variant_code(count)
+        labels = [f"{label} {i}" for i in range(1, count + 1)]
     
     db.execute("""
         INSERT INTO qr_variants (property_id, campaign_id, code, label, created_at)
-        VALUES (%s, %s, %s, %s, %s)
-    """, (property_id, campaign_id if campaign_id else None, code, label, utc_iso()))
+        SELECT %s, %s, v.code, v.label, %s
+        FROM unnest(%s::text[], %s::text[]) AS v(code, label)
+    """, (property_id, campaign_id if campaign_id else None, utc_iso(), codes, labels))
     db.commit()
     
     return redirect(url_for('campaigns.list_campaigns', property_id=property_id))
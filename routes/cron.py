@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 import os
-from services.cleanup import cleanup_expired_properties
+from services.cleanup import run_cleanup
 
 cron_bp = Blueprint("cron", __name__, url_prefix="/cron")
 
@@ -16,7 +16,8 @@ def cleanup_expired():
         return jsonify({"success": False, "error": "unauthorized"}), 401
         
     try:
-        count = cleanup_expired_properties()
-        return jsonify({"success": True, "deleted": count})
+        # Bounded by CLEANUP_TIME_BUDGET_SECONDS; an unfinished run resumes next call
+        progress = run_cleanup()
+        return jsonify({"success": True, **progress})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -11,12 +11,14 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from flask_login import login_required, current_user
 from database import get_db
 from config import PROPERTY_PHOTOS_DIR, PROPERTY_PHOTOS_KEY_PREFIX
-from utils.uploads import save_image_upload
+from utils.uploads import save_image_uploads
 from utils.storage import get_storage
 from slugify import slugify
 from utils.qr_codes import generate_unique_code
 from utils.timestamps import utc_iso
 from services.gating import can_create_property
+from services.photo_variants import enqueue as enqueue_photo_variants, delete_variants
+from services import property_entitlements
 from constants import PAID_STATUSES
 from datetime import datetime, timezone, timedelta
 from services.subscriptions import is_subscription_active
@@ -47,7 +49,7 @@ def index():
     db = get_db()
 
     # --- Phase 5: Analytics Service Integration ---
-    from services.analytics import per_agent_rollup, per_property_metrics, get_agent_lead_timeseries
+    from services.analytics import per_agent_rollup, metrics_for_properties, get_agent_lead_timeseries
 
     # 1. Main Metrics Rollup
     metrics = per_agent_rollup(current_user.id)
@@ -159,8 +161,7 @@ def index():
             p.address,
             p.price,
             o.status,
-            o.created_at,
-            (SELECT COUNT(*) FROM qr_scans WHERE property_id = p.id) as scan_count
+            o.created_at
         FROM orders o
         JOIN properties p ON o.property_id = p.id
         WHERE o.user_id = %s 
@@ -175,9 +176,23 @@ def index():
     yard_signs = []
     yard_sign_map = set() # Set of property IDs with yard signs
 
+    # Batched: one gating query + one grouped scan count for all rows
+    from services.gating import gating_status_for_properties
+    yard_property_ids = list({row['id'] for row in yard_signs_raw})
+    gating_by_property = gating_status_for_properties(yard_property_ids)
+    scan_counts = {}
+    if yard_property_ids:
+        scan_counts = {
+            r['property_id']: r['scan_count'] for r in db.execute("""
+                SELECT property_id, SUM(scans) AS scan_count
+                FROM property_daily_stats
+                WHERE property_id = ANY(%s)
+                GROUP BY property_id
+            """, (yard_property_ids,)).fetchall()
+        }
+
     for row in yard_signs_raw:
-        from services.gating import get_property_gating_status
-        gating = get_property_gating_status(row['id'])
+        gating = gating_by_property[row['id']]
         
         if gating['is_expired'] and not gating['is_paid']:
             status_label = 'Expired'
@@ -195,7 +210,7 @@ def index():
             'order_id': row['order_id'],
             'address': row['address'],
             'price': row['price'],
-            'scan_count': row['scan_count'] or 0,
+            'scan_count': scan_counts.get(row['id']) or 0,
             'status_label': status_label,
             'status_color': status_color,
         })
@@ -221,8 +236,10 @@ def index():
             (agent_ids_param,)
         ).fetchall()
 
+        metrics_by_property = metrics_for_properties([p['id'] for p in properties], ranges=(7,))
+
         for p in properties:
-            pm = per_property_metrics(p['id'], range_days=7)
+            pm = metrics_by_property[p['id']][7]
             
             # Determine Sign Type
             sign_types = []
@@ -605,7 +622,7 @@ def edit_property(property_id):
         delete_photos = request.form.getlist("delete_photos")
         for photo_id in delete_photos:
             photo = db.execute(
-                "SELECT filename FROM property_photos WHERE id = %s AND property_id = %s", 
+                "SELECT filename, variants FROM property_photos WHERE id = %s AND property_id = %s", 
                 (photo_id, property_id)
             ).fetchone()
             if photo:
@@ -613,9 +630,11 @@ def edit_property(property_id):
                     storage.delete(photo['filename'])
                 except Exception:
                     pass
+                delete_variants(photo['variants'], storage)
                 db.execute("DELETE FROM property_photos WHERE id = %s", (photo_id,))
 
         # Handle New Photo Uploads
+        new_photo_ids = []
         if 'property_photos' in request.files:
             photos = request.files.getlist('property_photos')
             valid_photos = [p for p in photos if p and p.filename != '']
@@ -635,24 +654,27 @@ def edit_property(property_id):
                         flash(f"Free Tier Limit: You can only have {gating['max_photos']} photo(s). Upgrade for unlimited.", "error")
                         valid_photos = []
 
-                for photo in valid_photos:
-                    try:
-                        base_name = f"property_{property_id}"
-                        safe_key = save_image_upload(
-                            photo,
-                            PROPERTY_PHOTOS_KEY_PREFIX,
-                            base_name,
-                            validate_image=True
-                        )
-                        db.execute(
-                            "INSERT INTO property_photos (property_id, filename) VALUES (%s, %s)", 
-                            (property_id, safe_key)
-                        )
-                    except ValueError as e:
-                        flash(f"Image upload failed: {str(e)}", "error")
+                # Streamed to storage concurrently; rows inserted in upload order
+                uploads = save_image_uploads(valid_photos, PROPERTY_PHOTOS_KEY_PREFIX, f"property_{property_id}")
+                for upload in uploads:
+                    if isinstance(upload.error, ValueError):
+                        flash(f"Image upload failed: {str(upload.error)}", "error")
                         continue
+                    if upload.error:
+                        # Nothing from this submission is recorded: remove what already reached storage
+                        failed = storage.delete_many([u.key for u in uploads if u.key])
+                        if failed:
+                            current_app.logger.warning(f"[Edit Property] Could not remove {len(failed)} orphaned uploads")
+                        raise upload.error
+                    new_photo_ids.append(db.execute(
+                        "INSERT INTO property_photos (property_id, filename) VALUES (%s, %s) RETURNING id", 
+                        (property_id, upload.key)
+                    ).fetchone()['id'])
 
         db.commit()
+        enqueue_photo_variants(new_photo_ids)
+        from services.qr_resolution import invalidate_property
+        invalidate_property(property_id, db=db)
         flash("Property updated successfully.", "success")
         return redirect(url_for('dashboard.index'))
     # GET request - fetch photos for display
@@ -671,7 +693,7 @@ def property_analytics(property_id):
     Detailed analytics page for a single property.
     """
     db = get_db()
-    from services.analytics import per_property_metrics
+    from services.analytics import metrics_for_properties
     from flask import abort
     
     # Verify ownership
@@ -683,7 +705,7 @@ def property_analytics(property_id):
     if not property_row:
         return abort(404)
         
-    metrics = per_property_metrics(property_id, range_days=7)
+    metrics = metrics_for_properties([property_id], ranges=(7,))[property_id][7]
     
     return render_template("dashboard/property_analytics.html", property=property_row, analytics=metrics)
 
@@ -696,7 +718,7 @@ def today():
     # - Momentum (>50% Scan Growth)
     # - High Intent (CTA but no Lead)
     db = get_db()
-    from services.analytics import per_property_metrics
+    from services.analytics import metrics_for_properties
     
     agent_id = db.execute("SELECT id FROM agents WHERE user_id = %s", (current_user.id,)).fetchone()
     if not agent_id:
@@ -705,9 +727,10 @@ def today():
     properties = db.execute("SELECT id, address, slug FROM properties WHERE agent_id = %s", (agent_id['id'],)).fetchall()
     
     cards = []
+    metrics_by_property = metrics_for_properties([p['id'] for p in properties], ranges=(7,))
     
     for p in properties:
-        pm = per_property_metrics(p['id'], range_days=7)
+        pm = metrics_by_property[p['id']][7]
         
         # 1. Zero Scans
         if pm['scans']['total'] == 0:
@@ -847,6 +870,7 @@ def new_property():
 
         # Fetch Agent ID
         agent = db.execute("SELECT id FROM agents WHERE user_id = %s", (current_user.id,)).fetchone()
+        claim = None
         if not agent:
             email_norm = normalize_agent_email(current_user.email)
             if bool(getattr(current_user, "is_verified", False)):
@@ -917,8 +941,10 @@ def new_property():
         
         code = generate_unique_code(db, length=12)
         cursor.execute("UPDATE properties SET qr_code=%s WHERE id=%s", (code, pid))
+        property_entitlements.refresh(db, [pid])
 
         # Handle Photo Uploads
+        new_photo_ids = []
         if 'property_photos' in request.files:
             photos = request.files.getlist('property_photos')
             valid_photos = [p for p in photos if p and p.filename != '']
@@ -930,24 +956,22 @@ def new_property():
                     flash(f"Limit reached: You can only upload {max_photos} photo(s). Upgrade for more.", "warning")
                     valid_photos = valid_photos[:max_photos]
 
-                for photo in valid_photos:
-                    try:
-                        base_name = f"property_{pid}"
-                        safe_key = save_image_upload(
-                            photo,
-                            PROPERTY_PHOTOS_KEY_PREFIX,
-                            base_name,
-                            validate_image=True
-                        )
-                        cursor.execute(
-                            "INSERT INTO property_photos (property_id, filename) VALUES (%s, %s)", 
-                            (pid, safe_key)
-                        )
-                    except Exception as e:
-                        current_app.logger.error(f"Error saving photo: {e}")
+                for upload in save_image_uploads(valid_photos, PROPERTY_PHOTOS_KEY_PREFIX, f"property_{pid}"):
+                    if upload.error:
+                        current_app.logger.error(f"Error saving photo: {upload.error}")
                         # Continue saving others
+                        continue
+                    cursor.execute(
+                        "INSERT INTO property_photos (property_id, filename) VALUES (%s, %s) RETURNING id", 
+                        (pid, upload.key)
+                    )
+                    new_photo_ids.append(cursor.fetchone()['id'])
 
         db.commit()
+        if claim:
+            from services.qr_resolution import invalidate_user
+            invalidate_user(claim.get("refreshed_user_id"), db=db)
+        enqueue_photo_variants(new_photo_ids)
         
         flash("Property created successfully.", "success")
         
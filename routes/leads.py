@@ -21,6 +21,7 @@ CSRF Configuration:
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, current_app
 from database import get_db
+from services.daily_stats import record_lead as record_lead_stats
 from utils.timestamps import minutes_ago, utc_now
 
 leads_bp = Blueprint('leads', __name__)
@@ -205,6 +206,7 @@ def submit_lead():
              sign_asset_id, lead_source)
         )
         lead_id = cursor.fetchone()['id']
+        record_lead_stats(cursor, lead_id)
         
         # --- Audit Log: Create notification record ---
         from utils.timestamps import utc_iso
@@ -1,12 +1,12 @@
 
-from flask import Blueprint, request, jsonify, send_file, current_app, redirect, url_for
+from flask import Blueprint, request, jsonify, current_app, redirect, url_for
 from flask_login import login_required, current_user
 from database import get_db
 from models import User
 from services.listing_kits import create_or_get_kit, generate_kit
 from services.stripe_checkout import create_checkout_attempt
 from config import STRIPE_PRICE_LISTING_KIT
-from utils.storage import get_storage
+from utils.storage import send_stored_file
 
 listing_kits_bp = Blueprint('listing_kits', __name__)
 
@@ -181,20 +181,13 @@ def download_kit(kit_id):
     if not kit['kit_zip_path']:
         return jsonify({"error": "Kit not ready"}), 400
         
-    storage = get_storage()
-    # Stream file
-    # utils.storage abstraction usually has .get_file(key), returning BytesIO.
-    
-    file_bytes = storage.get_file(kit['kit_zip_path'])
-    if not file_bytes:
+    # Stream file (Range-capable; S3 redirects to a presigned URL)
+    try:
+        return send_stored_file(
+            kit['kit_zip_path'],
+            download_name=f"listing_kit_{kit['property_id']}.zip",
+            as_attachment=True,
+            mimetype="application/zip"
+        )
+    except FileNotFoundError:
         return jsonify({"error": "File missing"}), 404
-    
-    # Ensure pointer is at start
-    file_bytes.seek(0)
-    
-    return send_file(
-        file_bytes,
-        download_name=f"listing_kit_{kit['property_id']}.zip",
-        as_attachment=True,
-        mimetype="application/zip"
-    )
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, abort, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, abort
 from flask_login import login_required, current_user
 import stripe
 import logging
@@ -20,7 +20,7 @@ def order_preview(order_id):
     """
     from services.order_access import get_order_for_request
     from database import get_db
-    from utils.storage import get_storage
+    from utils.storage import get_storage, send_stored_file
     from utils.filenames import make_sign_asset_basename
     from constants import LAYOUT_VERSION, DEFAULT_SIGN_SIZE
 
@@ -43,8 +43,8 @@ def order_preview(order_id):
 
     if preview_key:
         try:
-            file_data = storage.get_file(preview_key)
-            return send_file(file_data, mimetype='image/webp')
+            if storage.exists(preview_key):
+                return send_stored_file(preview_key, mimetype='image/webp', storage=storage)
         except Exception:
             pass # Fallback to deterministic
             
@@ -57,8 +57,7 @@ def order_preview(order_id):
     preview_key = f"previews/order_{order_id}/{basename}.webp"
     
     try:
-        file_data = storage.get_file(preview_key)
-        return send_file(file_data, mimetype='image/webp')
+        return send_stored_file(preview_key, mimetype='image/webp', storage=storage)
     except Exception as e:
         logger.warning(f"Preview not found for order {order_id}: {preview_key} - {e}")
         abort(404)
@@ -86,14 +85,15 @@ def select_property_for_sign():
         return redirect(url_for('agent.submit'))
     
     # Attach gating status for UI (expired/unpaid labels)
-    from services.gating import get_property_gating_status
+    from services.gating import gating_status_for_properties
     enriched_properties = []
+    gating_by_property = gating_status_for_properties([prop['id'] for prop in properties])
     
     # Convert Row objects to dicts to allow modification
     # Or just wrap them. Since Row objects might be read-only or rigid, it's safer to create a wrapper list.
     for prop in properties:
         p_dict = dict(prop)
-        gating = get_property_gating_status(p_dict['id'])
+        gating = gating_by_property[p_dict['id']]
         p_dict['gating'] = gating
         enriched_properties.append(p_dict)
         
@@ -162,8 +162,7 @@ def resize_order():
     Guest Supported.
     """
     from database import get_db
-    from services.printing.yard_sign import generate_yard_sign_pdf_from_order_row
-    from utils.pdf_preview import render_pdf_to_web_preview
+    from services.order_previews import refresh_order_preview
     from constants import SIGN_SIZES
     from services.order_access import get_order_for_request
     
@@ -202,49 +201,8 @@ def resize_order():
         """, (normalized_size, normalized_size, order_id))
         db.commit()
         
-        # Load full order row as dict for the unified generator
-        order_row = db.execute("SELECT * FROM orders WHERE id = %s", (order_id,)).fetchone()
-        if not order_row:
-            return jsonify({'success': False, 'error': 'order_not_found'}), 404
-        
-        # Convert to dict if needed
-        if hasattr(order_row, '_asdict'):
-            order_row = order_row._asdict()
-        elif not isinstance(order_row, dict):
-            order_row = dict(order_row)
-        
-        # For yard signs, we generate immediately (if we have data)
-        # But usually we wait for webhook. However, if we want preview?
-        # Preview logic is separate. This route is for re-generation? 
-        # Actually this route seems to be "fulfill_pdf"?
-        pdf_key = generate_yard_sign_pdf_from_order_row(order_row, db=db)
-        
-        # Regenerate preview (Returns Key)
-        preview_key = render_pdf_to_web_preview(
-            pdf_key=pdf_key,
-            order_id=order_id,
-            sign_size=normalized_size,
-        )
-        
-        # Update DB with new keys
-        try:
-             db.execute("""
-                UPDATE orders 
-                SET sign_pdf_path = %s,
-                    preview_key = %s,
-                    updated_at = NOW()
-                WHERE id = %s
-            """, (pdf_key, preview_key, order_id))
-        except Exception as e:
-            # Fallback for schema lag
-             db.execute("""
-                UPDATE orders 
-                SET sign_pdf_path = %s,
-                    updated_at = NOW()
-                WHERE id = %s
-            """, (pdf_key, order_id))
-            
-        db.commit()
+        # Fast screen-resolution preview; the print PDF is rendered by the async worker
+        refresh_order_preview(db, order_id)
         
         # Build preview URL with guest token if needed
         preview_args = {'order_id': order_id}
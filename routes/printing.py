@@ -1,7 +1,7 @@
 import os
-from flask import Blueprint, request, jsonify, current_app, url_for, send_file
+from flask import Blueprint, request, jsonify, current_app, url_for
 from database import get_db
-from utils.storage import get_storage
+from utils.storage import get_storage, send_stored_file
 import secrets
 from constants import ORDER_STATUS_FULFILLED
 
@@ -59,10 +59,9 @@ def download_job_pdf(job_id):
         return jsonify({"error": "PDF file missing"}), 404
         
     try:
-        # Stream file from storage
-        file_bytes = storage.get_file(job['filename'])
-        return send_file(
-            file_bytes,
+        # Stream from disk / redirect to S3 instead of buffering in the worker
+        return send_stored_file(
+            job['filename'],
             mimetype="application/pdf",
             as_attachment=True,
             download_name=f"print_job_{job_id}.pdf"
@@ -168,6 +167,15 @@ def claim_jobs():
                     "sides": om['sides'],
                     "layout_id": om['layout_id']
                 })
+
+        # Imposed SmartSign batch sheets have no order: metadata comes from the batch
+        batch_job_ids = [r['job_id'] for r in results if r['order_id'] is None]
+        if batch_job_ids:
+            from services.smartsign_batches import print_metadata
+            batch_meta = print_metadata(db, batch_job_ids)
+            for r in results:
+                if r['job_id'] in batch_meta:
+                    r.update(batch_meta[r['job_id']])
         
     return jsonify({"jobs": results})
 
@@ -243,13 +251,16 @@ def mark_printed(job_id):
         )
 
     # 3. Only mark the order fulfilled when ALL jobs are printed
-    remaining = db.execute(
-        "SELECT COUNT(*) AS remaining FROM print_jobs WHERE order_id = %s AND status != 'printed'",
-        (order_id,)
-    ).fetchone()["remaining"]
+    #    (SmartSign batch sheets have no order to fulfil)
+    remaining = 0
+    if order_id is not None:
+        remaining = db.execute(
+            "SELECT COUNT(*) AS remaining FROM print_jobs WHERE order_id = %s AND status != 'printed'",
+            (order_id,)
+        ).fetchone()["remaining"]
 
     order_fulfilled = False
-    if remaining == 0:
+    if order_id is not None and remaining == 0:
         db.execute(
             "UPDATE orders SET status = %s, fulfilled_at = CURRENT_TIMESTAMP WHERE id = %s",
             (ORDER_STATUS_FULFILLED, order_id)
@@ -56,23 +56,34 @@ def generate_qr_code() -> str:
 def qr_scan_redirect(code):
     """
     QR scan entrypoint - logs scan and redirects to property page.
-    Supports both:
-    1. QR Variants (from qr_variants table)
-    2. Legacy Property Shortcodes (fallback)
+    Supports:
+    1. SmartSign assets (sign_assets)
+    2. QR Variants (from qr_variants table)
+    3. Legacy Property Shortcodes (fallback)
+
+    Code -> destination resolution is cached (services.qr_resolution).
     """
-    db = get_db()
-    
-    # 0. Check SmartSigns (Phase 1 MVP)
-    from services.smart_signs import SmartSignsService
-    asset, asset_property_row = SmartSignsService.resolve_asset(code)
+    # Resolve via cache (warm scans do no reads before the insert)
+    from services.qr_resolution import resolve_code, KIND_SIGN_ASSET
+    entry = resolve_code(code)
+
+    if not entry:
+        abort(404)
 
-    if asset:
+    sign_asset_id = entry['sign_asset_id']
+    variant_id = entry['variant_id']
+    campaign_id = entry['campaign_id']
+    property_id = entry['property_id']
+    property_row = entry['property']
+
+    if entry['kind'] == KIND_SIGN_ASSET:
+        asset = entry['asset']
         # SmartSign Found - Check activation status (Option B)
-        if asset['activated_at'] is None:
+        if not asset['activated']:
             # Not activated - must purchase SmartSign to activate
             return render_template("sign_asset_not_activated.html", asset=asset)
-        
-        if not asset_property_row:
+
+        if not property_row:
             # Unassigned -> Log scan via app_events and Render Unassigned Page
             # Using app_events (Option 2) avoids qr_scans.property_id NOT NULL constraint
             try:
@@ -89,72 +100,15 @@ def qr_scan_redirect(code):
             except Exception as e:
                 import logging
                 logging.getLogger(__name__).error(f"[Analytics] Error logging unassigned SmartSign scan: {e}", exc_info=True)
-            
+
             return render_template("sign_asset_unassigned.html", asset=asset)
-        
-        # Assigned -> Proceed to setup redirect
-        property_id = asset_property_row['id']
-        property_row = asset_property_row
-        
-        # Explicit sign_asset_id for logging
-        sign_asset_id = asset['id']
-        
-        # Pre-fill variant/campaign as None (mutually exclusive with SmartSigns for now)
-        campaign_id = None
-        variant_id = None
-        
-    else:
-        # Fallback: Legacy Logic
-        sign_asset_id = None # Not a SmartSign
 
-        # 1. Check QR Variants first (Phase 2)
-        variant = db.execute("""
-            SELECT v.id as variant_id, v.property_id, v.campaign_id, c.name as campaign_name
-            FROM qr_variants v
-            LEFT JOIN campaigns c ON v.campaign_id = c.id
-            WHERE v.code = %s
-        """, (code,)).fetchone()
-        
-        property_id = None
-        campaign_id = None
-        variant_id = None
-        
-        if variant:
-            # Found a variant
-            property_id = variant['property_id']
-            campaign_id = variant['campaign_id']
-            variant_id = variant['variant_id']
-            
-            # Fetch property details needed for redirect and gating check
-            property_row = db.execute(
-                """SELECT p.*, a.name as agent_name, a.brokerage 
-                   FROM properties p
-                   JOIN agents a ON p.agent_id = a.id
-                   WHERE p.id = %s""", 
-                (property_id,)
-            ).fetchone()
-            
-        else:
-            # Fallback to Legacy Property Code
-            property_row = db.execute(
-                """SELECT p.*, a.name as agent_name, a.brokerage, a.email as agent_email, 
-                   a.phone as agent_phone, a.photo_filename as agent_photo
-                   FROM properties p
-                   JOIN agents a ON p.agent_id = a.id
-                   WHERE p.qr_code = %s""",
-                (code,)
-            ).fetchone()
-            
-            if property_row:
-                property_id = property_row['id']
-    
     if not property_row:
         abort(404)
-    
+
     # 2. Gating Check: Stop Counting Scans for Expired Listings
-    from services.gating import get_property_gating_status
-    gating = get_property_gating_status(property_id)
-    
+    gating = entry['gating']
+
     if gating['is_expired'] and not gating['is_paid']:
         # Return 410 Gone (do not insert scan)
         return render_template(
@@ -176,17 +130,21 @@ def qr_scan_redirect(code):
         
         # Privacy: Redact raw PII (P1.2)
         # We still compute hash for unique visitor counting.
+        # ip_address/user_agent are never stored.
         
-        db.execute(
-            """INSERT INTO qr_scans 
-               (property_id, ip_address, user_agent, utm_source, utm_medium, 
-                utm_campaign, referrer, visitor_hash, qr_variant_id, campaign_id, sign_asset_id) 
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-            (property_id, None, None, utm_source or None, 
-             utm_medium or None, utm_campaign or None, referrer or None, 
-             visitor_hash, variant_id, campaign_id, sign_asset_id)
+        from services.ingest import record
+        record(
+            'qr_scans',
+            property_id=property_id,
+            utm_source=utm_source or None,
+            utm_medium=utm_medium or None,
+            utm_campaign=utm_campaign or None,
+            referrer=referrer or None,
+            visitor_hash=visitor_hash,
+            qr_variant_id=variant_id,
+            campaign_id=campaign_id,
+            sign_asset_id=sign_asset_id,
         )
-        db.commit()
     except Exception as e:
         import logging
         logging.getLogger(__name__).error(f"[Analytics] Error logging QR scan: {e}", exc_info=True)
@@ -387,15 +345,15 @@ def property_page(slug):
         
         # 1. Legacy Logging (wrapped in its own try/except to prevent poisoning)
         try:
-            db.execute(
-                """INSERT INTO property_views 
-                   (property_id, ip_address, user_agent, referrer, is_internal, source) 
-                   VALUES (%s, %s, %s, %s, %s, %s)""",
-                (property_id, None, None, referrer or None, is_internal, source)
+            from services.ingest import record
+            record(
+                'property_views',
+                property_id=property_id,
+                referrer=referrer or None,
+                is_internal=is_internal,
+                source=source,
             )
-            db.commit()
         except Exception as db_err:
-            db.rollback()
             import logging
             logging.getLogger(__name__).exception(f"[Analytics] DB error logging page view: {db_err}")
         
@@ -438,15 +396,32 @@ def property_page(slug):
     photo_count_total = int(total_photos_row['c']) if total_photos_row and total_photos_row.get('c') is not None else 0
 
     photo_urls = []
+    photo_variants = []
     if gating.get('is_paid') and photo_count_total > 0:
         # Paid: we are allowed to generate URLs
         limit_clause = f"LIMIT {gating.get('max_photos', 50)}"
         photo_rows = db.execute(
-            f'SELECT filename FROM property_photos WHERE property_id = %s {limit_clause}',
+            f'SELECT filename, variants, lqip, width, height FROM property_photos WHERE property_id = %s {limit_clause}',
             (property_id,)
         ).fetchall()
-        from utils.template_helpers import get_storage_url
-        photo_urls = [get_storage_url(r['filename']) for r in photo_rows]
+        from utils.template_helpers import get_storage_urls
+        from services.photo_variants import srcset_entries
+        entries = srcset_entries(photo_rows)
+        avif_entries = srcset_entries(photo_rows, fmt='avif')
+        # One signing pass for originals and every variant
+        keys = [r['filename'] for r in photo_rows] + [
+            k for e in entries + avif_entries for k, _ in e['srcset_keys']
+        ]
+        signed = dict(zip(keys, get_storage_urls(keys)))
+        photo_urls = [signed[r['filename']] for r in photo_rows]
+        for entry, avif in zip(entries, avif_entries):
+            photo_variants.append({
+                'srcset': ", ".join(f"{signed[k]} {w}w" for k, w in entry['srcset_keys']),
+                'avif_srcset': ", ".join(f"{signed[k]} {w}w" for k, w in avif['srcset_keys']),
+                'lqip': entry['lqip'],
+                'width': entry['width'],
+                'height': entry['height'],
+            })
 
     # Property data for client-side JS (safe JSON injection in template)
     tier_state = 'paid' if gating.get('is_paid') else ('expired' if gating.get('is_expired') else 'free')
@@ -454,6 +429,8 @@ def property_page(slug):
         'id': property_id,
         'tier': tier_state,
         'photos': photo_urls,
+        'photoSrcsets': [v['srcset'] for v in photo_variants],
+        'photoAvifSrcsets': [v['avif_srcset'] for v in photo_variants],
         'photoCountTotal': photo_count_total,
         'agentName': property_row.get('agent_name')
     }
@@ -465,6 +442,7 @@ def property_page(slug):
         "property.html", 
         property=property_row, 
         photo_urls=photo_urls,
+        photo_variants=photo_variants,
         photo_count_total=photo_count_total,
         property_data=property_data,
         gating=gating,
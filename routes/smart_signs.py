@@ -1,4 +1,4 @@
-from flask import Blueprint, request, render_template, jsonify, flash, redirect, url_for, current_app, abort, send_file
+from flask import Blueprint, request, render_template, jsonify, flash, redirect, url_for, current_app, abort
 from flask_login import login_required, current_user
 import stripe
 import os
@@ -10,7 +10,7 @@ from models import User
 from database import get_db
 # Use subscriptions for entitlement checks
 from services.subscriptions import is_subscription_active
-from utils.storage import get_storage
+from utils.storage import get_storage, send_stored_file
 from services.events import track_event
 from services.pdf_smartsign import STYLE_MAP, CTA_MAP, generate_smartsign_pdf
 from utils.uploads import save_image_upload
@@ -21,7 +21,7 @@ smart_signs_bp = Blueprint('smart_signs', __name__, url_prefix='/smart-signs')
 # These are placeholder functions that tests may patch
 
 from utils.qr_codes import generate_unique_code
-from utils.pdf_preview import render_pdf_to_web_preview
+from services.order_previews import refresh_order_preview
 
 def create_checkout_attempt(*args, **kwargs):
     """Placeholder for test patching. Not used in production flow."""
@@ -221,12 +221,12 @@ def preview_smartsign(asset_id):
         current_host = request.url_root.rstrip('/')
         key = generate_smartsign_pdf(asset, order_id=None, override_base_url=current_host)
         
-        # Read back and serve
+        # Serve from storage without buffering
         storage = get_storage()
-        file_data = storage.get_file(key)
         
-        return send_file(
-            file_data,
+        return send_stored_file(
+            key,
+            storage=storage,
             mimetype='application/pdf',
             as_attachment=False,
             download_name='preview.pdf'
@@ -464,56 +464,9 @@ def create_smart_order():
     order_id = order_row['id']
     db.commit()
 
-    # 7. Generate PDF & Preview
+    # 7. Generate Preview (print PDF is rendered by the async worker)
     try:
-        # Construct asset-like dict for generator
-        # Generator expects: brand_name, phone, email, code, logo_key, etc.
-        # It uses _read which handles dicts.
-        
-        mock_asset = {
-            'code': asset_code,
-            'brand_name': payload.get('brand_name') or payload.get('agent_name'), # normalize
-            'agent_name': payload.get('agent_name'),  # Also pass as agent_name for V2 layouts
-            'phone': payload.get('phone') or payload.get('agent_phone'),
-            'agent_phone': payload.get('agent_phone'),
-            'email': payload.get('email') or payload.get('agent_email'),
-            'background_style': payload.get('background_style') or payload.get('banner_color_id'),
-            'cta_key': 'scan_for_details', # Default
-            'include_logo': bool(payload.get('logo_key') or payload.get('agent_logo_key')),
-            'logo_key': payload.get('logo_key') or payload.get('agent_logo_key'),
-            'include_headshot': bool(payload.get('headshot_key') or payload.get('agent_headshot_key')),
-            'headshot_key': payload.get('headshot_key') or payload.get('agent_headshot_key'),
-            'brokerage_name': payload.get('brokerage_name') or payload.get('brokerage'),
-            
-            # License fields (for V2 layouts)
-            'state': payload.get('state'),
-            'license_number': payload.get('license_number'),
-            'state': payload.get('state'),
-            'license_number': payload.get('license_number'),
-            'show_license_option': payload.get('show_license_option', 'auto'),
-            # 'show_license_number': payload.get('show_license_number'), # Legacy hidden
-            'license_label_override': payload.get('license_label_override'),
-            
-            # Context for New PDF Generator (Phase 2)
-            'layout_id': layout_id,
-            'print_size': size,
-            'banner_color_id': payload.get('banner_color_id')
-        }
-        
-        # Generate generic smart sign PDF
-        # TODO: Update generate_smartsign_pdf to support layout_id if needed
-        pdf_key = generate_smartsign_pdf(mock_asset, order_id=order_id, user_id=current_user.id)
-        
-        # Generate Preview
-        preview_key = render_pdf_to_web_preview(pdf_key, order_id=order_id, sign_size=size)
-        
-        # Update Order
-        db.execute(
-            "UPDATE orders SET sign_pdf_path=%s, preview_key=%s WHERE id=%s",
-            (pdf_key, preview_key, order_id)
-        )
-        db.commit()
-        
+        refresh_order_preview(db, order_id)
     except Exception as e:
         current_app.logger.error(f"Error generating preview for SmartSign order {order_id}: {e}")
         # flash("Warning: Preview generation failed, but order saved.", "warning")
@@ -634,3 +587,62 @@ def start_payment(order_id):
         current_app.logger.error(f"Stripe Error for Order {order_id}: {e}")
         flash("Payment initialization failed.", "error")
         return redirect(url_for('smart_signs.order_preview', order_id=order_id))
+
+
+# --- Bulk Provisioning (brokerage orders) ---
+
+@smart_signs_bp.route('/batches', methods=['POST'])
+@login_required
+def create_batch():
+    """
+    Provision N unactivated SmartSigns for an account and queue ONE imposed
+    print job. Admin only: brokerage orders are invoiced outside checkout.
+
+    JSON: {"user_id", "quantity", "label_prefix"?, "print_size"?, "layout_id"?,
+           "design"?: {sign_assets design fields}, "shipping"?: {...}}
+    """
+    if not current_user.is_admin:
+        abort(403)
+    from services.smartsign_batches import provision_batch
+
+    data = request.get_json(silent=True) or {}
+    try:
+        user_id = int(data.get('user_id'))
+        quantity = int(data.get('quantity'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'missing_params'}), 400
+
+    db = get_db()
+    if not db.execute("SELECT 1 FROM users WHERE id = %s", (user_id,)).fetchone():
+        return jsonify({'success': False, 'error': 'unknown_user'}), 404
+    try:
+        result = provision_batch(
+            db, user_id, quantity,
+            label_prefix=data.get('label_prefix'),
+            print_size=data.get('print_size'),
+            layout_id=data.get('layout_id'),
+            design=data.get('design'),
+            shipping=data.get('shipping'),
+        )
+    except ValueError as e:
+        db.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'batch_id': result['batch_id'],
+        'progress_url': url_for('smart_signs.batch_progress', batch_id=result['batch_id']),
+        'assets': result['assets'],
+    }), 201
+
+
+@smart_signs_bp.route('/batches/<int:batch_id>')
+@login_required
+def batch_progress(batch_id):
+    """Progress record of a bulk batch (polled by the dashboard)."""
+    from services.smartsign_batches import get_progress
+
+    progress = get_progress(get_db(), batch_id)
+    if not progress or (progress['user_id'] != current_user.id and not current_user.is_admin):
+        abort(404)
+    return jsonify(progress)
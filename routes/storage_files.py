@@ -2,7 +2,7 @@
 Storage Files Blueprint - Dev-only file serving for local storage.
 Only active when STORAGE_BACKEND == 'local' and APP_STAGE != 'production'.
 """
-from flask import Blueprint, abort, send_file
+from flask import Blueprint, abort
 from config import STORAGE_BACKEND, IS_PRODUCTION
 
 storage_files_bp = Blueprint('storage_files', __name__)
@@ -18,7 +18,7 @@ def serve_storage_file(key):
     if STORAGE_BACKEND != 'local' or IS_PRODUCTION:
         abort(404)
     
-    from utils.storage import get_storage
+    from utils.storage import get_storage, send_stored_file
     
     storage = get_storage()
     
@@ -26,16 +26,15 @@ def serve_storage_file(key):
         if not storage.exists(key):
             abort(404)
         
-        file_data = storage.get_file(key)
-        
         # Determine content type from extension
         import mimetypes
         content_type, _ = mimetypes.guess_type(key)
         if not content_type:
             content_type = 'application/octet-stream'
         
-        return send_file(
-            file_data,
+        return send_stored_file(
+            key,
+            storage=storage,
             mimetype=content_type,
             as_attachment=False
         )
@@ -14,6 +14,7 @@ from constants import (
     ORDER_STATUS_PENDING_PRODUCTION
 )
 from utils.qr_codes import generate_unique_code  # Exposed for test patching
+from services import property_entitlements
 
 webhook_bp = Blueprint('webhook', __name__)
 # stripe.api_key handled in app.py
@@ -195,7 +196,11 @@ def handle_subscription_checkout(db, session):
             subscription_end_date = %s 
         WHERE id = %s
     ''', (customer_id, subscription_id, status, end_date_iso, user_id))
+    property_entitlements.refresh_for_users(db, [user_id])
     db.commit()
+
+    from services.qr_resolution import invalidate_user
+    invalidate_user(user_id, db=db)
     
     # --- Track Event ---
     from services.events import track_event
@@ -242,24 +247,28 @@ def handle_invoice_paid(db, invoice):
 
     # Update User Status
     # Fallback to update by subscription_id if we have it recorded
-    updated = False
+    updated_user_ids = []
     if subscription_id:
         cursor = db.execute('''
             UPDATE users SET subscription_status = 'active', subscription_end_date = %s 
             WHERE stripe_subscription_id = %s
+            RETURNING id
         ''', (end_date_iso, subscription_id))
-        if cursor.rowcount > 0:
-            updated = True
+        updated_user_ids = [r['id'] for r in cursor.fetchall()]
+        if updated_user_ids:
             current_app.logger.info(f"[Webhook] Invoice paid: Updated via Subscription ID {subscription_id}")
 
-    if not updated:
+    if not updated_user_ids:
         # Fallback to customer_id
-        db.execute('''
+        cursor = db.execute('''
             UPDATE users SET subscription_status = 'active', subscription_end_date = %s 
             WHERE stripe_customer_id = %s
+            RETURNING id
         ''', (end_date_iso, customer_id))
+        updated_user_ids = [r['id'] for r in cursor.fetchall()]
         current_app.logger.info(f"[Webhook] Invoice paid: Updated via Customer ID {customer_id}")
     
+    property_entitlements.refresh_for_users(db, updated_user_ids)
     db.commit()
     
     # Unfreeze SmartSigns since invoice paid implies active status
@@ -283,16 +292,21 @@ def handle_subscription_updated(db, subscription):
         UPDATE users 
         SET subscription_status = %s, subscription_end_date = %s
         WHERE stripe_subscription_id = %s
+        RETURNING id
     ''', (status, end_date_iso, sub_id))
+    updated_user_ids = [r['id'] for r in cursor.fetchall()]
     
-    if cursor.rowcount == 0:
+    if not updated_user_ids:
         # Fallback to customer ID if subscription ID wasn't linked yet
-        db.execute('''
+        cursor = db.execute('''
             UPDATE users 
             SET subscription_status = %s, subscription_end_date = %s, stripe_subscription_id = %s
             WHERE stripe_customer_id = %s
+            RETURNING id
         ''', (status, end_date_iso, sub_id, customer_id))
+        updated_user_ids = [r['id'] for r in cursor.fetchall()]
     
+    property_entitlements.refresh_for_users(db, updated_user_ids)
     db.commit()
     
     # 2. Check for Freeze (if status changed to non-active)
@@ -313,10 +327,12 @@ def handle_subscription_deleted(db, subscription):
     customer_id = subscription.get('customer')
     current_app.logger.info(f"[Webhook] Subscription deleted: {sub_id}")
     
-    db.execute('''
+    cursor = db.execute('''
         UPDATE users SET subscription_status = 'canceled'
         WHERE stripe_subscription_id = %s OR stripe_customer_id = %s
+        RETURNING id
     ''', (sub_id, customer_id))
+    property_entitlements.refresh_for_users(db, [r['id'] for r in cursor.fetchall()])
     db.commit()
     
     # Freeze immediately
@@ -357,17 +373,21 @@ def _freeze_properties_for_customer(db, stripe_customer_id):
             SELECT property_id FROM orders 
             WHERE status IN ({placeholders}) 
             AND order_type IN ('sign', 'listing_unlock', 'smart_sign')
+            AND property_id IS NOT NULL
         )
+        RETURNING id
     '''
     
     # Params: [expires_at_val, stripe_cust_id, *PAID_STATUSES]
     params = [now_iso, stripe_customer_id] + list(PAID_STATUSES)
     
     cursor = db.execute(query, tuple(params))
+    frozen_ids = [r['id'] for r in cursor.fetchall()]
     
-    if cursor.rowcount > 0:
+    if frozen_ids:
+        property_entitlements.refresh(db, frozen_ids)
         db.commit()
-        current_app.logger.info(f"[Webhook] Frozen {cursor.rowcount} properties for customer {stripe_customer_id}")
+        current_app.logger.info(f"[Webhook] Frozen {len(frozen_ids)} properties for customer {stripe_customer_id}")
     else:
         current_app.logger.info(f"[Webhook] No properties needed freezing for customer {stripe_customer_id}")
 
@@ -394,3 +414,8 @@ def _set_sign_assets_frozen_for_customer(db, stripe_customer_id, frozen):
         current_app.logger.info(f"[Webhook] Updated {cursor.rowcount} SmartSigns (is_frozen={frozen}) for customer {stripe_customer_id}")
     else:
         current_app.logger.info(f"[Webhook] No SmartSigns found to update for customer {stripe_customer_id}")
+
+    # Every subscription path (invoice paid / updated / deleted) ends here after
+    # user status + property freeze are committed: drop cached scan resolutions.
+    from services.qr_resolution import invalidate_customer
+    invalidate_customer(stripe_customer_id, db=db)
@@ -6,6 +6,22 @@ Polls `async_jobs` table and executes tasks.
 Job Types:
 - 'fulfill_order': Generates Stripe/Pdf/Shipping data and submits to print provider.
 - 'generate_listing_kit': Generates ZIP assets for download.
+- 'render_smartsign_batch': Renders, imposes and queues the print job of a bulk SmartSign batch.
+
+Modes (ASYNC_WORKER_MODE):
+- 'pool' (default): jobs run concurrently. Render-heavy types (PROCESS_JOB_TYPES)
+  run in a process pool, everything else in a thread pool. Each type is capped
+  by ASYNC_WORKER_CONCURRENCY. A heartbeat thread keeps `locked_at` fresh for
+  running jobs so long renders are not reclaimed by the stale-lock rule.
+- 'serial': one job at a time in this process (debugging / tiny deployments).
+
+Idle workers block on LISTEN for enqueue notifications (JobListener), waking
+early for the next delayed retry (next_run_at) and at worst every
+ASYNC_WORKER_POLL_SECONDS.
+
+SIGTERM/SIGINT stop claiming and drain running jobs for up to
+ASYNC_WORKER_DRAIN_SECONDS; anything still running after that keeps its lock
+until it goes stale and is retried by the next worker.
 """
 import sys
 import time
@@ -13,12 +29,19 @@ import logging
 import traceback
 import signal
 import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 
 # Ensure project root is in path
 sys.path.append(os.getcwd())
 
+import config
 from app import create_app
-from services.async_jobs import claim_batch, mark_done, mark_failed
+from services.async_jobs import (
+    JobListener, claim_batch, heartbeat, mark_done, mark_failed, seconds_until_next_due,
+)
 from services.fulfillment import fulfill_order
 from services.listing_kits import create_or_get_kit, generate_kit
 from models import Order
@@ -31,21 +54,95 @@ logging.basicConfig(
 )
 logger = logging.getLogger("worker")
 
+# CPU-bound (PDF / image rendering): run in worker processes, not threads
+PROCESS_JOB_TYPES = {'fulfill_order', 'generate_listing_kit', 'photo_variants', 'render_print_pdf', 'render_smartsign_batch'}
+
 # Graceful Shutdown
-SHUTDOWN = False
+SHUTDOWN = threading.Event()
+_listener = None
 def handle_sigterm(signum, frame):
-    global SHUTDOWN
-    logger.info("Received SIGTERM. Finishing current batch...")
-    SHUTDOWN = True
+    logger.info("Received SIGTERM. Draining running jobs...")
+    SHUTDOWN.set()
+    if _listener is not None:
+        _listener.wakeup()
+
+
+def _handle_fulfill_order(payload):
+    order_id = payload.get('order_id')
+    if not order_id:
+        raise ValueError("Missing order_id in payload")
+
+    success = fulfill_order(order_id)
+    if not success:
+        raise RuntimeError("Fulfillment returned failure status")
+
+
+def _handle_generate_listing_kit(payload):
+    kit_id = payload.get('kit_id')
+    order_id = payload.get('order_id')
+
+    if kit_id:
+        # Direct generation request (e.g. from Dashboard)
+        logger.info(f"Generating Kit {kit_id} (Direct)")
+        generate_kit(kit_id)
+    elif order_id:
+        # Webhook trigger
+        logger.info(f"Generating Kit for Order {order_id} (Webhook)")
+        order = Order.get(order_id)
+        if not order:
+            raise ValueError(f"Order {order_id} not found")
+
+        # Idempotent create/get
+        kit = create_or_get_kit(order.user_id, order.property_id)
+        generate_kit(kit['id'])
+    else:
+         raise ValueError("Missing kit_id or order_id in payload")
+
+
+def _handle_photo_variants(payload):
+    photo_id = payload.get('photo_id')
+    if not photo_id:
+        raise ValueError("Missing photo_id in payload")
+
+    from services.photo_variants import generate_for_photo
+    if not generate_for_photo(photo_id):
+        logger.info(f"Photo {photo_id} no longer exists; skipping variants")
+
+
+def _handle_render_print_pdf(payload):
+    order_id = payload.get('order_id')
+    if not order_id:
+        raise ValueError("Missing order_id in payload")
+
+    from services.order_previews import render_print_pdf
+    if not render_print_pdf(order_id):
+        logger.info(f"Order {order_id} no longer exists; skipping print PDF")
+
+
+def _handle_render_smartsign_batch(payload):
+    batch_id = payload.get('batch_id')
+    if not batch_id:
+        raise ValueError("Missing batch_id in payload")
+
+    from services.smartsign_batches import render_batch
+    if not render_batch(batch_id):
+        logger.info(f"SmartSign batch {batch_id} no longer exists; skipping")
+
+
+JOB_HANDLERS = {
+    'fulfill_order': _handle_fulfill_order,
+    'generate_listing_kit': _handle_generate_listing_kit,
+    'photo_variants': _handle_photo_variants,
+    'render_print_pdf': _handle_render_print_pdf,
+    'render_smartsign_batch': _handle_render_smartsign_batch,
+}
 
-signal.signal(signal.SIGTERM, handle_sigterm)
-signal.signal(signal.SIGINT, handle_sigterm)
 
 def process_job(job):
     job_id = job['id']
     job_type = job['job_type']
     raw_payload = job['payload']
-    
+
     # Robust Payload Normalization (Blocker 3)
     import json
     if raw_payload is None:
@@ -65,72 +162,303 @@ def process_job(job):
         return
 
     logger.info(f"Processing Job {job_id}: {job_type}")
-    
+
     try:
-        if job_type == 'fulfill_order':
-            order_id = payload.get('order_id')
-            if not order_id:
-                raise ValueError("Missing order_id in payload")
-                
-            success = fulfill_order(order_id)
-            if not success:
-                raise RuntimeError("Fulfillment returned failure status")
-                
-        elif job_type == 'generate_listing_kit':
-            kit_id = payload.get('kit_id')
-            order_id = payload.get('order_id')
-            
-            if kit_id:
-                # Direct generation request (e.g. from Dashboard)
-                logger.info(f"Generating Kit {kit_id} (Direct)")
-                generate_kit(kit_id)
-            elif order_id:
-                # Webhook trigger
-                logger.info(f"Generating Kit for Order {order_id} (Webhook)")
-                order = Order.get(order_id)
-                if not order:
-                    raise ValueError(f"Order {order_id} not found")
-                
-                # Idempotent create/get
-                kit = create_or_get_kit(order.user_id, order.property_id)
-                generate_kit(kit['id'])
-            else:
-                 raise ValueError("Missing kit_id or order_id in payload")
-            
-        else:
+        handler = JOB_HANDLERS.get(job_type)
+        if handler is None:
             raise ValueError(f"Unknown job_type: {job_type}")
-            
+        handler(payload)
         mark_done(job_id)
-        
+
     except Exception as e:
         logger.error(f"Job {job_id} Failed: {e}")
         traceback.print_exc()
         mark_failed(job_id, error=str(e), can_retry=True)
 
-def run_worker():
-    app = create_app()
-    
-    with app.app_context():
-        logger.info("Worker Started. Polling for jobs...")
-        
-        while not SHUTDOWN:
+
+def parse_concurrency(raw):
+    """'generate_listing_kit=2,fulfill_order=1' -> {'generate_listing_kit': 2, 'fulfill_order': 1}"""
+    limits = {}
+    for part in (raw or "").split(","):
+        if not part.strip():
+            continue
+        job_type, _, value = part.partition("=")
+        try:
+            limit = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid concurrency entry: {part!r}")
+            continue
+        if limit > 0:
+            limits[job_type.strip()] = limit
+    return limits
+
+
+# --------------------------------------------------------------------------
+# Process-pool side (runs in child processes)
+# --------------------------------------------------------------------------
+
+_child_app = None
+
+def _init_child():
+    """Child initializer: own Flask app + DB pool; the parent handles signals and drains."""
+    global _child_app
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    _child_app = create_app()
+
+
+def _run_in_child(job):
+    with _child_app.app_context():
+        process_job(job)
+    # Children exit via os._exit (no atexit): push buffered analytics now
+    from services.ingest import flush as flush_ingest
+    flush_ingest()
+
+
+# --------------------------------------------------------------------------
+# Pool mode (parent)
+# --------------------------------------------------------------------------
+
+class JobPool:
+    """
+    Per-type bounded execution of claimed jobs on a process pool (render jobs)
+    and a thread pool (I/O jobs), with lease heartbeats for running jobs.
+    """
+
+    def __init__(self, app, limits, process_types=PROCESS_JOB_TYPES,
+                 heartbeat_seconds=60, mp_context=None, on_done=None):
+        self.app = app
+        self.on_done = on_done
+        self.limits = dict(limits)
+        self.process_types = set(process_types)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.mp_context = mp_context or multiprocessing.get_context("spawn")
+        self.inflight = {}  # future -> job
+        self._lock = threading.Lock()
+        self._stop_heartbeat = threading.Event()
+
+        self.process_slots = sum(n for t, n in self.limits.items() if t in self.process_types)
+        self.thread_slots = sum(n for t, n in self.limits.items() if t not in self.process_types)
+        self.processes = self._new_process_pool() if self.process_slots else None
+        self.threads = (
+            ThreadPoolExecutor(max_workers=self.thread_slots, thread_name_prefix="job")
+            if self.thread_slots else None
+        )
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+    def _new_process_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.process_slots,
+            mp_context=self.mp_context,
+            initializer=_init_child,
+        )
+
+    # ------------------------------------------------------------ claiming
+
+    def running(self, job_type):
+        with self._lock:
+            return sum(1 for job in self.inflight.values() if job['job_type'] == job_type)
+
+    def free_types(self):
+        return [job_type for job_type, limit in self.limits.items() if self.running(job_type) < limit]
+
+    def claim_and_submit(self):
+        """Claim up to the free slots of every job type. Returns the number of jobs started."""
+        started = 0
+        for job_type, limit in self.limits.items():
+            free = limit - self.running(job_type)
+            if free <= 0:
+                continue
+            with self.app.app_context():
+                jobs = claim_batch(job_types=[job_type], limit=free)
+            for job in jobs:
+                self.submit(job)
+                started += 1
+        return started
+
+    def submit(self, job):
+        if job['job_type'] in self.process_types:
+            future = self.processes.submit(_run_in_child, job)
+        else:
+            future = self.threads.submit(self._run_in_thread, job)
+        with self._lock:
+            self.inflight[future] = job
+        if self.on_done is not None:
+            future.add_done_callback(lambda _f: self.on_done())
+
+    def _run_in_thread(self, job):
+        with self.app.app_context():
+            process_job(job)
+
+    # ------------------------------------------------------------ completion
+
+    def wait(self, timeout):
+        """Block until a job finishes (or timeout), then reap finished jobs."""
+        with self._lock:
+            futures = list(self.inflight)
+        if futures:
+            wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+        else:
+            SHUTDOWN.wait(timeout)
+        self.reap()
+
+    def reap(self):
+        with self._lock:
+            done = [f for f in self.inflight if f.done()]
+            jobs = [(f, self.inflight.pop(f)) for f in done]
+
+        broken = False
+        for future, job in jobs:
+            error = future.exception()
+            if error is None:
+                continue
+            # process_job records its own failures; this is the executor itself failing
+            broken = broken or isinstance(error, BrokenProcessPool)
+            logger.error(f"Job {job['id']} crashed in executor: {error!r}")
+            with self.app.app_context():
+                mark_failed(job['id'], error=f"Worker crashed: {error!r}", can_retry=True)
+
+        if broken:
+            logger.warning("Process pool broken (child died). Recreating.")
+            self.processes.shutdown(wait=False, cancel_futures=True)
+            self.processes = self._new_process_pool()
+
+    def drain(self, timeout):
+        """Wait for running jobs (heartbeats continue meanwhile). Returns jobs still running."""
+        deadline = time.monotonic() + timeout
+        while self.inflight and time.monotonic() < deadline:
+            self.wait(min(1.0, max(0.0, deadline - time.monotonic())))
+        return list(self.inflight.values())
+
+    def shutdown(self):
+        self._stop_heartbeat.set()
+        for executor in (self.threads, self.processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------ heartbeat
+
+    def _heartbeat_loop(self):
+        while not self._stop_heartbeat.wait(self.heartbeat_seconds):
+            self.beat()
+
+    def beat(self):
+        with self._lock:
+            job_ids = [job['id'] for job in self.inflight.values()]
+        if not job_ids:
+            return 0
+        try:
+            with self.app.app_context():
+                return heartbeat(job_ids)
+        except Exception as e:
+            logger.error(f"Heartbeat failed for jobs {job_ids}: {e}")
+            return 0
+
+
+def idle_timeout(app, job_types):
+    """Sleep until the next delayed job is due, capped by the fallback poll interval."""
+    poll = config.ASYNC_WORKER_POLL_SECONDS
+    if not job_types:
+        return poll  # Every type is at its limit: a finishing job wakes us
+    try:
+        with app.app_context():
+            due = seconds_until_next_due(job_types)
+    except Exception as e:
+        logger.error(f"Scheduler query failed: {e}")
+        return poll
+    if due is None:
+        return poll
+    return max(0.1, min(poll, due))
+
+
+def run_pool(app):
+    global _listener
+    limits = parse_concurrency(config.ASYNC_WORKER_CONCURRENCY)
+    for job_type in JOB_HANDLERS:
+        limits.setdefault(job_type, 1)
+    logger.info(f"Worker Started (pool). Limits: {limits}")
+
+    _listener = JobListener(limits)
+    pool = JobPool(
+        app, limits,
+        heartbeat_seconds=config.ASYNC_WORKER_HEARTBEAT_SECONDS,
+        on_done=_listener.wakeup,
+    )
+    try:
+        while not SHUTDOWN.is_set():
             try:
-                # Claim jobs
-                jobs = claim_batch(limit=10)
-                
-                if not jobs:
-                    # Sleep if idle
-                    time.sleep(5)
-                    continue
-                
-                for job in jobs:
-                    if SHUTDOWN: break
-                    process_job(job)
-                    
+                pool.reap()
+                started = pool.claim_and_submit()
+                if not started:
+                    # Woken by NOTIFY, a finished job, a signal, or the scheduler timeout
+                    _listener.wait(idle_timeout(app, pool.free_types()))
             except Exception as e:
                 logger.error(f"Worker Loop Error: {e}")
-                time.sleep(5) # Brief pause on crash loop
-                
+                SHUTDOWN.wait(5)  # Brief pause on crash loop
+
+        remaining = pool.drain(config.ASYNC_WORKER_DRAIN_SECONDS)
+        if remaining:
+            logger.warning(
+                f"Drain timed out; {len(remaining)} job(s) still running "
+                f"({[job['id'] for job in remaining]}) will be reclaimed once their lock goes stale."
+            )
+    finally:
+        pool.shutdown()
+        _listener.close()
+
+
+def run_serial(app):
+    global _listener
+    logger.info("Worker Started (serial). Polling for jobs...")
+    _listener = JobListener(JOB_HANDLERS)
+
+    while not SHUTDOWN.is_set():
+        try:
+            # Each claim/job runs in its own app context so its pooled
+            # connection goes back to the pool instead of being pinned.
+            with app.app_context():
+                jobs = claim_batch(limit=10)
+
+            if not jobs:
+                # Sleep until NOTIFY / next delayed job / fallback poll
+                _listener.wait(idle_timeout(app, list(JOB_HANDLERS)))
+                continue
+
+            for job in jobs:
+                if SHUTDOWN.is_set():
+                    break
+                with app.app_context():
+                    process_job(job)
+
+        except Exception as e:
+            logger.error(f"Worker Loop Error: {e}")
+            SHUTDOWN.wait(5) # Brief pause on crash loop
+
+    _listener.close()
+
+
+def run_worker():
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    signal.signal(signal.SIGINT, handle_sigterm)
+
+    app = create_app()
+
+    with app.app_context():
+        if config.ASYNC_WORKER_MODE == "serial":
+            run_serial(app)
+        else:
+            run_pool(app)
+
+        # Drain any analytics rows buffered by jobs (track_event)
+        from services.ingest import shutdown as shutdown_ingest
+        shutdown_ingest()
+
+        from database import get_pool
+        pool = get_pool()
+        if pool is not None:
+            logger.info(f"DB pool stats: {pool.stats()}")
+            pool.closeall()
         logger.info("Worker Stopped.")
 
 if __name__ == "__main__":
@@ -139,5 +467,5 @@ if __name__ == "__main__":
     if wait_main() != 0:
         logger.critical("DB Not Reachable. Worker exiting.")
         sys.exit(1)
-        
+
     run_worker()
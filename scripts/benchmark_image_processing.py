@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Dev utility: logo processing benchmark.
+
+Compares utils.image_processing.process_transparency with the previous
+per-pixel implementation (getdata / putdata in Python) on representative
+logo sizes, and checks both produce identical pixels.
+
+Run from project root: python scripts/benchmark_image_processing.py [WxH ...]
+e.g. python scripts/benchmark_image_processing.py 512x512 2000x2000 4000x3000
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+# Path hack for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from utils.image_processing import process_transparency
+
+DEFAULT_SIZES = ["512x512", "1200x1200", "2000x2000", "4000x3000"]
+
+
+def legacy_process_transparency(image_data, threshold=30, remove_white=True):
+    """The per-pixel implementation this module replaced (for comparison only)."""
+    img = Image.open(io.BytesIO(image_data)).convert("RGBA")
+    new_data = []
+    limit = 255 - threshold
+    for item in img.getdata():
+        r, g, b = item[0], item[1], item[2]
+        if remove_white:
+            clear = r > limit and g > limit and b > limit
+        else:
+            clear = r < threshold and g < threshold and b < threshold
+        new_data.append((255, 255, 255, 0) if clear else item)
+    img.putdata(new_data)
+    bbox = img.getbbox()
+    if bbox:
+        img = img.crop(bbox)
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def sample_logo(width, height):
+    """White background with a coloured mark, anti-aliased text-ish edges and near-white noise."""
+    img = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((width * 0.2, height * 0.2, width * 0.8, height * 0.8), fill=(20, 60, 160))
+    draw.rectangle((width * 0.35, height * 0.45, width * 0.65, height * 0.55), fill=(240, 240, 240))
+    for i in range(0, width, max(1, width // 40)):
+        draw.line((i, 0, i, height // 10), fill=(230 + i % 25, 235, 250))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def measure(fn, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    sizes = sys.argv[1:] or DEFAULT_SIZES
+    print("=" * 72)
+    print("LOGO TRANSPARENCY BENCHMARK (legacy per-pixel vs band operations)")
+    print("=" * 72)
+    for spec in sizes:
+        width, height = (int(v) for v in spec.lower().split("x"))
+        data = sample_logo(width, height)
+        old, old_s, old_peak = measure(legacy_process_transparency, data)
+        new, new_s, new_peak = measure(process_transparency, data)
+        same = Image.open(io.BytesIO(old)).tobytes() == Image.open(io.BytesIO(new)).tobytes()
+        print(f"{spec:>10}  legacy {old_s:7.2f}s {old_peak / 2**20:7.1f} MiB  |  "
+              f"new {new_s:6.3f}s {new_peak / 2**20:6.1f} MiB  |  "
+              f"x{old_s / new_s:5.0f}  identical={same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Dev utility: QR engine micro-benchmark.
+
+Compares the shared QR engine (utils.qr_engine) with ReportLab's
+QrCodeWidget (the previous vector path) and the qrcode library's image
+drawing (the previous raster path).
+
+Run from project root: python scripts/benchmark_qr.py [iterations]
+"""
+import io
+import os
+import re
+import sys
+import time
+import zlib
+
+# Path hack for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode
+from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode.qr import QrCodeWidget
+from reportlab.graphics.shapes import Drawing
+from reportlab.pdfgen import canvas
+
+from utils import qr_engine
+
+URLS = [f"https://insitesigns.com/r/{code}" for code in ("a1B2c3D4", "Zz9Yy8Xx7", "qrbench01", "open-house-42")]
+
+
+def widget_draw(c, value, x, y, size):
+    qr = QrCodeWidget(value, barLevel="H")
+    bounds = qr.getBounds()
+    d = Drawing(size, size)
+    d.add(qr)
+    sx = size / (bounds[2] - bounds[0])
+    sy = size / (bounds[3] - bounds[1])
+    d.transform = [sx, 0, 0, sy, -bounds[0] * sx, -bounds[1] * sy]
+    renderPDF.draw(d, c, x, y)
+
+
+def engine_draw(c, value, x, y, size):
+    qr_engine.draw_pdf(c, value, x, y, size, ecc="H")
+
+
+def qrcode_png(value, size_px):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=1, border=4)
+    qr.add_data(value)
+    qr.make(fit=True)
+    qr.box_size = max(1, size_px // (qr.modules_count + 8))
+    return qr.make_image(fill_color="black", back_color="white").convert("RGB")
+
+
+def bench_pdf(draw, iterations):
+    """Two QR draws per page (front/back sign), one page per iteration."""
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(612, 792), pageCompression=0)
+    start = time.perf_counter()
+    for i in range(iterations):
+        value = URLS[i % len(URLS)]
+        draw(c, value, 100, 400, 288)
+        draw(c, value, 100, 50, 288)
+        c.showPage()
+    c.save()
+    elapsed = time.perf_counter() - start
+    content = buf.getvalue()
+    ops = len(re.findall(rb"\sre\s", content))
+    fills = len(re.findall(rb"\s(f\*?|B\*?)\s", content))
+    return elapsed, ops // (2 * iterations), fills // (2 * iterations), len(zlib.compress(content)) // iterations
+
+
+def bench_png(render, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        render(URLS[i % len(URLS)], 1024)
+    return time.perf_counter() - start
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print("=" * 60)
+    print(f"QR BENCHMARK - {iterations} iterations, {len(URLS)} distinct URLs")
+    print("=" * 60)
+
+    for label, draw in (("QrCodeWidget", widget_draw), ("qr_engine", engine_draw)):
+        elapsed, rects, fills, size = bench_pdf(draw, iterations)
+        print(f"PDF  {label:<14} {elapsed * 1000 / iterations:8.2f} ms/page  "
+              f"{rects:5d} rects/QR  {fills:4d} fills/QR  ~{size} B/page (deflated)")
+
+    for label, render in (("qrcode", qrcode_png), ("qr_engine", qr_engine.render_image)):
+        elapsed = bench_png(render, iterations)
+        print(f"PNG  {label:<14} {elapsed * 1000 / iterations:8.2f} ms/image (1024px)")
+
+    print(f"\nEncode cache: {qr_engine.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Dev utility: text-fit benchmark.
+
+Compares the previous linear searches (one stringWidth per point size, one
+full re-wrap per size) with utils.text_metrics on the yard sign gallery text,
+then times the whole gallery (scripts/render_yard_sign_gallery.py, PDFs only)
+with cold and warm text-metrics caches.
+
+Run from project root: python scripts/benchmark_text_fit.py [iterations]
+"""
+import os
+import sys
+import time
+
+# Allow running without DB config
+os.environ.setdefault("ALLOW_MISSING_DB", "1")
+
+# Path hack for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+import render_yard_sign_gallery as gallery
+import services.printing.layout_utils as lu
+from utils import text_metrics
+
+TEXT_FIELDS = ("address", "agent_name", "brokerage", "phone", "email", "cta", "price")
+WIDTHS = (180, 360, 720, 1100)
+
+
+def linear_fit(text, font_name, max_width, max_size, min_size):
+    """The previous fit_text_one_line / fit_font_size_single_line loop."""
+    size = max_size
+    while size >= min_size:
+        if stringWidth(text, font_name, size) <= max_width:
+            return size
+        size -= 1
+    return min_size
+
+
+def linear_wrapped(text, font_name, max_size, min_size, max_width, max_lines):
+    """The previous calculate_fitted_multiline wrapping loop."""
+    size = max_size
+    while size >= min_size:
+        lines, current = [], []
+        for word in text.split():
+            test_line = " ".join(current + [word])
+            if stringWidth(test_line, font_name, size) <= max_width:
+                current.append(word)
+            else:
+                if current:
+                    lines.append(" ".join(current))
+                current = [word]
+        if current:
+            lines.append(" ".join(current))
+        if len(lines) <= max_lines:
+            return size, lines
+        size -= 2
+    return None
+
+
+def cases():
+    for sample in gallery.SAMPLES:
+        for field in TEXT_FIELDS:
+            text = sample.get(field)
+            if not text:
+                continue
+            for font in (lu.FONT_BODY, lu.FONT_BOLD):
+                for width in WIDTHS:
+                    yield str(text), font, width
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lu.register_fonts()
+    items = list(cases())
+
+    def run_linear():
+        for text, font, width in items:
+            linear_fit(text, font, width, 160, 12)
+            linear_wrapped(text, font, 160, 12, width, 2)
+
+    def run_engine(cold):
+        def run():
+            if cold:
+                text_metrics.clear()
+            for text, font, width in items:
+                text_metrics.fit_size(text, font, width, 160, 12)
+                text_metrics.fit_wrapped(text, font, 160, 12, width, 2)
+        return run
+
+    # Same answers before timing anything
+    for text, font, width in items:
+        assert linear_fit(text, font, width, 160, 12) == text_metrics.fit_size(text, font, width, 160, 12)
+        expected = linear_wrapped(text, font, 160, 12, width, 2)
+        got = text_metrics.fit_wrapped(text, font, 160, 12, width, 2)
+        assert (expected is None and got is None) or (expected[0], tuple(expected[1])) == got
+
+    print(f"Fit cases: {len(items)} (single line + wrapped, 160pt..12pt)")
+    print(f"  linear search        {timed(run_linear, iterations) * 1000:8.2f} ms")
+    print(f"  engine, cold caches  {timed(run_engine(True), iterations) * 1000:8.2f} ms")
+    print(f"  engine, warm caches  {timed(run_engine(False), iterations) * 1000:8.2f} ms")
+
+    combos = [(layout_id, size, sample)
+              for layout_id in gallery.YARD_LAYOUTS
+              for size in gallery.YARD_SIZES
+              for sample in gallery.SAMPLES]
+
+    def render_gallery(cold):
+        def run():
+            if cold:
+                text_metrics.clear()
+            for layout_id, size, sample in combos:
+                gallery.render_yard_sign(layout_id, size, sample)
+        return run
+
+    passes = max(1, iterations // 5)
+    print(f"Yard sign gallery: {len(combos)} PDFs per pass, {passes} passes")
+    print(f"  cold caches          {timed(render_gallery(True), passes) * 1000:8.1f} ms/pass")
+    print(f"  warm caches          {timed(render_gallery(False), passes) * 1000:8.1f} ms/pass")
+    for name, info in text_metrics.stats().items():
+        print(f"  {name:<14} hits={info['hits']} misses={info['misses']} size={info['currsize']}/{info['maxsize']}")
+
+
+if __name__ == "__main__":
+    main()
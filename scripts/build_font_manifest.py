@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Build static/fonts/manifest.json (the PDF font registry).
+
+Run from project root after adding or replacing a font:
+    python scripts/build_font_manifest.py
+
+Only the faces listed in FONTS are registered for PDF rendering; other files
+in static/fonts (web fonts, unused weights) are ignored at runtime.
+"""
+import hashlib
+import json
+import os
+import sys
+
+# Path hack for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.printing.fonts import FONTS_DIR, MANIFEST_PATH
+
+# (registered name, file, role)
+FONTS = [
+    ("Inter-Regular", "Inter-Regular.ttf", "body"),
+    ("Inter-Medium", "Inter-Medium.ttf", "medium"),
+    ("Inter-Bold", "Inter-Bold.ttf", "bold"),
+    ("BodoniModa", "BodoniModa-VariableFont_opsz,wght.ttf", "serif"),
+    ("Allura", "Allura-Regular.ttf", "script"),
+]
+
+
+def build():
+    entries = []
+    for name, filename, role in FONTS:
+        path = os.path.join(FONTS_DIR, filename)
+        with open(path, "rb") as f:
+            data = f.read()
+        entries.append({
+            "name": name,
+            "file": filename,
+            "role": role,
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        })
+    return {"version": 1, "fonts": entries}
+
+
+def main():
+    manifest = build()
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"Wrote {MANIFEST_PATH} ({len(manifest['fonts'])} fonts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Diff property_entitlements against the current derivation.
+
+Consistency check for the entitlements projection (normally kept current by
+the paid-order, subscription webhook and freeze paths). Prints one line per
+drifted property; --fix re-derives those rows in one transaction.
+
+Exit status is 1 when drift was found and not fixed.
+
+Usage:
+    python scripts/check_property_entitlements.py [--fix] [--property ID ...]
+"""
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from database import get_db
+from services.property_entitlements import check_consistency
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff property_entitlements against the derivation.")
+    parser.add_argument("--fix", action="store_true", help="Re-derive drifted rows.")
+    parser.add_argument("--property", type=int, action="append", dest="property_ids", help="Limit to property id (repeatable).")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        diffs = check_consistency(db, property_ids=args.property_ids, fix=args.fix)
+        for diff in diffs:
+            print(f"property:{diff['property_id']} stored={diff['stored']} derived={diff['derived']}")
+        if args.fix:
+            db.commit()
+        print(f"drifted:{len(diffs)}{' fixed' if args.fix and diffs else ''}")
+    return 1 if diffs and not args.fix else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
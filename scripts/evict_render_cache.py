@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Evict stale entries from the sign/preview render cache.
+
+Drops entries not hit for --max-age-days and the least recently hit beyond
+--max-entries (defaults: RENDER_CACHE_MAX_AGE_DAYS / RENDER_CACHE_MAX_ENTRIES).
+Also run by /admin/cron/cleanup-expired.
+
+Usage:
+    python scripts/evict_render_cache.py [--max-age-days N] [--max-entries N] [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from services.render_cache import evict
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evict stale render cache entries.")
+    parser.add_argument("--max-age-days", type=int, default=None)
+    parser.add_argument("--max-entries", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be evicted.")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        count = evict(max_age_days=args.max_age_days, max_entries=args.max_entries, dry_run=args.dry_run)
+        mode = "dry-run" if args.dry_run else "evicted"
+        print(f"{mode}:{count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild property_daily_stats from the raw analytics tables.
+
+Reconciliation/backfill for the analytics rollup (normally kept current by the
+ingest path). Safe to re-run; matching rows are replaced in one transaction.
+
+Usage:
+    python scripts/rebuild_property_daily_stats.py [--days N] [--property ID ...]
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from database import get_db
+from services.daily_stats import rebuild
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild property_daily_stats from raw tables.")
+    parser.add_argument("--days", type=int, default=None, help="Only rebuild the last N days (default: all history).")
+    parser.add_argument("--property", type=int, action="append", dest="property_ids", help="Limit to property id (repeatable).")
+    args = parser.parse_args()
+
+    since = date.today() - timedelta(days=args.days - 1) if args.days else None
+
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        written = rebuild(db, property_ids=args.property_ids, since=since)
+        db.commit()
+        print(f"rebuilt:{written}")
+
+
+if __name__ == "__main__":
+    main()
@@ -65,7 +65,7 @@ def check_forbidden_files():
 
 def check_fonts():
     fonts_dir = "static/fonts"
-    required = ["Inter-Regular.ttf", "Inter-Medium.ttf", "Inter-Bold.ttf"]
+    required = ["Inter-Regular.ttf", "Inter-Medium.ttf", "Inter-Bold.ttf", "manifest.json"]
     missing = []
     for r in required:
         if not os.path.exists(os.path.join(fonts_dir, r)):
@@ -1,7 +1,8 @@
 #!/usr/bin/env python
 """
 Dev utility: Generate test PDFs for all sign sizes.
-Run from project root: python scripts/test_pdf_sizes.py
+Reports file size and embedded-font bytes (font programs as stored in the PDF).
+Run from project root: python scripts/verify_pdf_sizes.py
 """
 import os
 import sys
@@ -14,6 +15,8 @@ load_dotenv()
 
 from utils.pdf_generator import generate_pdf_sign
 from constants import SIGN_SIZES
+from services.printing.fonts import embedded_font_bytes
+from services.printing.layout_utils import register_fonts
 
 def main():
     print("=" * 60)
@@ -33,6 +36,7 @@ def main():
         "qr_path": "",  # Skip QR for quick test
     }
     
+    register_fonts()
     results = []
     for size in SIGN_SIZES.keys():
         print(f"\nGenerating {size}...")
@@ -42,20 +46,33 @@ def main():
                 sign_color="#1F6FEB",
                 sign_size=size
             )
-            file_size = os.path.getsize(path)
-            results.append((size, "✅ OK", path, file_size))
-            print(f"  Created: {path} ({file_size / 1024:.1f} KB)")
+            with open(path, "rb") as f:
+                pdf_bytes = f.read()
+            file_size = len(pdf_bytes)
+            fonts = embedded_font_bytes(pdf_bytes)
+            font_size = sum(fonts.values())
+            results.append((size, "✅ OK", path, file_size, font_size))
+            print(f"  Created: {path} ({file_size / 1024:.1f} KB, fonts {font_size / 1024:.1f} KB)")
+            for name, font_bytes in sorted(fonts.items()):
+                print(f"    {name}: {font_bytes / 1024:.1f} KB")
         except Exception as e:
-            results.append((size, "❌ FAILED", str(e), 0))
+            results.append((size, "❌ FAILED", str(e), 0, 0))
             print(f"  Error: {e}")
     
     print("\n" + "=" * 60)
     print("RESULTS:")
-    for size, status, path, file_size in results:
+    for size, status, path, file_size, font_size in results:
         if "OK" in status:
-            print(f"  {size}: {status} → {os.path.basename(path)}")
+            print(f"  {size}: {status} → {os.path.basename(path)} "
+                  f"({file_size / 1024:.1f} KB, fonts {font_size / 1024:.1f} KB)")
         else:
             print(f"  {size}: {status} → {path}")
+    ok = [r for r in results if "OK" in r[1]]
+    if ok:
+        total = sum(r[3] for r in ok)
+        fonts_total = sum(r[4] for r in ok)
+        print(f"\n  Total: {total / 1024:.1f} KB, embedded fonts {fonts_total / 1024:.1f} KB "
+              f"({100 * fonts_total / max(total, 1):.0f}%)")
     print("=" * 60)
     print("\nOpen the PDFs to visually verify layout scales correctly.")
 
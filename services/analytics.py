@@ -10,48 +10,96 @@ Aggregates data from:
 - app_events (Intent/CTA)
 
 Key Functions:
-- per_property_metrics(property_id, range_days)
+- per_property_metrics(property_id, range_days)  (reads property_daily_stats, see services.daily_stats)
+- metrics_for_properties(property_ids, ranges)  (batch form for list pages)
 - per_agent_rollup(user_id, range_days)
 """
 from datetime import datetime
 from database import get_db
 from utils.timestamps import minutes_ago, utc_now
 
-def per_property_metrics(property_id: int, range_days: int = 7, compare_days: int = 7) -> dict:
+def per_property_metrics(property_id: int, range_days: int = 7, compare_days: int = 7, source: str = "rollup") -> dict:
     """
     Get aggregated metrics for a single property with WoW comparison.
+
+    source="rollup" (default): reads property_daily_stats. Windows are whole
+        days: current = last `range_days` days including today,
+        previous = the `compare_days` days before that.
+    source="raw": rolling-interval COUNT/MAX scans of the raw tables.
+        Reconciliation only; see services.daily_stats.rebuild().
+
+    For lists of properties use metrics_for_properties().
     """
-    db = get_db()
-    
-    # helper for intervals
-    def get_count(table, date_col, pid, days_offset=0, days_span=7, extra_where=""):
-        # standard postgres interval syntax
-        query = f"""
-            SELECT COUNT(*) FROM {table} 
-            WHERE property_id = %s 
-            AND {date_col} >= NOW() - INTERVAL '{days_offset + days_span} days'
-            AND {date_col} < NOW() - INTERVAL '{days_offset} days'
-            {extra_where}
-        """
-        return db.execute(query, (pid,)).fetchone()[0]
+    if source == "raw":
+        counts = _raw_property_counts(get_db(), property_id, range_days, compare_days)
+        return _build_property_metrics(counts, range_days)
+    return metrics_for_properties([property_id], [range_days], compare_days)[property_id][range_days]
 
-    # 1. Scans (Physical)
-    scans_curr = get_count('qr_scans', 'scanned_at', property_id, 0, range_days)
-    scans_prev = get_count('qr_scans', 'scanned_at', property_id, range_days, compare_days)
-    
-    # 2. Views (Digital)
-    # Exclude internal views for purity? Usually yes, property_views has is_internal column
-    views_curr = get_count('property_views', 'viewed_at', property_id, 0, range_days, "AND is_internal = 0")
-    views_prev = get_count('property_views', 'viewed_at', property_id, range_days, compare_days, "AND is_internal = 0")
-    
-    # 3. Leads (Conversion)
-    leads_curr = get_count('leads', 'created_at', property_id, 0, range_days)
-    leads_prev = get_count('leads', 'created_at', property_id, range_days, compare_days)
-    
-    # 4. Contact Intents (CTA Clicks)
-    # app_events table, event_type = 'cta_click'
-    cta_curr = get_count('app_events', 'occurred_at', property_id, 0, range_days, "AND event_type = 'cta_click'")
-    cta_prev = get_count('app_events', 'occurred_at', property_id, range_days, compare_days, "AND event_type = 'cta_click'")
+
+def metrics_for_properties(property_ids, ranges=(7,), compare_days=None) -> dict:
+    """
+    Batch per_property_metrics: one grouped query over property_daily_stats
+    for any number of properties and windows.
+
+    ranges: window sizes in days, e.g. (7, 30)
+    compare_days: previous-window size (default: same as each range)
+
+    Returns:
+        {property_id: {range_days: <per_property_metrics() dict>}}
+    """
+    ids = list(dict.fromkeys(property_ids))
+    ranges = list(dict.fromkeys(ranges))
+    if not ids or not ranges:
+        return {pid: {} for pid in ids}
+
+    params = {"ids": ids}
+    select = []
+    for r in ranges:
+        rc = r + (compare_days if compare_days is not None else r)
+        params[f"r{r}"] = r
+        params[f"rc{r}"] = rc
+        for col in ("scans", "views", "leads", "ctas"):
+            select.append(f"COALESCE(SUM({col}) FILTER (WHERE day > CURRENT_DATE - %(r{r})s), 0) AS {col}_curr_{r}")
+            select.append(
+                f"COALESCE(SUM({col}) FILTER (WHERE day <= CURRENT_DATE - %(r{r})s "
+                f"AND day > CURRENT_DATE - %(rc{r})s), 0) AS {col}_prev_{r}"
+            )
+
+    # A property has at most one row per active day, so one pass covers every
+    # window and the lifetime last-activity maxima.
+    rows = get_db().execute(f"""
+        SELECT property_id,
+            {', '.join(select)},
+            MAX(last_scan_at) AS last_scan,
+            MAX(last_view_at) AS last_view,
+            MAX(last_lead_at) AS last_lead
+        FROM property_daily_stats
+        WHERE property_id = ANY(%(ids)s)
+        GROUP BY property_id
+    """, params).fetchall()
+    by_property = {row['property_id']: row for row in rows}
+
+    result = {}
+    for pid in ids:
+        row = by_property.get(pid)
+        result[pid] = {}
+        for r in ranges:
+            counts = {"last_scan": None, "last_view": None, "last_lead": None}
+            for col in ("scans", "views", "leads", "ctas"):
+                counts[f"{col}_curr"] = row[f"{col}_curr_{r}"] if row else 0
+                counts[f"{col}_prev"] = row[f"{col}_prev_{r}"] if row else 0
+            if row:
+                counts.update(last_scan=row['last_scan'], last_view=row['last_view'], last_lead=row['last_lead'])
+            result[pid][r] = _build_property_metrics(counts, r)
+    return result
+
+
+def _build_property_metrics(c: dict, range_days: int) -> dict:
+    scans_curr, scans_prev = c["scans_curr"], c["scans_prev"]
+    views_curr, views_prev = c["views_curr"], c["views_prev"]
+    leads_curr, leads_prev = c["leads_curr"], c["leads_prev"]
+    cta_curr, cta_prev = c["ctas_curr"], c["ctas_prev"]
+    last_scan, last_view, last_lead = c["last_scan"], c["last_view"], c["last_lead"]
 
     # Calculate Deltas
     def calc_delta(curr, prev):
@@ -59,11 +107,6 @@ def per_property_metrics(property_id: int, range_days: int = 7, compare_days: in
             return 100 if curr > 0 else 0
         return int(((curr - prev) / prev) * 100)
 
-    # Last Activity timestamps
-    last_scan = db.execute("SELECT MAX(scanned_at) FROM qr_scans WHERE property_id = %s", (property_id,)).fetchone()[0]
-    last_view = db.execute("SELECT MAX(viewed_at) FROM property_views WHERE property_id = %s", (property_id,)).fetchone()[0]
-    last_lead = db.execute("SELECT MAX(created_at) FROM leads WHERE property_id = %s", (property_id,)).fetchone()[0]
-    
     # Generate Insights
     insights = []
     
@@ -116,6 +159,40 @@ def per_property_metrics(property_id: int, range_days: int = 7, compare_days: in
         "insights": insights
     }
 
+
+def _raw_property_counts(db, property_id, range_days, compare_days):
+    # helper for intervals
+    def get_count(table, date_col, pid, days_offset=0, days_span=7, extra_where=""):
+        # standard postgres interval syntax
+        query = f"""
+            SELECT COUNT(*) FROM {table} 
+            WHERE property_id = %s 
+            AND {date_col} >= NOW() - INTERVAL '{days_offset + days_span} days'
+            AND {date_col} < NOW() - INTERVAL '{days_offset} days'
+            {extra_where}
+        """
+        return db.execute(query, (pid,)).fetchone()[0]
+
+    return {
+        # 1. Scans (Physical)
+        "scans_curr": get_count('qr_scans', 'scanned_at', property_id, 0, range_days),
+        "scans_prev": get_count('qr_scans', 'scanned_at', property_id, range_days, compare_days),
+        # 2. Views (Digital), public only
+        "views_curr": get_count('property_views', 'viewed_at', property_id, 0, range_days, "AND is_internal = 0"),
+        "views_prev": get_count('property_views', 'viewed_at', property_id, range_days, compare_days, "AND is_internal = 0"),
+        # 3. Leads (Conversion)
+        "leads_curr": get_count('leads', 'created_at', property_id, 0, range_days),
+        "leads_prev": get_count('leads', 'created_at', property_id, range_days, compare_days),
+        # 4. Contact Intents (CTA Clicks)
+        "ctas_curr": get_count('app_events', 'occurred_at', property_id, 0, range_days, "AND event_type = 'cta_click'"),
+        "ctas_prev": get_count('app_events', 'occurred_at', property_id, range_days, compare_days, "AND event_type = 'cta_click'"),
+        # Last Activity timestamps
+        "last_scan": db.execute("SELECT MAX(scanned_at) FROM qr_scans WHERE property_id = %s", (property_id,)).fetchone()[0],
+        "last_view": db.execute("SELECT MAX(viewed_at) FROM property_views WHERE property_id = %s", (property_id,)).fetchone()[0],
+        "last_lead": db.execute("SELECT MAX(created_at) FROM leads WHERE property_id = %s", (property_id,)).fetchone()[0],
+    }
+
+
 def per_agent_rollup(user_id: int, range_days: int = 7) -> dict:
     """
     Aggregate metrics across all properties for an agent.
@@ -1,7 +1,15 @@
 import logging
 import json
+import os
+import re
+import select
 from datetime import datetime, timezone
-from database import get_db
+
+import psycopg2
+from psycopg2 import sql
+
+import config
+from database import _database_url, get_db
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +18,21 @@ JOB_STATUS_PROCESSING = 'processing'
 JOB_STATUS_DONE = 'done'
 JOB_STATUS_DEAD = 'dead'
 MAX_RETRY_ATTEMPTS = 5
+# A processing job whose lock is older than this is presumed dead and reclaimed.
+# Long-running jobs keep their lock fresh with heartbeat().
+STALE_LOCK_INTERVAL = '5 minutes'
+CHANNEL_PREFIX = 'async_jobs_'
+
+
+def channel_for(job_type):
+    """NOTIFY channel for a job type (enqueue / retry wakeups)."""
+    return CHANNEL_PREFIX + re.sub(r'[^a-z0-9_]', '_', str(job_type).lower())
+
+
+def _notify(db, job_type, job_id):
+    # Delivered on commit, so listeners never see an uncommitted job
+    if config.ASYNC_JOBS_NOTIFY_ENABLED:
+        db.execute("SELECT pg_notify(%s, %s)", (channel_for(job_type), str(job_id)))
 
 def enqueue(job_type, payload):
     """
@@ -31,8 +54,9 @@ def enqueue(job_type, payload):
         """,
         (job_type, payload_json)
     )
-    db.commit()
     job_id = cursor.fetchone()['id']
+    _notify(db, job_type, job_id)
+    db.commit()
     logger.info(f"[Async] Enqueued {job_type} job {job_id}")
     return job_id
 
@@ -64,7 +88,7 @@ def claim_batch(job_types=None, limit=10):
             FROM async_jobs
             WHERE (
                 (status = '{JOB_STATUS_QUEUED}' AND (next_run_at IS NULL OR next_run_at <= NOW()))
-                OR (status = '{JOB_STATUS_PROCESSING}' AND locked_at < NOW() - INTERVAL '5 minutes')
+                OR (status = '{JOB_STATUS_PROCESSING}' AND locked_at < NOW() - INTERVAL '{STALE_LOCK_INTERVAL}')
             )
             {type_clause}
             ORDER BY next_run_at NULLS FIRST, created_at ASC
@@ -89,6 +113,22 @@ def claim_batch(job_types=None, limit=10):
     # Convert Row objects to dicts if needed, or return as is (dict-like)
     return [dict(j) for j in jobs]
 
+def heartbeat(job_ids):
+    """
+    Extend the lease (locked_at) of jobs still being processed so the stale
+    lock rule in claim_batch does not hand them to another worker.
+    Returns the number of leases extended.
+    """
+    if not job_ids:
+        return 0
+    db = get_db()
+    cursor = db.execute(
+        f"UPDATE async_jobs SET locked_at = NOW() WHERE id = ANY(%s) AND status = '{JOB_STATUS_PROCESSING}'",
+        (list(job_ids),)
+    )
+    db.commit()
+    return cursor.rowcount
+
 def mark_done(job_id):
     db = get_db()
     db.execute(
@@ -123,10 +163,13 @@ def mark_failed(job_id, error, can_retry=True):
                 ELSE NULL
             END
         WHERE id = %s
-        RETURNING status, next_run_at, attempts
+        RETURNING status, next_run_at, attempts, job_type
     """
 
     row = db.execute(sql, (can_retry, str(error), can_retry, job_id)).fetchone()
+    if row and row['status'] == JOB_STATUS_QUEUED:
+        # Idle workers recompute their wake-up time for the new next_run_at
+        _notify(db, row['job_type'], job_id)
     db.commit()
 
     if row:
@@ -139,3 +182,110 @@ def mark_failed(job_id, error, can_retry=True):
             )
         else:
             logger.error(f"[Async] Job {job_id} marked DEAD (attempt={attempts}): {error}")
+
+
+def seconds_until_next_due(job_types=None):
+    """
+    Seconds until the next job becomes claimable without a NOTIFY: the earliest
+    delayed retry (next_run_at) or the earliest processing lock to go stale.
+    0 if one is already due, None if nothing is scheduled.
+    """
+    db = get_db()
+    type_clause = "AND job_type = ANY(%s)" if job_types else ""
+    params = (list(job_types), list(job_types)) if job_types else ()
+    row = db.execute(f"""
+        SELECT EXTRACT(EPOCH FROM LEAST(
+            (SELECT MIN(next_run_at) FROM async_jobs
+             WHERE status = '{JOB_STATUS_QUEUED}' AND next_run_at IS NOT NULL {type_clause}),
+            (SELECT MIN(locked_at) + INTERVAL '{STALE_LOCK_INTERVAL}' FROM async_jobs
+             WHERE status = '{JOB_STATUS_PROCESSING}' {type_clause})
+        ) - NOW()) AS wait
+    """, params).fetchone()
+    if row is None or row['wait'] is None:
+        return None
+    return max(0.0, float(row['wait']))
+
+
+class JobListener:
+    """
+    Blocks until a NOTIFY on one of the job types' channels, a wakeup() call,
+    or the timeout - whichever comes first.
+
+    LISTEN needs a dedicated session, so this holds its own autocommit
+    connection outside the pool (not usable through a transaction-mode
+    pooler; set ASYNC_JOBS_NOTIFY_ENABLED=false there). Without a connection
+    it degrades to a timed sleep and reconnects on the next wait().
+    """
+
+    def __init__(self, job_types, dsn=None):
+        self.channels = sorted({channel_for(t) for t in job_types})
+        self._dsn = dsn
+        self._conn = None
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+    def _connect(self):
+        conn = psycopg2.connect(self._dsn or _database_url())
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for channel in self.channels:
+                cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        self._conn = conn
+        logger.info(f"[Async] Listening on {', '.join(self.channels)}")
+
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def wakeup(self):
+        """Interrupt a wait() from another thread or a signal handler."""
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass  # Pipe full: a wakeup is already pending
+
+    def wait(self, timeout):
+        """Returns the set of channels notified (empty on timeout or wakeup)."""
+        if self._conn is None and config.ASYNC_JOBS_NOTIFY_ENABLED:
+            try:
+                self._connect()
+            except Exception as e:
+                logger.warning(f"[Async] LISTEN unavailable ({e}); falling back to polling.")
+                self._disconnect()
+
+        fds = [self._wake_r] + ([self._conn] if self._conn is not None else [])
+        try:
+            ready, _, _ = select.select(fds, [], [], max(0.0, timeout))
+        except (OSError, ValueError):
+            ready = []
+
+        if self._wake_r in ready:
+            try:
+                while os.read(self._wake_r, 1024):
+                    pass
+            except BlockingIOError:
+                pass
+
+        notified = set()
+        if self._conn is not None:
+            try:
+                self._conn.poll()
+                while self._conn.notifies:
+                    notified.add(self._conn.notifies.pop(0).channel)
+            except psycopg2.Error as e:
+                logger.warning(f"[Async] LISTEN connection lost ({e}); reconnecting.")
+                self._disconnect()
+        return notified
+
+    def close(self):
+        self._disconnect()
+        for fd in (self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
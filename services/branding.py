@@ -1,11 +1,10 @@
 
 import logging
-import io
 import uuid
-from PIL import Image, ImageOps
 from flask import current_app
 from database import get_db
 from utils.storage import get_storage
+from utils import image_cache, image_processing, qr_image
 from datetime import datetime, timezone
 import config
 
@@ -24,41 +23,16 @@ def validate_and_normalize_logo(file_bytes: bytes) -> tuple[bytes, bytes]:
         raise ValueError("Image too large (max 5MB)")
 
     try:
-        # Load image from bytes
-        img = Image.open(io.BytesIO(file_bytes))
-        
-        # Security: Decompression bomb check (max 25MP)
-        if img.width * img.height > 25_000_000:
-            raise ValueError("Image dimensions too large (max 25MP)")
-
-        # Normalize EXIF orientation
-        img = ImageOps.exif_transpose(img)
-
-        # Convert to RGBA
-        img = img.convert('RGBA')
+        # Decode once: decompression bomb check (max 25MP, from the header),
+        # EXIF orientation, RGBA
+        img = image_processing.decode_image(file_bytes, max_pixels=25_000_000, exif_transpose=True)
         
         # 1. Generate "Original" (Transposed, RGBA, PNG)
         # We re-encode to PNG to scrub metadata and ensure safety
-        orig_buffer = io.BytesIO()
-        img.save(orig_buffer, format='PNG')
-        original_png = orig_buffer.getvalue()
+        original_png = image_processing.encode_png(img)
         
         # 2. Generate "Normalized" (512x512 contained)
-        target_size = (512, 512)
-        canvas = Image.new('RGBA', target_size, (255, 255, 255, 0))
-        
-        # Resize thumbnail
-        img.thumbnail(target_size, Image.Resampling.LANCZOS)
-        
-        # Center image
-        offset_x = (target_size[0] - img.width) // 2
-        offset_y = (target_size[1] - img.height) // 2
-        
-        canvas.paste(img, (offset_x, offset_y))
-        
-        norm_buffer = io.BytesIO()
-        canvas.save(norm_buffer, format='PNG')
-        normalized_png = norm_buffer.getvalue()
+        normalized_png = image_processing.encode_png(image_processing.contain(img, (512, 512)))
         
         return original_png, normalized_png
         
@@ -68,6 +42,15 @@ def validate_and_normalize_logo(file_bytes: bytes) -> tuple[bytes, bytes]:
             raise e
         raise ValueError("Invalid image file.")
 
+def _forget_logo_renders(normalized_key) -> None:
+    """Drop this process's verified QR renders for a logo being replaced or toggled."""
+    if not normalized_key:
+        return
+    try:
+        qr_image.forget_logo(image_cache.load_bytes(get_storage(), normalized_key))
+    except Exception as e:
+        logger.warning(f"Failed to forget QR renders for {normalized_key}: {e}")
+
 def save_qr_logo(user_id: int, file_storage) -> dict:
     """Save a new QR logo for a user."""
     # 1. Read bytes
@@ -92,6 +75,9 @@ def save_qr_logo(user_id: int, file_storage) -> dict:
     
     # 5. Update DB
     db = get_db()
+    previous = db.execute("SELECT qr_logo_normalized_key FROM users WHERE id = %s", (user_id,)).fetchone()
+    if previous:
+        _forget_logo_renders(previous['qr_logo_normalized_key'])
     db.execute("""
         UPDATE users 
         SET qr_logo_original_key = %s,
@@ -128,6 +114,8 @@ def delete_qr_logo(user_id: int) -> None:
     """, (user_id,))
     db.commit()
     
+    _forget_logo_renders(row['qr_logo_normalized_key'])
+
     # Delete from storage (Idempotent)
     storage = get_storage()
     for key in keys:
@@ -142,8 +130,13 @@ def delete_qr_logo(user_id: int) -> None:
 def set_use_qr_logo(user_id: int, enabled: bool) -> None:
     """Toggle usage of QR logo."""
     db = get_db()
-    db.execute("UPDATE users SET use_qr_logo = %s WHERE id = %s", (enabled, user_id))
+    row = db.execute(
+        "UPDATE users SET use_qr_logo = %s WHERE id = %s RETURNING qr_logo_normalized_key",
+        (enabled, user_id)
+    ).fetchone()
     db.commit()
+    if row:
+        _forget_logo_renders(row['qr_logo_normalized_key'])
 
 def get_user_qr_logo_bytes(user_id: int) -> bytes | None:
     """
@@ -166,11 +159,10 @@ def get_user_qr_logo_bytes(user_id: int) -> bytes | None:
     if not user or not user['use_qr_logo'] or not user['qr_logo_normalized_key']:
         return None
         
-    # 3. Retrieve Bytes
+    # 3. Retrieve Bytes (normalized keys are unique per upload, so no etag check)
     storage = get_storage()
     try:
-        file_obj = storage.get_file(user['qr_logo_normalized_key'])
-        return file_obj.getvalue()
+        return image_cache.load_bytes(storage, user['qr_logo_normalized_key'], immutable=True)
     except Exception as e:
         logger.error(f"Failed to retrieve logo for user {user_id}: {e}")
         return None
@@ -1,66 +1,162 @@
+"""
+Expired Property Cleanup
+
+Deletes properties whose trial expired (expires_at in the past) and that are
+not paid, in set-based batches:
+- candidates: one query per batch (expired, walked in id order, paid state
+  from the live entitlement derivation)
+- paid-but-expired properties are self-healed (expires_at cleared) in one UPDATE
+- the rest go through services.properties.delete_properties (one storage
+  delete_many + one DB transaction per batch)
+
+Progress lives in `cleanup_runs`: the cursor (last property id processed)
+and counters are committed after every batch. A run that hits its time
+budget (CLEANUP_TIME_BUDGET_SECONDS) stays open and the next invocation
+resumes it, so the nightly /cron/cleanup-expired finishes in bounded time.
+"""
 import logging
-from datetime import datetime, timezone
+import time
+
+import config
 from database import get_db
 import utils.storage as storage_module  # Module reference for testability
-from services.gating import get_property_gating_status
+from services import property_entitlements
 
 logger = logging.getLogger(__name__)
 
+RUN_COUNTERS = ('batches', 'scanned', 'deleted', 'healed', 'failed', 'storage_keys', 'storage_failed')
+
+
+def find_expired_candidates(db, after_id=0, limit=None):
+    """
+    Next batch of expired properties with id > after_id, in id order:
+    [{"property_id", "is_paid"}]. expires_at is stored as naive UTC.
+    """
+    limit = limit or config.CLEANUP_BATCH_SIZE
+    scope = "p.expires_at IS NOT NULL AND p.expires_at < (NOW() AT TIME ZONE 'UTC') AND p.id > %(after)s"
+    rows = db.execute(f"""
+        SELECT c.property_id, c.is_paid
+        FROM ({property_entitlements.derive_sql(scope)}) c
+        ORDER BY c.property_id
+        LIMIT %(limit)s
+    """, property_entitlements.derive_params(after=after_id, limit=limit)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _open_run(db):
+    """Resume the latest unfinished run, or start a new one."""
+    run = db.execute(
+        "SELECT * FROM cleanup_runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    if run:
+        logger.info(f"[Cleanup] Resuming run {run['id']} after property {run['cursor_property_id']}")
+    else:
+        run = db.execute("INSERT INTO cleanup_runs DEFAULT VALUES RETURNING *").fetchone()
+    db.commit()
+    return dict(run)
+
+
+def _save_run(db, run, finished=False):
+    sets = ', '.join(f"{name} = %s" for name in RUN_COUNTERS)
+    db.execute(f"""
+        UPDATE cleanup_runs
+        SET cursor_property_id = %s, {sets}, updated_at = NOW(),
+            finished_at = CASE WHEN %s THEN NOW() ELSE NULL END
+        WHERE id = %s
+    """, (run['cursor_property_id'], *(run[name] for name in RUN_COUNTERS), finished, run['id']))
+    db.commit()
+
+
+def _heal_paid(db, property_ids):
+    """Expired but PAID: should not happen if logic is correct, but self-heal."""
+    logger.info(f"[Cleanup] {len(property_ids)} expired properties are PAID. Clearing expires_at.")
+    db.execute("UPDATE properties SET expires_at = NULL WHERE id = ANY(%s)", (property_ids,))
+    property_entitlements.refresh(db, property_ids)
+    db.commit()
+    from services.qr_resolution import codes_for_properties, invalidate_codes
+    invalidate_codes(codes_for_properties(db, property_ids))
+
+
+def run_cleanup(dry_run=False, batch_size=None, time_budget=None):
+    """
+    Process expired properties batch by batch until none are left or the
+    time budget (seconds, 0 = none) runs out.
+
+    dry_run: count candidates only; nothing is deleted and no run is recorded.
+
+    Returns the run's progress: {"run_id", "done", "cursor_property_id",
+    <RUN_COUNTERS>..., "elapsed_ms"}. Counters are cumulative for a resumed run.
+    """
+    from services.properties import delete_properties
+
+    db = get_db()
+    batch_size = batch_size or config.CLEANUP_BATCH_SIZE
+    if time_budget is None:
+        time_budget = config.CLEANUP_TIME_BUDGET_SECONDS
+    started = time.monotonic()
+
+    if dry_run:
+        run = dict.fromkeys(RUN_COUNTERS, 0)
+        run.update(id=None, cursor_property_id=0)
+    else:
+        run = _open_run(db)
+    storage = None
+    done = False
+
+    while True:
+        batch = find_expired_candidates(db, after_id=run['cursor_property_id'], limit=batch_size)
+        if not batch:
+            done = True
+            break
+
+        paid = [c['property_id'] for c in batch if c['is_paid']]
+        unpaid = [c['property_id'] for c in batch if not c['is_paid']]
+        run['batches'] += 1
+        run['scanned'] += len(batch)
+
+        if dry_run:
+            # Reported as "deleted" / "healed" so a dry run reads like the real one
+            run['healed'] += len(paid)
+            run['deleted'] += len(unpaid)
+        else:
+            if paid:
+                _heal_paid(db, paid)
+                run['healed'] += len(paid)
+            if unpaid:
+                logger.info(f"[Cleanup] Deleting {len(unpaid)} expired properties")
+                storage = storage or storage_module.get_storage()
+                result = delete_properties(db, unpaid, storage)
+                run['deleted'] += result['deleted']
+                run['failed'] += len(result['failed_ids'])
+                run['storage_keys'] += result['storage_keys']
+                run['storage_failed'] += result['storage_failed']
+
+        run['cursor_property_id'] = batch[-1]['property_id']
+        if not dry_run:
+            _save_run(db, run)
+
+        if time_budget and time.monotonic() - started >= time_budget:
+            logger.info(f"[Cleanup] Time budget reached after property {run['cursor_property_id']}; will resume")
+            break
+
+    if done and not dry_run:
+        _save_run(db, run, finished=True)
+
+    progress = {name: run[name] for name in RUN_COUNTERS}
+    progress.update(
+        run_id=run['id'],
+        done=done,
+        cursor_property_id=run['cursor_property_id'],
+        elapsed_ms=int((time.monotonic() - started) * 1000),
+    )
+    logger.info(f"[Cleanup] {progress}")
+    return progress
+
+
 def cleanup_expired_properties(dry_run=False):
     """
     Find and delete expired properties that are NOT paid.
-    Returns count of deleted properties.
+    Returns count of deleted properties (cumulative for a resumed run; 0 for a dry run).
     """
-    db = get_db()
-    storage = storage_module.get_storage()
-    
-    # Platform-agnostic now check
-    # We fetch potentially expired rows, then filter in python for complex logic
-    query = "SELECT id, address, expires_at FROM properties WHERE expires_at IS NOT NULL"
-    rows = db.execute(query).fetchall()
-    
-    now = datetime.now(timezone.utc)
-    deleted_count = 0
-    
-    for row in rows:
-        pid = row['id']
-        expires_at = row['expires_at']
-        
-        # Parse date
-        if isinstance(expires_at, str):
-            try:
-                expires_at = datetime.fromisoformat(expires_at.replace(' ', 'T'))
-            except:
-                continue
-        
-        # Make timezone aware if naive
-        if expires_at and expires_at.tzinfo is None:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
-        
-        if expires_at < now:
-            # Double check: Is it paid?
-            gating = get_property_gating_status(pid)
-                
-            if gating['is_paid']:
-                # Should not happen if logic is correct, but self-heal
-                logger.info(f"[Cleanup] Property {pid} is expired but PAID. Clearing expires_at.")
-                if not dry_run:
-                    db.execute("UPDATE properties SET expires_at = NULL WHERE id = %s", (pid,))
-                    db.commit()
-                continue
-            
-            # Verify no pending processing orders?
-            # gating.is_paid checks PAID_STATUSES.
-            # What if status is 'pending_payment'? 
-            # If expired and pending_payment -> Delete. (User abandoned checkout > 24h ago).
-            
-            logger.info(f"[Cleanup] Deleting expired property {pid}")
-            
-            if dry_run:
-                continue
-
-            from services.properties import delete_property_fully
-            if delete_property_fully(pid):
-                deleted_count += 1
-
-    return deleted_count
+    progress = run_cleanup(dry_run=dry_run)
+    return 0 if dry_run else progress['deleted']
@@ -0,0 +1,124 @@
+"""
+Property Daily Stats Rollup
+
+`property_daily_stats` holds one row per (property_id, day) with the counters
+behind services.analytics.per_property_metrics:
+- scans         qr_scans
+- views         property_views (public only, is_internal = 0)
+- leads         leads
+- ctas          app_events (event_type = 'cta_click')
+- last_*_at     latest scan / view (any) / lead seen that day
+
+Maintained incrementally in the same statement/transaction as the raw insert:
+- services.ingest.insert_rows (qr_scans, property_views, app_events)
+- routes.leads (leads)
+
+Days are Postgres DATE() of the event time in the session timezone (UTC).
+Raw-table scans are only used by rebuild(), the reconciliation/backfill mode.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# table -> (time column, counter column, count filter, last-activity column)
+ROLLUPS = {
+    'qr_scans': ('scanned_at', 'scans', 'TRUE', 'last_scan_at'),
+    'property_views': ('viewed_at', 'views', 'is_internal = 0', 'last_view_at'),
+    'leads': ('created_at', 'leads', 'TRUE', 'last_lead_at'),
+    'app_events': ('occurred_at', 'ctas', "event_type = 'cta_click'", None),
+}
+
+
+def upsert_sql(table, source):
+    """
+    INSERT ... ON CONFLICT adding the rows of `source` (a CTE name or subquery
+    with `table`'s columns) into property_daily_stats.
+    """
+    time_col, counter, count_filter, last_col = ROLLUPS[table]
+    count_expr = f"COUNT(*) FILTER (WHERE {count_filter})"
+
+    cols = ["property_id", "day", counter]
+    select = ["src.property_id", f"DATE(src.{time_col})", count_expr]
+    updates = [f"{counter} = property_daily_stats.{counter} + EXCLUDED.{counter}"]
+    having = ""
+    if last_col:
+        cols.append(last_col)
+        select.append(f"MAX(src.{time_col})")
+        updates.append(f"{last_col} = GREATEST(property_daily_stats.{last_col}, EXCLUDED.{last_col})")
+    else:
+        # Nothing to record for non-matching rows (e.g. non-CTA app_events)
+        having = f"HAVING {count_expr} > 0"
+    updates.append("updated_at = NOW()")
+
+    return f"""
+        INSERT INTO property_daily_stats ({', '.join(cols)})
+        SELECT {', '.join(select)}
+        FROM {source} src
+        WHERE src.property_id IS NOT NULL
+        GROUP BY 1, 2
+        {having}
+        ON CONFLICT (property_id, day) DO UPDATE SET {', '.join(updates)}
+    """
+
+
+def record_lead(cur, lead_id):
+    """Add a freshly inserted lead to the rollup (same transaction as the insert)."""
+    cur.execute(upsert_sql('leads', "(SELECT * FROM leads WHERE id = %s)"), (lead_id,))
+
+
+def rebuild(db, property_ids=None, since=None):
+    """
+    Recompute rollup rows from the raw tables (reconciliation / backfill).
+
+    property_ids: limit to these properties (default: all)
+    since: a date; only days >= since are rebuilt (default: all history)
+
+    Replaces the matching rows in one transaction; the caller commits.
+    Returns the number of rows written.
+    """
+    scope = []
+    params = []
+    if property_ids is not None:
+        scope.append("property_id = ANY(%s)")
+        params.append(list(property_ids))
+    if since is not None:
+        scope.append("day >= %s")
+        params.append(since)
+    where = " AND ".join(scope) or "TRUE"
+
+    def agg(table):
+        time_col, counter, count_filter, last_col = ROLLUPS[table]
+        last = f", MAX({time_col}) AS {last_col}" if last_col else ""
+        return f"""
+            SELECT property_id, day, COUNT(*) FILTER (WHERE {count_filter}) AS {counter}{last}
+            FROM (SELECT *, DATE({time_col}) AS day FROM {table} WHERE property_id IS NOT NULL) t
+            WHERE {where}
+            GROUP BY property_id, day
+        """
+
+    db.execute(f"DELETE FROM property_daily_stats WHERE {where}", tuple(params))
+    cur = db.execute(f"""
+        WITH s AS ({agg('qr_scans')}),
+             v AS ({agg('property_views')}),
+             l AS ({agg('leads')}),
+             c AS ({agg('app_events')}),
+             k AS (
+                 SELECT property_id, day FROM s
+                 UNION SELECT property_id, day FROM v
+                 UNION SELECT property_id, day FROM l
+                 UNION SELECT property_id, day FROM c WHERE ctas > 0
+             )
+        INSERT INTO property_daily_stats
+            (property_id, day, scans, views, leads, ctas, last_scan_at, last_view_at, last_lead_at)
+        SELECT k.property_id, k.day,
+               COALESCE(s.scans, 0), COALESCE(v.views, 0), COALESCE(l.leads, 0), COALESCE(c.ctas, 0),
+               s.last_scan_at, v.last_view_at, l.last_lead_at
+        FROM k
+        LEFT JOIN s USING (property_id, day)
+        LEFT JOIN v USING (property_id, day)
+        LEFT JOIN l USING (property_id, day)
+        LEFT JOIN c USING (property_id, day)
+    """, tuple(params) * 4)
+    written = cur.rowcount
+    logger.info(f"[DailyStats] Rebuilt {written} rows (properties={property_ids or 'all'}, since={since})")
+    return written
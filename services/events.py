@@ -1,15 +1,19 @@
 import os
+import re
 import json
 import hashlib
 from datetime import datetime
+from functools import lru_cache
 from flask import request, g, has_request_context, current_app
-from config import SECRET_KEY, APP_STAGE
-from models import AppEvent
+from config import SECRET_KEY, APP_STAGE, EVENTS_KEY_CACHE_SIZE
 
 # --- Config ---
 MAX_PAYLOAD_SIZE = 8192  # 8KB
 SECRET_SALT = SECRET_KEY if SECRET_KEY else "fallback-salt"
 
+# Per-process counters (see stats())
+_stats = {"accepted": 0, "rejected": 0, "too_large": 0, "pii_stripped": 0, "failed": 0}
+
 # --- Allowlists ---
 SERVER_EVENTS = {
     "property_view",
@@ -52,9 +56,22 @@ def _hash_value(value):
     if not value: return None
     return hashlib.sha256(f"{value}{SECRET_SALT}".encode('utf-8')).hexdigest()
 
+# One pass over the key for every dangerous substring
+_FORBIDDEN_SUBSTRING_RE = re.compile("|".join(re.escape(bad) for bad in sorted(FORBIDDEN_SUBSTRINGS)))
+
+@lru_cache(maxsize=EVENTS_KEY_CACHE_SIZE)
+def _is_forbidden_key(key):
+    """
+    Verdict for one payload key, cached: clients send the same few keys on
+    every event, so each distinct key is lowercased and matched once per process.
+    """
+    lowered = str(key).lower()
+    # 1. Exact Match (Case-insensitive)  2. Dangerous Substring Match
+    return lowered in FORBIDDEN_EXACT_KEYS or _FORBIDDEN_SUBSTRING_RE.search(lowered) is not None
+
 def _clean_payload(payload):
     """
-    Recursively remove forbidden keys and enforce size limits.
+    Recursively remove forbidden keys.
     Returns (cleaned_dict, was_stripped_bool).
     """
     if not isinstance(payload, dict):
@@ -64,15 +81,7 @@ def _clean_payload(payload):
     stripped = False
     
     for k, v in payload.items():
-        # Check key
-        # Check key
-        # 1. Exact Match (Case-insensitive)
-        if k.lower() in FORBIDDEN_EXACT_KEYS:
-            stripped = True
-            continue
-            
-        # 2. Dangerous Substring Match
-        if any(bad in k.lower() for bad in FORBIDDEN_SUBSTRINGS):
+        if _is_forbidden_key(k):
             stripped = True
             continue
             
@@ -103,6 +112,7 @@ def track_event(event_type, *, source="server", schema_version=1, environment=No
         # 1. Validation
         allowed = SERVER_EVENTS if source == "server" else CLIENT_EVENTS
         if event_type not in allowed:
+             _stats["rejected"] += 1
              # Log but don't crash. Return early.
              if has_request_context():
                  current_app.logger.warning(f"[Events] Rejected unknown event_type: {event_type} (source={source})")
@@ -122,15 +132,18 @@ def track_event(event_type, *, source="server", schema_version=1, environment=No
         
         if stripped:
             safe_payload["pii_stripped"] = True
+            _stats["pii_stripped"] += 1
 
-        # Size check
+        # Size check (the same serialization is what gets inserted)
         try:
             serialized = json.dumps(safe_payload)
             if len(serialized) > MAX_PAYLOAD_SIZE:
+                _stats["too_large"] += 1
                 if has_request_context():
                     current_app.logger.warning(f"[Events] Payload too large ({len(serialized)} bytes). Truncating.")
                 return 
         except Exception:
+             _stats["failed"] += 1
              return
 
         # 3. Request Context Metadata
@@ -167,8 +180,10 @@ def track_event(event_type, *, source="server", schema_version=1, environment=No
         # Environment default
         env = environment if environment else (APP_STAGE if APP_STAGE else 'production')
 
-        # 4. Commit to DB
-        AppEvent.create(
+        # 4. Hand off to the analytics ingestion buffer (batched, off the request thread)
+        from services.ingest import record
+        record(
+            'app_events',
             event_type=event_type,
             source=source,
             schema_version=schema_version,
@@ -187,13 +202,26 @@ def track_event(event_type, *, source="server", schema_version=1, environment=No
             idempotency_key=idempotency_key,
             ip_hash=ip_hash,
             ua_hash=ua_hash,
-            payload=safe_payload
+            payload=serialized
         )
+        _stats["accepted"] += 1
         
     except Exception as e:
+        _stats["failed"] += 1
         # Fail silent
         if has_request_context():
             current_app.logger.warning(f"[Events] Failed to track {event_type}: {e}")
         else:
             import logging
             logging.getLogger(__name__).warning(f"[Events] Failed to track {event_type}: {e}")
+
+
+def stats():
+    """Event pipeline counters for this process, plus the ingestion buffer's (drops included)."""
+    from services.ingest import stats as ingest_stats
+    s = dict(_stats)
+    cache = _is_forbidden_key.cache_info()
+    s["key_cache_hits"] = cache.hits
+    s["key_cache_misses"] = cache.misses
+    s.update({f"ingest_{name}": value for name, value in ingest_stats().items()})
+    return s
@@ -21,66 +21,16 @@ def property_is_paid(property_id, user_id=None):
     1. Owner has active PRO subscription.
     2. OR there is a PAID order of type 'listing_unlock', 'sign', or 'smart_sign'.
        (Explicitly EXCLUDES 'listing_kit').
+
+    Read from the property_entitlements projection (user_id is accepted for
+    compatibility; the property OWNER's subscription is what counts).
     """
     if property_id is None:
         return False
 
-    db = get_db()
-    
-    # 1. Check Subscription (if user_id provided or derived from property owner)
-    # If user_id is NOT provided, we must look up the agent->user owning the property
-    if not user_id:
-        owner_row = db.execute("""
-            SELECT u.subscription_status, u.id as user_id
-            FROM properties p
-            JOIN agents a ON p.agent_id = a.id
-            JOIN users u ON a.user_id = u.id
-            WHERE p.id = %s
-        """, (property_id,)).fetchone()
-        
-        if owner_row:
-            user_id = owner_row['user_id']
-            from services.subscriptions import is_subscription_active
-            if is_subscription_active(owner_row['subscription_status']):
-                return True
-    else:
-        # If user_id provided, check that specific user's sub? 
-        # Usually we care about the PROPERTY OWNER's status.
-        # But let's assume if user_id is passed, we check their sub status if they own it.
-        # Ideally we stick to property owner lookup for robustness.
-        # Let's fallback to the query above which is safer.
-        pass
-
-    # Re-run owner lookup if we didn't enter the block above or if we need to be sure
-    # Actually, the logic in get_property_gating_status does the join.
-    # Let's reuse that exact query structure for consistency.
-    
-    owner_query = """
-        SELECT u.subscription_status
-        FROM properties p
-        JOIN agents a ON p.agent_id = a.id
-        JOIN users u ON a.user_id = u.id
-        WHERE p.id = %s
-    """
-    owner_row = db.execute(owner_query, (property_id,)).fetchone()
-    
-    from services.subscriptions import is_subscription_active
-    if owner_row and is_subscription_active(owner_row['subscription_status']):
-        return True
-
-    # 2. Check for Paid Order (Canonical Entitlement)
-    placeholders = ','.join(['%s'] * len(PAID_STATUSES))
-    # Note: listing_kit is explicitly EXCLUDED
-    query = f"""
-        SELECT 1 FROM orders 
-        WHERE property_id = %s 
-        AND status IN ({placeholders})
-        AND order_type IN ('listing_unlock', 'sign', 'smart_sign')
-        LIMIT 1
-    """
-    has_order = db.execute(query, (property_id, *PAID_STATUSES)).fetchone()
-    
-    return bool(has_order)
+    from services import property_entitlements
+    ent = property_entitlements.get_many(get_db(), [property_id]).get(property_id)
+    return bool(ent and ent['is_paid'])
 
 def get_property_gating_status(property_id):
     """
@@ -108,75 +58,26 @@ def get_property_gating_status(property_id):
             "locked_reason": "unpaid"
         }
 
-    db = get_db()
-    
-    # Use Canonical Helper for 'is_paid' state
-    # This checks both Subscription and explicit Paid Orders
-    is_paid = property_is_paid(property_id)
-    
-    # Determine 'paid_via' for UI/Logic if paid
-    paid_via = None
-    paid_source_order_id = None
-    
-    if is_paid:
-        # Re-derive source for granular UI details if needed
-        # (Optimized: we could have property_is_paid return metadata, but keeping it boolean is cleaner for other callers)
-        
-        # 1. Check Sub again (lightwieght)
-        owner_row = db.execute("""
-            SELECT u.subscription_status
-            FROM properties p
-            JOIN agents a ON p.agent_id = a.id
-            JOIN users u ON a.user_id = u.id
-            WHERE p.id = %s
-        """, (property_id,)).fetchone()
-        
-        from services.subscriptions import is_subscription_active
-        if owner_row and is_subscription_active(owner_row['subscription_status']):
-            paid_via = 'subscription'
-        else:
-            # 2. Must be an order
-            placeholders = ','.join(['%s'] * len(PAID_STATUSES))
-            query = f"""
-                SELECT id, order_type FROM orders 
-                WHERE property_id = %s 
-                AND status IN ({placeholders})
-                AND order_type IN ('listing_unlock', 'sign', 'smart_sign')
-                ORDER BY created_at DESC
-                LIMIT 1
-            """
-            row = db.execute(query, (property_id, *PAID_STATUSES)).fetchone()
-            if row:
-                paid_source_order_id = row['id']
-                if row['order_type'] == 'listing_unlock':
-                    paid_via = 'listing_unlock'
-                else:
-                    paid_via = 'sign_order'
+    return gating_status_for_properties([property_id])[property_id]
 
 
-    # 3. Get expiry info from property
-    prop = db.execute(
-        "SELECT expires_at FROM properties WHERE id = %s",
-        (property_id,)
-    ).fetchone()
-    
+def _build_gating_status(is_paid, paid_via, paid_source_order_id, expires_raw, max_photos=None):
+    """Strict gating logic shared by the single and batch lookups."""
     expires_at = None
     is_expired = False
     days_remaining = None
     locked_reason = None
     
-    if prop:
-        expires_raw = prop['expires_at']
-        if isinstance(expires_raw, str):
-            try:
-                expires_at = datetime.fromisoformat(expires_raw.replace(' ', 'T'))
-            except ValueError:
-                expires_at = None
-        else:
-            expires_at = expires_raw
-            
-        if expires_at and expires_at.tzinfo is None:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if isinstance(expires_raw, str):
+        try:
+            expires_at = datetime.fromisoformat(expires_raw.replace(' ', 'T'))
+        except ValueError:
+            expires_at = None
+    else:
+        expires_at = expires_raw
+        
+    if expires_at and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
 
     # 4. Strict Gating Logic (Priority-based)
     if is_paid:
@@ -207,7 +108,8 @@ def get_property_gating_status(property_id):
     
     # 5. Calculate limits
     # Paid = Max capabilities
-    max_photos = 50 if is_paid else 1
+    if max_photos is None:
+        max_photos = 50 if is_paid else 1
     show_gallery = is_paid
     
     return {
@@ -222,6 +124,37 @@ def get_property_gating_status(property_id):
         "locked_reason": locked_reason
     }
 
+def gating_status_for_properties(property_ids):
+    """
+    Batch form of get_property_gating_status for list pages.
+
+    One read of the property_entitlements projection (see
+    services.property_entitlements) for all ids.
+
+    Returns:
+        dict: {property_id: <get_property_gating_status() dict>}
+        Unknown ids get the unpaid / no-expiry default.
+    """
+    ids = [pid for pid in dict.fromkeys(property_ids) if pid is not None]
+    if not ids:
+        return {}
+
+    from services import property_entitlements
+
+    entitlements = property_entitlements.get_many(get_db(), ids)
+
+    result = {}
+    for pid in ids:
+        ent = entitlements.get(pid)
+        if ent is None:
+            result[pid] = _build_gating_status(False, None, None, None)
+            continue
+        result[pid] = _build_gating_status(
+            ent['is_paid'], ent['paid_via'], ent['paid_source_order_id'], ent['expires_at'],
+            max_photos=ent['max_photos']
+        )
+    return result
+
 def can_create_property(user_id):
     """
     Check if user can create a new property based on subscription status and limits.
@@ -0,0 +1,457 @@
+"""
+Analytics Ingestion Buffer
+
+Write path for the high-volume analytics tables hit by public pages:
+- qr_scans        (/r/<code>)
+- property_views  (/p/<slug>)
+- app_events      (services.events.track_event)
+
+Rows are appended to a bounded in-process buffer and drained by a background
+flusher using multi-row execute_values inserts (flush on size or interval,
+and on shutdown). When Postgres is slow or down, or the buffer is full,
+batches are spilled to a local append-only JSONL file and replayed by the
+next healthy flush. A write that would take the spill file past
+INGEST_SPILL_MAX_BYTES drops the rows that do not fit; drops are counted
+(stats(): "overflowed", "dropped") and logged at error level when they start.
+
+One bad row never holds up its batch:
+- app_events duplicates (uq_app_events_idempotency) are skipped (ON CONFLICT DO NOTHING)
+- qr_scans / property_views rows for a deleted property are filtered out ("orphaned")
+- any other row-level error retries the batch row by row; rows that still fail
+  go to dead-<pid>.jsonl ("dead_lettered") and are never replayed
+
+Event time is captured on the request thread and written as
+`CURRENT_TIMESTAMP - <age>` so buffered rows keep DB-clock semantics.
+
+With INGEST_ASYNC_ENABLED=false (default in tests) rows are inserted
+synchronously on the request connection, exactly like the old code paths.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extras import Json, execute_values
+
+import config
+from database import connection, get_db
+from services import daily_stats
+
+logger = logging.getLogger(__name__)
+
+# table -> (event time column, value columns)
+TABLES = {
+    'qr_scans': ('scanned_at', (
+        'property_id', 'utm_source', 'utm_medium', 'utm_campaign', 'referrer',
+        'visitor_hash', 'qr_variant_id', 'campaign_id', 'sign_asset_id',
+    )),
+    'property_views': ('viewed_at', (
+        'property_id', 'referrer', 'is_internal', 'source',
+    )),
+    'app_events': ('occurred_at', (
+        'event_type', 'source', 'schema_version', 'environment',
+        'actor_type', 'actor_id', 'subject_type', 'subject_id',
+        'user_id', 'property_id', 'sign_asset_id', 'order_id', 'qr_code',
+        'session_id', 'request_id', 'idempotency_key', 'ip_hash', 'ua_hash',
+        'payload',
+    )),
+}
+# str values here are already-serialized JSON (track_event serializes once for its size check)
+JSON_COLUMNS = {'payload'}
+# Tables whose property_id references properties(id)
+PROPERTY_FK_TABLES = {'qr_scans', 'property_views'}
+# Tables where a unique-key conflict means the row was already recorded
+SKIP_CONFLICT_TABLES = {'app_events'}
+# Errors caused by the row's data rather than the connection: retry row by row
+ROW_ERRORS = (psycopg2.IntegrityError, psycopg2.DataError)
+
+
+def _values(table, **fields):
+    """Column-ordered value tuple for `table`. Unknown keys are ignored; missing columns are NULL."""
+    _, cols = TABLES[table]
+    return tuple(fields.get(c) for c in cols)
+
+
+def _adapt(table, values):
+    _, cols = TABLES[table]
+    return tuple(
+        Json(v) if c in JSON_COLUMNS and v is not None and not isinstance(v, str) else v
+        for c, v in zip(cols, values)
+    )
+
+
+def _live_items(cur, table, items):
+    """Drop items whose property has been deleted since they were captured."""
+    if table not in PROPERTY_FK_TABLES:
+        return items
+    idx = TABLES[table][1].index('property_id')
+    ids = list({values[idx] for _, values in items if values[idx] is not None})
+    if not ids:
+        return items
+    cur.execute("SELECT id FROM properties WHERE id = ANY(%s)", (ids,))
+    live = {row[0] for row in cur.fetchall()}
+    return [item for item in items if item[1][idx] is None or item[1][idx] in live]
+
+
+def insert_rows(cur, table, items, now=None):
+    """
+    Multi-row insert of buffered items [(captured_epoch, values), ...] into `table`,
+    plus the matching property_daily_stats increments.
+    Shared by the flusher, spill replay and the synchronous path.
+
+    Returns the number of items skipped because their property no longer exists.
+    """
+    if not items:
+        return 0
+    live = _live_items(cur, table, items)
+    orphaned = len(items) - len(live)
+    if not live:
+        return orphaned
+    now = time.time() if now is None else now
+    time_col, cols = TABLES[table]
+    template = "(" + ", ".join(["%s"] * len(cols)) + ", CURRENT_TIMESTAMP - (%s * interval '1 second'))"
+    rows = [_adapt(table, values) + (max(0.0, now - captured),) for captured, values in live]
+    sql = f"INSERT INTO {table} ({', '.join(cols)}, {time_col}) VALUES %s"
+    if table in SKIP_CONFLICT_TABLES:
+        sql += " ON CONFLICT DO NOTHING"
+    if table in daily_stats.ROLLUPS:
+        # Keep property_daily_stats in step within the same statement
+        sql = f"WITH ins AS ({sql} RETURNING *) " + daily_stats.upsert_sql(table, "ins")
+    execute_values(
+        cur,
+        sql,
+        rows,
+        template=template,
+        page_size=len(rows),
+    )
+    return orphaned
+
+
+class IngestBuffer:
+    """
+    Bounded multi-table row buffer with a background flusher thread.
+    Safe across gunicorn forks: state is reset lazily in the child on first use.
+    """
+
+    def __init__(self, max_rows, batch_size, flush_interval, spill_dir, statement_timeout_ms=2000,
+                 spill_max_bytes=0):
+        self.max_rows = max_rows
+        self.spill_max_bytes = spill_max_bytes  # 0 = unbounded
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir
+        self.statement_timeout_ms = statement_timeout_ms
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._atexit_registered = False
+        self._dropping = False
+        self.stats = {
+            "submitted": 0,
+            "flushed": 0,
+            "batches": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "failed_flushes": 0,
+            "overflowed": 0,  # submitted while the buffer was full (spilled or dropped)
+            "dropped": 0,
+            "orphaned": 0,  # property deleted before the row was written
+            "dead_lettered": 0,  # rejected by Postgres on their own; kept in dead-<pid>.jsonl
+        }
+
+    # ------------------------------------------------------------------ API
+
+    def submit(self, table, values):
+        if self._pid != os.getpid():
+            self._reset()
+        item = (table, time.time(), tuple(values))
+        with self._cond:
+            self.stats["submitted"] += 1
+            if len(self._items) >= self.max_rows:
+                # Backlog means Postgres is not keeping up: go straight to disk.
+                overflow = True
+                self.stats["overflowed"] += 1
+            else:
+                overflow = False
+                self._items.append(item)
+                if len(self._items) >= self.batch_size:
+                    self._cond.notify()
+        if overflow:
+            self._spill([item])
+        self._ensure_thread()
+
+    def flush(self):
+        """Drain everything currently buffered (blocking)."""
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flusher and drain the buffer. Registered with atexit."""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def pending(self):
+        return len(self._items)
+
+    # ------------------------------------------------------------ internals
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def _take(self, n):
+        with self._cond:
+            batch = []
+            while self._items and len(batch) < n:
+                batch.append(self._items.popleft())
+            return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._items) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            batch = self._take(self.batch_size)
+            if batch:
+                self._write(batch)
+            else:
+                self._replay_spill()
+
+    def _set_timeout(self, db):
+        cur = db.cursor()
+        cur.execute("SET LOCAL statement_timeout = %s", (self.statement_timeout_ms,))
+        cur.close()
+
+    @contextmanager
+    def _get_conn(self):
+        """Pooled connection with a short statement_timeout so a slow DB spills instead of blocking."""
+        with connection() as db:
+            self._set_timeout(db)
+            yield db
+
+    def _insert(self, grouped):
+        """
+        Insert {table: [(captured, values), ...]} in one transaction.
+
+        A row-level error (FK, unique, bad data) retries row by row under
+        savepoints and dead-letters only the rows that fail. Connection-level
+        errors propagate so the caller can spill and retry later.
+        """
+        with self._get_conn() as db:
+            cur = db.cursor()
+            try:
+                orphaned = 0
+                for table, items in grouped.items():
+                    for i in range(0, len(items), self.batch_size):
+                        orphaned += insert_rows(cur, table, items[i:i + self.batch_size])
+                db.commit()
+                self.stats["orphaned"] += orphaned
+                return
+            except ROW_ERRORS as e:
+                db.rollback()
+                logger.warning(f"[Ingest] Batch insert rejected ({type(e).__name__}: {e}). Retrying row by row.")
+
+            self._set_timeout(db)
+            cur = db.cursor()
+            orphaned = 0
+            dead = []
+            for table, items in grouped.items():
+                for item in items:
+                    cur.execute("SAVEPOINT ingest_row")
+                    try:
+                        orphaned += insert_rows(cur, table, [item])
+                        cur.execute("RELEASE SAVEPOINT ingest_row")
+                    except ROW_ERRORS as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT ingest_row")
+                        dead.append((table, item, e))
+            db.commit()
+        self.stats["orphaned"] += orphaned
+        if dead:
+            self._dead_letter(dead)
+
+    def _write(self, batch):
+        grouped = {}
+        for table, captured, values in batch:
+            grouped.setdefault(table, []).append((captured, values))
+
+        with self._flush_lock:
+            try:
+                self._insert(grouped)
+                self.stats["flushed"] += len(batch)
+                self.stats["batches"] += 1
+            except Exception as e:
+                self.stats["failed_flushes"] += 1
+                logger.warning(f"[Ingest] Flush of {len(batch)} rows failed ({type(e).__name__}: {e}). Spilling to disk.")
+                self._spill(batch)
+                return
+        self._replay_spill()
+
+    # ---------------------------------------------------------------- spill
+
+    def _spill_path(self):
+        return os.path.join(self.spill_dir, f"spill-{os.getpid()}.jsonl")
+
+    def _spill(self, batch):
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = self._spill_path()
+            lines = [
+                json.dumps({"t": table, "ts": captured, "v": list(values)}, default=str) + "\n"
+                for table, captured, values in batch
+            ]
+            if self.spill_max_bytes:
+                # Cap the file at what it would be after this write, not before
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                kept = 0
+                for line in lines:
+                    size += len(line.encode("utf-8"))
+                    if size > self.spill_max_bytes:
+                        break
+                    kept += 1
+                if kept < len(lines):
+                    self._drop(len(lines) - kept, f"spill file full ({self.spill_max_bytes} bytes)")
+                    lines = lines[:kept]
+            if lines:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                self.stats["spilled"] += len(lines)
+        except Exception as e:
+            self._drop(len(batch), f"spill failed: {e}")
+
+    def _drop(self, count, reason):
+        """Count dropped rows. The first drop logs at error level; later ones are only counted."""
+        self.stats["dropped"] += count
+        if not self._dropping:
+            self._dropping = True
+            logger.error(f"[Ingest] Dropping analytics rows: {reason}. Dropped {count}; further drops are only counted in stats()['dropped'].")
+
+    def _dead_letter(self, dead):
+        """Keep rows Postgres rejected on their own for inspection; they are never replayed."""
+        path = os.path.join(self.spill_dir, f"dead-{os.getpid()}.jsonl")
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                for table, (captured, values), err in dead:
+                    f.write(json.dumps(
+                        {"t": table, "ts": captured, "v": list(values), "err": f"{type(err).__name__}: {err}"},
+                        default=str,
+                    ) + "\n")
+        except Exception as e:
+            logger.error(f"[Ingest] Dead-letter write failed: {e}")
+        self.stats["dead_lettered"] += len(dead)
+        logger.error(f"[Ingest] Dead-lettered {len(dead)} rejected rows to {os.path.basename(path)}")
+
+    def _replay_spill(self):
+        """Re-insert spilled rows (from any process) once Postgres is healthy."""
+        paths = glob.glob(os.path.join(self.spill_dir, "spill-*.jsonl"))
+        for path in paths:
+            claimed = f"{path}.replay-{os.getpid()}"
+            try:
+                os.rename(path, claimed)  # Atomic claim; another worker may win
+            except OSError:
+                continue
+
+            grouped = {}
+            with open(claimed, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write at crash time
+                    if rec.get("t") in TABLES:
+                        grouped.setdefault(rec["t"], []).append((rec["ts"], rec["v"]))
+
+            with self._flush_lock:
+                try:
+                    self._insert(grouped)
+                except Exception as e:
+                    logger.warning(f"[Ingest] Spill replay failed ({e}). Will retry later.")
+                    os.rename(claimed, path)
+                    return
+            count = sum(len(v) for v in grouped.values())
+            self.stats["replayed"] += count
+            os.remove(claimed)
+            self._dropping = False  # Room again: the next drop episode logs loudly too
+            logger.info(f"[Ingest] Replayed {count} spilled rows from {os.path.basename(path)}")
+
+
+_buffer = IngestBuffer(
+    max_rows=config.INGEST_MAX_BUFFER,
+    batch_size=config.INGEST_BATCH_SIZE,
+    flush_interval=config.INGEST_FLUSH_INTERVAL,
+    spill_dir=config.INGEST_SPILL_DIR,
+    spill_max_bytes=config.INGEST_SPILL_MAX_BYTES,
+)
+
+
+def record(table, **fields):
+    """
+    Record one analytics row. Unknown keys are ignored; missing columns are NULL.
+
+    Async mode: buffered, never touches the request's DB connection.
+    Sync mode: inserted and committed on the request connection (raises on error).
+    """
+    values = _values(table, **fields)
+
+    if config.INGEST_ASYNC_ENABLED:
+        _buffer.submit(table, values)
+        return
+
+    db = get_db()
+    cur = db.cursor()
+    try:
+        insert_rows(cur, table, [(time.time(), values)])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def flush():
+    _buffer.flush()
+
+
+def shutdown(timeout=5.0):
+    _buffer.shutdown(timeout)
+
+
+def stats():
+    s = dict(_buffer.stats)
+    s["pending"] = _buffer.pending()
+    return s
@@ -0,0 +1,157 @@
+"""
+Order previews for pending sign orders.
+
+Interactive flows (yard sign resize, agent submit, SmartSign order form) show a
+fast preview drawn straight from the layout at screen resolution and defer the
+print-resolution PDF to the async 'render_print_pdf' job. Fulfillment still
+regenerates the PDF itself if the job has not run yet (sign_pdf_path is NULL).
+
+With PREVIEW_FAST_ENABLED off the print PDF is rendered inline and the preview
+rasterized from it, as before.
+"""
+import json
+import logging
+
+import config
+from database import get_db
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = 'render_print_pdf'
+
+
+def _is_smart_sign(order):
+    return order.get('print_product') == 'smart_sign' or order.get('order_type') == 'smart_sign'
+
+
+def _payload(order):
+    payload = order.get('design_payload') or {}
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return payload
+
+
+def smartsign_asset_from_payload(payload, code, layout_id, print_size):
+    """Asset-like dict for the SmartSign generators from an order's design payload."""
+    return {
+        'code': code,
+        'brand_name': payload.get('brand_name') or payload.get('agent_name'), # normalize
+        'agent_name': payload.get('agent_name'),  # Also pass as agent_name for V2 layouts
+        'phone': payload.get('phone') or payload.get('agent_phone'),
+        'agent_phone': payload.get('agent_phone'),
+        'email': payload.get('email') or payload.get('agent_email'),
+        'background_style': payload.get('background_style') or payload.get('banner_color_id'),
+        'cta_key': 'scan_for_details', # Default
+        'include_logo': bool(payload.get('logo_key') or payload.get('agent_logo_key')),
+        'logo_key': payload.get('logo_key') or payload.get('agent_logo_key'),
+        'include_headshot': bool(payload.get('headshot_key') or payload.get('agent_headshot_key')),
+        'headshot_key': payload.get('headshot_key') or payload.get('agent_headshot_key'),
+        'brokerage_name': payload.get('brokerage_name') or payload.get('brokerage'),
+
+        # License fields (for V2 layouts)
+        'state': payload.get('state'),
+        'license_number': payload.get('license_number'),
+        'show_license_option': payload.get('show_license_option', 'auto'),
+        'license_label_override': payload.get('license_label_override'),
+
+        # Context for New PDF Generator (Phase 2)
+        'layout_id': layout_id,
+        'print_size': print_size,
+        'banner_color_id': payload.get('banner_color_id'),
+    }
+
+
+def _smartsign_asset(db, order):
+    payload = _payload(order)
+    code = payload.get('code')
+    if not code and order.get('sign_asset_id'):
+        # Re-orders keep the existing asset's code
+        row = db.execute("SELECT code FROM sign_assets WHERE id = %s", (order['sign_asset_id'],)).fetchone()
+        code = row['code'] if row else None
+    return smartsign_asset_from_payload(payload, code, order.get('layout_id'), order.get('print_size'))
+
+
+def _generate_print_pdf(db, order):
+    if _is_smart_sign(order):
+        from services.pdf_smartsign import generate_smartsign_pdf
+        return generate_smartsign_pdf(_smartsign_asset(db, order), order_id=order['id'], user_id=order.get('user_id'))
+    from services.printing.yard_sign import generate_yard_sign_pdf_from_order_row
+    return generate_yard_sign_pdf_from_order_row(order, db=db)
+
+
+def refresh_order_preview(db, order_id):
+    """
+    Render the preview for a pending order and persist preview_key.
+    Fast mode clears sign_pdf_path and queues the print PDF (after the commit).
+    Returns the preview key.
+    """
+    order = db.execute("SELECT * FROM orders WHERE id = %s", (order_id,)).fetchone()
+    if not order:
+        raise ValueError(f"Order {order_id} not found")
+    order = dict(order)
+    sign_size = order.get('print_size') or order.get('sign_size')
+
+    if not config.PREVIEW_FAST_ENABLED:
+        from utils.pdf_preview import render_pdf_to_web_preview
+        pdf_key = _generate_print_pdf(db, order)
+        preview_key = render_pdf_to_web_preview(pdf_key, order_id=order_id, sign_size=sign_size)
+        db.execute(
+            "UPDATE orders SET sign_pdf_path = %s, preview_key = %s, updated_at = NOW() WHERE id = %s",
+            (pdf_key, preview_key, order_id)
+        )
+        db.commit()
+        return preview_key
+
+    if _is_smart_sign(order):
+        from services.pdf_smartsign import render_smartsign_preview
+        preview_key = render_smartsign_preview(
+            _smartsign_asset(db, order), order_id=order_id, user_id=order.get('user_id')
+        )
+    else:
+        from services.printing.yard_sign import render_yard_sign_preview
+        preview_key = render_yard_sign_preview(order)
+
+    db.execute(
+        "UPDATE orders SET sign_pdf_path = NULL, preview_key = %s, updated_at = NOW() WHERE id = %s",
+        (preview_key, order_id)
+    )
+    db.commit()
+
+    from services.async_jobs import enqueue
+    try:
+        enqueue(JOB_TYPE, {'order_id': order_id})
+    except Exception as e:
+        # Fulfillment renders the PDF itself when sign_pdf_path is still NULL
+        logger.warning(f"[OrderPreviews] Failed to enqueue print PDF for order {order_id}: {e}")
+    return preview_key
+
+
+def render_print_pdf(order_id):
+    """
+    Async job body: render the print PDF for an order whose preview was drawn
+    fast. Returns False if the order is gone.
+    """
+    db = get_db()
+    order = db.execute("SELECT * FROM orders WHERE id = %s", (order_id,)).fetchone()
+    if not order:
+        return False
+    order = dict(order)
+    if order.get('sign_pdf_path'):
+        # Fulfillment (or an earlier job) already rendered it
+        return True
+
+    pdf_key = _generate_print_pdf(db, order)
+
+    # Only record it if the order was not resized again meanwhile; the newer
+    # job renders the current size.
+    db.execute(
+        """
+        UPDATE orders SET sign_pdf_path = %s, updated_at = NOW()
+        WHERE id = %s AND sign_pdf_path IS NULL
+          AND print_size IS NOT DISTINCT FROM %s
+          AND layout_id IS NOT DISTINCT FROM %s
+        """,
+        (pdf_key, order_id, order.get('print_size'), order.get('layout_id'))
+    )
+    db.commit()
+    return True
@@ -20,6 +20,7 @@ from database import get_db
 from utils.timestamps import utc_iso
 from services.stripe_checkout import update_attempt_status
 from services.print_catalog import get_price_id
+from services import property_entitlements
 from constants import (
     ORDER_STATUS_PAID, 
     ORDER_STATUS_SUBMITTED_TO_PRINTER, 
@@ -188,6 +189,7 @@ def process_paid_order(db, session):
         session.get('currency'),      # Capture currency code
         order_id
     ))
+    property_entitlements.refresh(db, [row['property_id']])
     db.commit()
     
     # Mark checkout attempt as completed (if present)
@@ -220,7 +222,10 @@ def process_paid_order(db, session):
     if property_id:
         if final_type in ('sign', 'listing_unlock', 'smart_sign'):
             db.execute("UPDATE properties SET expires_at = NULL WHERE id = %s", (property_id,))
+            property_entitlements.refresh(db, [property_id])
             db.commit()
+            from services.qr_resolution import invalidate_property
+            invalidate_property(property_id, db=db)
             logger.info(f"[Orders] Property {property_id} unlocked for Order {order_id} (expires_at=NULL).")
 
     # 4. SmartSign Creation & Activation (Idempotent)
@@ -359,6 +364,9 @@ def process_paid_order(db, session):
                     f"[Orders] Auto-assigned SmartSign Asset {asset_id} to Property {assign_property_id} for Order {order_id}"
                 )
 
+            from services.qr_resolution import invalidate_sign_asset
+            invalidate_sign_asset(asset_id, db=db)
+
     # 5. Trigger Fulfillment (Async)
     if final_type in ('sign', 'smart_sign'):
         # Check if job exists (Idempotent)
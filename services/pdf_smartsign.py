@@ -4,7 +4,6 @@ Generates branded generic signs with NO property details.
 """
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import inch
-from reportlab.lib.utils import ImageReader
 from reportlab.lib.colors import HexColor
 import io
 import os
@@ -12,6 +11,9 @@ import logging
 from constants import SIGN_SIZES, DEFAULT_SIGN_SIZE
 from utils.pdf_generator import draw_qr
 from utils.storage import get_storage
+from services import render_cache
+from utils import image_cache, text_metrics
+from utils.pdf_preview import preview_key_for, render_layout_preview
 from config import BASE_URL, PUBLIC_BASE_URL
 from services.print_catalog import BANNER_COLOR_PALETTE, SMART_SIGN_LAYOUTS, validate_layout
 import services.printing.layout_utils as lu
@@ -278,8 +280,7 @@ def calculate_fitted_multiline(c, text, font_name, start_size, min_size, max_wid
     if not text: return {'size': start_size, 'lines': [], 'height': 0, 'line_height': 0}
     
     # 1. Try single line (prefer largest font)
-    c.setFont(font_name, start_size)
-    if c.stringWidth(text, font_name, start_size) <= max_width:
+    if text_metrics.text_width(text, font_name, start_size) <= max_width:
         return {
             'size': start_size, 
             'lines': [text], 
@@ -288,8 +289,8 @@ def calculate_fitted_multiline(c, text, font_name, start_size, min_size, max_wid
         }
         
     # 2. Try single line shrunk (using layout_utils fit logic manually here)
-    shrunk_size = fit_text_one_line(c, text, font_name, max_width, start_size, min_size)
-    if c.stringWidth(text, font_name, shrunk_size) <= max_width:
+    shrunk_size = lu.fit_text_one_line(c, text, font_name, max_width, start_size, min_size)
+    if text_metrics.text_width(text, font_name, shrunk_size) <= max_width:
         if max_lines == 1 or shrunk_size > (start_size * 0.75):
             return {
                 'size': shrunk_size, 
@@ -306,36 +307,13 @@ def calculate_fitted_multiline(c, text, font_name, start_size, min_size, max_wid
             'height': min_size * leading_factor
          }
 
-    # 3. Try wrapping
-    best_size = min_size
-    best_lines = [text]
-    
-    test_size = start_size
-    while test_size >= min_size:
-        c.setFont(font_name, test_size)
-        words = text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = " ".join(current_line + [word])
-            if c.stringWidth(test_line, font_name, test_size) <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(" ".join(current_line))
-                current_line = [word]
-                
-        if current_line:
-            lines.append(" ".join(current_line))
-            
-        if len(lines) <= max_lines:
-            best_size = test_size
-            best_lines = lines
-            break
-            
-        test_size -= 2
-        
+    # 3. Try wrapping (largest size on the start..min ladder, step 2, within max_lines)
+    fit = text_metrics.fit_wrapped(text, font_name, start_size, min_size, max_width, max_lines, step=2)
+    if fit:
+        best_size, best_lines = fit[0], list(fit[1])
+    else:
+        best_size, best_lines = min_size, [text]
+
     lh = best_size * leading_factor
     return {
         'size': best_size, 
@@ -402,11 +380,8 @@ def _draw_safe_footer_stack(c, l, center_x, cta_text, url_text, cta_font, url_fo
     return 
 
 
-def generate_smartsign_pdf(asset, order_id=None, user_id=None, override_base_url=None):
-    # 0. Register Fonts
-    lu.register_fonts()
-
-    # 1. Extract Config
+def _resolve_layout(asset):
+    """(size_key, layout_id, layout, drawer) for an asset row/dict."""
     size_key = _read(asset, 'print_size') or _read(asset, 'size') or DEFAULT_SIGN_SIZE
     if size_key not in SIGN_SIZES: size_key = DEFAULT_SIGN_SIZE
 
@@ -417,16 +392,7 @@ def generate_smartsign_pdf(asset, order_id=None, user_id=None, override_base_url
 
     layout = SmartSignLayout(size_key, layout_id)
     
-    # 2. Setup Canvas
-    buffer = io.BytesIO()
-    c = canvas.Canvas(
-        buffer,
-        pagesize=(layout.width + 2*layout.bleed, layout.height + 2*layout.bleed)
-    )
-    c.translate(layout.bleed, layout.bleed)
-    
     # Dispatch
-    active_base_url = override_base_url or PUBLIC_BASE_URL
     drawer_by_layout = {
         'smart_v1_photo_banner': _draw_photo_banner,
         'smart_v1_minimal': _draw_modern_minimal,
@@ -440,26 +406,98 @@ def generate_smartsign_pdf(asset, order_id=None, user_id=None, override_base_url
     drawer = drawer_by_layout.get(layout_id)
     if drawer is None:
         raise ValueError(f"No PDF drawer registered for SmartSign layout: {layout_id}")
-    drawer(c, layout, asset, user_id, active_base_url)
+    return size_key, layout_id, layout, drawer
+
+
+def _image_keys(fields):
+    return [fields.get(k) for k in ('headshot_key', 'agent_headshot_key', 'logo_key', 'agent_logo_key')]
+
+
+def generate_smartsign_pdf(asset, order_id=None, user_id=None, override_base_url=None, key=None):
+    # key: storage key override (bulk batches render many assets without an order)
+    # 0. Register Fonts
+    lu.register_fonts()
+
+    # 1. Extract Config
+    size_key, layout_id, layout, drawer = _resolve_layout(asset)
+    active_base_url = override_base_url or PUBLIC_BASE_URL
+
+    def _render():
+        # 2. Setup Canvas
+        buffer = io.BytesIO()
+        c = canvas.Canvas(
+            buffer,
+            pagesize=(layout.width + 2*layout.bleed, layout.height + 2*layout.bleed)
+        )
+        c.translate(layout.bleed, layout.bleed)
+        with image_cache.render_scope():
+            drawer(c, layout, asset, user_id, active_base_url)
         
-    c.showPage()
-    c.save()
-    buffer.seek(0)
+        c.showPage()
+        c.save()
+        buffer.seek(0)
+        return buffer
     
     # Storage
-    from utils.filenames import make_sign_asset_basename
-    basename = make_sign_asset_basename(order_id if order_id else 0, size_key)
-    folder = f"pdfs/order_{order_id}" if order_id else "pdfs/tmp_smartsign"
-    
-    # Append layout_id to filename to distinguish variants
-    # Clean layout_id for filename safety just in case
-    safe_layout = layout_id.replace("smart_", "")
-    key = f"{folder}/{basename}_smart_{safe_layout}.pdf"
+    if key is None:
+        from utils.filenames import make_sign_asset_basename
+        basename = make_sign_asset_basename(order_id if order_id else 0, size_key)
+        folder = f"pdfs/order_{order_id}" if order_id else "pdfs/tmp_smartsign"
+
+        # Append layout_id to filename to distinguish variants
+        # Clean layout_id for filename safety just in case
+        safe_layout = layout_id.replace("smart_", "")
+        key = f"{folder}/{basename}_smart_{safe_layout}.pdf"
     
     storage = get_storage()
-    storage.put_file(buffer, key, content_type="application/pdf")
-    
-    return key
+    fields = _asset_fields(asset)
+    if fields is None:
+        # Not a row/dict we can fingerprint: always render
+        storage.put_file(_render(), key, content_type="application/pdf")
+        return key
+
+    # Identical inputs reuse the stored render instead of redrawing
+    fields.update({'size_key': size_key, 'layout_id': layout_id, 'base_url': active_base_url})
+    return render_cache.render_to_storage(
+        'smartsign_pdf', key, _render, "application/pdf",
+        fields=fields,
+        image_keys=_image_keys(fields),
+        qr_user_id=user_id,
+        storage=storage,
+    )
+
+
+def render_smartsign_preview(asset, order_id=None, user_id=None, override_base_url=None, max_dimension=None):
+    """
+    Fast WebP preview of a SmartSign: the layout drawer runs at screen
+    resolution without bleed, so no print PDF is generated first.
+    Returns the storage key of the order's preview.
+    """
+    lu.register_fonts()
+    size_key, layout_id, layout, drawer = _resolve_layout(asset)
+    active_base_url = override_base_url or PUBLIC_BASE_URL
+
+    fields = _asset_fields(asset) or {}
+    fields.update({'size_key': size_key, 'layout_id': layout_id, 'base_url': active_base_url})
+    return render_layout_preview(
+        lambda c: drawer(c, layout, asset, user_id, active_base_url),
+        layout.width, layout.height,
+        preview_key_for(order_id, size_key),
+        fields=fields,
+        image_keys=_image_keys(fields),
+        qr_user_id=user_id,
+        max_dimension=max_dimension,
+        storage=get_storage(),
+    )
+
+
+def _asset_fields(asset):
+    """Every field of the asset row/dict (the drawers may read any of them), or None."""
+    if isinstance(asset, dict):
+        return dict(asset)
+    if hasattr(asset, 'keys'):
+        return {k: asset[k] for k in asset.keys()}
+    return None
 
 
 def _draw_modern_round(c, l, asset, user_id, base_url):
@@ -508,8 +546,7 @@ def _draw_modern_round(c, l, asset, user_id, base_url):
             p.circle(center_x, badge_y_center, head_d/2)
             c.clipPath(p, stroke=0)
             
-            img_data = storage.get_file(head_key)
-            img = ImageReader(img_data)
+            img = image_cache.load_image(storage, head_key, box=(head_d, head_d))
             c.drawImage(img, center_x - head_d/2, badge_y_center - head_d/2, width=head_d, height=head_d, mask='auto', preserveAspectRatio=True)
             c.restoreState()
         except Exception as e:
@@ -560,8 +597,9 @@ def _draw_modern_split(c, l, asset, user_id, base_url):
             p.rect(-l.bleed, -l.bleed, split_x + l.bleed, l.height + 2*l.bleed)
             c.clipPath(p, stroke=0)
             
-            img_data = storage.get_file(head_key)
-            img = ImageReader(img_data)
+            img = image_cache.load_image(
+                storage, head_key, box=(split_x + l.bleed, l.height + 2*l.bleed), cover=True
+            )
             
             # center crop logic simplified: draw image covering rect
             # We use drawImage with preserveAspectRatio=True usually, but here we want FILL.
@@ -696,8 +734,7 @@ def _draw_elegant_serif(c, l, asset, user_id, base_url):
             p.circle(center_x, head_y, head_dia/2)
             c.clipPath(p, stroke=0)
             
-            img_data = storage.get_file(head_key)
-            img = ImageReader(img_data)
+            img = image_cache.load_image(storage, head_key, box=(head_dia, head_dia))
             c.drawImage(img, center_x - head_dia/2, head_y - head_dia/2, width=head_dia, height=head_dia, mask='auto', preserveAspectRatio=True)
             c.restoreState()
             
@@ -1085,8 +1122,7 @@ def _draw_smart_v2_vertical_banner(c, l, asset, user_id, base_url):
             p.circle(content_center_x, head_y_center, head_d/2)
             c.clipPath(p, stroke=0)
             
-            img_data = storage.get_file(head_key)
-            img = ImageReader(img_data)
+            img = image_cache.load_image(storage, head_key, box=(head_d, head_d), cover=True)
             c.drawImage(img, content_center_x - head_d/2, head_y_center - head_d/2, width=head_d, height=head_d)
             c.restoreState()
             
@@ -1183,8 +1219,7 @@ def _draw_smart_v2_vertical_banner(c, l, asset, user_id, base_url):
              max_h = to_pt(1.5) 
              max_w = content_w * 0.6
              
-             l_data = storage.get_file(logo_key)
-             l_img = ImageReader(l_data)
+             l_img = image_cache.load_image(storage, logo_key, box=(max_w, max_h))
              iw, ih = l_img.getSize()
              aspect = iw / ih
              
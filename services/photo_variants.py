@@ -0,0 +1,150 @@
+"""
+Property Photo Variants
+
+Uploads are stored as-is (up to 16MB). After upload, an async job
+('photo_variants') derives:
+- EXIF-normalized WebP (and optionally AVIF) copies at PHOTO_VARIANT_WIDTHS
+- a tiny blurred WebP data: URI (LQIP) painted while the real photo loads
+
+Variants live next to the original (`<original key without ext>/w480.webp`)
+and are recorded on the property_photos row. The property page builds a
+WebP srcset from them (plus an AVIF <source> when AVIF copies exist) and falls
+back to the original while they are missing.
+"""
+import base64
+import io
+import json
+import logging
+import os
+
+from PIL import Image, ImageOps, features
+
+import config
+from database import get_db
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE = 'photo_variants'
+CONTENT_TYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+LQIP_WIDTH = 24
+
+
+def _formats():
+    formats = []
+    for fmt in config.PHOTO_VARIANT_FORMATS:
+        if fmt in CONTENT_TYPES and features.check(fmt):
+            formats.append(fmt)
+        else:
+            logger.warning(f"[PhotoVariants] Format {fmt!r} unsupported by this Pillow build; skipping.")
+    return formats or ['webp']
+
+
+def variant_key(original_key, width, fmt):
+    return f"{os.path.splitext(original_key)[0]}/w{width}.{fmt}"
+
+
+def build_variants(raw, original_key, storage):
+    """
+    Write the variants for one photo. Returns (variants, lqip, (width, height)).
+    Widths wider than the (oriented) original are not upscaled; the original
+    width is used once instead.
+    """
+    with Image.open(io.BytesIO(raw)) as img:
+        img = ImageOps.exif_transpose(img)
+        img = img.convert('RGB')
+    width, height = img.size
+
+    widths = sorted({min(w, width) for w in config.PHOTO_VARIANT_WIDTHS})
+    variants = []
+    for target in widths:
+        resized = img if target == width else img.resize(
+            (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+        )
+        for fmt in _formats():
+            out = io.BytesIO()
+            resized.save(out, format=fmt.upper(), quality=config.PHOTO_VARIANT_QUALITY)
+            key = variant_key(original_key, target, fmt)
+            storage.put_file(out.getvalue(), key, content_type=CONTENT_TYPES[fmt])
+            variants.append({'width': target, 'format': fmt, 'key': key})
+
+    thumb = img.resize((LQIP_WIDTH, max(1, round(height * LQIP_WIDTH / width))), Image.Resampling.BOX)
+    out = io.BytesIO()
+    thumb.save(out, format='WEBP', quality=30)
+    lqip = "data:image/webp;base64," + base64.b64encode(out.getvalue()).decode('ascii')
+    return variants, lqip, (width, height)
+
+
+def generate_for_photo(photo_id, storage=None):
+    """Derive and record variants for a property_photos row. Returns False if the row is gone."""
+    db = get_db()
+    row = db.execute("SELECT id, filename FROM property_photos WHERE id = %s", (photo_id,)).fetchone()
+    if not row:
+        return False
+    storage = storage or get_storage()
+    raw = storage.get_file(row['filename']).getvalue()
+    variants, lqip, (width, height) = build_variants(raw, row['filename'], storage)
+
+    cursor = db.execute(
+        "UPDATE property_photos SET variants = %s, lqip = %s, width = %s, height = %s WHERE id = %s",
+        (json.dumps(variants), lqip, width, height, photo_id)
+    )
+    db.commit()
+    if cursor.rowcount == 0:
+        # Deleted while we rendered: don't leave orphans behind
+        delete_variants(variants, storage)
+        return False
+    logger.info(f"[PhotoVariants] Photo {photo_id}: {len(variants)} variants")
+    return True
+
+
+def enqueue(photo_ids):
+    """Queue variant generation; call after the photo rows are committed."""
+    from services.async_jobs import enqueue as enqueue_job
+    for photo_id in photo_ids:
+        try:
+            enqueue_job(JOB_TYPE, {'photo_id': photo_id})
+        except Exception as e:
+            # The page falls back to the original; a backfill can catch up later
+            logger.warning(f"[PhotoVariants] Failed to enqueue photo {photo_id}: {e}")
+
+
+def variant_keys(variants):
+    """Storage keys of a photo's variants (JSONB list or its JSON text)."""
+    if not variants:
+        return []
+    if isinstance(variants, str):
+        variants = json.loads(variants)
+    return [variant['key'] for variant in variants if variant.get('key')]
+
+
+def delete_variants(variants, storage=None):
+    """Best-effort removal of a photo's variant objects."""
+    keys = variant_keys(variants)
+    if not keys:
+        return
+    storage = storage or get_storage()
+    for key in keys:
+        try:
+            storage.delete(key)
+        except Exception as e:
+            logger.warning(f"[PhotoVariants] Failed to delete {key}: {e}")
+
+
+def srcset_entries(rows, fmt='webp'):
+    """
+    Per photo row: {'srcset_keys': [(key, width), ...], 'lqip': str|None,
+    'width', 'height'}. Rows without variants get an empty srcset.
+    """
+    entries = []
+    for row in rows:
+        variants = row.get('variants') or []
+        if isinstance(variants, str):
+            variants = json.loads(variants)
+        entries.append({
+            'srcset_keys': [(v['key'], v['width']) for v in variants if v.get('format') == fmt],
+            'lqip': row.get('lqip'),
+            'width': row.get('width'),
+            'height': row.get('height'),
+        })
+    return entries
@@ -0,0 +1,194 @@
+"""
+Font Registry for generated PDFs.
+
+Fonts are registered once per process (create_app) from a precomputed
+manifest (static/fonts/manifest.json, built by scripts/build_font_manifest.py)
+instead of walking static/fonts on every render path.
+
+Embedding: every registered face is a SubsetTTFont. Each document embeds only
+the glyphs it draws (ReportLab subsets per document, 256 glyphs per subset).
+On top of that the subset drops the font's license/description name records
+(about a third of a small Inter subset) and is always Flate-compressed, even
+on canvases created with pageCompression=0.
+"""
+import io
+import json
+import logging
+import os
+import struct
+
+from reportlab.pdfbase import pdfdoc, pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFontFace
+
+logger = logging.getLogger(__name__)
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static", "fonts")
+MANIFEST_PATH = os.path.join(FONTS_DIR, "manifest.json")
+
+# Role -> font name for the faces the print layouts use (see layout_utils.FONT_*)
+ROLES = ("body", "medium", "bold", "serif", "script")
+REQUIRED_ROLES = ("body", "bold")
+
+_manifest = None
+_registered = {}
+
+
+# name table records kept in embedded subsets: family, subfamily, unique ID,
+# full name, PostScript name (license/description text is dropped)
+KEEP_NAME_IDS = (1, 2, 3, 4, 6)
+
+
+def trim_name_table(data, keep=KEEP_NAME_IDS):
+    """Rebuild a 'name' table (format 0) with only the `keep` name IDs."""
+    fmt, count, string_offset = struct.unpack(">HHH", data[:6])
+    if fmt != 0:
+        return data
+    records, strings = [], b""
+    for i in range(count):
+        platform, encoding, language, name_id, length, offset = struct.unpack(
+            ">HHHHHH", data[6 + 12 * i:18 + 12 * i]
+        )
+        if name_id not in keep:
+            continue
+        start = string_offset + offset
+        records.append((platform, encoding, language, name_id, length, len(strings)))
+        strings += data[start:start + length]
+    header = struct.pack(">HHH", 0, len(records), 6 + 12 * len(records))
+    return header + b"".join(struct.pack(">HHHHHH", *r) for r in records) + strings
+
+
+class _SubsetFace(TTFontFace):
+    """Face whose per-document subsets carry a trimmed name table and are always compressed."""
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self._subset_name_table = trim_name_table(super().get_table("name"))
+
+    def get_table(self, tag):
+        # makeSubset copies 'name' verbatim from the source font
+        if tag == "name" and hasattr(self, "_subset_name_table"):
+            return self._subset_name_table
+        return super().get_table(tag)
+
+    def addSubsetObjects(self, doc, fontname, subset):
+        ref = super().addSubsetObjects(doc, fontname, subset)
+        font_file = doc.idToObject["fontFile:%s(%s)" % (self.filename, fontname)]
+        if not font_file.filters:
+            font_file.filters = [pdfdoc.PDFZCompress]
+        return ref
+
+
+class SubsetTTFont(TTFont):
+    """TTFont embedding compact per-document subsets (see _SubsetFace)."""
+
+    def __init__(self, name, filename):
+        # asciiReadable (ReportLab's default) pre-assigns all of printable ASCII to
+        # subset 0, embedding ~95 glyphs per face whether drawn or not. Without it
+        # only drawn glyphs are embedded; text stays extractable via ToUnicode.
+        super().__init__(name, filename, asciiReadable=False)
+        # TTFont always builds a plain TTFontFace; replace it with the subsetting face
+        self.face = _SubsetFace(filename)
+
+
+def load_manifest(path=None):
+    """Parsed manifest ({"fonts": [{name, file, role, bytes, sha256}, ...]}); cached for the default path."""
+    global _manifest
+    if path is None and _manifest is not None:
+        return _manifest
+    with open(path or MANIFEST_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if path is None:
+        _manifest = manifest
+    return manifest
+
+
+def register_all(manifest=None, fonts_dir=FONTS_DIR):
+    """
+    Register every manifest font that is present on disk. Idempotent.
+    Returns {role: font name} for the registered faces.
+    """
+    manifest = manifest or load_manifest()
+    for entry in manifest["fonts"]:
+        name = entry["name"]
+        if name in _registered:
+            continue
+        path = os.path.join(fonts_dir, entry["file"])
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            logger.warning(f"[Fonts] {entry['file']} listed in manifest but missing from {fonts_dir}")
+            continue
+        if entry.get("bytes") is not None and size != entry["bytes"]:
+            # Renders still work; render cache fingerprints would be stale
+            logger.warning(f"[Fonts] {entry['file']} does not match manifest; rerun scripts/build_font_manifest.py")
+        pdfmetrics.registerFont(SubsetTTFont(name, path))
+        _registered[name] = entry.get("role")
+    return {role: name for name, role in _registered.items() if role}
+
+
+def fingerprint():
+    """(file, sha256) of every manifest font; part of render cache keys."""
+    try:
+        fonts = load_manifest()["fonts"]
+    except (OSError, ValueError):
+        return []
+    return sorted((entry["file"], entry.get("sha256")) for entry in fonts)
+
+
+def embedded_font_bytes(pdf_bytes):
+    """
+    Stored size of each embedded font program in a PDF:
+    {BaseFont: bytes}, summed over subsets of the same face.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    seen = {}
+    for page in reader.pages:
+        resources = page.get("/Resources")
+        if resources is None:
+            continue
+        resources = resources.get_object()
+        fonts = resources.get("/Font")
+        for font in (fonts.get_object().values() if fonts else []):
+            _collect_font(font.get_object(), seen)
+        _collect_form_fonts(resources, seen)
+
+    totals = {}
+    for name, length in seen.values():
+        # Subset tags (ABCDEF+Name) differ per subset of the same face
+        base = name.split("+", 1)[-1]
+        totals[base] = totals.get(base, 0) + length
+    return totals
+
+
+def _collect_font(font, seen):
+    descriptor = font.get("/FontDescriptor")
+    if descriptor is None and "/DescendantFonts" in font:
+        descriptor = font["/DescendantFonts"][0].get_object().get("/FontDescriptor")
+    if descriptor is None:
+        return
+    descriptor = descriptor.get_object()
+    for key in ("/FontFile2", "/FontFile", "/FontFile3"):
+        ref = descriptor.get(key)
+        if ref is not None:
+            stream = ref.get_object()
+            seen[(ref.idnum, ref.generation)] = (str(font.get("/BaseFont", "")).lstrip("/"), len(stream._data))
+
+
+def _collect_form_fonts(resources, seen, depth=0):
+    """Fonts used inside form XObjects (e.g. draw_repeated_pages sign faces)."""
+    xobjects = resources.get("/XObject")
+    if not xobjects or depth > 4:
+        return
+    for xobject in xobjects.get_object().values():
+        xobject = xobject.get_object()
+        if xobject.get("/Subtype") != "/Form":
+            continue
+        form_resources = xobject.get("/Resources")
+        if not form_resources:
+            continue
+        form_resources = form_resources.get_object()
+        for font in (form_resources.get("/Font") or {}).values():
+            _collect_font(font.get_object(), seen)
+        _collect_form_fonts(form_resources, seen, depth + 1)
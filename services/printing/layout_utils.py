@@ -6,15 +6,14 @@ Handles:
 2. Shared Identity Block Rendering (Headshot, Name, Details, Brokerage).
 3. Text Fitting Utilities.
 """
-import os
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.utils import ImageReader
 from reportlab.lib.colors import HexColor
 import logging
 
-# 1. Font Registration
-FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static", "fonts")
+from services.printing import fonts
+from utils import image_cache, text_metrics
+
+# 1. Font Registration (services/printing/fonts.py: manifest registry, per-document subsets)
+FONTS_DIR = fonts.FONTS_DIR
 
 # Safe Fallbacks (Helvetica used only as a last resort in non-prod)
 FONT_BODY = "Helvetica"
@@ -27,67 +26,38 @@ _fonts_registered = False
 
 def register_fonts():
     """
-    Register Inter fonts from static/fonts/.
+    Register the print fonts listed in static/fonts/manifest.json.
+    Called once at process start (create_app); later calls are no-ops.
     Raises RuntimeError in production if required fonts are missing.
     """
     global FONT_BODY, FONT_MED, FONT_BOLD, FONT_SERIF, FONT_SCRIPT, _fonts_registered
     
     if _fonts_registered:
         return
-        
-    # Search for fonts recursively under static/fonts
-    found_fonts = {}
-    target_fonts = {
-        "Inter-Regular.ttf": "Regular",
-        "Inter-Medium.ttf": "Medium",
-        "Inter-Bold.ttf": "Bold",
-        "BodoniModa-VariableFont_opsz,wght.ttf": "Bodoni",
-        "Allura-Regular.ttf": "Allura"
-    }
-    
-    for root, dirs, files in os.walk(FONTS_DIR):
-        for f in files:
-            if f in target_fonts:
-                found_fonts[f] = os.path.join(root, f)
 
-    # Required for success: Regular and Bold
-    has_required = "Inter-Regular.ttf" in found_fonts and "Inter-Bold.ttf" in found_fonts
-    
     from config import IS_PRODUCTION
-    if not has_required and IS_PRODUCTION:
-        raise RuntimeError(f"CRITICAL: Required Inter fonts (Regular/Bold) missing from {FONTS_DIR}. SmartSigns cannot be generated.")
-
     try:
-        if "Inter-Regular.ttf" in found_fonts:
-            pdfmetrics.registerFont(TTFont('Inter-Regular', found_fonts["Inter-Regular.ttf"]))
-            FONT_BODY = 'Inter-Regular'
-            
-        if "Inter-Medium.ttf" in found_fonts:
-            pdfmetrics.registerFont(TTFont('Inter-Medium', found_fonts["Inter-Medium.ttf"]))
-            FONT_MED = 'Inter-Medium'
-            
-        if "Inter-Bold.ttf" in found_fonts:
-            pdfmetrics.registerFont(TTFont('Inter-Bold', found_fonts["Inter-Bold.ttf"]))
-            FONT_BOLD = 'Inter-Bold'
-            
-        # New Premium Fonts (SmartSign V2)
-        if "BodoniModa-VariableFont_opsz,wght.ttf" in found_fonts:
-            pdfmetrics.registerFont(TTFont('BodoniModa', found_fonts["BodoniModa-VariableFont_opsz,wght.ttf"]))
-            FONT_SERIF = 'BodoniModa'
-            
-        if "Allura-Regular.ttf" in found_fonts:
-            pdfmetrics.registerFont(TTFont('Allura', found_fonts["Allura-Regular.ttf"]))
-            FONT_SCRIPT = 'Allura'
-            
-        # Success if we got the essentials
-        if FONT_BODY == 'Inter-Regular' and FONT_BOLD == 'Inter-Bold':
-            _fonts_registered = True
-            
+        roles = fonts.register_all()
     except Exception as e:
         if IS_PRODUCTION:
             raise RuntimeError(f"CRITICAL: Failed to register Inter fonts: {e}")
-        import logging
         logging.getLogger(__name__).warning(f"[PDF Utils] Warning: Failed to register Inter fonts: {e}")
+        return
+
+    # Required for success: Regular and Bold
+    missing = [role for role in fonts.REQUIRED_ROLES if role not in roles]
+    if missing and IS_PRODUCTION:
+        raise RuntimeError(f"CRITICAL: Required Inter fonts (Regular/Bold) missing from {FONTS_DIR}. SmartSigns cannot be generated.")
+
+    FONT_BODY = roles.get("body", FONT_BODY)
+    FONT_MED = roles.get("medium", FONT_MED)
+    FONT_BOLD = roles.get("bold", FONT_BOLD)
+    FONT_SERIF = roles.get("serif", FONT_SERIF)
+    FONT_SCRIPT = roles.get("script", FONT_SCRIPT)
+
+    # Success if we got the essentials
+    if not missing:
+        _fonts_registered = True
 
 # 1.1 Phone Formatting
 def format_phone(raw):
@@ -109,15 +79,7 @@ def fit_text_one_line(c, text, font_name, max_width, max_font, min_font):
     Returns: chosen_size
     """
     if not text: return min_font
-    
-    current_size = max_font
-    while current_size >= min_font:
-        c.setFont(font_name, current_size)
-        if c.stringWidth(text, font_name, current_size) <= max_width:
-            return current_size
-        current_size -= 1
-        
-    return min_font
+    return text_metrics.fit_size(text, font_name, max_width, max_font, min_font)
 
 def draw_fitted_text_block(c, text_list, x, y_top, w, align='center', font_map=None, leading=1.2):
     """
@@ -238,8 +200,7 @@ def draw_identity_block(c, x, y, w, h, asset, storage, theme='dark', cta_text=No
             p.circle(head_x + head_size/2, head_y + head_size/2, head_size/2)
             c.clipPath(p, stroke=0)
             
-            img_data = storage.get_file(head_key)
-            img = ImageReader(img_data)
+            img = image_cache.load_image(storage, head_key, box=(head_size, head_size), cover=True)
             c.drawImage(img, head_x, head_y, width=head_size, height=head_size)
             c.restoreState()
             has_head = True
@@ -297,8 +258,7 @@ def draw_identity_block(c, x, y, w, h, asset, storage, theme='dark', cta_text=No
     
     if logo_key and storage.exists(logo_key):
         try:
-             l_data = storage.get_file(logo_key)
-             l_img = ImageReader(l_data)
+             l_img = image_cache.load_image(storage, logo_key, box=(brok_w, safe_h))
              iw, ih = l_img.getSize()
              aspect = iw / ih
              
@@ -64,7 +64,7 @@ def generate_smart_riser_pdf(order, output_path=None):
     bleed = 0.125 * inch
     
     # Fetch QR URL
-    from utils.pdf_generator import draw_qr
+    from utils.pdf_generator import draw_qr, draw_repeated_pages
     from config import PUBLIC_BASE_URL
     
     qr_url = f"{PUBLIC_BASE_URL}" 
@@ -125,14 +125,8 @@ def generate_smart_riser_pdf(order, output_path=None):
         
         c.restoreState()
 
-    # Page 1
-    draw_page(c)
-    c.showPage()
-    
-    # Page 2
-    draw_page(c)
-    c.showPage()
-    
+    # Front / back: one drawn face referenced by both pages
+    draw_repeated_pages(c, draw_page)
     c.save()
     pdf_buffer.seek(0)
     
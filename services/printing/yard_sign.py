@@ -17,7 +17,9 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.units import inch
 from database import get_db
 from utils.storage import get_storage
-from utils.pdf_generator import LayoutSpec, SIGN_SIZES, DEFAULT_SIGN_SIZE, _draw_standard_layout, _draw_landscape_split_layout, _draw_modern_round_layout, hex_to_rgb
+from services import render_cache
+from utils.pdf_preview import preview_key_for, render_layout_preview
+from utils.pdf_generator import LayoutSpec, SIGN_SIZES, DEFAULT_SIGN_SIZE, _draw_standard_layout, _draw_landscape_split_layout, _draw_modern_round_layout, hex_to_rgb, draw_repeated_pages
 from utils.listing_designs import _draw_yard_phone_qr_premium, _draw_yard_address_qr_premium
 from services.printing.layout_utils import register_fonts
 from config import PUBLIC_BASE_URL
@@ -69,21 +71,14 @@ def _format_price(price_val):
         return price_str
 
 
-def generate_yard_sign_pdf(order, output_path=None, output_key=None):
+def _yard_sign_spec(order):
     """
-    Generate the print-ready PDF for a standard Yard Sign.
-    
-    Args:
-        order (dict): Order details (address, QR data, agent info)
-        output_path (str, optional): Local path to save. If None, saves to tmp.
-        output_key (str, optional): Explicit storage key. If provided, overrides default naming.
-        
-    Returns:
-        str: Storage key of the generated PDF (e.g. "pdfs/.../yard_sign_18x24.pdf")
+    Resolve an order's sign data and layout into what both the print PDF and
+    the fast preview need: the layout, a face drawer (origin at the trim
+    corner) and the render cache fields.
     """
     register_fonts()
     db = get_db()
-    storage = get_storage()
     
     # Handle both dict-like and object-like access
     def get_val(obj, key, default=None):
@@ -200,18 +195,10 @@ def generate_yard_sign_pdf(order, output_path=None, output_key=None):
     if layout_id in LAYOUT_ALIASES:
         layout_id = LAYOUT_ALIASES[layout_id]
 
-    # Generate PDF in memory
-    pdf_buffer = io.BytesIO()
-    c = canvas.Canvas(pdf_buffer, pagesize=(layout.width + 2*layout.bleed, layout.height + 2*layout.bleed))
-    
     # Determine if landscape (width > height)
     is_landscape = size_config['width_in'] > size_config['height_in']
-    
-    # Draw 2 identical pages (front/back)
-    for page_num in range(2):
-        c.saveState()
-        c.translate(layout.bleed, layout.bleed)
-        
+
+    def _draw_face(c):
         args_v2 = {
             'address': address, 'beds': beds, 'baths': baths, 'sqft': sqft, 'price': price,
             'agent_name': agent_name, 'brokerage': brokerage, 
@@ -223,7 +210,7 @@ def generate_yard_sign_pdf(order, output_path=None, output_key=None):
 
         if layout_id in ('yard_phone_qr_premium', 'listing_v2_phone_qr_premium'):
              _draw_yard_phone_qr_premium(c, layout, **args_v2)
-             
+         
         elif layout_id in ('yard_address_qr_premium', 'listing_v2_address_qr_premium'):
              _draw_yard_address_qr_premium(c, layout, **args_v2)
 
@@ -255,28 +242,97 @@ def generate_yard_sign_pdf(order, output_path=None, output_key=None):
                     agent_name, brokerage, agent_email, agent_phone,
                     None, agent_photo_key, sign_color, qr_value=qr_url, user_id=user_id, logo_key=agent_logo_key
                 )
-        
-        c.restoreState()
-        c.showPage()
+
+    return {
+        'order_id': order_id,
+        'user_id': user_id,
+        'sign_size': sign_size,
+        'layout': layout,
+        'draw_face': _draw_face,
+        'fields': {
+            'layout_id': layout_id, 'sign_size': sign_size, 'sign_color': sign_color,
+            'address': address, 'beds': beds, 'baths': baths, 'sqft': sqft, 'price': price,
+            'agent_name': agent_name, 'brokerage': brokerage,
+            'agent_email': agent_email, 'agent_phone': agent_phone, 'qr_value': qr_url,
+            'state': prop_row.get('state'), 'city': prop_row.get('city'),
+        },
+        'image_keys': (agent_photo_key, agent_logo_key),
+    }
+
+
+def generate_yard_sign_pdf(order, output_path=None, output_key=None):
+    """
+    Generate the print-ready PDF for a standard Yard Sign.
     
-    c.save()
-    pdf_buffer.seek(0)
+    Args:
+        order (dict): Order details (address, QR data, agent info)
+        output_path (str, optional): Local path to save. If None, saves to tmp.
+        output_key (str, optional): Explicit storage key. If provided, overrides default naming.
+        
+    Returns:
+        str: Storage key of the generated PDF (e.g. "pdfs/.../yard_sign_18x24.pdf")
+    """
+    spec = _yard_sign_spec(order)
+    storage = get_storage()
+    layout = spec['layout']
+
+    def _render():
+        # Generate PDF in memory
+        pdf_buffer = io.BytesIO()
+        c = canvas.Canvas(pdf_buffer, pagesize=(layout.width + 2*layout.bleed, layout.height + 2*layout.bleed))
+
+        # 2 identical pages (front/back) referencing one drawn face
+        def _draw_page(c):
+            c.saveState()
+            c.translate(layout.bleed, layout.bleed)
+            spec['draw_face'](c)
+            c.restoreState()
+
+        draw_repeated_pages(c, _draw_page)
+        c.save()
+        pdf_buffer.seek(0)
+        return pdf_buffer
     
-    # Save to storage
-    # ----------------
     # Save to storage
     # ----------------
     if output_key:
         pdf_key = output_key
     else:
+        order_id = spec['order_id']
         folder = f"pdfs/order_{order_id}" if order_id else "pdfs/misc"
         # Filename: yard_sign_{SIZE}.pdf  (e.g. yard_sign_18x24.pdf)
         # If we have multiple signs? This generator is usually 1-to-1 with an order item.
-        pdf_key = f"{folder}/yard_sign_{sign_size}.pdf"
-    
-    storage.put_file(pdf_buffer, pdf_key, content_type="application/pdf")
+        pdf_key = f"{folder}/yard_sign_{spec['sign_size']}.pdf"
     
-    return pdf_key
+    # Identical inputs reuse the stored render instead of redrawing
+    return render_cache.render_to_storage(
+        'yard_sign_pdf', pdf_key, _render, "application/pdf",
+        fields=spec['fields'],
+        image_keys=spec['image_keys'],
+        qr_user_id=spec['user_id'],
+        storage=storage,
+    )
+
+
+def render_yard_sign_preview(order, max_dimension=None):
+    """
+    Fast WebP preview of a yard sign order: the same face drawer as the print
+    PDF, drawn at screen resolution without bleed (no print PDF involved).
+
+    Returns:
+        str: Storage key of the preview (the order's usual preview key)
+    """
+    spec = _yard_sign_spec(order)
+    layout = spec['layout']
+    return render_layout_preview(
+        spec['draw_face'], layout.width, layout.height,
+        preview_key_for(spec['order_id'], spec['sign_size']),
+        fields=spec['fields'],
+        image_keys=spec['image_keys'],
+        qr_user_id=spec['user_id'],
+        max_dimension=max_dimension,
+        storage=get_storage(),
+    )
 
 
 def generate_yard_sign_pdf_from_order_row(order_row, *, storage=None, db=None):
@@ -3,6 +3,7 @@ import logging
 from database import get_db
 import utils.storage as storage_module  # Module reference for testability
 from utils.filenames import make_sign_asset_basename
+from services.photo_variants import variant_keys
 
 logger = logging.getLogger(__name__)
 
@@ -21,141 +22,148 @@ def delete_property_fully(property_id: int):
         bool: True if successful, False if DB error (storage errors logged but ignored)
     """
     db = get_db()
-    storage = storage_module.get_storage()
-    
-    # 1. Gather Data (Read-only phase)
-    # We need data to know what storage keys to delete
-    
-    # Get Property Info (QR code)
-    prop = db.execute("SELECT id, qr_code FROM properties WHERE id = %s", (property_id,)).fetchone()
-    if not prop:
+    if not db.execute("SELECT 1 FROM properties WHERE id = %s", (property_id,)).fetchone():
         return True # Already gone
-    
-    qr_code = prop['qr_code']
-    
-    # Get Photos
-    photos = db.execute("SELECT filename FROM property_photos WHERE property_id = %s", (property_id,)).fetchall()
-    
-    # Get Orders (for PDFs and Previews)
-    orders = db.execute("SELECT id, sign_pdf_path, sign_size FROM orders WHERE property_id = %s", (property_id,)).fetchall()
-    
-    # 2. Delete Storage Assets (Best Effort)
-    # Errors here should NOT roll back the DB deletion, so we just log them.
-    
-    # Delete Property Photos
-    for photo in photos:
+    return delete_properties(db, [property_id])['deleted'] == 1
+
+
+def storage_keys_for_properties(db, property_ids):
+    """Every storage key owned by these properties (photos + variants, QR, order PDFs/previews, print jobs)."""
+    keys = []
+
+    # Property Photos (+ responsive variants)
+    for photo in db.execute(
+        "SELECT filename, variants FROM property_photos WHERE property_id = ANY(%s)", (property_ids,)
+    ).fetchall():
         if photo['filename']:
-            try:
-                storage.delete(photo['filename'])
-            except Exception as e:
-                logger.warning(f"[Delete] Failed to delete photo {photo['filename']}: {e}")
-                
-    # Delete QR Image
-    if qr_code:
-        try:
-            qr_key = f"qr/{qr_code}.png"
-            storage.delete(qr_key)
-        except Exception as e:
-            logger.warning(f"[Delete] Failed to delete QR {qr_key}: {e}")
-            
-    # Delete Order Assets
-    for order in orders:
-        # PDF
+            keys.append(photo['filename'])
+        keys.extend(variant_keys(photo['variants']))
+
+    # QR Images
+    for prop in db.execute(
+        "SELECT qr_code FROM properties WHERE id = ANY(%s) AND qr_code IS NOT NULL", (property_ids,)
+    ).fetchall():
+        keys.append(f"qr/{prop['qr_code']}.png")
+
+    # Order Assets
+    for order in db.execute(
+        "SELECT id, sign_pdf_path, sign_size FROM orders WHERE property_id = ANY(%s)", (property_ids,)
+    ).fetchall():
         if order['sign_pdf_path']:
-            try:
-                storage.delete(order['sign_pdf_path'])
-            except Exception as e:
-                logger.warning(f"[Delete] Failed to delete PDF {order['sign_pdf_path']}: {e}")
-        
-        # Preview
+            keys.append(order['sign_pdf_path'])
         # deterministic: previews/order_{order_id}/{basename}.webp
-        # basename comes from make_sign_asset_basename
         if order['sign_size']:
-            try:
-                basename = make_sign_asset_basename(order['id'], order['sign_size'])
-                preview_key = f"previews/order_{order['id']}/{basename}.webp"
-                storage.delete(preview_key)
-            except Exception as e:
-                logger.warning(f"[Delete] Failed to delete preview {preview_key}: {e}")
-                
-    # Delete Print Job Assets
-    # Fetch job_ids related to these orders
-    if orders:
-        order_ids = [o['id'] for o in orders]
-        placeholders = ','.join(['%s'] * len(order_ids))
-        print_jobs = db.execute(
-            f"SELECT filename FROM print_jobs WHERE order_id IN ({placeholders})", 
-            (*order_ids,)
-        ).fetchall()
-        
-        for job in print_jobs:
-            if job['filename']:
-                try:
-                    storage.delete(job['filename'])
-                except Exception as e:
-                    logger.warning(f"[Delete] Failed to delete print job asset {job['filename']}: {e}")
+            basename = make_sign_asset_basename(order['id'], order['sign_size'])
+            keys.append(f"previews/order_{order['id']}/{basename}.webp")
+
+    # Print Job Assets
+    for job in db.execute("""
+        SELECT filename FROM print_jobs
+        WHERE order_id IN (SELECT id FROM orders WHERE property_id = ANY(%s))
+          AND filename IS NOT NULL
+    """, (property_ids,)).fetchall():
+        keys.append(job['filename'])
+
+    return list(dict.fromkeys(keys))
+
+
+def _delete_rows(db, property_ids):
+    """DB records of these properties in FK-safe order (caller owns the transaction)."""
+    # lead_notifications (FK -> leads)
+    db.execute("""
+        DELETE FROM lead_notifications 
+        WHERE lead_id IN (SELECT id FROM leads WHERE property_id = ANY(%s))
+    """, (property_ids,))
+
+    # leads (FK -> properties)
+    db.execute("DELETE FROM leads WHERE property_id = ANY(%s)", (property_ids,))
+
+    # checkout_attempts (FK -> orders)
+    db.execute("""
+        DELETE FROM checkout_attempts 
+        WHERE order_id IN (SELECT id FROM orders WHERE property_id = ANY(%s))
+    """, (property_ids,))
+
+    # print_jobs (order_id, no FK constraint)
+    db.execute("""
+        DELETE FROM print_jobs 
+        WHERE order_id IN (SELECT id FROM orders WHERE property_id = ANY(%s))
+    """, (property_ids,))
+
+    # orders (FK -> properties)
+    db.execute("DELETE FROM orders WHERE property_id = ANY(%s)", (property_ids,))
+
+    # qr_scans (FK -> properties)
+    db.execute("DELETE FROM qr_scans WHERE property_id = ANY(%s)", (property_ids,))
+
+    # property_views (FK -> properties)
+    db.execute("DELETE FROM property_views WHERE property_id = ANY(%s)", (property_ids,))
+
+    # property_daily_stats (analytics rollup, no FK)
+    db.execute("DELETE FROM property_daily_stats WHERE property_id = ANY(%s)", (property_ids,))
+
+    # property_photos (FK -> properties)
+    db.execute("DELETE FROM property_photos WHERE property_id = ANY(%s)", (property_ids,))
+
+    # properties
+    cur = db.execute("DELETE FROM properties WHERE id = ANY(%s)", (property_ids,))
+    return cur.rowcount
+
+
+def delete_properties(db, property_ids, storage=None):
+    """
+    Set-based delete_property_fully for a batch of properties.
+
+    Storage keys are gathered up front and removed with one storage.delete_many
+    (S3 DeleteObjects batches / parallel local unlinks); storage errors are
+    logged but ignored. DB records go in one transaction. If that fails (e.g.
+    one property still has a row the FK order above does not cover), each
+    property is retried in its own transaction so one bad row does not block
+    the batch.
+
+    Returns:
+        dict: {"deleted": int, "failed_ids": [...], "storage_keys": int, "storage_failed": int}
+    """
+    ids = [int(pid) for pid in dict.fromkeys(property_ids) if pid is not None]
+    result = {"deleted": 0, "failed_ids": [], "storage_keys": 0, "storage_failed": 0}
+    if not ids:
+        return result
+    storage = storage or storage_module.get_storage()
+
+    # 1. Gather Data (Read-only phase)
+    from services.qr_resolution import codes_for_properties, invalidate_codes
+    resolved_codes = codes_for_properties(db, ids)
+    keys = storage_keys_for_properties(db, ids)
+
+    # 2. Delete Storage Assets (Best Effort)
+    # Errors here should NOT roll back the DB deletion, so we just log them.
+    failed_keys = storage.delete_many(keys)
+    for key in failed_keys:
+        logger.warning(f"[Delete] Failed to delete storage key {key}")
+    result["storage_keys"] = len(keys)
+    result["storage_failed"] = len(failed_keys)
 
     # 3. Delete DB Records (Transactional)
     try:
-        # Order satisfies Postgres cascading requirements
-        
-        # lead_notifications (FK -> leads)
-        db.execute("""
-            DELETE FROM lead_notifications 
-            WHERE lead_id IN (SELECT id FROM leads WHERE property_id = %s)
-        """, (property_id,))
-        
-        # leads (FK -> properties)
-        db.execute("DELETE FROM leads WHERE property_id = %s", (property_id,))
-        
-        # order_agent_snapshot (Legacy table, deprecated usage)
-        # db.execute("""
-        #     DELETE FROM order_agent_snapshot 
-        #     WHERE order_id IN (SELECT id FROM orders WHERE property_id = %s)
-        # """, (property_id,))
-        
-        # checkout_attempts (FK -> orders, if column exists)
-        # Check if table exists first to be safe or just try/except
-        try:
-            db.execute("""
-                DELETE FROM checkout_attempts 
-                WHERE order_id IN (SELECT id FROM orders WHERE property_id = %s)
-            """, (property_id,))
-        except Exception:
-            # Table or column might not exist in some states
-            pass
-            
-        # print_jobs (FK -> orders implicitly via order_id)
-        # Need to delete print_jobs first if orders prevents it?
-        # Typically print_jobs references orders? 
-        # database.py schema for print_jobs: order_id INTEGER. No FOREIGN KEY constraint mentioned in `database.py` line 639.
-        # But good practice to clean up.
-        db.execute(f"""
-            DELETE FROM print_jobs 
-            WHERE order_id IN (SELECT id FROM orders WHERE property_id = %s)
-        """, (property_id,))
-            
-        # orders (FK -> properties)
-        db.execute("DELETE FROM orders WHERE property_id = %s", (property_id,))
-        
-        # qr_scans (FK -> properties)
-        db.execute("DELETE FROM qr_scans WHERE property_id = %s", (property_id,))
-        
-        # property_views (FK -> properties)
-        db.execute("DELETE FROM property_views WHERE property_id = %s", (property_id,))
-        
-        # property_photos (FK -> properties)
-        db.execute("DELETE FROM property_photos WHERE property_id = %s", (property_id,))
-        
-        # properties
-        db.execute("DELETE FROM properties WHERE id = %s", (property_id,))
-        
+        result["deleted"] = _delete_rows(db, ids)
         db.commit()
-        logger.info(f"[Delete] Successfully deleted property {property_id} and related data.")
-        return True
-        
     except Exception as e:
         db.rollback()
-        logger.error(f"[Delete] DB Error deleting property {property_id}: {e}")
-        # Storage assets are already gone, but that's acceptable (orphaned DB records is worse)
-        return False
+        if len(ids) == 1:
+            logger.error(f"[Delete] DB Error deleting property {ids[0]}: {e}")
+            # Storage assets are already gone, but that's acceptable (orphaned DB records is worse)
+            result["failed_ids"] = ids
+            return result
+        logger.warning(f"[Delete] Batch delete of {len(ids)} properties failed ({e}); retrying one by one")
+        for pid in ids:
+            try:
+                result["deleted"] += _delete_rows(db, [pid])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"[Delete] DB Error deleting property {pid}: {e}")
+                result["failed_ids"].append(pid)
+
+    invalidate_codes(resolved_codes)
+    logger.info(f"[Delete] Deleted {result['deleted']} of {len(ids)} properties and related data.")
+    return result
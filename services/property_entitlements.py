@@ -0,0 +1,201 @@
+"""
+Property Entitlements Projection
+
+`property_entitlements` holds one row per property with the paid/expiry state
+services.gating used to re-derive on every request (owner subscription join,
+paid-order probe, expiry lookup):
+- is_paid, paid_via, paid_source_order_id   owner subscription, else latest paid
+                                            unlocking order (listing_kit excluded)
+- expires_at                                mirror of properties.expires_at
+- max_photos                                PAID_MAX_PHOTOS / FREE_MAX_PHOTOS
+
+Refreshed in the same transaction as the write that changes an input:
+- property creation (routes.dashboard, routes.agent)
+- services.orders.process_paid_order (order paid, expires_at cleared)
+- routes.webhook subscription handlers and property freeze
+- utils.agent_identity agent claims (the owner's subscription now applies)
+- services.cleanup self-heal (expires_at cleared)
+
+get_many() derives any property without a row in the same query.
+check_consistency() diffs the table against the derivation and can repair it
+(scripts/check_property_entitlements.py).
+"""
+import logging
+
+from constants import PAID_STATUSES
+from services.subscriptions import ACTIVE_SUBSCRIPTION_STATUSES
+
+logger = logging.getLogger(__name__)
+
+PAID_MAX_PHOTOS = 50
+FREE_MAX_PHOTOS = 1
+
+# Order types that unlock a property (listing_kit does not)
+UNLOCKING_ORDER_TYPES = ('listing_unlock', 'sign', 'smart_sign')
+
+FIELDS = ('is_paid', 'paid_via', 'paid_source_order_id', 'expires_at', 'max_photos')
+
+
+def derive_sql(scope):
+    """
+    SELECT of the derived columns (property_id + FIELDS) for the properties
+    matching `scope`, a WHERE fragment over p/a/u with named params; run it
+    with derive_params(**scope_params).
+    """
+    return f"""
+        SELECT d.property_id, d.is_paid, d.paid_via, d.paid_source_order_id, d.expires_at,
+               CASE WHEN d.is_paid THEN %(paid_max)s ELSE %(free_max)s END AS max_photos
+        FROM (
+            SELECT p.id AS property_id, p.expires_at,
+                   (sub.active OR o.id IS NOT NULL) AS is_paid,
+                   CASE WHEN sub.active THEN 'subscription'
+                        WHEN o.id IS NULL THEN NULL
+                        WHEN o.order_type = 'listing_unlock' THEN 'listing_unlock'
+                        ELSE 'sign_order' END AS paid_via,
+                   CASE WHEN sub.active THEN NULL ELSE o.id END AS paid_source_order_id
+            FROM properties p
+            LEFT JOIN agents a ON p.agent_id = a.id
+            LEFT JOIN users u ON a.user_id = u.id
+            CROSS JOIN LATERAL (
+                SELECT COALESCE(LOWER(u.subscription_status) = ANY(%(active)s), FALSE) AS active
+            ) sub
+            LEFT JOIN LATERAL (
+                SELECT id, order_type FROM orders
+                WHERE property_id = p.id
+                  AND status = ANY(%(paid)s)
+                  AND order_type = ANY(%(unlocking)s)
+                ORDER BY created_at DESC
+                LIMIT 1
+            ) o ON TRUE
+            WHERE {scope}
+        ) d
+    """
+
+
+def derive_params(**extra):
+    """Named parameters for derive_sql(), plus the scope's own."""
+    params = {
+        'active': sorted(ACTIVE_SUBSCRIPTION_STATUSES),
+        'paid': sorted(PAID_STATUSES),
+        'unlocking': list(UNLOCKING_ORDER_TYPES),
+        'paid_max': PAID_MAX_PHOTOS,
+        'free_max': FREE_MAX_PHOTOS,
+    }
+    params.update(extra)
+    return params
+
+
+def _clean_ids(property_ids):
+    return [int(pid) for pid in dict.fromkeys(property_ids) if pid is not None]
+
+
+def _row_dict(row):
+    return {field: row[field] for field in FIELDS}
+
+
+def derive(db, property_ids):
+    """Current derivation from the source tables: {property_id: entitlement dict}."""
+    ids = _clean_ids(property_ids)
+    if not ids:
+        return {}
+    rows = db.execute(derive_sql("p.id = ANY(%(ids)s)"), derive_params(ids=ids)).fetchall()
+    return {row['property_id']: _row_dict(row) for row in rows}
+
+
+def _upsert(db, scope, params):
+    cur = db.execute(f"""
+        INSERT INTO property_entitlements
+            (property_id, is_paid, paid_via, paid_source_order_id, expires_at, max_photos)
+        {derive_sql(scope)}
+        ON CONFLICT (property_id) DO UPDATE SET
+            is_paid = EXCLUDED.is_paid,
+            paid_via = EXCLUDED.paid_via,
+            paid_source_order_id = EXCLUDED.paid_source_order_id,
+            expires_at = EXCLUDED.expires_at,
+            max_photos = EXCLUDED.max_photos,
+            updated_at = NOW()
+    """, params)
+    return cur.rowcount
+
+
+def refresh(db, property_ids):
+    """
+    Re-derive and store the rows for these properties.
+
+    Runs in the caller's transaction (the caller commits).
+    Returns the number of rows written.
+    """
+    ids = _clean_ids(property_ids)
+    if not ids:
+        return 0
+    return _upsert(db, "p.id = ANY(%(ids)s)", derive_params(ids=ids))
+
+
+def refresh_for_users(db, user_ids):
+    """refresh() every property owned by these users (subscription changes)."""
+    ids = _clean_ids(user_ids)
+    if not ids:
+        return 0
+    return _upsert(db, "a.user_id = ANY(%(user_ids)s)", derive_params(user_ids=ids))
+
+
+def get_many(db, property_ids):
+    """
+    Bulk read: {property_id: entitlement dict}, one query.
+
+    Ids without a stored row are derived in the same statement (not stored);
+    unknown properties are omitted.
+    """
+    ids = _clean_ids(property_ids)
+    if not ids:
+        return {}
+    unstored = (
+        "p.id = ANY(%(ids)s) AND NOT EXISTS "
+        "(SELECT 1 FROM property_entitlements pe WHERE pe.property_id = p.id)"
+    )
+    rows = db.execute(f"""
+        SELECT property_id, {', '.join(FIELDS)}
+        FROM property_entitlements WHERE property_id = ANY(%(ids)s)
+        UNION ALL
+        {derive_sql(unstored)}
+    """, derive_params(ids=ids)).fetchall()
+    return {row['property_id']: _row_dict(row) for row in rows}
+
+
+def check_consistency(db, property_ids=None, fix=False):
+    """
+    Diff the projection against the current derivation.
+
+    property_ids: limit to these properties (default: all)
+    fix: refresh() the drifted properties (the caller commits)
+
+    Returns a list of {"property_id", "stored", "derived"} for every property
+    whose row is missing or differs in any of FIELDS.
+    """
+    if property_ids is None:
+        scope, params = "TRUE", derive_params()
+    else:
+        ids = _clean_ids(property_ids)
+        if not ids:
+            return []
+        scope, params = "p.id = ANY(%(ids)s)", derive_params(ids=ids)
+
+    derived = {row['property_id']: _row_dict(row)
+               for row in db.execute(derive_sql(scope), params).fetchall()}
+    if not derived:
+        return []
+    stored = {row['property_id']: _row_dict(row) for row in db.execute(
+        f"SELECT property_id, {', '.join(FIELDS)} FROM property_entitlements WHERE property_id = ANY(%s)",
+        (list(derived),)
+    ).fetchall()}
+
+    diffs = [
+        {"property_id": pid, "stored": stored.get(pid), "derived": expected}
+        for pid, expected in sorted(derived.items())
+        if stored.get(pid) != expected
+    ]
+    if diffs:
+        logger.warning(f"[Entitlements] {len(diffs)} of {len(derived)} properties drifted from the derivation")
+        if fix:
+            refresh(db, [d["property_id"] for d in diffs])
+    return diffs
@@ -0,0 +1,333 @@
+"""
+QR Code Resolution Cache
+
+Maps a printed code (/r/<code>) to everything the scan redirect needs:
+    kind, property_id, sign_asset_id, variant_id, campaign_id,
+    slug, custom_url, agent contact fields and a gating snapshot.
+
+Printed codes almost never change, so a warm scan does zero DB reads before
+the scan insert and the redirect.
+
+Tiers:
+1. Per-process TTL/LRU (always on unless QR_RESOLVE_CACHE_ENABLED=false).
+2. Optional shared tier (Redis via QR_RESOLVE_CACHE_REDIS_URL).
+
+Writers MUST invalidate explicitly after committing:
+- assign/unassign, activation, freeze      -> invalidate_sign_asset / invalidate_customer
+- custom_url edits, unlocks, deletes       -> invalidate_property
+- subscription webhooks                    -> invalidate_user / invalidate_customer
+
+Other processes' local tiers converge within QR_RESOLVE_CACHE_TTL.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+
+import config
+from database import get_db
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KIND_SIGN_ASSET = 'sign_asset'
+KIND_VARIANT = 'variant'
+KIND_PROPERTY = 'property'
+
+_SHARED_KEY_PREFIX = "qrres:v1:"
+
+_local = TTLCache(maxsize=config.QR_RESOLVE_CACHE_MAXSIZE, ttl=config.QR_RESOLVE_CACHE_TTL)
+_shared_client = None
+_shared_failed = False
+
+
+# =============================================================================
+# Shared tier (optional)
+# =============================================================================
+
+def _get_shared():
+    """Return a Redis client for the shared tier, or None if not configured/available."""
+    global _shared_client, _shared_failed
+    if not config.QR_RESOLVE_CACHE_REDIS_URL or _shared_failed:
+        return None
+    if _shared_client is None:
+        try:
+            import redis
+            _shared_client = redis.Redis.from_url(
+                config.QR_RESOLVE_CACHE_REDIS_URL,
+                socket_timeout=0.25,
+                socket_connect_timeout=0.25,
+            )
+        except ImportError:
+            logger.warning("[QRCache] QR_RESOLVE_CACHE_REDIS_URL set but 'redis' is not installed. Shared tier disabled.")
+            _shared_failed = True
+            return None
+    return _shared_client
+
+
+def _shared_get(code):
+    client = _get_shared()
+    if client is None:
+        return None
+    try:
+        raw = client.get(_SHARED_KEY_PREFIX + code)
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        logger.warning(f"[QRCache] Shared tier read failed: {e}")
+        return None
+
+
+def _shared_set(code, entry):
+    client = _get_shared()
+    if client is None:
+        return
+    try:
+        client.set(_SHARED_KEY_PREFIX + code, json.dumps(entry), ex=config.QR_RESOLVE_CACHE_SHARED_TTL)
+    except Exception as e:
+        logger.warning(f"[QRCache] Shared tier write failed: {e}")
+
+
+def _shared_delete(codes):
+    client = _get_shared()
+    if client is None or not codes:
+        return
+    try:
+        client.delete(*[_SHARED_KEY_PREFIX + c for c in codes])
+    except Exception as e:
+        logger.warning(f"[QRCache] Shared tier delete failed: {e}")
+
+
+# =============================================================================
+# Resolution
+# =============================================================================
+
+def _gating_snapshot(property_id):
+    """Serializable subset of get_property_gating_status()."""
+    from services.gating import get_property_gating_status
+    gating = get_property_gating_status(property_id)
+    expires_at = gating.get('expires_at')
+    return {
+        "is_paid": bool(gating['is_paid']),
+        "is_expired": bool(gating['is_expired']),
+        "expires_at": expires_at.isoformat() if expires_at else None,
+        "locked_reason": gating.get('locked_reason'),
+    }
+
+
+def _refresh_expiry(gating):
+    """
+    Re-evaluate time-based expiry on a cached snapshot.
+    A listing that crosses expires_at while cached must still stop counting scans.
+    """
+    if gating['is_paid'] or gating['is_expired'] or not gating.get('expires_at'):
+        return gating
+    expires_at = datetime.fromisoformat(gating['expires_at'])
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at < datetime.now(timezone.utc):
+        gating = dict(gating)
+        gating['is_expired'] = True
+        gating['locked_reason'] = "trial_expired"
+    return gating
+
+
+def _property_fields(db, property_id):
+    row = db.execute(
+        """SELECT p.id, p.slug, p.custom_url, p.qr_code,
+                  a.name as agent_name, a.brokerage, a.email as agent_email, a.phone as agent_phone
+           FROM properties p
+           JOIN agents a ON p.agent_id = a.id
+           WHERE p.id = %s""",
+        (property_id,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def _load(code):
+    """
+    Resolve a code from the database (cache miss path).
+    Same precedence as the original redirect: SmartSign -> QR variant -> legacy property code.
+    Returns entry dict or None if the code is unknown.
+    """
+    db = get_db()
+    entry = {
+        "code": code,
+        "kind": None,
+        "property_id": None,
+        "sign_asset_id": None,
+        "variant_id": None,
+        "campaign_id": None,
+        "asset": None,
+        "property": None,
+        "gating": None,
+    }
+
+    asset = db.execute(
+        "SELECT id, code, label, activated_at, active_property_id FROM sign_assets WHERE code = %s",
+        (code,)
+    ).fetchone()
+
+    if asset:
+        entry["kind"] = KIND_SIGN_ASSET
+        entry["sign_asset_id"] = asset['id']
+        entry["asset"] = {
+            "id": asset['id'],
+            "code": asset['code'],
+            "label": asset['label'],
+            "activated": asset['activated_at'] is not None,
+        }
+        property_id = asset['active_property_id']
+    else:
+        variant = db.execute(
+            "SELECT id, property_id, campaign_id FROM qr_variants WHERE code = %s",
+            (code,)
+        ).fetchone()
+        if variant:
+            entry["kind"] = KIND_VARIANT
+            entry["variant_id"] = variant['id']
+            entry["campaign_id"] = variant['campaign_id']
+            property_id = variant['property_id']
+        else:
+            row = db.execute("SELECT id FROM properties WHERE qr_code = %s", (code,)).fetchone()
+            if not row:
+                return None
+            entry["kind"] = KIND_PROPERTY
+            property_id = row['id']
+
+    if property_id:
+        prop = _property_fields(db, property_id)
+        if prop:
+            entry["property_id"] = prop['id']
+            entry["property"] = prop
+            entry["gating"] = _gating_snapshot(prop['id'])
+        elif entry["kind"] != KIND_SIGN_ASSET:
+            # Variant/legacy code pointing at a missing property
+            return None
+
+    return entry
+
+
+def resolve_code(code):
+    """
+    Resolve a scanned code to its cached destination entry.
+
+    Returns:
+        dict | None: entry with keys kind, property_id, sign_asset_id, variant_id,
+        campaign_id, asset, property, gating. None if the code is unknown.
+    """
+    if not config.QR_RESOLVE_CACHE_ENABLED:
+        entry = _load(code)
+    else:
+        entry = _local.get(code)
+        if entry is None:
+            entry = _shared_get(code)
+            if entry is None:
+                entry = _load(code)
+                if entry is not None:
+                    _shared_set(code, entry)
+            if entry is not None:
+                _local.set(code, entry)
+
+    if entry is not None and entry.get("gating"):
+        entry = dict(entry)
+        entry["gating"] = _refresh_expiry(entry["gating"])
+    return entry
+
+
+# =============================================================================
+# Invalidation
+# =============================================================================
+
+def invalidate_codes(codes):
+    """Drop specific codes from every tier."""
+    codes = [c for c in (codes or []) if c]
+    for code in codes:
+        _local.pop(code)
+    _shared_delete(codes)
+
+
+def _codes_for_properties_sql(where_sql):
+    return f"""
+        SELECT p.qr_code AS code FROM properties p WHERE {where_sql} AND p.qr_code IS NOT NULL
+        UNION
+        SELECT v.code FROM qr_variants v JOIN properties p ON v.property_id = p.id WHERE {where_sql}
+        UNION
+        SELECT sa.code FROM sign_assets sa JOIN properties p ON sa.active_property_id = p.id WHERE {where_sql}
+    """
+
+
+def codes_for_property(db, property_id):
+    """All codes (legacy, variant, assigned SmartSign) that resolve to a property."""
+    rows = db.execute(
+        _codes_for_properties_sql("p.id = %s"),
+        (property_id, property_id, property_id)
+    ).fetchall()
+    return [r['code'] for r in rows]
+
+
+def codes_for_properties(db, property_ids):
+    """codes_for_property for many properties in one query."""
+    ids = list(property_ids)
+    if not ids:
+        return []
+    rows = db.execute(_codes_for_properties_sql("p.id = ANY(%s)"), (ids, ids, ids)).fetchall()
+    return [r['code'] for r in rows]
+
+
+def invalidate_property(property_id, db=None):
+    """Invalidate every code pointing at a property (gating, slug or custom_url changed)."""
+    if property_id is None:
+        return
+    try:
+        invalidate_codes(codes_for_property(db or get_db(), property_id))
+    except Exception as e:
+        logger.warning(f"[QRCache] Failed to invalidate property {property_id}: {e}")
+
+
+def invalidate_sign_asset(asset_id, db=None):
+    """Invalidate a SmartSign's code (assign/unassign, activation, freeze)."""
+    if asset_id is None:
+        return
+    try:
+        row = (db or get_db()).execute("SELECT code FROM sign_assets WHERE id = %s", (asset_id,)).fetchone()
+        if row:
+            invalidate_codes([row['code']])
+    except Exception as e:
+        logger.warning(f"[QRCache] Failed to invalidate sign asset {asset_id}: {e}")
+
+
+def invalidate_user(user_id, db=None):
+    """Invalidate all codes owned by a user (subscription status drives gating)."""
+    if user_id is None:
+        return
+    try:
+        db = db or get_db()
+        where = "p.agent_id IN (SELECT id FROM agents WHERE user_id = %s)"
+        rows = db.execute(
+            _codes_for_properties_sql(where) + " UNION SELECT code FROM sign_assets WHERE user_id = %s",
+            (user_id, user_id, user_id, user_id)
+        ).fetchall()
+        invalidate_codes([r['code'] for r in rows])
+    except Exception as e:
+        logger.warning(f"[QRCache] Failed to invalidate user {user_id}: {e}")
+
+
+def invalidate_customer(stripe_customer_id, db=None):
+    """Invalidate all codes owned by the user(s) linked to a Stripe customer."""
+    if not stripe_customer_id:
+        return
+    try:
+        db = db or get_db()
+        rows = db.execute("SELECT id FROM users WHERE stripe_customer_id = %s", (stripe_customer_id,)).fetchall()
+        for r in rows:
+            invalidate_user(r['id'], db=db)
+    except Exception as e:
+        logger.warning(f"[QRCache] Failed to invalidate customer {stripe_customer_id}: {e}")
+
+
+def clear():
+    """Drop the local tier (tests / admin)."""
+    _local.clear()
+
+
+def stats():
+    return _local.stats()
@@ -0,0 +1,222 @@
+"""
+Render Cache
+
+Content-addressed cache for rendered sign PDFs and WebP previews.
+
+A render is keyed by a SHA-256 over its canonical inputs:
+- kind (sign_pdf / yard_sign_pdf / smartsign_pdf / preview / fast_preview)
+- layout id, size, colors, text fields, QR value
+- image keys plus their storage etags (headshots, logos, QR logo)
+- LAYOUT_VERSION and the installed font set
+
+Cached outputs live under `render-cache/<kind>/` in storage and are indexed
+by the `render_cache` table. On a hit the cached object is copied to the
+caller's destination key (server-side on S3), so callers keep their own
+per-order keys and eviction never touches them.
+
+Lookups use their own pooled connection and fail open: any cache error
+falls back to a normal render.
+"""
+import hashlib
+import json
+import logging
+import threading
+
+import config
+from constants import LAYOUT_VERSION
+from database import connection
+from utils import image_cache
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {
+    'sign_pdf': 'pdf',
+    'yard_sign_pdf': 'pdf',
+    'smartsign_pdf': 'pdf',
+    'preview': 'webp',
+    'fast_preview': 'webp',
+}
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0, "evicted": 0}
+_font_set = None
+_lock = threading.Lock()  # request threads and the async worker share _stats / _font_set
+
+
+def _count(name, n=1):
+    with _lock:
+        _stats[name] += n
+
+
+def _fonts():
+    """(file, sha256) of every registered print font; part of every fingerprint."""
+    global _font_set
+    with _lock:
+        if _font_set is None:
+            from services.printing.fonts import fingerprint
+            _font_set = fingerprint()
+        return _font_set
+
+
+def _qr_logo_state(user_id, storage):
+    """The QR logo draw_qr would embed for this user (key + etag), or None."""
+    if not (config.ENABLE_QR_LOGO and user_id):
+        return None
+    with connection() as db:
+        user = db.execute(
+            "SELECT use_qr_logo, qr_logo_normalized_key FROM users WHERE id = %s",
+            (user_id,)
+        ).fetchone()
+    if not user or not user['use_qr_logo'] or not user['qr_logo_normalized_key']:
+        return None
+    key = user['qr_logo_normalized_key']
+    return [key, storage.etag(key)]
+
+
+def fingerprint(kind, fields, image_keys=(), qr_user_id=None, storage=None):
+    """
+    Canonical hash of everything a render depends on.
+
+    fields: JSON-able render inputs (text, colors, size, layout, QR value...)
+    image_keys: storage keys drawn into the output; their etags are included
+    qr_user_id: user whose QR logo may be embedded by draw_qr
+    """
+    storage = storage or get_storage()
+    payload = {
+        'kind': kind,
+        'layout_version': LAYOUT_VERSION,
+        'fonts': _fonts(),
+        'fields': fields,
+        'images': {key: storage.etag(key) for key in sorted(set(k for k in image_keys if k))},
+        'qr_logo': _qr_logo_state(qr_user_id, storage),
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def object_key(kind, digest):
+    return f"render-cache/{kind}/{digest[:2]}/{digest}.{EXTENSIONS[kind]}"
+
+
+def fetch(kind, digest, dest_key, storage=None):
+    """Copy the cached render for `digest` to dest_key. Returns True on a hit."""
+    storage = storage or get_storage()
+    try:
+        with connection() as db:
+            row = db.execute(
+                "SELECT storage_key FROM render_cache WHERE digest = %s", (digest,)
+            ).fetchone()
+            if row is None:
+                _count("misses")
+                return False
+            try:
+                if row['storage_key'] != dest_key:
+                    storage.copy(row['storage_key'], dest_key)
+            except Exception as e:
+                # Cached object vanished (manual cleanup / bucket lifecycle): forget it
+                logger.warning(f"[RenderCache] Dropping {kind} {digest[:12]}: {e}")
+                db.execute("DELETE FROM render_cache WHERE digest = %s", (digest,))
+                db.commit()
+                _count("misses")
+                return False
+            db.execute(
+                "UPDATE render_cache SET hits = hits + 1, last_hit_at = NOW() WHERE digest = %s",
+                (digest,)
+            )
+            db.commit()
+    except Exception as e:
+        _count("errors")
+        logger.warning(f"[RenderCache] Lookup failed ({type(e).__name__}: {e}). Rendering.")
+        return False
+    _count("hits")
+    return True
+
+
+def store(kind, digest, src_key, size_bytes=None, storage=None):
+    """Keep a copy of a fresh render (src_key) under its content address."""
+    storage = storage or get_storage()
+    try:
+        cached_key = object_key(kind, digest)
+        storage.copy(src_key, cached_key)
+        with connection() as db:
+            db.execute("""
+                INSERT INTO render_cache (digest, kind, storage_key, size_bytes)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (digest) DO UPDATE SET last_hit_at = NOW()
+            """, (digest, kind, cached_key, size_bytes))
+            db.commit()
+        _count("stores")
+    except Exception as e:
+        _count("errors")
+        logger.warning(f"[RenderCache] Store failed for {kind} {digest[:12]}: {e}")
+
+
+def render_to_storage(kind, dest_key, render, content_type, fields, image_keys=(), qr_user_id=None, storage=None):
+    """
+    Write render() (-> BytesIO) to dest_key, reusing a cached render when the
+    fingerprint of its inputs matches. Returns dest_key.
+    """
+    if kind not in EXTENSIONS:
+        raise ValueError(f"Unknown render kind: {kind}")
+    storage = storage or get_storage()
+    digest = None
+    if config.RENDER_CACHE_ENABLED:
+        try:
+            digest = fingerprint(kind, fields, image_keys=image_keys, qr_user_id=qr_user_id, storage=storage)
+        except Exception as e:
+            _count("errors")
+            logger.warning(f"[RenderCache] Fingerprint failed ({type(e).__name__}: {e}). Rendering.")
+
+    if digest and fetch(kind, digest, dest_key, storage=storage):
+        return dest_key
+
+    # Pages of one render share decoded images and QR logo lookups
+    with image_cache.render_scope():
+        buffer = render()
+    storage.put_file(buffer, dest_key, content_type=content_type)
+    if digest:
+        store(kind, digest, dest_key, buffer.getbuffer().nbytes, storage=storage)
+    return dest_key
+
+
+def evict(max_age_days=None, max_entries=None, dry_run=False):
+    """
+    Drop entries not hit for max_age_days, and the least recently hit beyond
+    max_entries. Deletes the cached objects and their index rows.
+    Returns the number of entries evicted (or that would be, with dry_run).
+    """
+    max_age_days = config.RENDER_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_entries = config.RENDER_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+    with connection() as db:
+        rows = db.execute("""
+            SELECT digest, storage_key FROM (
+                SELECT digest, storage_key, last_hit_at,
+                       ROW_NUMBER() OVER (ORDER BY last_hit_at DESC) AS recency
+                FROM render_cache
+            ) r
+            WHERE last_hit_at < NOW() - (%s * interval '1 day') OR recency > %s
+        """, (max_age_days, max_entries)).fetchall()
+        if dry_run or not rows:
+            return len(rows)
+
+        storage = get_storage()
+        for row in rows:
+            try:
+                storage.delete(row['storage_key'])
+            except Exception as e:
+                logger.warning(f"[RenderCache] Failed to delete {row['storage_key']}: {e}")
+        db.execute("DELETE FROM render_cache WHERE digest = ANY(%s)", ([row['digest'] for row in rows],))
+        db.commit()
+
+    _count("evicted", len(rows))
+    logger.info(f"[RenderCache] Evicted {len(rows)} entries (max_age_days={max_age_days}, max_entries={max_entries})")
+    return len(rows)
+
+
+def stats():
+    with _lock:
+        s = dict(_stats)
+    lookups = s["hits"] + s["misses"]
+    s["hit_rate"] = round(s["hits"] / lookups, 3) if lookups else None
+    return s
@@ -84,6 +84,9 @@ class SmartSignsService:
         )
         db.commit()
 
+        from services.qr_resolution import invalidate_codes
+        invalidate_codes([asset['code']])
+
     @staticmethod
     def assign_asset(asset_id, property_id, user_id):
         """
@@ -162,6 +165,9 @@ class SmartSignsService:
             (asset_id, old_property_id, property_id, user_id)
         )
         db.commit()
+
+        from services.qr_resolution import invalidate_codes
+        invalidate_codes([asset['code']])
         
         # Return updated asset
         return db.execute("SELECT * FROM sign_assets WHERE id = %s", (asset_id,)).fetchone()
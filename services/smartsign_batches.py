@@ -0,0 +1,332 @@
+"""
+Bulk SmartSign Provisioning
+
+Brokerage-scale orders (hundreds of signs for one account) in one request:
+- codes come from utils.qr_codes.allocate_codes (one registry round trip)
+- the assets are inserted with a single execute_values (ALWAYS unactivated,
+  like SmartSignsService.create_asset)
+- one async 'render_smartsign_batch' job renders every sign PDF on a process
+  pool, imposes them onto print sheets (N-up on SMARTSIGN_SHEET_SIZE) and
+  queues ONE multi-page print job (no order_id; the print client gets its
+  product/material/layout from print_metadata())
+
+The `smartsign_batches` row is the progress record the dashboard polls:
+status queued -> rendering -> imposing -> submitted (or failed), with the
+number of signs rendered so far.
+"""
+import io
+import json
+import logging
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing
+
+import config
+from constants import SIGN_SIZES, DEFAULT_SIGN_SIZE
+from database import get_db
+from psycopg2.extras import execute_values
+from services.print_catalog import validate_layout
+from utils.qr_codes import allocate_codes
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAYOUT_ID = 'smart_v1_minimal'
+
+# sign_assets design columns a batch may preset (same value on every asset)
+DESIGN_FIELDS = (
+    'brand_name', 'agent_name', 'agent_phone', 'phone', 'email', 'cta_key',
+    'background_style', 'logo_key', 'headshot_key', 'include_logo', 'include_headshot',
+    'state', 'license_number', 'show_license_option', 'license_label_override',
+)
+
+# Commit render progress at most this often (seconds)
+PROGRESS_INTERVAL = 1.0
+
+# SmartSign product rules (same as routes.smart_signs order_create)
+PRINT_PRODUCT = 'smart_sign'
+MATERIAL = 'aluminum_040'
+SIDES = 'double'
+
+
+def asset_pdf_key(batch_id, asset_id):
+    return f"pdfs/smartsign_batch_{batch_id}/asset_{asset_id}.pdf"
+
+
+def provision_batch(db, user_id, quantity, label_prefix=None, print_size=None, layout_id=None,
+                    design=None, shipping=None):
+    """
+    Create `quantity` unactivated SmartSign assets for user_id and queue their
+    print render. Commits. Returns {"batch_id", "job_id", "assets": [{id, code, label}]}.
+
+    Raises:
+        ValueError: invalid quantity, size, layout or design field
+    """
+    if not isinstance(quantity, int) or quantity < 1 or quantity > config.SMARTSIGN_BATCH_MAX_QUANTITY:
+        raise ValueError(f"quantity must be between 1 and {config.SMARTSIGN_BATCH_MAX_QUANTITY}")
+    print_size = print_size or DEFAULT_SIGN_SIZE
+    if print_size not in SIGN_SIZES:
+        raise ValueError(f"Unsupported print_size: {print_size}")
+    layout_id = layout_id or DEFAULT_LAYOUT_ID
+    ok_layout, layout_reason = validate_layout('smart_sign', layout_id)
+    if not ok_layout:
+        raise ValueError(layout_reason)
+    design = dict(design or {})
+    unknown = set(design) - set(DESIGN_FIELDS)
+    if unknown:
+        raise ValueError(f"Unsupported design fields: {sorted(unknown)}")
+
+    batch_id = db.execute("""
+        INSERT INTO smartsign_batches (user_id, quantity, print_size, layout_id, shipping_json)
+        VALUES (%s, %s, %s, %s, %s)
+        RETURNING id
+    """, (user_id, quantity, print_size, layout_id, json.dumps(shipping) if shipping else None)).fetchone()['id']
+
+    codes = allocate_codes(db, quantity, length=12)
+    labels = [f"{label_prefix} {i}" if label_prefix else None for i in range(1, quantity + 1)]
+
+    columns = ['user_id', 'code', 'label', 'batch_id', 'is_frozen', 'activated_at', *design]
+    rows = [(user_id, code, label, batch_id, False, None, *design.values()) for code, label in zip(codes, labels)]
+    assets = execute_values(
+        db.cursor(),
+        f"INSERT INTO sign_assets ({', '.join(columns)}) VALUES %s RETURNING id, code, label",
+        rows,
+        page_size=len(rows),
+        fetch=True,
+    )
+
+    # enqueue commits the request connection (normally `db` itself)
+    from services.async_jobs import enqueue
+    job_id = enqueue('render_smartsign_batch', {'batch_id': batch_id})
+    db.commit()
+    logger.info(f"[SmartSignBatch] Batch {batch_id}: {quantity} assets for user {user_id}, job {job_id}")
+    return {'batch_id': batch_id, 'job_id': job_id, 'assets': [dict(a) for a in assets]}
+
+
+def get_progress(db, batch_id):
+    """Dashboard poll payload for a batch, or None."""
+    row = db.execute("SELECT * FROM smartsign_batches WHERE id = %s", (batch_id,)).fetchone()
+    if not row:
+        return None
+    return {
+        'batch_id': row['id'],
+        'user_id': row['user_id'],
+        'status': row['status'],
+        'quantity': row['quantity'],
+        'rendered': row['rendered'],
+        'percent': int(100 * row['rendered'] / row['quantity']) if row['quantity'] else 100,
+        'sheets': row['sheets'],
+        'print_job_id': row['print_job_id'],
+        'error': row['error'],
+    }
+
+
+def print_metadata(db, print_job_ids):
+    """
+    Print metadata for batch sheet jobs (print_jobs rows without an order):
+    {print_job_id: {print_product, material, sides, layout_id, print_size, sheet_size, batch_id}}.
+    """
+    if not print_job_ids:
+        return {}
+    rows = db.execute(
+        "SELECT id, print_job_id, layout_id, print_size FROM smartsign_batches WHERE print_job_id = ANY(%s)",
+        (list(print_job_ids),)
+    ).fetchall()
+    return {
+        row['print_job_id']: {
+            'print_product': PRINT_PRODUCT,
+            'material': MATERIAL,
+            'sides': SIDES,
+            'layout_id': row['layout_id'],
+            'print_size': row['print_size'],
+            'sheet_size': config.SMARTSIGN_SHEET_SIZE,
+            'batch_id': row['id'],
+        }
+        for row in rows
+    }
+
+
+def _set_status(db, batch_id, status, **fields):
+    sets = ''.join(f", {name} = %s" for name in fields)
+    db.execute(
+        f"UPDATE smartsign_batches SET status = %s{sets}, updated_at = NOW() WHERE id = %s",
+        (status, *fields.values(), batch_id)
+    )
+    db.commit()
+
+
+# --------------------------------------------------------------------------
+# Render pool (child processes)
+# --------------------------------------------------------------------------
+
+_render_ctx = None
+
+def _init_render_process():
+    """Child initializer: own Flask app context (DB pool, storage) for the renders."""
+    global _render_ctx
+    from app import create_app
+    _render_ctx = create_app().app_context()
+    _render_ctx.push()
+
+
+def _render_asset(batch_id, asset, user_id):
+    from services.pdf_smartsign import generate_smartsign_pdf
+    return generate_smartsign_pdf(asset, user_id=user_id, key=asset_pdf_key(batch_id, asset['id']))
+
+
+def _render_all(db, batch, assets, workers):
+    """Render every asset PDF, committing `rendered` as they finish. Returns {asset_id: key}."""
+    keys = {}
+    last_saved = time.monotonic()
+
+    def record(asset_id, key):
+        nonlocal last_saved
+        keys[asset_id] = key
+        now = time.monotonic()
+        if now - last_saved >= PROGRESS_INTERVAL or len(keys) == len(assets):
+            db.execute(
+                "UPDATE smartsign_batches SET rendered = %s, updated_at = NOW() WHERE id = %s",
+                (len(keys), batch['id'])
+            )
+            db.commit()
+            last_saved = now
+
+    if workers <= 1 or len(assets) == 1:
+        for asset in assets:
+            record(asset['id'], _render_asset(batch['id'], asset, batch['user_id']))
+        return keys
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(assets)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_render_process,
+    ) as pool:
+        futures = {pool.submit(_render_asset, batch['id'], asset, batch['user_id']): asset['id'] for asset in assets}
+        for future in as_completed(futures):
+            record(futures[future], future.result())
+    return keys
+
+
+# --------------------------------------------------------------------------
+# Imposition
+# --------------------------------------------------------------------------
+
+def sheet_grid(sign_w, sign_h, sheet_w, sheet_h, gutter):
+    """
+    Best N-up grid (points) of sign_w x sign_h on the sheet:
+    (cols, rows, rotated). A sign larger than the sheet gets a sheet of its own size (1, 1, False).
+    """
+    def fit(w, h):
+        return int((sheet_w + gutter) // (w + gutter)), int((sheet_h + gutter) // (h + gutter))
+
+    cols, rows = fit(sign_w, sign_h)
+    rcols, rrows = fit(sign_h, sign_w)
+    if rcols * rrows > cols * rows:
+        return rcols, rrows, True
+    if cols * rows == 0:
+        return 1, 1, False
+    return cols, rows, False
+
+
+def impose(pdf_streams, sheet_size=None, gutter_in=None):
+    """
+    Place the first page of every PDF (bytes) N-up onto print sheets.
+    Returns (BytesIO of the multi-page sheet PDF, sheet count).
+    """
+    import fitz  # PyMuPDF
+
+    sheet_w_in, _, sheet_h_in = (sheet_size or config.SMARTSIGN_SHEET_SIZE).partition('x')
+    sheet_w, sheet_h = float(sheet_w_in) * 72, float(sheet_h_in) * 72
+    gutter = (config.SMARTSIGN_SHEET_GUTTER_IN if gutter_in is None else gutter_in) * 72
+
+    out = fitz.open()
+    per_sheet = grid = None
+    page = None
+    for i, data in enumerate(pdf_streams):
+        src = fitz.open(stream=data, filetype="pdf")
+        if grid is None:
+            rect = src[0].rect
+            cols, rows, rotated = sheet_grid(rect.width, rect.height, sheet_w, sheet_h, gutter)
+            w, h = (rect.height, rect.width) if rotated else (rect.width, rect.height)
+            if cols * rows == 1 and (w > sheet_w or h > sheet_h):
+                sheet_w, sheet_h = w, h
+            grid = (cols, rows, rotated, w, h)
+            per_sheet = cols * rows
+            # Center the grid on the sheet
+            origin_x = (sheet_w - (cols * w + (cols - 1) * gutter)) / 2
+            origin_y = (sheet_h - (rows * h + (rows - 1) * gutter)) / 2
+
+        cols, rows, rotated, w, h = grid
+        slot = i % per_sheet
+        if slot == 0:
+            page = out.new_page(width=sheet_w, height=sheet_h)
+        x = origin_x + (slot % cols) * (w + gutter)
+        y = origin_y + (slot // cols) * (h + gutter)
+        page.show_pdf_page(fitz.Rect(x, y, x + w, y + h), src, 0, rotate=90 if rotated else 0)
+        src.close()
+
+    sheets = out.page_count
+    buffer = io.BytesIO(out.tobytes(garbage=3, deflate=True))
+    out.close()
+    return buffer, sheets
+
+
+# --------------------------------------------------------------------------
+# Job
+# --------------------------------------------------------------------------
+
+def render_batch(batch_id, workers=None):
+    """
+    Async job body: render, impose and queue the print job for a batch.
+    Safe to retry (renders overwrite their keys; the print job is keyed by batch).
+    Returns False if the batch no longer exists.
+    """
+    db = get_db()
+    batch = db.execute("SELECT * FROM smartsign_batches WHERE id = %s", (batch_id,)).fetchone()
+    if not batch:
+        return False
+    if batch['status'] == 'submitted':
+        logger.info(f"[SmartSignBatch] Batch {batch_id} already submitted")
+        return True
+    workers = config.SMARTSIGN_BATCH_RENDER_WORKERS if workers is None else workers
+
+    try:
+        rows = db.execute(
+            "SELECT * FROM sign_assets WHERE batch_id = %s ORDER BY id", (batch_id,)
+        ).fetchall()
+        assets = [dict(row, print_size=batch['print_size'], layout_id=batch['layout_id']) for row in rows]
+        if not assets:
+            raise ValueError(f"Batch {batch_id} has no assets")
+
+        _set_status(db, batch_id, 'rendering', rendered=0, error=None)
+        keys = _render_all(db, batch, assets, workers)
+
+        _set_status(db, batch_id, 'imposing')
+        storage = get_storage()
+        sheet_pdf, sheets = impose(storage.get_file(keys[asset['id']]).getvalue() for asset in assets)
+
+        idempotency_key = f"smartsign_batch_{batch_id}"
+        existing = db.execute(
+            "SELECT job_id, filename FROM print_jobs WHERE idempotency_key = %s", (idempotency_key,)
+        ).fetchone()
+        if existing:
+            print_job_id, sheet_key = existing['job_id'], existing['filename']
+        else:
+            print_job_id = str(uuid.uuid4())
+            sheet_key = f"print-jobs/{print_job_id}.pdf"
+            storage.put_file(sheet_pdf, sheet_key, content_type="application/pdf")
+            db.execute('''
+                INSERT INTO print_jobs (
+                    idempotency_key, job_id, order_id, filename, status, shipping_json, attempts
+                ) VALUES (%s, %s, NULL, %s, 'queued', %s, 0)
+            ''', (idempotency_key, print_job_id, sheet_key, batch['shipping_json']))
+
+        _set_status(db, batch_id, 'submitted', sheets=sheets, sheet_pdf_key=sheet_key, print_job_id=print_job_id)
+        logger.info(f"[SmartSignBatch] Batch {batch_id}: {len(assets)} signs on {sheets} sheets -> job {print_job_id}")
+        return True
+
+    except Exception as e:
+        db.rollback()
+        _set_status(db, batch_id, 'failed', error=str(e)[:500])
+        raise
@@ -5,11 +5,10 @@ import os
 from datetime import datetime, timezone, timedelta
 from uuid import uuid4
 
-from flask import send_file
 from werkzeug.utils import secure_filename
 
 from database import get_db
-from utils.storage import get_storage
+from utils.storage import get_storage, send_stored_file
 from services.teams_collab import log_audit_event
 
 logger = logging.getLogger(__name__)
@@ -211,26 +210,36 @@ def stream_download(team_id, file_id, actor_user_id, role):
         raise PermissionError("Viewers can only download export files.")
 
     storage = get_storage()
-    payload = storage.get_file(row["storage_key"])
-
-    log_audit_event(
-        db,
-        team_id=team_id,
-        actor_user_id=actor_user_id,
-        event_type="file.downloaded",
-        object_type="property_files",
-        object_id=row["id"],
-        metadata={"property_id": row["property_id"], "kind": row["kind"]},
-    )
-    db.commit()
+    if not storage.exists(row["storage_key"]):
+        raise FileNotFoundError("File not found.")
 
+    # Open the object first so only downloads that can actually start are audited
     mimetype = row["content_type"] or "application/octet-stream"
-    return send_file(
-        payload,
+    response = send_stored_file(
+        row["storage_key"],
+        storage=storage,
         as_attachment=True,
         download_name=row["original_filename"],
         mimetype=mimetype,
     )
+    if response.status_code >= 400:
+        return response
+
+    try:
+        log_audit_event(
+            db,
+            team_id=team_id,
+            actor_user_id=actor_user_id,
+            event_type="file.downloaded",
+            object_type="property_files",
+            object_id=row["id"],
+            metadata={"property_id": row["property_id"], "kind": row["kind"]},
+        )
+        db.commit()
+    except Exception:
+        response.close()
+        raise
+    return response
 
 
 def delete_file(team_id, file_id, actor_user_id):
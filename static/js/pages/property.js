@@ -38,6 +38,7 @@
     // ============================================================
     function initHeroGallery() {
         const heroImg = document.getElementById('hero-image');
+        const heroAvif = document.getElementById('hero-source-avif');
 
         if (!heroImg || !DATA.photos) return;
 
@@ -49,6 +50,12 @@
 
                 // Update hero image
                 if (DATA.photos[idx]) {
+                    // srcset wins over src, so swap (or clear) it too
+                    heroImg.srcset = (DATA.photoSrcsets && DATA.photoSrcsets[idx]) || '';
+                    if (heroAvif) {
+                        // An empty srcset makes the browser skip the <source>
+                        heroAvif.srcset = (DATA.photoAvifSrcsets && DATA.photoAvifSrcsets[idx]) || '';
+                    }
                     heroImg.src = DATA.photos[idx];
                 }
 
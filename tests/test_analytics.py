@@ -42,7 +42,7 @@ def test_per_property_metrics_structure(app, mocker):
     
     mock_db.execute.return_value.fetchone.side_effect = results
 
-    metrics = per_property_metrics(1)
+    metrics = per_property_metrics(1, source="raw")
     
     assert metrics['scans']['total'] == 25
     assert metrics['scans']['delta'] == 150
@@ -0,0 +1,53 @@
+"""Tests for LISTEN/NOTIFY worker wakeups and next_run_at scheduling."""
+import threading
+import time
+
+from scripts import async_worker
+from services.async_jobs import JobListener, channel_for, enqueue, seconds_until_next_due
+
+
+def test_channel_for_is_a_safe_identifier():
+    assert channel_for('generate_listing_kit') == 'async_jobs_generate_listing_kit'
+    assert channel_for('Weird-Type!') == 'async_jobs_weird_type_'
+
+
+def test_enqueue_notifies_listener(app, db):
+    listener = JobListener(['notify_job'])
+    try:
+        assert listener.wait(0) == set()  # connects and LISTENs
+        enqueue('notify_job', {'x': 1})
+        enqueue('other_job', {'x': 2})
+
+        assert listener.wait(5) == {channel_for('notify_job')}
+    finally:
+        listener.close()
+
+
+def test_wakeup_interrupts_wait(app):
+    listener = JobListener(['notify_job'])
+    try:
+        threading.Timer(0.1, listener.wakeup).start()
+        started = time.monotonic()
+        assert listener.wait(10) == set()
+        assert time.monotonic() - started < 5
+    finally:
+        listener.close()
+
+
+def test_seconds_until_next_due(app, db, monkeypatch):
+    assert seconds_until_next_due(['delayed_job']) is None
+
+    db.execute("""
+        INSERT INTO async_jobs (job_type, payload, status, next_run_at)
+        VALUES ('delayed_job', '{}', 'queued', NOW() + interval '120 seconds')
+    """)
+    db.commit()
+    due = seconds_until_next_due(['delayed_job'])
+    assert 100 < due <= 120
+    assert seconds_until_next_due(['other_job']) is None
+
+    monkeypatch.setattr(async_worker.config, 'ASYNC_WORKER_POLL_SECONDS', 600)
+    assert 100 < async_worker.idle_timeout(app, ['delayed_job']) <= 120
+    assert async_worker.idle_timeout(app, []) == 600  # every type at its limit
+    monkeypatch.setattr(async_worker.config, 'ASYNC_WORKER_POLL_SECONDS', 5)
+    assert async_worker.idle_timeout(app, ['delayed_job']) == 5
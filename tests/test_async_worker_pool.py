@@ -0,0 +1,94 @@
+"""Tests for the bounded async job worker pool and lease heartbeats."""
+import json
+import threading
+
+import pytest
+
+from scripts import async_worker
+from services.async_jobs import claim_batch, heartbeat
+
+
+def _enqueue(db, job_type, n=1, status='queued', locked_age=None):
+    ids = []
+    for i in range(n):
+        row = db.execute(
+            """
+            INSERT INTO async_jobs (job_type, payload, status, locked_at)
+            VALUES (%s, %s, %s, CASE WHEN %s::int IS NULL THEN NULL ELSE NOW() - (%s::int * interval '1 second') END)
+            RETURNING id
+            """,
+            (job_type, json.dumps({"i": i}), status, locked_age, locked_age)
+        ).fetchone()
+        ids.append(row['id'])
+    db.commit()
+    return ids
+
+
+def _statuses(db, ids):
+    rows = db.execute("SELECT id, status FROM async_jobs WHERE id = ANY(%s)", (ids,)).fetchall()
+    return {r['id']: r['status'] for r in rows}
+
+
+@pytest.fixture
+def blocking_handler(monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def handler(payload):
+        started.append(payload["i"])
+        assert release.wait(10)
+
+    monkeypatch.setitem(async_worker.JOB_HANDLERS, 'io_job', handler)
+    return release, started
+
+
+def test_parse_concurrency():
+    assert async_worker.parse_concurrency("a=2, b=1,c=0,bad,d=x") == {"a": 2, "b": 1}
+
+
+def test_pool_respects_per_type_limit_and_drains(app, db, blocking_handler):
+    release, started = blocking_handler
+    ids = _enqueue(db, 'io_job', n=3)
+
+    pool = async_worker.JobPool(app, {'io_job': 2}, process_types=set(), heartbeat_seconds=3600)
+    try:
+        assert pool.claim_and_submit() == 2
+        assert pool.running('io_job') == 2
+        assert pool.claim_and_submit() == 0  # type is at its limit
+
+        release.set()
+        assert pool.drain(timeout=10) == []
+        assert pool.claim_and_submit() == 1
+        assert pool.drain(timeout=10) == []
+    finally:
+        pool.shutdown()
+
+    assert sorted(started) == [0, 1, 2]
+    assert set(_statuses(db, ids).values()) == {'done'}
+
+
+def test_heartbeat_extends_lease(app, db):
+    [stale_id] = _enqueue(db, 'io_job', status='processing', locked_age=600)
+    [fresh_id] = _enqueue(db, 'io_job', status='processing', locked_age=600)
+
+    assert heartbeat([fresh_id]) == 1
+    reclaimed = claim_batch(job_types=['io_job'], limit=10)
+    assert [j['id'] for j in reclaimed] == [stale_id]
+
+
+def test_pool_heartbeats_running_jobs(app, db, blocking_handler):
+    release, _ = blocking_handler
+    [job_id] = _enqueue(db, 'io_job')
+
+    pool = async_worker.JobPool(app, {'io_job': 1}, process_types=set(), heartbeat_seconds=3600)
+    try:
+        pool.claim_and_submit()
+        db.execute("UPDATE async_jobs SET locked_at = NOW() - interval '10 minutes' WHERE id = %s", (job_id,))
+        db.commit()
+
+        assert pool.beat() == 1
+        assert claim_batch(job_types=['io_job'], limit=10) == []
+    finally:
+        release.set()
+        pool.drain(timeout=10)
+        pool.shutdown()
@@ -0,0 +1,109 @@
+"""Tests for the set-based dashboard metrics and gating lookups."""
+import pytest
+
+import database
+from services.analytics import metrics_for_properties, per_property_metrics
+from services.gating import gating_status_for_properties, get_property_gating_status
+from services import daily_stats
+
+
+@pytest.fixture
+def portfolio(db):
+    user_id = db.execute(
+        "INSERT INTO users (email, password_hash, subscription_status, is_verified) VALUES ('batch@test.com', 'x', 'free', TRUE) RETURNING id"
+    ).fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (%s, 'Batch Agent', 'Batch Realty', 'batch@agent.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+
+    ids = {}
+    for slug, expires in (
+        ('no-expiry', None),
+        ('trial-live', "NOW() + INTERVAL '3 days'"),
+        ('trial-expired', "NOW() - INTERVAL '1 day'"),
+        ('unlocked', "NOW() - INTERVAL '1 day'"),
+    ):
+        ids[slug] = db.execute(
+            f"""INSERT INTO properties (agent_id, address, beds, baths, slug, expires_at)
+                VALUES (%s, %s, '2', '1', %s, {expires or 'NULL'}) RETURNING id""",
+            (agent_id, f"1 {slug} St", slug)
+        ).fetchone()['id']
+
+    db.execute(
+        """INSERT INTO orders (user_id, property_id, status, order_type, created_at, updated_at)
+           VALUES (%s, %s, 'paid', 'listing_unlock', NOW(), NOW())""",
+        (user_id, ids['unlocked'])
+    )
+
+    for age, pid in ((0, ids['no-expiry']), (1, ids['no-expiry']), (8, ids['no-expiry']), (2, ids['trial-live'])):
+        db.execute(
+            "INSERT INTO qr_scans (property_id, scanned_at) VALUES (%s, NOW() - make_interval(days => %s))",
+            (pid, age)
+        )
+    db.execute(
+        "INSERT INTO property_views (property_id, is_internal, viewed_at) VALUES (%s, 0, NOW())",
+        (ids['trial-live'],)
+    )
+    daily_stats.rebuild(db)
+    db.commit()
+    return {'user_id': user_id, 'ids': ids}
+
+
+def test_metrics_for_properties_matches_single(app, portfolio):
+    ids = list(portfolio['ids'].values())
+    with app.app_context():
+        batch = metrics_for_properties(ids, ranges=(7, 30))
+        for pid in ids:
+            assert batch[pid][7] == per_property_metrics(pid, range_days=7)
+            assert batch[pid][30] == per_property_metrics(pid, range_days=30, compare_days=30)
+
+    no_expiry = batch[portfolio['ids']['no-expiry']]
+    assert no_expiry[7]['scans']['total'] == 2
+    assert no_expiry[7]['scans']['prev'] == 1
+    assert no_expiry[30]['scans']['total'] == 3
+
+
+def test_metrics_for_properties_is_one_query(app, portfolio, monkeypatch):
+    calls = []
+    original = database.PostgresDB.execute
+
+    def counting(self, sql, params=None):
+        calls.append(sql)
+        return original(self, sql, params)
+
+    monkeypatch.setattr(database.PostgresDB, 'execute', counting)
+    with app.app_context():
+        metrics_for_properties(list(portfolio['ids'].values()) + [999999], ranges=(7, 30))
+        gating_status_for_properties(list(portfolio['ids'].values()))
+    assert len(calls) == 2
+
+
+def test_gating_status_for_properties_matches_single(app, db, portfolio):
+    ids = portfolio['ids']
+    with app.app_context():
+        batch = gating_status_for_properties(list(ids.values()) + [999999])
+        for pid in ids.values():
+            assert batch[pid] == get_property_gating_status(pid)
+
+    assert batch[ids['trial-expired']]['locked_reason'] == 'trial_expired'
+    assert batch[ids['unlocked']]['paid_via'] == 'listing_unlock'
+    assert batch[999999]['is_paid'] is False
+
+    db.execute("UPDATE users SET subscription_status = 'active' WHERE id = %s", (portfolio['user_id'],))
+    db.commit()
+    with app.app_context():
+        batch = gating_status_for_properties(list(ids.values()))
+        for pid in ids.values():
+            assert batch[pid] == get_property_gating_status(pid)
+    assert all(g['paid_via'] == 'subscription' for g in batch.values())
+
+
+def test_today_feed_uses_batch_metrics(client, db, portfolio):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(portfolio['user_id'])
+        sess['_fresh'] = True
+    resp = client.get('/dashboard/today')
+    assert resp.status_code == 200
+    # Zero-scan listings get the visibility card
+    assert b'1 trial-expired St has 0 scans' in resp.data
@@ -0,0 +1,116 @@
+"""Tests for set-based batched cleanup of expired properties."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.cleanup import run_cleanup
+from services.properties import delete_properties
+from utils.storage import LocalStorage, S3Storage
+
+
+def test_s3_delete_many_batches_delete_objects():
+    storage = S3Storage("bucket", "us-east-1", "AKIAEXAMPLE", "secret", prefix="p")
+    storage.s3 = MagicMock()
+    storage.s3.delete_objects.side_effect = lambda Bucket, Delete: {
+        'Errors': [{'Key': o['Key'], 'Code': 'AccessDenied'} for o in Delete['Objects'] if o['Key'] == 'p/k7']
+    }
+
+    keys = [f"k{i}" for i in range(2500)] + ["k1", None]
+    assert storage.delete_many(keys) == ["k7"]
+
+    calls = storage.s3.delete_objects.call_args_list
+    assert [len(c.kwargs['Delete']['Objects']) for c in calls] == [1000, 1000, 500]
+    assert calls[0].kwargs['Delete']['Objects'][0] == {'Key': 'p/k0'}
+    assert calls[0].kwargs['Delete']['Quiet'] is True
+    storage.s3.delete_object.assert_not_called()
+
+
+def test_local_delete_many_parallel(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/", delete_workers=4)
+    keys = [f"uploads/p/{i}.jpg" for i in range(20)]
+    for key in keys:
+        storage.put_file(b"x", key)
+
+    assert storage.delete_many(keys + ["uploads/missing.jpg"]) == []
+    assert not any(storage.exists(key) for key in keys)
+
+
+@pytest.fixture
+def expired_portfolio(db, tmp_path):
+    storage = LocalStorage(str(tmp_path), "/")
+    user_id = db.execute(
+        "INSERT INTO users (email, password_hash) VALUES ('sweep@test.com', 'x') RETURNING id"
+    ).fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (%s, 'Sweep', 'Brk', 'sweep@agent.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+
+    def prop(slug, expires_sql):
+        pid = db.execute(
+            f"INSERT INTO properties (agent_id, address, slug, qr_code, expires_at) "
+            f"VALUES (%s, %s, %s, %s, {expires_sql}) RETURNING id",
+            (agent_id, f"1 {slug} St", slug, f"qr{slug}")
+        ).fetchone()['id']
+        key = f"uploads/properties/{slug}.jpg"
+        storage.put_file(b"jpeg", key)
+        storage.put_file(b"png", f"qr/qr{slug}.png")
+        db.execute("INSERT INTO property_photos (property_id, filename) VALUES (%s, %s)", (pid, key))
+        return pid
+
+    expired = [prop(f"gone{i}", "NOW() - INTERVAL '2 days'") for i in range(5)]
+    paid = prop("paid", "NOW() - INTERVAL '2 days'")
+    live = prop("live", "NOW() + INTERVAL '2 days'")
+    db.execute(
+        "INSERT INTO orders (user_id, property_id, status, order_type, created_at, updated_at) "
+        "VALUES (%s, %s, 'paid', 'listing_unlock', NOW(), NOW())",
+        (user_id, paid)
+    )
+    db.commit()
+    return {'storage': storage, 'expired': expired, 'paid': paid, 'live': live}
+
+
+def _remaining(db):
+    return {r['id'] for r in db.execute("SELECT id FROM properties").fetchall()}
+
+
+def test_run_cleanup_batches_and_resumes(app, db, expired_portfolio):
+    storage = expired_portfolio['storage']
+    with app.app_context(), patch('utils.storage.get_storage', return_value=storage):
+        assert run_cleanup(dry_run=True, batch_size=2, time_budget=0)['deleted'] == 5
+        assert db.execute("SELECT COUNT(*) AS n FROM cleanup_runs").fetchone()['n'] == 0
+
+        # Budget exhausted after the first batch: the run stays open
+        first = run_cleanup(batch_size=2, time_budget=1e-9)
+        assert first['done'] is False and first['batches'] == 1 and first['deleted'] == 2
+        assert first['storage_keys'] == 4
+        assert len(_remaining(db)) == 5
+
+        second = run_cleanup(batch_size=2, time_budget=0)
+
+    assert second['run_id'] == first['run_id'] and second['done'] is True
+    assert second['deleted'] == 5 and second['healed'] == 1 and second['failed'] == 0
+    assert second['scanned'] == 6 and second['batches'] == 3
+    assert _remaining(db) == {expired_portfolio['paid'], expired_portfolio['live']}
+    assert not any(storage.exists(f"uploads/properties/gone{i}.jpg") for i in range(5))
+    assert storage.exists("uploads/properties/paid.jpg")
+
+    run = db.execute("SELECT * FROM cleanup_runs WHERE id = %s", (first['run_id'],)).fetchone()
+    assert run['finished_at'] is not None and run['deleted'] == 5
+    assert run['cursor_property_id'] == max(expired_portfolio['expired'] + [expired_portfolio['paid']])
+    healed = db.execute("SELECT expires_at FROM properties WHERE id = %s", (expired_portfolio['paid'],)).fetchone()
+    assert healed['expires_at'] is None
+
+
+def test_delete_properties_isolates_blocked_property(app, db, expired_portfolio):
+    blocked, *rest = expired_portfolio['expired']
+    # qr_variants has no ON DELETE action and is not cleared by delete_properties
+    db.execute("INSERT INTO qr_variants (property_id, code) VALUES (%s, 'blockedcode')", (blocked,))
+    db.commit()
+
+    with app.app_context():
+        result = delete_properties(db, expired_portfolio['expired'], expired_portfolio['storage'])
+
+    assert result['deleted'] == 4 and result['failed_ids'] == [blocked]
+    remaining = _remaining(db)
+    assert blocked in remaining and not remaining & set(rest)
@@ -0,0 +1,99 @@
+"""Tests for the pooled Postgres connections behind get_db."""
+import threading
+
+import psycopg2
+import pytest
+
+from database import ConnectionPool, PoolExhausted, _database_url, connection, get_db
+
+
+@pytest.fixture
+def pool():
+    p = ConnectionPool(_database_url(), max_size=2, timeout=0.2, ping_after_idle=0)
+    yield p
+    p.closeall()
+
+
+def _backend_pid(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT pg_backend_pid()")
+    pid = cur.fetchone()[0]
+    cur.close()
+    return pid
+
+
+def test_get_db_reuses_connection_across_app_contexts(app):
+    with app.app_context():
+        first = get_db().execute("SELECT pg_backend_pid() AS pid").fetchone()['pid']
+    with app.app_context():
+        second = get_db().execute("SELECT pg_backend_pid() AS pid").fetchone()['pid']
+    assert first == second
+
+
+def test_return_rolls_back_open_transaction(db, app):
+    with connection() as conn:
+        conn.execute("INSERT INTO users (email, password_hash) VALUES ('pool@test.com', 'x')")
+        # no commit
+
+    with connection() as conn:
+        row = conn.execute("SELECT COUNT(*) AS c FROM users WHERE email = 'pool@test.com'").fetchone()
+    assert row['c'] == 0
+
+
+def test_dead_connection_replaced_on_checkout(pool):
+    conn = pool.getconn()
+    dead_pid = _backend_pid(conn)
+    conn.rollback()
+    pool.putconn(conn)
+
+    killer = psycopg2.connect(_database_url())
+    killer.autocommit = True
+    killer.cursor().execute("SELECT pg_terminate_backend(%s)", (dead_pid,))
+    killer.close()
+
+    conn = pool.getconn()
+    assert _backend_pid(conn) != dead_pid
+    pool.putconn(conn)
+    stats = pool.stats()
+    assert stats['health_check_failures'] == 1
+    assert stats['discarded'] == 1
+    assert stats['size'] == 1
+
+
+def test_closed_connection_is_discarded_on_return(pool):
+    conn = pool.getconn()
+    conn.close()
+    pool.putconn(conn)
+    stats = pool.stats()
+    assert stats['size'] == 0
+    assert stats['in_use'] == 0
+
+
+def test_exhaustion_raises_and_is_counted(pool):
+    a = pool.getconn()
+    b = pool.getconn()
+    with pytest.raises(PoolExhausted):
+        pool.getconn()
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['waits'] == 1
+    assert stats['peak_in_use'] == 2
+    pool.putconn(a)
+    pool.putconn(b)
+
+
+def test_waiter_gets_returned_connection(pool):
+    pool.timeout = 5
+    a = pool.getconn()
+    b = pool.getconn()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    pool.putconn(a)
+    waiter.join(5)
+
+    assert got and got[0] is a
+    pool.putconn(got[0])
+    pool.putconn(b)
+    assert pool.stats()['in_use'] == 0
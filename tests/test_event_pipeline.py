@@ -0,0 +1,93 @@
+"""Tests for services.events.track_event on top of the services.ingest buffer."""
+import json
+import logging
+import os
+from unittest.mock import patch
+
+import services.events as events
+import services.ingest as ingest
+
+
+def test_key_classifier_caches_verdicts():
+    events._is_forbidden_key.cache_clear()
+    assert events._is_forbidden_key('Email') is True            # exact, case-insensitive
+    assert events._is_forbidden_key('stripe_AUTH_header') is True  # substring
+    assert events._is_forbidden_key('cta_label') is False
+
+    dirty = {'cta_label': 'x', 'nested': {'cta_label': 'y', 'phone': '555'}, 'api_token': 't'}
+    cleaned, stripped = events._clean_payload(dirty)
+    assert cleaned == {'cta_label': 'x', 'nested': {'cta_label': 'y'}}
+    assert stripped is True
+    assert events._is_forbidden_key.cache_info().hits >= 2
+
+
+def test_track_event_serializes_once(app):
+    recorded = {}
+    with app.test_request_context('/'), \
+         patch('services.ingest.record', side_effect=lambda table, **fields: recorded.update(fields)), \
+         patch.object(events.json, 'dumps', wraps=json.dumps) as dumps:
+        events.track_event('cta_click', source='client', payload={'cta': 'tour', 'email': 'a@b.c'})
+
+    assert dumps.call_count == 1
+    assert json.loads(recorded['payload']) == {'cta': 'tour', 'version': 1, 'context': {}, 'pii_stripped': True}
+
+    before = events.stats()
+    with app.test_request_context('/'):
+        events.track_event('cta_click', source='client', payload={'blob': 'x' * 10000})
+        events.track_event('not_an_event', source='client')
+    after = events.stats()
+    assert after['too_large'] == before['too_large'] + 1
+    assert after['rejected'] == before['rejected'] + 1
+
+
+def test_serialized_payload_is_written_as_json(app, db, tmp_path):
+    with app.test_request_context('/'):
+        events.track_event('cta_click', source='client', payload={'cta': 'sync'})
+    row = db.execute("SELECT payload FROM app_events WHERE event_type = 'cta_click'").fetchone()
+    assert row['payload']['cta'] == 'sync'
+
+    buf = ingest.IngestBuffer(max_rows=100, batch_size=50, flush_interval=60, spill_dir=str(tmp_path))
+    try:
+        values = ingest._values(
+            'app_events', event_type='upsell_shown', source='client', schema_version=1,
+            environment='test', actor_type='system', payload=json.dumps({'k': [1, 2]})
+        )
+        buf.submit('app_events', values)
+        buf._spill([('app_events', 0.0, values)])
+        buf.flush()
+        buf._replay_spill()
+    finally:
+        buf.shutdown(timeout=1)
+
+    db.rollback()
+    rows = db.execute("SELECT payload FROM app_events WHERE event_type = 'upsell_shown'").fetchall()
+    assert [r['payload'] for r in rows] == [{'k': [1, 2]}, {'k': [1, 2]}]
+
+
+def test_full_buffer_drop_counters(tmp_path, caplog):
+    values = ingest._values('qr_scans', property_id=None)
+    buf = ingest.IngestBuffer(max_rows=1, batch_size=50, flush_interval=60, spill_dir=str(tmp_path))
+    with patch.object(buf, '_ensure_thread'):
+        for _ in range(4):
+            buf.submit('qr_scans', values)
+
+    assert buf.pending() == 1
+    assert buf.stats['overflowed'] == 3
+    assert buf.stats['spilled'] == 3 and buf.stats['dropped'] == 0
+
+
+def test_spill_cap_counts_the_incoming_batch(tmp_path, caplog):
+    values = ingest._values('qr_scans', property_id=None)
+    line = json.dumps({"t": "qr_scans", "ts": 0.0, "v": list(values)}) + "\n"
+    buf = ingest.IngestBuffer(
+        max_rows=1, batch_size=50, flush_interval=60, spill_dir=str(tmp_path), spill_max_bytes=len(line) * 2
+    )
+
+    with caplog.at_level(logging.ERROR, logger='services.ingest'):
+        buf._spill([('qr_scans', 0.0, values)] * 3)  # would overshoot: only what fits is written
+        buf._spill([('qr_scans', 0.0, values)])
+
+    assert buf.stats['spilled'] == 2 and buf.stats['dropped'] == 2
+    assert os.path.getsize(buf._spill_path()) <= buf.spill_max_bytes
+    # Loud once when drops start, counted afterwards
+    assert len([r for r in caplog.records if 'Dropping analytics rows' in r.getMessage()]) == 1
@@ -0,0 +1,138 @@
+"""Tests for screen-resolution order previews and the deferred print PDF."""
+import io
+from unittest.mock import patch
+
+from PIL import Image
+
+from database import get_db
+from services import order_previews, render_cache
+from utils import image_cache
+from utils.pdf_preview import render_layout_preview
+from utils.storage import LocalStorage
+
+
+def test_render_scope_dpi_sizes_image_boxes(monkeypatch):
+    monkeypatch.setattr(image_cache.config, 'IMAGE_CACHE_PRINT_DPI', 300)
+    box = (144, 72)  # 2in x 1in
+    assert image_cache._box_px(box) == (600, 300)
+    with image_cache.render_scope():
+        assert image_cache._box_px(box) == (600, 300)
+        with image_cache.render_scope(dpi=50):
+            assert image_cache._box_px(box) == (100, 50)
+        assert image_cache._box_px(box) == (600, 300)
+
+
+def test_render_layout_preview_clips_bleed(tmp_path):
+    storage = LocalStorage(str(tmp_path), "/")
+    width, height = 18 * 72, 24 * 72
+
+    def draw(c):
+        # Paints into the bleed like the sign drawers do
+        c.setFillColorRGB(1, 0, 0)
+        c.rect(-9, -9, width + 18, height + 18, fill=1, stroke=0)
+        c.setFillColorRGB(0, 0, 1)
+        c.rect(0, 0, width / 2, height, fill=1, stroke=0)
+
+    key = render_layout_preview(draw, width, height, "previews/test.webp", fields={'t': 1},
+                                max_dimension=400, storage=storage)
+
+    assert key == "previews/test.webp"
+    with Image.open(storage.get_file(key)) as img:
+        assert img.format == "WEBP"
+        assert img.size == (300, 400)
+        img = img.convert("RGB")
+        r, g, b = img.getpixel((5, 200))
+        assert b > 200 and r < 60
+        r, g, b = img.getpixel((295, 200))
+        assert r > 200 and b < 60
+
+
+def test_render_layout_preview_uses_render_cache(app, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(render_cache.config, 'RENDER_CACHE_ENABLED', True)
+    monkeypatch.setattr(render_cache, '_stats', dict.fromkeys(render_cache._stats, 0))
+    storage = LocalStorage(str(tmp_path), "/")
+    draws = []
+
+    def draw(c):
+        draws.append(1)
+        c.rect(0, 0, 72, 72, fill=1, stroke=0)
+
+    for name in ("a", "b"):
+        render_layout_preview(draw, 144, 144, f"previews/{name}.webp", fields={'t': 1},
+                              max_dimension=200, storage=storage)
+
+    assert len(draws) == 1
+    stats = render_cache.stats()
+    assert (stats['stores'], stats['hits'], stats['errors']) == (1, 1, 0)
+    assert storage.get_file("previews/b.webp").getvalue() == storage.get_file("previews/a.webp").getvalue()
+    row = db.execute("SELECT kind, storage_key FROM render_cache").fetchone()
+    assert row['kind'] == 'fast_preview' and row['storage_key'].endswith('.webp')
+
+
+def _yard_order(db):
+    db.execute("INSERT INTO users (email, password_hash, full_name) VALUES ('fp@test.com', 'x', 'FP')")
+    user_id = db.execute("SELECT id FROM users WHERE email='fp@test.com'").fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, phone, email) "
+        "VALUES (%s, 'FP Agent', 'Brk', '555-0101', 'fp@test.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+    prop_id = db.execute(
+        "INSERT INTO properties (agent_id, address, beds, baths, price, qr_code, slug) "
+        "VALUES (%s, '9 Fast Ln', '3', '2', 450000, 'fastcode1', '9-fast-ln') RETURNING id",
+        (agent_id,)
+    ).fetchone()['id']
+    order_id = db.execute(
+        "INSERT INTO orders (user_id, property_id, order_type, status, print_product, print_size, sign_size, sign_pdf_path) "
+        "VALUES (%s, %s, 'sign', 'pending_payment', 'yard_sign', '18x24', '18x24', 'pdfs/old.pdf') RETURNING id",
+        (user_id, prop_id)
+    ).fetchone()['id']
+    db.commit()
+    return order_id
+
+
+def test_refresh_order_preview_defers_print_pdf(app, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(order_previews.config, 'PREVIEW_FAST_ENABLED', True)
+    monkeypatch.setattr(order_previews.config, 'PREVIEW_FAST_MAX_DIMENSION', 480)
+    storage = LocalStorage(str(tmp_path), "/")
+    order_id = _yard_order(db)
+
+    with app.app_context(), \
+            patch('services.printing.yard_sign.get_storage', return_value=storage), \
+            patch('services.printing.yard_sign.generate_yard_sign_pdf') as generate_pdf:
+        preview_key = order_previews.refresh_order_preview(get_db(), order_id)
+    generate_pdf.assert_not_called()
+
+    with Image.open(io.BytesIO(storage.get_file(preview_key).getvalue())) as img:
+        assert img.size == (360, 480)
+    row = db.execute("SELECT sign_pdf_path, preview_key FROM orders WHERE id = %s", (order_id,)).fetchone()
+    assert row['sign_pdf_path'] is None and row['preview_key'] == preview_key
+    job = db.execute("SELECT payload FROM async_jobs WHERE job_type = 'render_print_pdf'").fetchone()
+    assert job['payload'] == {'order_id': order_id}
+
+    with app.app_context(), \
+            patch('services.printing.yard_sign.get_storage', return_value=storage):
+        assert order_previews.render_print_pdf(order_id) is True
+    pdf_key = db.execute("SELECT sign_pdf_path FROM orders WHERE id = %s", (order_id,)).fetchone()['sign_pdf_path']
+    assert pdf_key == f"pdfs/order_{order_id}/yard_sign_18x24.pdf"
+    assert storage.exists(pdf_key)
+
+
+def test_render_print_pdf_skips_stale_size(app, db, tmp_path):
+    storage = LocalStorage(str(tmp_path), "/")
+    order_id = _yard_order(db)
+    db.execute("UPDATE orders SET sign_pdf_path = NULL WHERE id = %s", (order_id,))
+    db.commit()
+
+    def resize_meanwhile(order_row, **kwargs):
+        db.execute("UPDATE orders SET print_size = '24x36' WHERE id = %s", (order_id,))
+        db.commit()
+        return "pdfs/stale.pdf"
+
+    with app.app_context(), \
+            patch('services.printing.yard_sign.generate_yard_sign_pdf_from_order_row', side_effect=resize_meanwhile):
+        assert order_previews.render_print_pdf(order_id) is True
+        assert order_previews.render_print_pdf(order_id + 999) is False
+
+    row = db.execute("SELECT sign_pdf_path FROM orders WHERE id = %s", (order_id,)).fetchone()
+    assert row['sign_pdf_path'] is None
@@ -204,7 +204,7 @@ def test_gating_rendering(client, db, feature_data):
 
 @patch('utils.storage.get_storage')
 def test_cleanup_calls_storage_delete(mock_get_storage, db):
-    """Cleanup should call storage.delete for each photo."""
+    """Cleanup should delete each photo from storage (batched delete_many)."""
     mock_storage = MagicMock()
     mock_get_storage.return_value = mock_storage
 
@@ -237,9 +237,9 @@ def test_cleanup_calls_storage_delete(mock_get_storage, db):
     from services.cleanup import cleanup_expired_properties
     cleanup_expired_properties()
 
-    # Verify storage.delete matched uploads/test.jpg
+    # Verify storage.delete_many matched uploads/test.jpg
     found = False
-    for call in mock_storage.delete.call_args_list:
+    for call in mock_storage.delete_many.call_args_list:
         if 'uploads/test.jpg' in str(call):
             found = True
             break
@@ -0,0 +1,95 @@
+"""Tests for the manifest-driven PDF font registry and subset embedding."""
+import hashlib
+import io
+import os
+import struct
+
+from pypdf import PdfReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+from services.printing import fonts
+import services.printing.layout_utils as lu
+
+
+def test_manifest_matches_font_files():
+    manifest = fonts.load_manifest()
+    roles = {entry["role"] for entry in manifest["fonts"]}
+    assert set(fonts.REQUIRED_ROLES) <= roles
+
+    for entry in manifest["fonts"]:
+        with open(os.path.join(fonts.FONTS_DIR, entry["file"]), "rb") as f:
+            data = f.read()
+        assert len(data) == entry["bytes"], entry["file"]
+        assert hashlib.sha256(data).hexdigest() == entry["sha256"], entry["file"]
+
+
+def test_register_fonts_uses_subsetting_faces():
+    lu.register_fonts()
+    assert lu.FONT_BODY == "Inter-Regular"
+    assert lu.FONT_BOLD == "Inter-Bold"
+    for name in (lu.FONT_BODY, lu.FONT_BOLD, lu.FONT_SERIF, lu.FONT_SCRIPT):
+        assert isinstance(pdfmetrics.getFont(name), fonts.SubsetTTFont)
+
+
+def _pdf(text_by_font, compression=0):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pageCompression=compression)
+    y = 700
+    for font_name, text in text_by_font:
+        c.setFont(font_name, 24)
+        c.drawString(50, y, text)
+        y -= 40
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def test_documents_embed_only_drawn_glyphs():
+    lu.register_fonts()
+    short = _pdf([(lu.FONT_BODY, "Hi")])
+    long = _pdf([(lu.FONT_BODY, "The quick brown fox jumps over the lazy dog 0123456789")])
+
+    short_bytes = sum(fonts.embedded_font_bytes(short).values())
+    long_bytes = sum(fonts.embedded_font_bytes(long).values())
+    assert 0 < short_bytes < long_bytes
+    # Two glyphs (plus .notdef and space), not all of ASCII
+    assert short_bytes < 2500
+
+    reader = PdfReader(io.BytesIO(short))
+    assert "Hi" in reader.pages[0].extract_text()
+    font = next(
+        f.get_object() for f in reader.pages[0]["/Resources"]["/Font"].values()
+        if f.get_object()["/Subtype"] == "/TrueType"
+    )
+    descriptor = font["/FontDescriptor"].get_object()
+    # Compressed even though the canvas itself is uncompressed
+    assert "/FlateDecode" in descriptor["/FontFile2"].get_object()["/Filter"]
+
+
+def test_embedded_font_bytes_per_face():
+    lu.register_fonts()
+    pdf = _pdf([(lu.FONT_BODY, "Open House"), (lu.FONT_SCRIPT, "Welcome"), ("Helvetica", "Plain")])
+    sizes = fonts.embedded_font_bytes(pdf)
+    assert len(sizes) == 2  # Helvetica is a base-14 font: nothing embedded
+    assert all(v > 0 for v in sizes.values())
+
+
+def test_trim_name_table_keeps_identity_records():
+    def record(name_id, text):
+        return name_id, text.encode("utf-16-be")
+
+    records = [record(1, "Inter"), record(2, "Regular"), record(13, "License text " * 20), record(6, "Inter-Regular")]
+    strings = b""
+    packed = []
+    for name_id, data in records:
+        packed.append(struct.pack(">HHHHHH", 3, 1, 0x409, name_id, len(data), len(strings)))
+        strings += data
+    table = struct.pack(">HHH", 0, len(records), 6 + 12 * len(records)) + b"".join(packed) + strings
+
+    trimmed = fonts.trim_name_table(table)
+    count = struct.unpack(">H", trimmed[2:4])[0]
+    assert count == 3
+    assert "License".encode("utf-16-be") not in trimmed
+    assert "Inter-Regular".encode("utf-16-be") in trimmed
+    assert len(trimmed) < len(table)
@@ -0,0 +1,148 @@
+"""Tests for the decoded image cache used during PDF rendering."""
+import io
+
+import pytest
+from PIL import Image
+
+from utils import image_cache
+from utils.storage import get_storage
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    image_cache.clear()
+    yield
+    image_cache.clear()
+
+
+class CountingStorage:
+    """Wraps a backend and counts downloads."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.gets = 0
+
+    def get_file(self, key):
+        self.gets += 1
+        return self.inner.get_file(key)
+
+    def etag(self, key):
+        return self.inner.etag(key)
+
+
+def _jpeg(w, h, color=(200, 30, 30)):
+    buf = io.BytesIO()
+    Image.new("RGB", (w, h), color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def test_prepare_downscales_to_print_box(monkeypatch):
+    monkeypatch.setattr(image_cache.config, 'IMAGE_CACHE_PRINT_DPI', 300)
+    raw = _jpeg(3000, 2000)
+    box_px = image_cache._box_px((72, 72))  # one inch
+    assert box_px == (300, 300)
+
+    fit = Image.open(io.BytesIO(image_cache.prepare(raw, box_px)))
+    assert fit.size == (300, 200) and fit.format == "JPEG"
+    cover = Image.open(io.BytesIO(image_cache.prepare(raw, box_px, cover=True)))
+    assert cover.size == (450, 300)
+
+    small = _jpeg(100, 100)
+    assert image_cache.prepare(small, box_px) is small  # untouched: JPEG passthrough
+
+
+def test_process_cache_keyed_by_etag(app):
+    storage = CountingStorage(get_storage())
+    storage.inner.put_file(_jpeg(400, 400), 'img-cache/head.jpg')
+
+    a = image_cache.load_image(storage, 'img-cache/head.jpg', box=(72, 72))
+    b = image_cache.load_image(storage, 'img-cache/head.jpg', box=(72, 72))
+    assert storage.gets == 1
+    assert a.getSize() == b.getSize() == (300, 300)
+
+    storage.inner.put_file(_jpeg(800, 400, color=(0, 0, 255)), 'img-cache/head.jpg')
+    c = image_cache.load_image(storage, 'img-cache/head.jpg', box=(72, 72))
+    assert storage.gets == 2
+    assert c.getSize() == (300, 150)
+
+
+def test_immutable_bytes_skip_etag_lookup():
+    class Storage:
+        gets = 0
+
+        def get_file(self, key):
+            self.gets += 1
+            return io.BytesIO(b"logo")
+
+        def etag(self, key):
+            raise AssertionError("immutable keys must not be HEADed")
+
+    storage = Storage()
+    for _ in range(3):
+        assert image_cache.load_bytes(storage, "branding/qr_logo/normalized/1/a.png", immutable=True) == b"logo"
+    assert storage.gets == 1
+
+
+def test_render_scope_shares_reader_without_etag(app):
+    class NoEtagStorage:
+        gets = 0
+
+        def get_file(self, key):
+            NoEtagStorage.gets += 1
+            return io.BytesIO(_jpeg(50, 50))
+
+    storage = NoEtagStorage()
+    with image_cache.render_scope():
+        first = image_cache.load_image(storage, 'img-cache/x.jpg', box=(36, 36))
+        with image_cache.render_scope():  # nested scope is the same scope
+            assert image_cache.load_image(storage, 'img-cache/x.jpg', box=(36, 36)) is first
+    assert NoEtagStorage.gets == 1
+
+    image_cache.load_image(storage, 'img-cache/x.jpg', box=(36, 36))
+    assert NoEtagStorage.gets == 2  # no etag: never cached across renders
+
+
+def test_memo_only_within_scope():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b"logo"
+
+    with image_cache.render_scope():
+        assert image_cache.memo(('qr_logo', 7), compute) == b"logo"
+        assert image_cache.memo(('qr_logo', 7), compute) == b"logo"
+    image_cache.memo(('qr_logo', 7), compute)
+    assert len(calls) == 2
+
+
+def test_byte_budget_evicts_lru():
+    lru = image_cache._ByteLRU(max_bytes=100)
+    lru.set('a', b'x' * 20, 20)
+    lru.set('b', b'x' * 20, 20)
+    lru.get('a')
+    for key in 'cdef':
+        lru.set(key, b'x' * 20, 20)
+    assert lru.size <= 100
+    assert lru.get('a') is not None and lru.get('b') is None
+    lru.set('huge', b'x' * 60, 60)  # over a quarter of the budget: not cached
+    assert lru.get('huge') is None
+
+
+def test_draw_qr_looks_up_logo_once_per_render(app, monkeypatch):
+    from reportlab.pdfgen import canvas
+    from services import branding
+    from utils import pdf_generator
+
+    buf = io.BytesIO()
+    Image.new("RGBA", (64, 64), (0, 0, 0, 255)).save(buf, format="PNG")
+    lookups = []
+    monkeypatch.setattr(pdf_generator, 'ENABLE_QR_LOGO', True)
+    monkeypatch.setattr(branding, 'get_user_qr_logo_bytes', lambda uid: lookups.append(uid) or buf.getvalue())
+
+    c = canvas.Canvas(io.BytesIO())
+    with image_cache.render_scope():
+        for _ in range(2):
+            pdf_generator.draw_qr(c, "https://example.com/r/abc", 0, 0, 144, user_id=42)
+            c.showPage()
+    assert lookups == [42]
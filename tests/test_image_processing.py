@@ -0,0 +1,68 @@
+"""Tests for the shared image decode/encode pipeline and logo transparency."""
+import io
+
+import pytest
+from PIL import Image
+
+from services.branding import validate_and_normalize_logo
+from utils.image_processing import process_transparency
+
+
+def _png(img):
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _pixels(img):
+    img = img.convert("RGBA")
+    return [img.getpixel((x, y)) for y in range(img.height) for x in range(img.width)]
+
+
+def _reference(img, threshold, remove_white):
+    out = []
+    for r, g, b, a in _pixels(img):
+        if remove_white:
+            clear = min(r, g, b) > 255 - threshold
+        else:
+            clear = max(r, g, b) < threshold
+        out.append((255, 255, 255, 0) if clear else (r, g, b, a))
+    return out
+
+
+@pytest.mark.parametrize("remove_white", [True, False])
+def test_thresholds_match_per_pixel_rule(remove_white):
+    # Every value around both thresholds, in each channel
+    values = [0, 1, 28, 29, 30, 31, 128, 224, 225, 226, 254, 255]
+    img = Image.new("RGB", (len(values), 3))
+    for x, v in enumerate(values):
+        img.putpixel((x, 0), (v, v, v))
+        img.putpixel((x, 1), (v, 255, 255) if remove_white else (v, 0, 0))
+        img.putpixel((x, 2), (0, 0, 0) if remove_white else (255, 255, 255))  # keeps the bbox full size
+
+    result = Image.open(io.BytesIO(process_transparency(_png(img), threshold=30, remove_white=remove_white)))
+    assert result.size == img.size
+    assert _pixels(result) == _reference(img, 30, remove_white)
+
+
+def test_crops_to_remaining_content():
+    img = Image.new("RGB", (100, 80), (255, 255, 255))
+    img.paste((10, 20, 200), (30, 20, 50, 60))
+    result = Image.open(io.BytesIO(process_transparency(_png(img))))
+    assert result.size == (20, 40)
+
+
+def test_invalid_bytes_are_returned_unchanged():
+    assert process_transparency(b"not an image") == b"not an image"
+
+
+def test_logo_normalization():
+    original, normalized = validate_and_normalize_logo(_png(Image.new("RGB", (1024, 256), (200, 0, 0))))
+    orig = Image.open(io.BytesIO(original))
+    norm = Image.open(io.BytesIO(normalized))
+    assert (orig.mode, orig.size) == ("RGBA", (1024, 256))
+    assert (norm.mode, norm.size) == ("RGBA", (512, 512))
+    assert norm.getbbox() == (0, 192, 512, 320)  # contained and centred
+
+    with pytest.raises(ValueError):
+        validate_and_normalize_logo(b"garbage")
@@ -0,0 +1,154 @@
+"""Tests for the services.ingest analytics buffer: batching, spill and replay."""
+import os
+import time
+
+import pytest
+
+import services.ingest as ingest
+
+
+@pytest.fixture
+def listing(db):
+    user_id = db.execute(
+        "INSERT INTO users (email, password_hash) VALUES ('ingest@test.com', 'x') RETURNING id"
+    ).fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (%s, 'Ingest Agent', 'Ingest Realty', 'ingest@agent.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+    property_id = db.execute(
+        "INSERT INTO properties (agent_id, address, beds, baths, slug) VALUES (%s, '9 Buffer Rd', '2', '1', 'buffer-rd') RETURNING id",
+        (agent_id,)
+    ).fetchone()['id']
+    db.commit()
+    return property_id
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    buf = ingest.IngestBuffer(max_rows=100, batch_size=50, flush_interval=60, spill_dir=str(tmp_path))
+    yield buf
+    buf.shutdown(timeout=1)
+
+
+def _count(db, table, property_id):
+    db.rollback()
+    return db.execute(
+        f"SELECT COUNT(*) AS c FROM {table} WHERE property_id = %s", (property_id,)
+    ).fetchone()['c']
+
+
+def test_flush_writes_all_tables(db, buffer, listing):
+    for _ in range(3):
+        buffer.submit('qr_scans', ingest._values('qr_scans', property_id=listing, visitor_hash='abc'))
+    buffer.submit('property_views', ingest._values('property_views', property_id=listing, is_internal=0, source='public'))
+    buffer.submit('app_events', ingest._values(
+        'app_events', event_type='property_view', source='server', schema_version=1,
+        environment='test', actor_type='system', property_id=listing, payload={"k": 1}
+    ))
+    buffer.flush()
+
+    assert _count(db, 'qr_scans', listing) == 3
+    assert _count(db, 'property_views', listing) == 1
+    row = db.execute("SELECT payload FROM app_events WHERE property_id = %s", (listing,)).fetchone()
+    assert row['payload'] == {"k": 1}
+    assert buffer.stats['flushed'] == 5
+
+
+def test_event_time_is_capture_time(db, buffer, listing):
+    buffer.submit('qr_scans', ingest._values('qr_scans', property_id=listing))
+    # Pretend the row sat in the buffer for an hour
+    table, captured, values = buffer._items[0]
+    buffer._items[0] = (table, captured - 3600, values)
+    buffer.flush()
+
+    db.rollback()
+    age = db.execute(
+        "SELECT EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - scanned_at)) AS age FROM qr_scans WHERE property_id = %s",
+        (listing,)
+    ).fetchone()['age']
+    assert 3500 < float(age) < 3700
+
+
+def test_failed_flush_spills_and_replays(db, buffer, listing, monkeypatch, tmp_path):
+    def _down():
+        raise ConnectionError("db down")
+    monkeypatch.setattr(buffer, '_get_conn', _down)
+
+    buffer.submit('qr_scans', ingest._values('qr_scans', property_id=listing))
+    buffer.submit('qr_scans', ingest._values('qr_scans', property_id=listing))
+    buffer.flush()
+
+    assert buffer.stats['spilled'] == 2
+    assert os.listdir(tmp_path)
+    assert _count(db, 'qr_scans', listing) == 0
+
+    monkeypatch.undo()
+    buffer._replay_spill()
+
+    assert buffer.stats['replayed'] == 2
+    assert _count(db, 'qr_scans', listing) == 2
+    assert not os.listdir(tmp_path)
+
+
+def test_overflow_spills_instead_of_growing(db, tmp_path, listing):
+    buf = ingest.IngestBuffer(max_rows=2, batch_size=50, flush_interval=60, spill_dir=str(tmp_path))
+    try:
+        for _ in range(5):
+            buf.submit('qr_scans', ingest._values('qr_scans', property_id=listing))
+        assert buf.pending() == 2
+        assert buf.stats['spilled'] == 3
+        buf.flush()
+        assert _count(db, 'qr_scans', listing) == 5
+    finally:
+        buf.shutdown(timeout=1)
+
+
+def test_background_flusher_drains_on_interval(db, tmp_path, listing):
+    buf = ingest.IngestBuffer(max_rows=100, batch_size=50, flush_interval=0.05, spill_dir=str(tmp_path))
+    try:
+        buf.submit('qr_scans', ingest._values('qr_scans', property_id=listing))
+        deadline = time.time() + 5
+        while buf.stats['flushed'] < 1 and time.time() < deadline:
+            time.sleep(0.05)
+        assert _count(db, 'qr_scans', listing) == 1
+    finally:
+        buf.shutdown(timeout=1)
+
+
+def test_sync_record_writes_immediately(app, db, listing):
+    with app.app_context():
+        ingest.record('property_views', property_id=listing, is_internal=1, source='dashboard')
+    assert _count(db, 'property_views', listing) == 1
+
+
+def test_replay_isolates_bad_rows(db, buffer, listing, tmp_path):
+    now = time.time()
+    buffer._spill([
+        ('qr_scans', now, ingest._values('qr_scans', property_id=listing)),
+        # Property deleted while the row sat in the spill file
+        ('qr_scans', now, ingest._values('qr_scans', property_id=listing + 100000)),
+        # FK violation on another column: only this row can fail
+        ('qr_scans', now, ingest._values('qr_scans', property_id=listing, sign_asset_id=999999)),
+        ('property_views', now, ingest._values('property_views', property_id=listing, is_internal=0)),
+    ])
+    event = ingest._values(
+        'app_events', event_type='lead_submitted', source='server', schema_version=1,
+        environment='test', actor_type='system', property_id=listing,
+        idempotency_key='dup-key', payload={}
+    )
+    buffer._spill([('app_events', now, event), ('app_events', now, event)])
+
+    buffer._replay_spill()
+
+    assert _count(db, 'qr_scans', listing) == 1
+    assert _count(db, 'property_views', listing) == 1
+    assert _count(db, 'app_events', listing) == 1
+    assert buffer.stats['orphaned'] == 1
+    assert buffer.stats['dead_lettered'] == 1
+    assert sorted(os.listdir(tmp_path)) == [f"dead-{os.getpid()}.jsonl"]
+
+    # The drained spill file no longer blocks later batches
+    buffer.submit('qr_scans', ingest._values('qr_scans', property_id=listing))
+    buffer.flush()
+    assert _count(db, 'qr_scans', listing) == 2
@@ -0,0 +1,48 @@
+"""Tests for drawing repeated sign faces once as a shared form XObject."""
+import io
+
+import fitz  # PyMuPDF
+from reportlab.pdfgen import canvas
+
+from utils.pdf_generator import draw_repeated_pages, generate_pdf_sign
+from utils.storage import get_storage
+
+
+def _pixels(page):
+    return page.get_pixmap(dpi=36).samples
+
+
+def test_face_is_drawn_once_and_placed_on_every_page():
+    calls = []
+
+    def face(c):
+        calls.append(1)
+        c.setFillColorRGB(0.1, 0.4, 0.8)
+        c.rect(10, 10, 100, 50, fill=1, stroke=0)
+        c.drawString(20, 80, "FRONT AND BACK")
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(200, 200))
+    draw_repeated_pages(c, face, pages=3)
+    c.save()
+
+    doc = fitz.open(stream=buf.getvalue(), filetype="pdf")
+    assert len(calls) == 1
+    assert len(doc) == 3
+    assert _pixels(doc[0]) == _pixels(doc[1]) == _pixels(doc[2])
+    assert "FRONT AND BACK" in doc[2].get_text()
+
+
+def test_sign_pages_share_one_form(app):
+    key = generate_pdf_sign(
+        address="5 Form St", beds="4", baths="3", sqft="2,100", price="$610,000",
+        agent_name="Form Agent", brokerage="XObject Realty", agent_email="f@example.com",
+        agent_phone="555-0101", sign_size="18x24", qr_value="https://example.com/r/form",
+        output_key="xo-tests/sign.pdf",
+    )
+    doc = fitz.open(stream=get_storage().get_file(key).getvalue(), filetype="pdf")
+
+    assert len(doc) == 2
+    forms = [{x[0] for x in page.get_xobjects()} for page in doc]
+    assert forms[0] and forms[0] == forms[1]
+    assert _pixels(doc[0]) == _pixels(doc[1])
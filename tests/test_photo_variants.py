@@ -0,0 +1,142 @@
+"""Tests for responsive WebP/AVIF photo variants and LQIP placeholders."""
+import io
+import json
+
+from PIL import Image
+
+from services import photo_variants
+
+
+class DictStorage:
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self.deleted = []
+
+    def put_file(self, data, key, content_type=None):
+        self.files[key] = data if isinstance(data, bytes) else data.read()
+        return key
+
+    def get_file(self, key):
+        return io.BytesIO(self.files[key])
+
+    def delete(self, key):
+        self.deleted.append(key)
+        self.files.pop(key, None)
+
+
+def _jpeg(w, h, orientation=None):
+    img = Image.new("RGB", (w, h), (30, 120, 200))
+    buf = io.BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        img.save(buf, format="JPEG", exif=exif)
+    else:
+        img.save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def test_build_variants_widths_and_orientation(monkeypatch):
+    monkeypatch.setattr(photo_variants.config, 'PHOTO_VARIANT_WIDTHS', [480, 960, 1600])
+    monkeypatch.setattr(photo_variants.config, 'PHOTO_VARIANT_FORMATS', ['webp'])
+    storage = DictStorage()
+
+    # 1200x800 stored sideways (orientation 6 = rotate 90) -> 800x1200 upright
+    variants, lqip, size = photo_variants.build_variants(
+        _jpeg(1200, 800, orientation=6), "uploads/properties/property_1_abc.jpg", storage
+    )
+
+    assert size == (800, 1200)
+    assert [v['width'] for v in variants] == [480, 800]
+    for v in variants:
+        assert v['key'].startswith("uploads/properties/property_1_abc/w")
+        with Image.open(io.BytesIO(storage.files[v['key']])) as img:
+            assert img.format == "WEBP"
+            assert img.width == v['width']
+            assert img.height > img.width
+    assert lqip.startswith("data:image/webp;base64,")
+    assert len(lqip) < 1000
+
+
+def test_generate_for_photo_updates_row(app, db, monkeypatch):
+    monkeypatch.setattr(photo_variants.config, 'PHOTO_VARIANT_WIDTHS', [480])
+    monkeypatch.setattr(photo_variants.config, 'PHOTO_VARIANT_FORMATS', ['webp'])
+    db.execute("INSERT INTO users (email, password_hash, full_name) VALUES ('pv@test.com', 'x', 'PV')")
+    user_id = db.execute("SELECT id FROM users WHERE email='pv@test.com'").fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (%s, 'PV', 'B', 'pv@test.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+    prop_id = db.execute(
+        "INSERT INTO properties (agent_id, address, beds, baths, slug, qr_code) "
+        "VALUES (%s, '1 Photo Ln', '3', '2', '1-photo-ln', 'pvcode123') RETURNING id",
+        (agent_id,)
+    ).fetchone()['id']
+    photo_id = db.execute(
+        "INSERT INTO property_photos (property_id, filename) VALUES (%s, 'uploads/properties/p.jpg') RETURNING id",
+        (prop_id,)
+    ).fetchone()['id']
+    db.commit()
+
+    storage = DictStorage({'uploads/properties/p.jpg': _jpeg(1000, 500)})
+    with app.app_context():
+        assert photo_variants.generate_for_photo(photo_id, storage=storage) is True
+
+    row = db.execute("SELECT variants, lqip, width, height FROM property_photos WHERE id = %s", (photo_id,)).fetchone()
+    variants = row['variants'] if not isinstance(row['variants'], str) else json.loads(row['variants'])
+    assert variants == [{'width': 480, 'format': 'webp', 'key': 'uploads/properties/p/w480.webp'}]
+    assert row['lqip'].startswith("data:image/webp;base64,")
+    assert (row['width'], row['height']) == (1000, 500)
+
+    entries = photo_variants.srcset_entries([dict(row)])
+    assert entries[0]['srcset_keys'] == [('uploads/properties/p/w480.webp', 480)]
+    assert photo_variants.srcset_entries([dict(row)], fmt='avif')[0]['srcset_keys'] == []
+
+    with app.app_context():
+        assert photo_variants.generate_for_photo(photo_id + 999, storage=storage) is False
+
+
+def test_property_page_offers_avif_source(client, db):
+    user_id = db.execute(
+        "INSERT INTO users (email, password_hash, subscription_status) VALUES ('avif@test.com', 'x', 'active') RETURNING id"
+    ).fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (%s, 'AV', 'B', 'avif@test.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+    prop_id = db.execute(
+        "INSERT INTO properties (agent_id, address, beds, baths, slug, qr_code) "
+        "VALUES (%s, '2 Avif Ct', '3', '2', '2-avif-ct', 'avifcode1') RETURNING id",
+        (agent_id,)
+    ).fetchone()['id']
+    variants = [
+        {'width': 480, 'format': 'webp', 'key': 'uploads/properties/a/w480.webp'},
+        {'width': 480, 'format': 'avif', 'key': 'uploads/properties/a/w480.avif'},
+    ]
+    db.execute(
+        "INSERT INTO property_photos (property_id, filename, variants) VALUES (%s, 'uploads/properties/a.jpg', %s)",
+        (prop_id, json.dumps(variants))
+    )
+    db.commit()
+
+    html = client.get("/p/2-avif-ct").data.decode()
+    assert '<source type="image/avif" id="hero-source-avif"' in html
+    assert 'w480.avif 480w' in html
+    assert 'w480.webp 480w' in html
+
+
+def test_delete_variants_best_effort():
+    class FailingStorage(DictStorage):
+        def delete(self, key):
+            if key.endswith("w480.webp"):
+                raise OSError("boom")
+            super().delete(key)
+
+    storage = FailingStorage()
+    variants = [
+        {'width': 480, 'format': 'webp', 'key': 'a/w480.webp'},
+        {'width': 960, 'format': 'webp', 'key': 'a/w960.webp'},
+    ]
+    photo_variants.delete_variants(json.dumps(variants), storage)
+    assert storage.deleted == ['a/w960.webp']
+    photo_variants.delete_variants(None, storage)
@@ -0,0 +1,132 @@
+"""Tests for the property_entitlements projection and its refresh paths."""
+from unittest.mock import patch
+
+import pytest
+
+from database import get_db
+from routes.webhook import handle_subscription_updated
+from services import property_entitlements
+from services.gating import get_property_gating_status, property_is_paid
+from utils.agent_identity import claim_agent_for_verified_user
+
+
+@pytest.fixture
+def owner(db):
+    user_id = db.execute(
+        "INSERT INTO users (email, password_hash, subscription_status, stripe_customer_id) "
+        "VALUES ('ent@test.com', 'x', 'free', 'cus_ent') RETURNING id"
+    ).fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (%s, 'Ent Agent', 'Ent Realty', 'ent@agent.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+    ids = {}
+    for slug in ('trial', 'unlocked'):
+        ids[slug] = db.execute(
+            "INSERT INTO properties (agent_id, address, slug, expires_at) "
+            "VALUES (%s, %s, %s, NOW() + INTERVAL '3 days') RETURNING id",
+            (agent_id, f"1 {slug} St", slug)
+        ).fetchone()['id']
+    order_id = db.execute(
+        "INSERT INTO orders (user_id, property_id, status, order_type, created_at, updated_at) "
+        "VALUES (%s, %s, 'paid', 'sign', NOW(), NOW()) RETURNING id",
+        (user_id, ids['unlocked'])
+    ).fetchone()['id']
+    db.commit()
+    return {'user_id': user_id, 'ids': ids, 'order_id': order_id}
+
+
+def _stored(db, pid):
+    return db.execute("SELECT * FROM property_entitlements WHERE property_id = %s", (pid,)).fetchone()
+
+
+def test_get_many_derives_unstored_rows(app, db, owner):
+    trial, unlocked = owner['ids']['trial'], owner['ids']['unlocked']
+    with app.app_context():
+        ents = property_entitlements.get_many(get_db(), [trial, unlocked, 999999])
+
+    assert set(ents) == {trial, unlocked}
+    assert ents[trial]['is_paid'] is False and ents[trial]['max_photos'] == 1
+    assert ents[unlocked] == property_entitlements.derive(db, [unlocked])[unlocked]
+    assert ents[unlocked]['paid_via'] == 'sign_order'
+    assert ents[unlocked]['paid_source_order_id'] == owner['order_id']
+    assert ents[unlocked]['max_photos'] == 50
+    assert _stored(db, trial) is None
+
+    property_entitlements.refresh(db, [trial, unlocked])
+    db.commit()
+    assert _stored(db, unlocked)['paid_via'] == 'sign_order'
+    with app.app_context():
+        assert property_entitlements.get_many(get_db(), [trial, unlocked]) == ents
+
+
+def test_subscription_webhooks_refresh_projection(app, db, owner):
+    trial, unlocked = owner['ids']['trial'], owner['ids']['unlocked']
+    property_entitlements.refresh(db, [trial, unlocked])
+    db.commit()
+
+    subscription = {'id': 'sub_ent', 'customer': 'cus_ent', 'status': 'active', 'current_period_end': None}
+    with app.app_context():
+        handle_subscription_updated(get_db(), subscription)
+    row = _stored(db, trial)
+    assert row['is_paid'] is True and row['paid_via'] == 'subscription' and row['max_photos'] == 50
+
+    with app.app_context():
+        handle_subscription_updated(get_db(), dict(subscription, status='canceled'))
+        assert property_is_paid(trial) is False
+        assert get_property_gating_status(trial)['locked_reason'] == 'trial_expired'
+        assert get_property_gating_status(unlocked)['paid_via'] == 'sign_order'
+
+    # Frozen: expires_at set to now, mirrored into the projection
+    row = _stored(db, trial)
+    assert row['is_paid'] is False and row['expires_at'] is not None
+    assert row['expires_at'] == db.execute("SELECT expires_at FROM properties WHERE id = %s", (trial,)).fetchone()['expires_at']
+    assert property_entitlements.check_consistency(db) == []
+
+
+def test_check_consistency_reports_and_fixes_drift(app, db, owner):
+    trial, unlocked = owner['ids']['trial'], owner['ids']['unlocked']
+    property_entitlements.refresh(db, [unlocked])
+    # Subscription changed behind the projection's back
+    db.execute("UPDATE users SET subscription_status = 'active' WHERE id = %s", (owner['user_id'],))
+    db.commit()
+
+    diffs = property_entitlements.check_consistency(db)
+    assert {d['property_id'] for d in diffs} == {trial, unlocked}
+    missing = next(d for d in diffs if d['property_id'] == trial)
+    assert missing['stored'] is None and missing['derived']['paid_via'] == 'subscription'
+    assert property_entitlements.check_consistency(db, property_ids=[unlocked])[0]['stored']['paid_via'] == 'sign_order'
+
+    assert len(property_entitlements.check_consistency(db, fix=True)) == 2
+    db.commit()
+    assert property_entitlements.check_consistency(db) == []
+    assert _stored(db, unlocked)['paid_via'] == 'subscription'
+
+
+def test_agent_claim_refreshes_projection(app, db):
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (NULL, 'Unclaimed', 'B', 'claim@ent.com') RETURNING id"
+    ).fetchone()['id']
+    pid = db.execute(
+        "INSERT INTO properties (agent_id, address, slug, expires_at) "
+        "VALUES (%s, '1 Claim St', 'claim-st', NOW() + INTERVAL '3 days') RETURNING id",
+        (agent_id,)
+    ).fetchone()['id']
+    property_entitlements.refresh(db, [pid])
+    user_id = db.execute(
+        "INSERT INTO users (email, password_hash, is_verified, subscription_status) "
+        "VALUES ('claim@ent.com', 'x', TRUE, 'active') RETURNING id"
+    ).fetchone()['id']
+    db.commit()
+    assert _stored(db, pid)['is_paid'] is False
+
+    with app.app_context(), patch('services.qr_resolution.invalidate_user') as invalidate:
+        result = claim_agent_for_verified_user(db, user_id, 'claim@ent.com')
+    invalidate.assert_not_called()  # the caller invalidates after committing
+    db.commit()
+
+    assert result['status'] == 'claimed'
+    assert result['refreshed_user_id'] == user_id
+    row = _stored(db, pid)
+    assert row['is_paid'] is True and row['paid_via'] == 'subscription'
+    assert row['max_photos'] == property_entitlements.PAID_MAX_PHOTOS
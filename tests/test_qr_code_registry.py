@@ -0,0 +1,94 @@
+"""Tests for QR code allocation through the unique qr_codes registry."""
+import pytest
+from werkzeug.security import generate_password_hash
+
+import database
+from utils.qr_codes import allocate_codes, generate_unique_code, is_code_taken
+
+
+def _registered(db, code):
+    return db.execute("SELECT 1 FROM qr_codes WHERE code = %s", (code,)).fetchone() is not None
+
+
+def _count_queries(monkeypatch):
+    calls = []
+    original = database.PostgresDB.execute
+
+    def counting(self, sql, params=None):
+        calls.append(sql)
+        return original(self, sql, params)
+
+    monkeypatch.setattr(database.PostgresDB, 'execute', counting)
+    return calls
+
+
+def test_generate_unique_code_reserves_in_one_write(app, db, monkeypatch):
+    db.execute("INSERT INTO qr_codes (code) VALUES ('REGISTERED1')")
+    db.commit()
+    assert is_code_taken(db, 'REGISTERED1') is True
+
+    candidates = ['REGISTERED1', 'FRESHCODE01']
+    calls = _count_queries(monkeypatch)
+    code = generate_unique_code(db, _candidate_fn=lambda attempt: candidates[attempt])
+    assert code == 'FRESHCODE01'
+    assert len(calls) == 2
+    monkeypatch.undo()
+
+    # Reserved with the caller's transaction
+    db.rollback()
+    assert not _registered(db, 'FRESHCODE01')
+    code = generate_unique_code(db, _candidate_fn=lambda attempt: 'FRESHCODE01')
+    db.commit()
+    assert _registered(db, code)
+    with pytest.raises(RuntimeError):
+        generate_unique_code(db, max_tries=3, _candidate_fn=lambda attempt: 'FRESHCODE01')
+
+
+def test_allocate_codes_bulk(app, db, monkeypatch):
+    db.execute("INSERT INTO qr_codes (code) VALUES ('TAKEN0')")
+    db.commit()
+    # Round 1: one collision with the registry and one duplicate -> 2 fresh codes
+    candidates = ['TAKEN0', 'BULK01', 'BULK01', 'BULK02', 'BULK03', 'BULK04']
+
+    calls = _count_queries(monkeypatch)
+    codes = allocate_codes(db, 4, _candidate_fn=lambda attempt: candidates[attempt])
+    assert sorted(codes) == ['BULK01', 'BULK02', 'BULK03', 'BULK04']
+    assert len(calls) == 2
+    monkeypatch.undo()
+    db.commit()
+    assert all(_registered(db, code) for code in codes)
+
+    codes = allocate_codes(db, 200, length=8)
+    assert len(set(codes)) == 200 and all(len(code) == 8 for code in codes)
+    assert allocate_codes(db, 0) == []
+
+
+def test_bulk_variant_creation(client, db):
+    user_id = db.execute(
+        "INSERT INTO users (email, password_hash, is_verified, subscription_status) "
+        "VALUES ('variants@example.com', %s, TRUE, 'active') RETURNING id",
+        (generate_password_hash('password'),)
+    ).fetchone()['id']
+    agent_id = db.execute(
+        "INSERT INTO agents (user_id, name, brokerage, email) VALUES (%s, 'V Agent', 'Brk', 'variants@example.com') RETURNING id",
+        (user_id,)
+    ).fetchone()['id']
+    prop_id = db.execute(
+        "INSERT INTO properties (agent_id, address, qr_code) VALUES (%s, 'Bulk St', 'BULKPROP1') RETURNING id",
+        (agent_id,)
+    ).fetchone()['id']
+    db.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    resp = client.post(f"/api/properties/{prop_id}/variants", data={'label': 'Open House', 'count': '3'})
+    assert resp.status_code == 302
+
+    rows = db.execute("SELECT code, label FROM qr_variants WHERE property_id = %s ORDER BY label", (prop_id,)).fetchall()
+    assert [r['label'] for r in rows] == ['Open House 1', 'Open House 2', 'Open House 3']
+    assert len({r['code'] for r in rows}) == 3
+    assert all(len(r['code']) == 8 and _registered(db, r['code']) for r in rows)
+
+    resp = client.post(f"/api/properties/{prop_id}/variants", data={'label': 'Too Many', 'count': '500'})
+    assert resp.status_code == 400
@@ -0,0 +1,62 @@
+"""Tests for the shared memoized QR engine behind vector and raster output."""
+import io
+import re
+
+import fitz  # PyMuPDF
+import qrcode
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from utils import qr_engine
+from utils.qr_image import render_qr_png
+
+URL = "https://example.com/r/engine42"
+
+
+def test_encode_is_memoized_per_value_and_ecc():
+    a = qr_engine.encode(URL, 'H')
+    assert qr_engine.encode(URL, 'H') is a
+    assert qr_engine.encode(URL, 'M') is not a
+    assert qr_engine.encode(URL, 'H', min_version=6).version >= 6
+
+
+def test_runs_cover_dark_modules():
+    matrix = qr_engine.encode(URL, 'H')
+    rebuilt = [[False] * matrix.size for _ in range(matrix.size)]
+    for r, col, length in matrix.runs:
+        assert length > 0
+        for i in range(col, col + length):
+            rebuilt[r][i] = True
+    assert tuple(tuple(row) for row in rebuilt) == matrix.rows
+    assert len(matrix.runs) < sum(map(sum, matrix.rows))  # runs merge modules
+
+
+def test_pdf_is_single_path_with_quiet_zone():
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(300, 300), pageCompression=0)
+    qr_engine.draw_pdf(c, URL, 50, 50, 200)
+    c.showPage()
+    c.save()
+    content = re.search(rb"stream\n(.*?)endstream", buf.getvalue(), re.S).group(1)
+    assert len(re.findall(rb"\sf\*?\s", content)) == 1  # one fill for all modules
+
+    page = fitz.open(stream=buf.getvalue(), filetype="pdf")[0]
+    pix = page.get_pixmap(dpi=72)
+    img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples).convert("L")
+    bbox = img.point(lambda v: 255 if v < 128 else 0).getbbox()
+    module = 200 / (qr_engine.encode(URL, 'H').size + 8)
+    assert abs(bbox[0] - (50 + 4 * module)) <= 1
+    assert abs(bbox[2] - (250 - 4 * module)) <= 1
+
+
+def test_png_matches_qrcode_library():
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=1, border=4)
+    qr.add_data(URL)
+    qr.make(fit=True)
+    qr.box_size = 600 // (qr.modules_count + 8)
+    reference = qr.make_image(fill_color="black", back_color="white").convert("RGB")
+
+    rendered = Image.open(io.BytesIO(render_qr_png(URL, size_px=600))).convert("RGB")
+    assert rendered.size == (600, 600)
+    offset = (600 - reference.width) // 2
+    assert rendered.crop((offset, offset, offset + reference.width, offset + reference.height)).tobytes() == reference.tobytes()
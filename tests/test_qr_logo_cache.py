@@ -0,0 +1,86 @@
+"""Tests for the verified logo QR render cache."""
+import io
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from services import branding
+from utils import qr_image
+from utils.storage import get_storage
+
+URL = "https://example.com/r/logo-cache"
+
+
+def _logo_png(color=(220, 20, 60, 255)):
+    buf = io.BytesIO()
+    Image.new("RGBA", (64, 64), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def fake_zbar(monkeypatch):
+    """Stand-in decoder: records decoded image widths; `accept(img)` decides success."""
+    calls = []
+    state = SimpleNamespace(calls=calls, accept=lambda img: True)
+
+    def decode(img, symbols=None):
+        calls.append(img.width)
+        return [SimpleNamespace(data=URL.encode())] if state.accept(img) else []
+
+    monkeypatch.setattr(qr_image, 'PYZBAR_AVAILABLE', True)
+    monkeypatch.setattr(qr_image, 'decode', decode)
+    monkeypatch.setattr(qr_image, 'ZBarSymbol', SimpleNamespace(QRCODE='QRCODE'))
+    monkeypatch.setattr(qr_image.config, 'QR_LOGO_VERIFY_PX', 256)
+    qr_image._verified.clear()
+    yield state
+    qr_image._verified.clear()
+
+
+def test_verified_render_is_cached(fake_zbar):
+    logo = _logo_png()
+    first = qr_image.render_qr_png(URL, size_px=1024, logo_png=logo)
+    second = qr_image.render_qr_png(URL, size_px=1024, logo_png=logo)
+
+    assert first == second
+    assert fake_zbar.calls == [256]  # one downscaled decode, then cache hits
+    qr_image.render_qr_png(URL, size_px=800, logo_png=logo)
+    qr_image.render_qr_png(URL, size_px=1024, logo_png=_logo_png((0, 0, 255, 255)))
+    assert len(fake_zbar.calls) == 3  # size and logo are part of the key
+
+
+def test_full_resolution_is_the_fallback(fake_zbar):
+    fake_zbar.accept = lambda img: img.width == 1024
+    qr_image.render_qr_png(URL, size_px=1024, logo_png=_logo_png())
+
+    assert fake_zbar.calls == [256] * len(qr_image.LOGO_RATIOS) + [1024]
+    [(ratio, _png)] = [v for _, v in qr_image._verified._data.values()]
+    assert ratio == qr_image.LOGO_RATIOS[0]
+
+
+def test_all_ratios_failing_falls_back_to_plain_qr(fake_zbar):
+    fake_zbar.accept = lambda img: False
+    png = qr_image.render_qr_png(URL, size_px=600, logo_png=_logo_png())
+    img = Image.open(io.BytesIO(png)).convert("RGB")
+    assert img.getpixel((300, 300)) in ((0, 0, 0), (255, 255, 255))  # no logo colour in the centre
+    assert len(fake_zbar.calls) == 2 * len(qr_image.LOGO_RATIOS)
+
+
+def test_branding_changes_forget_old_logo(app, db, fake_zbar):
+    logo = _logo_png()
+    key = "branding/qr_logo/normalized/test/logo.png"
+    get_storage().put_file(logo, key, content_type="image/png")
+    user_id = db.execute("""
+        INSERT INTO users (email, password_hash, full_name, subscription_status, use_qr_logo, qr_logo_normalized_key)
+        VALUES ('logo-cache@example.com', 'x', 'Logo Cache', 'active', TRUE, %s) RETURNING id
+    """, (key,)).fetchone()['id']
+    db.commit()
+
+    qr_image.render_qr_png(URL, size_px=1024, logo_png=logo)
+    assert len(qr_image._verified) == 1
+    branding.set_use_qr_logo(user_id, False)
+    assert len(qr_image._verified) == 0
+
+    qr_image.render_qr_png(URL, size_px=1024, logo_png=logo)
+    branding.delete_qr_logo(user_id)
+    assert len(qr_image._verified) == 0
@@ -0,0 +1,134 @@
+"""Tests for the services.qr_resolution cache behind /r/<code> scans."""
+import pytest
+
+import config
+import services.qr_resolution as qr_resolution
+from services.smart_signs import SmartSignsService
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch):
+    monkeypatch.setattr(config, 'QR_RESOLVE_CACHE_ENABLED', True)
+    qr_resolution.clear()
+    yield
+    qr_resolution.clear()
+
+
+@pytest.fixture
+def listing(db):
+    db.execute("""
+        INSERT INTO users (email, password_hash, subscription_status)
+        VALUES ('qrcache@test.com', 'x', 'active')
+    """)
+    user_id = db.execute("SELECT id FROM users WHERE email = 'qrcache@test.com'").fetchone()['id']
+    agent_id = db.execute("""
+        INSERT INTO agents (user_id, name, brokerage, email)
+        VALUES (%s, 'Cache Agent', 'Cache Realty', 'qrcache@agent.com')
+        RETURNING id
+    """, (user_id,)).fetchone()['id']
+    property_id = db.execute("""
+        INSERT INTO properties (agent_id, address, beds, baths, slug, qr_code)
+        VALUES (%s, '1 Cache Ln', '3', '2', 'cache-ln', 'CACHECODE001')
+        RETURNING id
+    """, (agent_id,)).fetchone()['id']
+    db.commit()
+    return {'user_id': user_id, 'agent_id': agent_id, 'property_id': property_id, 'code': 'CACHECODE001'}
+
+
+def test_warm_scan_does_not_reload(app, client, db, cache_enabled, listing, monkeypatch):
+    resp = client.get(f"/r/{listing['code']}")
+    assert resp.status_code == 302
+    assert '/p/cache-ln' in resp.headers['Location']
+
+    def _fail(code):
+        raise AssertionError("cache miss on warm scan")
+    monkeypatch.setattr(qr_resolution, '_load', _fail)
+
+    resp = client.get(f"/r/{listing['code']}")
+    assert resp.status_code == 302
+    assert '/p/cache-ln' in resp.headers['Location']
+
+    scans = db.execute(
+        "SELECT COUNT(*) AS c FROM qr_scans WHERE property_id = %s", (listing['property_id'],)
+    ).fetchone()['c']
+    assert scans == 2
+
+
+def test_custom_url_edit_invalidates(app, client, db, cache_enabled, listing):
+    client.get(f"/r/{listing['code']}")
+
+    db.execute(
+        "UPDATE properties SET custom_url = 'https://example.com/listing' WHERE id = %s",
+        (listing['property_id'],)
+    )
+    db.commit()
+
+    # Stale until the writer invalidates
+    resp = client.get(f"/r/{listing['code']}")
+    assert '/p/cache-ln' in resp.headers['Location']
+
+    with app.app_context():
+        qr_resolution.invalidate_property(listing['property_id'])
+
+    resp = client.get(f"/r/{listing['code']}")
+    assert resp.headers['Location'] == 'https://example.com/listing'
+
+
+def test_activate_and_assign_asset_invalidate(app, client, db, cache_enabled, listing):
+    with app.app_context():
+        asset = SmartSignsService.create_asset(listing['user_id'], None, "Cache Sign")
+    order_id = db.execute(
+        "INSERT INTO orders (user_id, status, order_type, created_at, updated_at) "
+        "VALUES (%s, 'paid', 'smart_sign', NOW(), NOW()) RETURNING id",
+        (listing['user_id'],)
+    ).fetchone()['id']
+    db.commit()
+
+    resp = client.get(f"/r/{asset['code']}")
+    assert b"Not Activated" in resp.data
+
+    with app.app_context():
+        SmartSignsService.activate_asset(asset['id'], order_id)
+
+    resp = client.get(f"/r/{asset['code']}")
+    assert resp.status_code == 200
+    assert b"Not Activated" not in resp.data  # Unassigned page
+
+    with app.app_context():
+        SmartSignsService.assign_asset(asset['id'], listing['property_id'], listing['user_id'])
+
+    resp = client.get(f"/r/{asset['code']}")
+    assert resp.status_code == 302
+    assert '/p/cache-ln' in resp.headers['Location']
+
+
+def test_cached_snapshot_expires_on_time(app, db, cache_enabled, listing):
+    db.execute("UPDATE users SET subscription_status = 'free' WHERE id = %s", (listing['user_id'],))
+    db.execute(
+        "UPDATE properties SET expires_at = NOW() + INTERVAL '1 hour' WHERE id = %s",
+        (listing['property_id'],)
+    )
+    db.commit()
+
+    with app.app_context():
+        entry = qr_resolution.resolve_code(listing['code'])
+    assert entry['gating']['is_expired'] is False
+
+    cached = qr_resolution._local.get(listing['code'])
+    cached['gating']['expires_at'] = '2000-01-01T00:00:00+00:00'
+
+    with app.app_context():
+        entry = qr_resolution.resolve_code(listing['code'])
+    assert entry['gating']['is_expired'] is True
+
+
+def test_invalidate_user_drops_owned_codes(app, db, cache_enabled, listing):
+    with app.app_context():
+        qr_resolution.resolve_code(listing['code'])
+        assert listing['code'] in qr_resolution._local
+        qr_resolution.invalidate_user(listing['user_id'])
+    assert listing['code'] not in qr_resolution._local
+
+
+def test_unknown_code_404(client, cache_enabled):
+    assert client.get("/r/NOPE00000000").status_code == 404
@@ -0,0 +1,123 @@
+"""Tests for the content-addressed render cache for sign PDFs and previews."""
+import io
+
+import pytest
+
+from services import render_cache
+from utils.storage import get_storage
+
+
+@pytest.fixture
+def cache_on(monkeypatch):
+    monkeypatch.setattr(render_cache.config, 'RENDER_CACHE_ENABLED', True)
+    monkeypatch.setattr(render_cache, '_stats', dict.fromkeys(render_cache._stats, 0))
+
+
+def _renderer(payload=b"%PDF-1.4 rendered"):
+    calls = []
+
+    def render():
+        calls.append(1)
+        return io.BytesIO(payload)
+    return render, calls
+
+
+def _row_count(db):
+    return db.execute("SELECT COUNT(*) AS n FROM render_cache").fetchone()['n']
+
+
+def test_hit_copies_cached_render_to_new_key(app, db, cache_on):
+    render, calls = _renderer()
+    fields = {'address': '1 Cache Way', 'sign_color': '#112233'}
+
+    first = render_cache.render_to_storage('sign_pdf', 'rc-tests/a.pdf', render, 'application/pdf', fields)
+    second = render_cache.render_to_storage('sign_pdf', 'rc-tests/b.pdf', render, 'application/pdf', fields)
+
+    assert (first, second) == ('rc-tests/a.pdf', 'rc-tests/b.pdf')
+    assert len(calls) == 1
+    assert get_storage().get_file('rc-tests/b.pdf').getvalue() == b"%PDF-1.4 rendered"
+    assert render_cache.stats()['hits'] == 1
+    assert render_cache.stats()['misses'] == 1
+    row = db.execute("SELECT kind, hits, size_bytes FROM render_cache").fetchone()
+    assert (row['kind'], row['hits'], row['size_bytes']) == ('sign_pdf', 1, len(b"%PDF-1.4 rendered"))
+
+
+def test_changed_inputs_miss(app, db, cache_on):
+    render, calls = _renderer()
+    render_cache.render_to_storage('sign_pdf', 'rc-tests/c.pdf', render, 'application/pdf', {'price': '$1'})
+    render_cache.render_to_storage('sign_pdf', 'rc-tests/c.pdf', render, 'application/pdf', {'price': '$2'})
+    assert len(calls) == 2
+
+    storage = get_storage()
+    storage.put_file(b"logo-v1", 'rc-tests/logo.png')
+    fields = {'price': '$1'}
+    before = render_cache.fingerprint('sign_pdf', fields, image_keys=['rc-tests/logo.png'])
+    storage.put_file(b"logo-v2-longer", 'rc-tests/logo.png')
+    after = render_cache.fingerprint('sign_pdf', fields, image_keys=['rc-tests/logo.png'])
+    assert before != after
+
+
+def test_vanished_cache_object_is_rerendered(app, db, cache_on):
+    render, calls = _renderer()
+    fields = {'address': '2 Gone St'}
+    render_cache.render_to_storage('preview', 'rc-tests/p1.webp', render, 'image/webp', fields)
+
+    cached_key = db.execute("SELECT storage_key FROM render_cache").fetchone()['storage_key']
+    get_storage().delete(cached_key)
+
+    render_cache.render_to_storage('preview', 'rc-tests/p2.webp', render, 'image/webp', fields)
+    assert len(calls) == 2
+    assert get_storage().exists(cached_key)  # re-stored by the second render
+
+
+def test_evict_by_age_and_count(app, db, cache_on):
+    for i in range(3):
+        render, _ = _renderer(f"pdf-{i}".encode())
+        render_cache.render_to_storage('sign_pdf', f'rc-tests/e{i}.pdf', render, 'application/pdf', {'i': i})
+    db.execute("UPDATE render_cache SET last_hit_at = NOW() - interval '90 days' WHERE digest = (SELECT MIN(digest) FROM render_cache)")
+    db.commit()
+
+    assert render_cache.evict(max_age_days=30, max_entries=10, dry_run=True) == 1
+    assert render_cache.evict(max_age_days=30, max_entries=1) == 2
+    assert _row_count(db) == 1
+    remaining = db.execute("SELECT storage_key FROM render_cache").fetchone()['storage_key']
+    assert get_storage().exists(remaining)
+
+
+def test_disabled_cache_always_renders(app, db, monkeypatch):
+    monkeypatch.setattr(render_cache.config, 'RENDER_CACHE_ENABLED', False)
+    render, calls = _renderer()
+    for _ in range(2):
+        render_cache.render_to_storage('sign_pdf', 'rc-tests/d.pdf', render, 'application/pdf', {'x': 1})
+    assert len(calls) == 2
+    assert _row_count(db) == 0
+
+
+def test_unknown_kind_fails_before_rendering(cache_on):
+    render, calls = _renderer()
+    with pytest.raises(ValueError, match="Unknown render kind"):
+        render_cache.render_to_storage('poster', 'rc-tests/x.pdf', render, 'application/pdf', {'x': 1})
+    assert calls == []
+    assert render_cache.stats()['errors'] == 0
+
+
+def test_generate_pdf_sign_reuses_render(app, db, cache_on, monkeypatch):
+    from utils import pdf_generator
+
+    draws = []
+    original = pdf_generator._draw_standard_layout
+    monkeypatch.setattr(
+        pdf_generator, '_draw_standard_layout',
+        lambda *a, **kw: draws.append(1) or original(*a, **kw)
+    )
+    args = dict(
+        address="3 Render Rd", beds="3", baths="2", sqft="1,800", price="$450,000",
+        agent_name="Cache Agent", brokerage="Cache Realty", agent_email="c@example.com",
+        agent_phone="555-0100", sign_size="18x24", qr_value="https://example.com/r/abc",
+    )
+    pdf_generator.generate_pdf_sign(**args, output_key="rc-tests/sign-1.pdf")
+    pdf_generator.generate_pdf_sign(**args, output_key="rc-tests/sign-2.pdf")
+
+    assert len(draws) == 1  # one render draws the face once; second call is a cache hit
+    storage = get_storage()
+    assert storage.get_file("rc-tests/sign-1.pdf").getvalue() == storage.get_file("rc-tests/sign-2.pdf").getvalue()
@@ -0,0 +1,126 @@
+"""Tests for bulk SmartSign provisioning, imposed print sheets and their print jobs."""
+from unittest.mock import patch
+
+import fitz
+from flask import g
+from werkzeug.security import generate_password_hash
+
+from services.smartsign_batches import render_batch, sheet_grid
+from utils.storage import LocalStorage
+
+
+def _user(db, email, is_admin=False):
+    return db.execute(
+        "INSERT INTO users (email, password_hash, is_admin, is_verified) VALUES (%s, %s, %s, TRUE) RETURNING id",
+        (email, generate_password_hash('password'), is_admin)
+    ).fetchone()['id']
+
+
+def _login(client, user_id):
+    # The app fixture's context is shared across requests: drop flask-login's cached user
+    g.pop('_login_user', None)
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+
+def test_sheet_grid_picks_densest_orientation():
+    pt = 72
+    # 18x24 (+1/8" bleed) on 48x96: 2x3 upright beats 1x5 rotated
+    assert sheet_grid(18.25 * pt, 24.25 * pt, 48 * pt, 96 * pt, 0.25 * pt) == (2, 3, False)
+    # 24x36 on 48x96: 1x2 upright, 1x3 rotated
+    assert sheet_grid(24.25 * pt, 36.25 * pt, 48 * pt, 96 * pt, 0.25 * pt) == (1, 3, True)
+    # Larger than the sheet: one per sheet
+    assert sheet_grid(60 * pt, 60 * pt, 48 * pt, 48 * pt, 0) == (1, 1, False)
+
+
+def test_bulk_provisioning_end_to_end(client, db, tmp_path):
+    admin_id = _user(db, 'ops@example.com', is_admin=True)
+    broker_id = _user(db, 'broker@example.com')
+    other_id = _user(db, 'other@example.com')
+    db.commit()
+
+    _login(client, broker_id)
+    assert client.post('/smart-signs/batches', json={'user_id': broker_id, 'quantity': 3}).status_code == 403
+
+    _login(client, admin_id)
+    resp = client.post('/smart-signs/batches', json={'user_id': broker_id, 'quantity': 0})
+    assert resp.status_code == 400
+    resp = client.post('/smart-signs/batches', json={
+        'user_id': broker_id, 'quantity': 7, 'label_prefix': 'Office',
+        'layout_id': 'smart_v1_minimal', 'design': {'brand_name': 'Big Brokerage', 'cta_key': 'scan_to_connect'},
+        'shipping': {'name': 'Big Brokerage', 'city': 'Austin'},
+    })
+    assert resp.status_code == 201
+    batch_id = resp.get_json()['batch_id']
+
+    assets = db.execute(
+        "SELECT * FROM sign_assets WHERE batch_id = %s ORDER BY id", (batch_id,)
+    ).fetchall()
+    assert len(assets) == 7 and assets[0]['label'] == 'Office 1'
+    assert all(a['user_id'] == broker_id and a['activated_at'] is None and not a['is_frozen'] for a in assets)
+    assert all(a['brand_name'] == 'Big Brokerage' and a['cta_key'] == 'scan_to_connect' for a in assets)
+    registered = db.execute(
+        "SELECT COUNT(*) AS n FROM qr_codes WHERE code = ANY(%s)", ([a['code'] for a in assets],)
+    ).fetchone()['n']
+    assert registered == 7
+    jobs = db.execute("SELECT payload FROM async_jobs WHERE job_type = 'render_smartsign_batch'").fetchall()
+    assert [j['payload'] for j in jobs] == [{'batch_id': batch_id}]
+
+    _login(client, broker_id)
+    progress = client.get(f'/smart-signs/batches/{batch_id}').get_json()
+    assert progress['status'] == 'queued' and progress['rendered'] == 0 and progress['quantity'] == 7
+
+    storage = LocalStorage(str(tmp_path), "/")
+    with patch('services.smartsign_batches.get_storage', return_value=storage), \
+         patch('services.pdf_smartsign.get_storage', return_value=storage):
+        assert render_batch(batch_id, workers=0) is True
+        # Retried job: same print job, no duplicate
+        db.execute("UPDATE smartsign_batches SET status = 'failed' WHERE id = %s", (batch_id,))
+        db.commit()
+        assert render_batch(batch_id, workers=0) is True
+
+    progress = client.get(f'/smart-signs/batches/{batch_id}').get_json()
+    assert progress['status'] == 'submitted' and progress['rendered'] == 7 and progress['percent'] == 100
+    assert progress['sheets'] == 2
+
+    print_jobs = db.execute("SELECT * FROM print_jobs").fetchall()
+    assert len(print_jobs) == 1
+    job = print_jobs[0]
+    assert job['job_id'] == progress['print_job_id'] and job['idempotency_key'] == f'smartsign_batch_{batch_id}'
+    assert job['status'] == 'queued' and 'Austin' in job['shipping_json']
+
+    sheets = fitz.open(stream=storage.get_file(job['filename']).getvalue(), filetype="pdf")
+    assert sheets.page_count == 2
+    assert (round(sheets[0].rect.width), round(sheets[0].rect.height)) == (48 * 72, 96 * 72)
+
+    _login(client, other_id)
+    assert client.get(f'/smart-signs/batches/{batch_id}').status_code == 404
+
+
+def test_batch_print_job_claim_and_print(client, db):
+    from config import PRINT_JOBS_TOKEN
+    headers = {'Authorization': f"Bearer {PRINT_JOBS_TOKEN}"}
+    broker_id = _user(db, 'sheet@example.com')
+    batch_id = db.execute("""
+        INSERT INTO smartsign_batches (user_id, quantity, print_size, layout_id, status, print_job_id)
+        VALUES (%s, 6, '18x24', 'smart_v1_minimal', 'submitted', 'batch-job-1') RETURNING id
+    """, (broker_id,)).fetchone()['id']
+    db.execute("""
+        INSERT INTO print_jobs (idempotency_key, job_id, order_id, filename, status, attempts)
+        VALUES (%s, 'batch-job-1', NULL, 'print-jobs/batch-job-1.pdf', 'queued', 0)
+    """, (f'smartsign_batch_{batch_id}',))
+    db.commit()
+
+    jobs = client.post('/api/print-jobs/claim', headers=headers).get_json()['jobs']
+    assert len(jobs) == 1
+    job = jobs[0]
+    assert job['job_id'] == 'batch-job-1' and job['order_id'] is None
+    assert job['print_product'] == 'smart_sign' and job['material'] == 'aluminum_040' and job['sides'] == 'double'
+    assert job['layout_id'] == 'smart_v1_minimal' and job['print_size'] == '18x24'
+    assert job['batch_id'] == batch_id and job['sheet_size'] == '48x96'
+
+    resp = client.post('/api/print-jobs/batch-job-1/printed', headers=headers).get_json()
+    assert resp['success'] is True
+    assert resp['order_id'] is None and resp['order_fulfilled'] is False
+    assert db.execute("SELECT status FROM print_jobs WHERE job_id = 'batch-job-1'").fetchone()['status'] == 'printed'
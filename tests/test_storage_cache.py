@@ -0,0 +1,79 @@
+"""Tests for the shared storage backend and presigned URL caching."""
+from unittest.mock import MagicMock
+
+import pytest
+
+import utils.storage as storage_module
+from utils.storage import LocalStorage, S3Storage, get_storage, reset_storage
+
+
+@pytest.fixture(autouse=True)
+def fresh_storage():
+    reset_storage()
+    yield
+    reset_storage()
+
+
+@pytest.fixture
+def s3():
+    storage = S3Storage("bucket", "us-east-1", "AKIAEXAMPLE", "secret", prefix="p")
+    storage.s3 = MagicMock()
+    storage.s3.generate_presigned_url.side_effect = (
+        lambda op, Params, ExpiresIn: f"https://s3/{Params['Key']}?sig={storage.s3.generate_presigned_url.call_count}"
+    )
+    return storage
+
+
+def test_get_storage_is_singleton():
+    first = get_storage()
+    assert isinstance(first, LocalStorage)
+    assert get_storage() is first
+
+
+def test_get_storage_rebuilds_on_config_change(monkeypatch, tmp_path):
+    first = get_storage()
+    monkeypatch.setattr('config.INSTANCE_DIR', str(tmp_path))
+    second = get_storage()
+    assert second is not first
+    assert second.base_dir == str(tmp_path)
+
+
+def test_presigned_url_reused_within_bucket(s3, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(storage_module.time, 'time', lambda: now[0])
+
+    url = s3.get_url("uploads/a.jpg")
+    assert s3.get_url("uploads/a.jpg") == url
+    assert s3.s3.generate_presigned_url.call_count == 1
+
+    # Different lifetime is a different signature
+    s3.get_url("uploads/a.jpg", expires_seconds=600)
+    assert s3.s3.generate_presigned_url.call_count == 2
+
+    # Past the reuse window (half the lifetime) a fresh signature is issued
+    now[0] += 1800
+    assert s3.get_url("uploads/a.jpg") != url
+    assert s3.s3.generate_presigned_url.call_count == 3
+
+
+def test_get_urls_bulk(s3):
+    urls = s3.get_urls(["a.jpg", "b.jpg", "a.jpg", None, ""])
+    assert set(urls) == {"a.jpg", "b.jpg"}
+    assert urls["a.jpg"].startswith("https://s3/p/a.jpg")
+    assert s3.s3.generate_presigned_url.call_count == 2
+
+    s3.get_urls(["a.jpg", "b.jpg"])
+    assert s3.s3.generate_presigned_url.call_count == 2
+
+
+def test_failed_signature_not_cached(s3):
+    s3.s3.generate_presigned_url.side_effect = RuntimeError("no creds")
+    assert s3.get_url("a.jpg") == ""
+    s3.s3.generate_presigned_url.side_effect = None
+    s3.s3.generate_presigned_url.return_value = "https://s3/ok"
+    assert s3.get_url("a.jpg") == "https://s3/ok"
+
+
+def test_template_bulk_helper_preserves_order():
+    from utils.template_helpers import get_storage_urls
+    assert get_storage_urls(["b.jpg", "", "a.jpg"]) == ["/b.jpg", "", "/a.jpg"]
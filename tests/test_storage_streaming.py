@@ -0,0 +1,107 @@
+"""Tests for streamed storage reads and send_stored_file downloads."""
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.storage import S3Storage, content_disposition, get_storage, reset_storage, send_stored_file
+
+PAYLOAD = b"0123456789" * 100
+
+
+@pytest.fixture(autouse=True)
+def fresh_storage():
+    reset_storage()
+    yield
+    reset_storage()
+
+
+@pytest.fixture
+def stored_key(app):
+    key = "streaming-tests/blob.bin"
+    get_storage().put_file(PAYLOAD, key)
+    yield key
+    get_storage().delete(key)
+
+
+@pytest.fixture
+def s3():
+    storage = S3Storage("bucket", "us-east-1", "AKIAEXAMPLE", "secret")
+    storage.s3 = MagicMock()
+    storage.s3.generate_presigned_url.side_effect = (
+        lambda op, Params, ExpiresIn: f"https://s3/{Params['Key']}?expires={ExpiresIn}"
+    )
+    return storage
+
+
+def test_local_iter_chunks(stored_key):
+    chunks = list(get_storage().iter_chunks(stored_key, chunk_size=256))
+    assert [len(c) for c in chunks] == [256, 256, 256, 232]
+    assert b"".join(chunks) == PAYLOAD
+
+
+def test_local_download_full_and_range(client, stored_key):
+    full = client.get(f"/storage/{stored_key}")
+    assert full.status_code == 200
+    assert full.data == PAYLOAD
+    assert full.headers["Accept-Ranges"] == "bytes"
+
+    partial = client.get(f"/storage/{stored_key}", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.data == PAYLOAD[10:20]
+    assert partial.headers["Content-Range"] == f"bytes 10-19/{len(PAYLOAD)}"
+
+
+def test_local_x_accel_redirect(client, stored_key, monkeypatch):
+    monkeypatch.setattr('config.STORAGE_X_ACCEL_REDIRECT_PREFIX', '/_protected/')
+    resp = client.get(f"/storage/{stored_key}")
+    assert resp.status_code == 200
+    assert resp.headers["X-Accel-Redirect"] == f"/_protected/{stored_key}"
+    assert resp.data == b""
+
+
+def test_local_missing_file_raises(app):
+    with app.test_request_context("/"):
+        with pytest.raises(FileNotFoundError):
+            send_stored_file("streaming-tests/missing.bin", storage=get_storage())
+
+
+def test_s3_redirects_to_presigned_url(app, s3, monkeypatch):
+    monkeypatch.setattr('config.STORAGE_S3_REDIRECT_DOWNLOADS', True)
+    with app.test_request_context("/"):
+        resp = send_stored_file(
+            "kits/kit.zip", storage=s3, mimetype="application/zip",
+            as_attachment=True, download_name="kit.zip",
+        )
+    assert resp.status_code == 302
+    assert resp.headers["Location"].startswith("https://s3/kits/kit.zip")
+    params = s3.s3.generate_presigned_url.call_args.kwargs["Params"]
+    assert params["ResponseContentType"] == "application/zip"
+    assert params["ResponseContentDisposition"] == 'attachment; filename="kit.zip"'
+    s3.s3.get_object.assert_not_called()
+
+
+def test_s3_streams_range_when_redirect_disabled(app, s3, monkeypatch):
+    monkeypatch.setattr('config.STORAGE_S3_REDIRECT_DOWNLOADS', False)
+    body = MagicMock()
+    body.iter_chunks.return_value = iter([PAYLOAD[:5], PAYLOAD[5:10]])
+    s3.s3.get_object.return_value = {
+        "Body": body,
+        "ContentLength": 10,
+        "ContentRange": f"bytes 0-9/{len(PAYLOAD)}",
+    }
+
+    with app.test_request_context("/", headers={"Range": "bytes=0-9"}):
+        resp = send_stored_file("print-jobs/job.pdf", storage=s3, mimetype="application/pdf")
+        data = b"".join(resp.response)
+
+    assert resp.status_code == 206
+    assert data == PAYLOAD[:10]
+    assert resp.headers["Content-Range"] == f"bytes 0-9/{len(PAYLOAD)}"
+    assert s3.s3.get_object.call_args.kwargs["Range"] == "bytes=0-9"
+    body.close.assert_called_once()
+
+
+def test_content_disposition_non_ascii():
+    assert content_disposition(False) == "inline"
+    value = content_disposition(True, "café.pdf")
+    assert value == "attachment; filename=\"cafe.pdf\"; filename*=UTF-8''caf%C3%A9.pdf"
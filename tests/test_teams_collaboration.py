@@ -157,6 +157,9 @@ def test_viewer_permissions(client, db, monkeypatch):
         def get_file(self, _key):
             return io.BytesIO(b"content")
 
+        def exists(self, _key):
+            return True
+
     monkeypatch.setattr("services.team_files.get_storage", lambda: MockStorage())
 
     _force_login(client, viewer_id)
@@ -253,6 +256,40 @@ def test_member_permissions(client, db, monkeypatch):
     assert client.get(f"/teams/{team_id}/settings").status_code == 403
 
 
+def test_missing_file_download_is_not_audited(client, db, monkeypatch):
+    owner_id = _create_user(db, "owner-missing@example.com")
+    owner_agent_id = _create_agent(db, owner_id, "owner-missing@example.com")
+    team_id = create_team(db, owner_id)
+    property_id = _create_property(db, owner_agent_id, "104 Missing File Way", team_id=team_id)
+    file_id = _insert_property_file(
+        db,
+        team_id,
+        property_id,
+        owner_id,
+        "export",
+        "teams/gone.csv",
+        "gone.csv",
+    )
+
+    class MockStorage:
+        def exists(self, _key):
+            return False
+
+        def get_file(self, _key):
+            raise AssertionError("missing objects must not be opened")
+
+    monkeypatch.setattr("services.team_files.get_storage", lambda: MockStorage())
+
+    _force_login(client, owner_id)
+    assert client.get(f"/teams/{team_id}/files/{file_id}/download").status_code == 404
+
+    audited = db.execute(
+        "SELECT COUNT(*) AS c FROM audit_events WHERE team_id = %s AND event_type = 'file.downloaded'",
+        (team_id,),
+    ).fetchone()
+    assert audited["c"] == 0
+
+
 def test_admin_permissions_retention_invite_delete(client, db, monkeypatch):
     owner_id = _create_user(db, "owner-admin@example.com")
     owner_agent_id = _create_agent(db, owner_id, "owner-admin@example.com")
@@ -0,0 +1,98 @@
+"""Tests for the shared memoized text-metrics engine."""
+import io
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+import services.printing.layout_utils as lu
+from services.pdf_smartsign import calculate_fitted_multiline
+from utils import text_metrics
+
+TEXTS = [
+    "123 Main Street",
+    "12345 Northwest Brookhaven Boulevard Apartment 2507",
+    "Coldwell Banker International Real Estate Group Associates LLC",
+    "Christopher Alexander Montgomery-Worthington III",
+    "(555) 123-4567",
+    "SCAN FOR DETAILS",
+    "W",
+]
+
+
+def _linear_fit(text, font_name, max_width, max_size, min_size, step=1):
+    size = max_size
+    while size >= min_size:
+        if stringWidth(text, font_name, size) <= max_width:
+            return size
+        size -= step
+    return min_size
+
+
+def _linear_wrapped(text, font_name, max_size, min_size, max_width, max_lines):
+    size = max_size
+    while size >= min_size:
+        lines, current = [], []
+        for word in text.split():
+            if stringWidth(" ".join(current + [word]), font_name, size) <= max_width:
+                current.append(word)
+            else:
+                if current:
+                    lines.append(" ".join(current))
+                current = [word]
+        if current:
+            lines.append(" ".join(current))
+        if len(lines) <= max_lines:
+            return size, tuple(lines)
+        size -= 2
+    return None
+
+
+def test_text_width_matches_stringwidth():
+    lu.register_fonts()
+    for font in (lu.FONT_BODY, lu.FONT_BOLD, lu.FONT_SCRIPT, "Helvetica", "Helvetica-Bold"):
+        for text in TEXTS:
+            for size in (7, 12.5, 33.3, 57.599999, 96, 144):
+                assert text_metrics.text_width(text, font, size) == stringWidth(text, font, size)
+    assert text_metrics.text_width("", lu.FONT_BODY, 40) == 0.0
+
+
+def test_fit_size_matches_linear_search():
+    lu.register_fonts()
+    for font in (lu.FONT_BODY, lu.FONT_BOLD, "Helvetica"):
+        for text in TEXTS:
+            for width in (20, 150, 420, 900, 5000):
+                for max_size, min_size, step in ((120, 24, 1), (57.6, 28.8, 1), (80, 60, 2), (40, 40, 1), (20, 30, 1)):
+                    expected = _linear_fit(text, font, width, max_size, min_size, step)
+                    assert text_metrics.fit_size(text, font, width, max_size, min_size, step) == expected, (text, width)
+    assert text_metrics.fit_size("", lu.FONT_BODY, 10, 48, 12) == 48
+
+
+def test_fit_wrapped_matches_linear_search():
+    lu.register_fonts()
+    for text in TEXTS:
+        for width in (60, 250, 600, 1200):
+            for max_lines in (1, 2, 3):
+                expected = _linear_wrapped(text, lu.FONT_BOLD, 110, 30, width, max_lines)
+                assert text_metrics.fit_wrapped(text, lu.FONT_BOLD, 110, 30, width, max_lines) == expected
+
+
+def test_calculate_fitted_multiline_wraps_long_text():
+    lu.register_fonts()
+    res = calculate_fitted_multiline(canvas.Canvas(io.BytesIO()), TEXTS[2], lu.FONT_BOLD, 80, 40, 900, max_lines=2)
+    assert len(res['lines']) == 2
+    assert all(stringWidth(line, lu.FONT_BOLD, res['size']) <= 900 for line in res['lines'])
+    assert res['height'] == 2 * res['line_height']
+
+
+def test_caches_are_bounded_and_clearable():
+    lu.register_fonts()
+    text_metrics.clear()
+    text_metrics.fit_size(TEXTS[0], lu.FONT_BODY, 300, 96, 24)
+    text_metrics.fit_size(TEXTS[0], lu.FONT_BODY, 300, 96, 24)
+
+    stats = text_metrics.stats()
+    assert stats["fits"]["hits"] == 1 and stats["fits"]["misses"] == 1
+    assert stats["widths"]["maxsize"] == text_metrics.config.TEXT_METRICS_CACHE_SIZE
+
+    text_metrics.clear()
+    assert text_metrics.stats()["fits"]["currsize"] == 0
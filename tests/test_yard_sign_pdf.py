@@ -215,8 +215,8 @@ class TestListingSignPDF:
                         
                         generate_yard_sign_pdf(order_dict)
                         
-                        # Two-sided PDF should draw the chosen layout twice (front/back).
-                        assert mock_modern_round.call_count == 2
+                        # Two-sided PDF draws the chosen layout once; front/back reference it.
+                        assert mock_modern_round.call_count == 1
                         mock_landscape.assert_not_called()
 
     # Redundant test_landscape_layout_selection removed (covered by test_landscape_layout_used_for_36x24)
@@ -25,6 +25,14 @@ def get_agent_by_normalized_email(db: Any, normalized_email: str):
     ).fetchone()
 
 
+def _refresh_claimed_properties(db: Any, agent_id: int) -> None:
+    """The claiming user's subscription now decides gating for the agent's properties."""
+    from services import property_entitlements
+
+    rows = db.execute("SELECT id FROM properties WHERE agent_id = %s", (agent_id,)).fetchall()
+    property_entitlements.refresh(db, [row["id"] for row in rows])
+
+
 def claim_agent_for_verified_user(db: Any, user_id: int, email: str, default_name: str | None = None) -> dict:
     """
     Claim (or create+claim) the agent identity for a verified user.
@@ -35,6 +43,9 @@ def claim_agent_for_verified_user(db: Any, user_id: int, email: str, default_nam
     - claimed by another user => deny
     - unclaimed => claim
     - absent => create claimed row
+
+    A "claimed" result carries refreshed_user_id: the caller must run
+    qr_resolution.invalidate_user for it after committing.
     """
     normalized_email = normalize_agent_email(email)
     if not normalized_email:
@@ -60,7 +71,8 @@ def claim_agent_for_verified_user(db: Any, user_id: int, email: str, default_nam
                 "UPDATE agents SET user_id = %s, email = %s WHERE id = %s",
                 (user_id, normalized_email, agent["id"]),
             )
-            return {"agent_id": agent["id"], "status": "claimed"}
+            _refresh_claimed_properties(db, agent["id"])
+            return {"agent_id": agent["id"], "status": "claimed", "refreshed_user_id": user_id}
         if int(agent["user_id"]) == int(user_id):
             return {"agent_id": agent["id"], "status": "already_claimed"}
         raise PermissionError("This agent email is already claimed by another account.")
@@ -0,0 +1,216 @@
+"""
+Decoded image cache for PDF rendering.
+
+Headshots, logos and QR logo bytes are drawn into several pages and several
+documents (both faces of a yard sign, every kit asset, previews). Without a
+cache each draw downloads and decodes the same object again.
+
+Two levels:
+- Render scope (`with render_scope():`): one ImageReader per (key, box) for
+  the duration of a render; no storage round trips after the first draw.
+  Also memoizes small per-render lookups (QR logo bytes, raster QR PNGs).
+- Process scope: prepared image bytes keyed by (key, etag, box), bounded by
+  IMAGE_CACHE_MAX_BYTES with LRU eviction. The etag check means a replaced
+  headshot is never served stale.
+
+Images larger than the print box are downscaled to IMAGE_CACHE_PRINT_DPI
+before they are cached (and embedded), keeping the original encoding when no
+downscale is needed so JPEGs still pass through to the PDF untouched. Preview
+renders open their scope with a lower dpi so they decode screen-sized proxies.
+"""
+import contextvars
+import io
+import logging
+import math
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_scope = contextvars.ContextVar("image_render_scope", default=None)
+_stats = {"hits": 0, "scope_hits": 0, "misses": 0, "evictions": 0, "downscaled": 0}
+
+
+class _ByteLRU:
+    """LRU mapping bounded by the total size of its values (bytes)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()  # key -> (nbytes, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, nbytes):
+        # One oversized entry would flush everything else
+        if nbytes > self.max_bytes // 4:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= old[0]
+            self._data[key] = (nbytes, value)
+            self.size += nbytes
+            while self.size > self.max_bytes and self._data:
+                _, (evicted, _) = self._data.popitem(last=False)
+                self.size -= evicted
+                _stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+
+_cache = _ByteLRU(config.IMAGE_CACHE_MAX_BYTES)
+
+
+@contextmanager
+def render_scope(dpi=None):
+    """
+    Share decoded images across every page drawn inside the block. Nests;
+    a nested scope with a different dpi (preview renders) gets its own images.
+    """
+    current = _scope.get()
+    if current is not None and dpi in (None, current.get("dpi")):
+        yield
+        return
+    token = _scope.set({"dpi": dpi})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def memo(key, compute):
+    """compute() once per render scope (always, outside one)."""
+    scope = _scope.get()
+    if scope is None:
+        return compute()
+    memo_key = ("memo",) + tuple(key)
+    if memo_key not in scope:
+        scope[memo_key] = compute()
+    else:
+        _stats["scope_hits"] += 1
+    return scope[memo_key]
+
+
+def _box_px(box):
+    if not box:
+        return None
+    scope = _scope.get()
+    dpi = (scope.get("dpi") if scope else None) or config.IMAGE_CACHE_PRINT_DPI
+    return tuple(max(1, math.ceil(float(v) / 72.0 * dpi)) for v in box)
+
+
+def _etag(storage, key):
+    etag = getattr(storage, "etag", None)
+    if etag is None:
+        return None
+    try:
+        return etag(key)
+    except Exception:
+        return None
+
+
+def prepare(raw, box_px=None, cover=False):
+    """
+    Downscale encoded image bytes so they cover no more than box_px (w, h)
+    pixels: fit inside the box, or fill it when cover=True (clipped draws).
+    Returns the original bytes when they are already small enough.
+    """
+    if not box_px:
+        return raw
+    with Image.open(io.BytesIO(raw)) as im:
+        w, h = im.size
+        scale = (max if cover else min)(box_px[0] / w, box_px[1] / h)
+        if scale >= 1:
+            return raw
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        fmt = im.format
+        if fmt == "JPEG":
+            im.draft("RGB", size)  # DCT-domain downscale: decodes far fewer pixels
+        if im.mode not in ("RGB", "RGBA", "L", "LA"):
+            im = im.convert("RGBA" if "transparency" in im.info else "RGB")
+        resized = im.resize(size, Image.LANCZOS)
+
+    out = io.BytesIO()
+    if fmt == "JPEG" and resized.mode in ("RGB", "L"):
+        resized.save(out, format="JPEG", quality=90)
+    else:
+        resized.save(out, format="PNG")
+    _stats["downscaled"] += 1
+    return out.getvalue()
+
+
+def load_bytes(storage, key, immutable=False):
+    """
+    Raw bytes of a stored object, cached per process by (key, etag).
+    immutable=True: the key is never rewritten (unique per upload), so it alone
+    identifies the bytes and warm hits skip the etag (HEAD) round trip.
+    """
+    etag = "immutable" if immutable else _etag(storage, key)
+    cache_key = ("raw", key, etag)
+    if etag is not None:
+        data = _cache.get(cache_key)
+        if data is not None:
+            _stats["hits"] += 1
+            return data
+    _stats["misses"] += 1
+    data = storage.get_file(key).getvalue()
+    if etag is not None:
+        _cache.set(cache_key, data, len(data))
+    return data
+
+
+def load_image(storage, key, box=None, cover=False):
+    """
+    ImageReader for a stored image, downscaled for a draw box of `box`
+    (width, height) points at print DPI (or the render scope's dpi).
+    """
+    box_px = _box_px(box)
+    scope = _scope.get()
+    scope_key = ("image", key, box_px, cover)
+    if scope is not None and scope_key in scope:
+        _stats["scope_hits"] += 1
+        return scope[scope_key]
+
+    etag = _etag(storage, key)
+    cache_key = ("image", key, etag, box_px, cover)
+    data = _cache.get(cache_key) if etag is not None else None
+    if data is not None:
+        _stats["hits"] += 1
+    else:
+        _stats["misses"] += 1
+        data = prepare(storage.get_file(key).getvalue(), box_px, cover)
+        if etag is not None:
+            _cache.set(cache_key, data, len(data))
+
+    reader = ImageReader(io.BytesIO(data))
+    if scope is not None:
+        scope[scope_key] = reader
+    return reader
+
+
+def clear():
+    _cache.clear()
+
+
+def stats():
+    s = dict(_stats)
+    s["bytes"] = _cache.size
+    s["entries"] = len(_cache._data)
+    return s
@@ -1,61 +1,95 @@
+"""
+Image processing for uploaded logos.
+
+One decode -> transform -> encode pipeline shared by background removal
+(process_transparency) and QR logo normalization
+(services.branding.validate_and_normalize_logo). Per-pixel work runs as
+whole-image band operations in PIL's C code (point / multiply / masked
+paste) rather than Python loops over getdata().
+"""
 import io
-from PIL import Image
+import logging
+
+from PIL import Image, ImageChops, ImageOps
+
+logger = logging.getLogger(__name__)
+
+TRANSPARENT_WHITE = (255, 255, 255, 0)
+
+
+def decode_image(image_data: bytes, max_pixels: int | None = None, exif_transpose: bool = False) -> Image.Image:
+    """
+    Decode bytes to an RGBA image.
+
+    max_pixels is checked from the header, before any pixel data is decoded.
+    """
+    img = Image.open(io.BytesIO(image_data))
+    if max_pixels and img.width * img.height > max_pixels:
+        raise ValueError(f"Image dimensions too large (max {max_pixels // 1_000_000}MP)")
+    if exif_transpose:
+        img = ImageOps.exif_transpose(img)
+    return img.convert("RGBA")
+
+
+def encode_png(img: Image.Image) -> bytes:
+    output = io.BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def background_mask(img: Image.Image, threshold: int = 30, remove_white: bool = True) -> Image.Image:
+    """
+    'L' mask, 255 where all of R, G and B are past the threshold: brighter
+    than 255 - threshold (remove_white) or darker than threshold.
+    """
+    if remove_white:
+        limit = 255 - threshold
+        table = [255 if v > limit else 0 for v in range(256)]
+    else:
+        table = [255 if v < threshold else 0 for v in range(256)]
+    r, g, b = (band.point(table) for band in img.split()[:3])
+    return ImageChops.multiply(ImageChops.multiply(r, g), b)
+
+
+def make_transparent(img: Image.Image, threshold: int = 30, remove_white: bool = True) -> Image.Image:
+    """Replace background pixels with fully transparent white, in place."""
+    img.paste(TRANSPARENT_WHITE, (0, 0) + img.size, background_mask(img, threshold, remove_white))
+    return img
+
+
+def crop_to_content(img: Image.Image) -> Image.Image:
+    bbox = img.getbbox()
+    return img.crop(bbox) if bbox else img
+
+
+def contain(img: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """Fit inside `size` (downscale only) and centre on a transparent canvas."""
+    canvas = Image.new("RGBA", size, TRANSPARENT_WHITE)
+    img = img.copy()
+    img.thumbnail(size, Image.Resampling.LANCZOS)
+    canvas.paste(img, ((size[0] - img.width) // 2, (size[1] - img.height) // 2))
+    return canvas
+
 
 def process_transparency(image_data: bytes, threshold: int = 30, remove_white: bool = True) -> bytes:
     """
     Process an image to make the background transparent.
-    
+
     Args:
         image_data: Raw bytes of the image/uploaded file.
         threshold: Color threshold. Pixels darker than this (or brighter if remove_white) become transparent.
         remove_white: If True, remove white/bright backgrounds. If False, remove black/dark backgrounds.
                       Defaults to True as white backgrounds are more common for logos.
-                      
+
     Returns:
         bytes: The processed PNG image bytes.
     """
     try:
-        img = Image.open(io.BytesIO(image_data))
-        img = img.convert("RGBA")
-        
-        datas = img.getdata()
-        new_data = []
-        
-        for item in datas:
-            # item is (R, G, B, A)
-            r, g, b = item[0], item[1], item[2]
-            
-            is_transparent = False
-            
-            if remove_white:
-                # Remove Bright Pixels (White Backgrounds)
-                # Check if it's very bright (considering threshold as distance from 255)
-                # e.g. if threshold is 30, anything > 225 is transparent
-                limit = 255 - threshold
-                if r > limit and g > limit and b > limit:
-                    is_transparent = True
-            else:
-                # Remove Dark Pixels (Black Backgrounds - logic from original script)
-                if r < threshold and g < threshold and b < threshold:
-                    is_transparent = True
-            
-            if is_transparent:
-                new_data.append((255, 255, 255, 0)) # Fully Transparent
-            else:
-                new_data.append(item)
-                
-        img.putdata(new_data)
-        
+        img = make_transparent(decode_image(image_data), threshold, remove_white)
         # Crop tight to content
-        bbox = img.getbbox()
-        if bbox:
-            img = img.crop(bbox)
-            
-        output = io.BytesIO()
-        img.save(output, format="PNG")
-        return output.getvalue()
-        
+        return encode_png(crop_to_content(img))
+
     except Exception as e:
-        print(f"Error processing transparency: {e}")
+        logger.warning(f"Error processing transparency: {e}")
         # Return original if processing fails
         return image_data
@@ -4,13 +4,13 @@ Uses standard typography (Bodoni, Allura) and components.
 """
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
 from reportlab.lib.colors import HexColor
 
 import services.printing.layout_utils as lu
 import utils.pdf_text as pdf_text
 from utils.pdf_generator import hex_to_rgb, draw_qr, LayoutSpec
 from utils.storage import get_storage
+from utils import image_cache
 from config import PUBLIC_BASE_URL
 import logging
 import re
@@ -380,7 +380,7 @@ def _draw_photo_circle(c, key, x, y, size):
             p = c.beginPath()
             p.circle(x + size/2, y + size/2, size/2)
             c.clipPath(p, stroke=0)
-            img = ImageReader(storage.get_file(key))
+            img = image_cache.load_image(storage, key, box=(size, size), cover=True)
             c.drawImage(img, x, y, width=size, height=size)
             c.restoreState()
             # Stroke
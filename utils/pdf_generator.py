@@ -1,7 +1,7 @@
 """
 PDF Sign Generator with Size-Aware Layout.
 Generates print-ready PDF signs that scale proportionally to any supported size.
-Vector QR codes for print-grade sharpness using ReportLab's QrCodeWidget.
+Vector QR codes for print-grade sharpness via the shared QR engine (utils.qr_engine).
 """
 import logging
 from reportlab.pdfgen import canvas
@@ -12,6 +12,7 @@ import io
 from constants import SIGN_SIZES, DEFAULT_SIGN_COLOR, DEFAULT_SIGN_SIZE
 from utils.qr_vector import draw_vector_qr
 from utils.storage import get_storage
+from utils import image_cache, text_metrics
 from config import PUBLIC_BASE_URL
 from utils.qr_urls import property_scan_url
 import utils.pdf_text as pdf_text
@@ -84,15 +85,7 @@ def fit_text_single_line(c, text: str, max_width_pts: float, font_name: str,
     Returns:
         The largest font size that fits, or min_font_size if text is too long.
     """
-    from reportlab.pdfbase.pdfmetrics import stringWidth
-    
-    font_size = max_font_size
-    while font_size >= min_font_size:
-        width = stringWidth(text, font_name, font_size)
-        if width <= max_width_pts:
-            return font_size
-        font_size -= 1
-    return min_font_size
+    return text_metrics.fit_size(text, font_name, max_width_pts, max_font_size, min_font_size)
 
 
 def wrap_text_to_width(text: str, max_width_pts: float, font_name: str, 
@@ -111,8 +104,6 @@ def wrap_text_to_width(text: str, max_width_pts: float, font_name: str,
         List of text lines (capped at max_lines). 
         Last line is truncated with "..." if text overflows.
     """
-    from reportlab.pdfbase.pdfmetrics import stringWidth
-    
     words = text.split()
     if not words:
         return []
@@ -122,7 +113,7 @@ def wrap_text_to_width(text: str, max_width_pts: float, font_name: str,
     
     for word in words:
         test_line = ' '.join(current_line + [word])
-        if stringWidth(test_line, font_name, font_size) <= max_width_pts:
+        if text_metrics.text_width(test_line, font_name, font_size) <= max_width_pts:
             current_line.append(word)
         else:
             if current_line:
@@ -130,7 +121,7 @@ def wrap_text_to_width(text: str, max_width_pts: float, font_name: str,
                 if len(lines) >= max_lines:
                     # Truncate with ellipsis
                     last = lines[-1]
-                    while stringWidth(last + '...', font_name, font_size) > max_width_pts and len(last) > 5:
+                    while text_metrics.text_width(last + '...', font_name, font_size) > max_width_pts and len(last) > 5:
                         last = last[:-1].rstrip()
                     lines[-1] = last + '...'
                     return lines
@@ -147,6 +138,22 @@ def wrap_text_to_width(text: str, max_width_pts: float, font_name: str,
     
     return lines
 
+def draw_repeated_pages(c, draw_face, pages=2, name="SignFace"):
+    """
+    Draw a face once and place it on `pages` identical pages (front/back).
+
+    draw_face(c) runs a single time inside a form XObject; every page is just
+    a reference to it, so text fitting, image embedding and QR paths are
+    computed and stored once. The form spans the whole page (bleed included)
+    in page coordinates, so draw_face works exactly as it would on a page.
+    """
+    c.beginForm(name)
+    draw_face(c)
+    c.endForm()
+    for _ in range(pages):
+        c.doForm(name)
+        c.showPage()
+
 def draw_qr(c, qr_value: str, x, y, size, *, user_id: int | None = None, **kwargs):
     """
     Draw a QR code at (x, y) with dimension `size` x `size`.
@@ -164,7 +171,8 @@ def draw_qr(c, qr_value: str, x, y, size, *, user_id: int | None = None, **kwarg
             # Lazy import to avoid circular dep / early DB access
             from services.branding import get_user_qr_logo_bytes
             
-            logo_bytes = get_user_qr_logo_bytes(user_id)
+            # Both faces of a sign draw the same QR: look up / rasterize once per render
+            logo_bytes = image_cache.memo(('qr_logo', user_id), lambda: get_user_qr_logo_bytes(user_id))
             if logo_bytes:
                 # Calculate resolution
                 # ReportLab size is in points (1/72 inch)
@@ -172,7 +180,10 @@ def draw_qr(c, qr_value: str, x, y, size, *, user_id: int | None = None, **kwarg
                 # Target 300 DPI, min 1024, max 2400
                 target_px = max(1024, min(2400, int(size_in * 300)))
                 
-                png_data = render_qr_png(qr_value, size_px=target_px, logo_png=logo_bytes)
+                png_data = image_cache.memo(
+                    ('qr_png', user_id, qr_value, target_px),
+                    lambda: render_qr_png(qr_value, size_px=target_px, logo_png=logo_bytes)
+                )
                 
                 # ReportLab drawImage
                 img_reader = ImageReader(io.BytesIO(png_data))
@@ -241,58 +252,62 @@ def generate_pdf_sign(address, beds, baths, sqft, price, agent_name, brokerage,
     # Create layout spec
     layout = LayoutSpec(size_config['width_in'], size_config['height_in'])
     
-    # Create canvas in memory
-    pdf_buffer = io.BytesIO()
+    def _render():
+        # Create canvas in memory
+        pdf_buffer = io.BytesIO()
     
-    # Create canvas with bleed
-    c = canvas.Canvas(
-        pdf_buffer, 
-        pagesize=(layout.width + 2 * layout.bleed, layout.height + 2 * layout.bleed)
-    )
+        # Create canvas with bleed
+        c = canvas.Canvas(
+            pdf_buffer, 
+            pagesize=(layout.width + 2 * layout.bleed, layout.height + 2 * layout.bleed)
+        )
     
-    # Determine if landscape (width > height)
-    is_landscape = size_config['width_in'] > size_config['height_in']
+        # Determine if landscape (width > height)
+        is_landscape = size_config['width_in'] > size_config['height_in']
     
-    # Draw 2 identical pages (front/back)
-    for page_num in range(2):
-        c.saveState()
-        c.translate(layout.bleed, layout.bleed)
+        # 2 identical pages (front/back) referencing one drawn face
+        def _draw_face(c):
+            c.saveState()
+            c.translate(layout.bleed, layout.bleed)
         
-        if layout_id == 'listing_modern_round':
-             _draw_modern_round_layout(
-                c, layout, address, beds, baths, sqft, price,
-                agent_name, brokerage, agent_email, agent_phone,
-                qr_key, agent_photo_key, sign_color, qr_value=qr_value,
-                agent_photo_path=agent_photo_path, user_id=user_id, logo_key=logo_key
-            )
+            if layout_id == 'listing_modern_round':
+                 _draw_modern_round_layout(
+                    c, layout, address, beds, baths, sqft, price,
+                    agent_name, brokerage, agent_email, agent_phone,
+                    qr_key, agent_photo_key, sign_color, qr_value=qr_value,
+                    agent_photo_path=agent_photo_path, user_id=user_id, logo_key=logo_key
+                )
 
-        elif is_landscape:
-            # House Style Landscape
-            _draw_landscape_split_layout(
-                c, layout, address, beds, baths, sqft, price,
-                agent_name, brokerage, agent_email, agent_phone,
-                qr_key, agent_photo_key, sign_color, qr_value=qr_value,
-                agent_photo_path=agent_photo_path, user_id=user_id, logo_key=logo_key
-            )
-        else:
-            # House Style Standard (Vertical)
-            _draw_standard_layout(
-                c, layout, address, beds, baths, sqft, price,
-                agent_name, brokerage, agent_email, agent_phone,
-                qr_key, agent_photo_key, sign_color, qr_value=qr_value,
-                agent_photo_path=agent_photo_path, user_id=user_id, logo_key=logo_key
-            )
+            elif is_landscape:
+                # House Style Landscape
+                _draw_landscape_split_layout(
+                    c, layout, address, beds, baths, sqft, price,
+                    agent_name, brokerage, agent_email, agent_phone,
+                    qr_key, agent_photo_key, sign_color, qr_value=qr_value,
+                    agent_photo_path=agent_photo_path, user_id=user_id, logo_key=logo_key
+                )
+            else:
+                # House Style Standard (Vertical)
+                _draw_standard_layout(
+                    c, layout, address, beds, baths, sqft, price,
+                    agent_name, brokerage, agent_email, agent_phone,
+                    qr_key, agent_photo_key, sign_color, qr_value=qr_value,
+                    agent_photo_path=agent_photo_path, user_id=user_id, logo_key=logo_key
+                )
         
-        c.restoreState()
-        c.showPage()
-    
-    c.save()
-    
-    pdf_buffer.seek(0)
+            c.restoreState()
+
+        draw_repeated_pages(c, _draw_face)
+        c.save()
     
+        pdf_buffer.seek(0)
+        return pdf_buffer
+
     # Branch: Legacy mode returns filesystem path
     if legacy_mode:
         import tempfile
+        with image_cache.render_scope():
+            pdf_buffer = _render()
         # Write to temp file
         tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
         tmp_file.write(pdf_buffer.read())
@@ -301,6 +316,7 @@ def generate_pdf_sign(address, beds, baths, sqft, price, agent_name, brokerage,
     
     # Normal mode: Upload PDF to storage
     from utils.filenames import make_sign_asset_basename
+    from services import render_cache
     
     if output_key:
         pdf_key = output_key
@@ -310,10 +326,19 @@ def generate_pdf_sign(address, beds, baths, sqft, price, agent_name, brokerage,
         basename = make_sign_asset_basename(order_id if order_id else 0, sign_size)
         pdf_key = f"{folder}/{basename}.pdf"
     
-    storage = get_storage()
-    storage.put_file(pdf_buffer, pdf_key, content_type="application/pdf")
-    
-    return pdf_key
+    # Identical inputs reuse the stored render instead of redrawing
+    return render_cache.render_to_storage(
+        'sign_pdf', pdf_key, _render, "application/pdf",
+        fields={
+            'layout_id': layout_id, 'sign_size': sign_size, 'sign_color': sign_color,
+            'address': address, 'beds': beds, 'baths': baths, 'sqft': sqft, 'price': price,
+            'agent_name': agent_name, 'brokerage': brokerage,
+            'agent_email': agent_email, 'agent_phone': agent_phone, 'qr_value': qr_value,
+        },
+        image_keys=(qr_key, agent_photo_key, logo_key),
+        qr_user_id=user_id,
+        storage=get_storage(),
+    )
 
 
 def _draw_standard_layout(c, layout, address, beds, baths, sqft, price,
@@ -652,8 +677,7 @@ def _draw_brand_layout(c, layout, address, beds, baths, sqft, price,
     logo_size = layout.height * 0.15
     if logo_key and storage.exists(logo_key):
         try:
-            logo_data = storage.get_file(logo_key)
-            img = ImageReader(logo_data)
+            img = image_cache.load_image(storage, logo_key, box=(logo_size, logo_size))
             # Draw centered
             logo_x = (layout.width - logo_size) / 2
             logo_y = cursor_y - logo_size
@@ -836,8 +860,7 @@ def _draw_landscape_brand(c, layout, address, beds, baths, sqft, price,
     has_logo = False
     if logo_key and storage.exists(logo_key):
         try:
-            logo_data = storage.get_file(logo_key)
-            img = ImageReader(logo_data)
+            img = image_cache.load_image(storage, logo_key, box=(logo_size, logo_size))
             c.drawImage(img, logo_x, logo_y, width=logo_size, height=logo_size, preserveAspectRatio=True, mask='auto', anchorAtXY=True)
             has_logo = True
         except Exception as e:
@@ -3,16 +3,25 @@ PDF Preview Generator - Web Optimized.
 
 Renders PDF first page to WebP preview with aspect ratio preservation.
 Supports per-order directory structure and atomic generation via storage abstraction.
+
+Interactive flows (resize, order forms) use render_layout_preview instead: the
+layout drawer runs directly at screen resolution with low-res image proxies
+and no bleed, so no print PDF has to exist (or be rasterized) first.
 """
+import hashlib
 import os
 import io
 from typing import Optional, Tuple
 
 import fitz  # PyMuPDF
 from PIL import Image
+from reportlab.pdfgen import canvas
 
+import config
 from constants import SIGN_SIZES, DEFAULT_SIGN_SIZE, LAYOUT_VERSION
 from utils.storage import get_storage
+from services import render_cache
+from utils import image_cache
 from utils.filenames import make_sign_asset_basename
 
 # Web preview settings
@@ -46,6 +55,70 @@ def _calculate_scaled_dimensions(
     return new_width, new_height
 
 
+def preview_key_for(order_id: Optional[int], sign_size: str, layout_version: Optional[int] = None) -> str:
+    """Storage key of an order's WebP preview (shared by both preview paths)."""
+    if layout_version is None:
+        layout_version = LAYOUT_VERSION
+    folder = f"previews/order_{order_id}" if order_id else "previews/tmp"
+    basename = make_sign_asset_basename(order_id if order_id else 0, sign_size, layout_version)
+    return f"{folder}/{basename}.webp"
+
+
+def render_layout_preview(
+    draw,
+    width_pt: float,
+    height_pt: float,
+    preview_key: str,
+    fields: dict,
+    image_keys=(),
+    qr_user_id: Optional[int] = None,
+    max_dimension: Optional[int] = None,
+    storage=None,
+) -> str:
+    """
+    Fast preview: run a layout drawer straight to a screen-size WebP.
+
+    draw(c) paints one face with its origin at the trim corner (the same
+    drawers the print PDFs use); anything it paints into the bleed is clipped.
+    Images are loaded at the preview DPI rather than print DPI.
+
+    Returns:
+        str: preview_key
+    """
+    max_dimension = max_dimension or config.PREVIEW_FAST_MAX_DIMENSION
+    dpi = max_dimension * 72.0 / max(width_pt, height_pt)
+
+    def _render():
+        pdf_buffer = io.BytesIO()
+        # Throwaway single-page document: skip stream compression
+        c = canvas.Canvas(pdf_buffer, pagesize=(width_pt, height_pt), pageCompression=0)
+        with image_cache.render_scope(dpi=dpi):
+            draw(c)
+        c.showPage()
+        c.save()
+
+        doc = fitz.open(stream=pdf_buffer.getvalue(), filetype="pdf")
+        try:
+            zoom = dpi / 72.0
+            pix = doc.load_page(0).get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        finally:
+            doc.close()
+
+        img_buffer = io.BytesIO()
+        img.save(img_buffer, format="WEBP", quality=PREVIEW_QUALITY)
+        img_buffer.seek(0)
+        return img_buffer
+
+    return render_cache.render_to_storage(
+        'fast_preview', preview_key, _render, "image/webp",
+        fields=dict(fields, max_dimension=max_dimension, quality=PREVIEW_QUALITY),
+        image_keys=image_keys,
+        qr_user_id=qr_user_id,
+        storage=storage,
+    )
+
+
 def render_pdf_to_web_preview(
     pdf_key: str,
     order_id: Optional[int] = None,
@@ -96,79 +169,81 @@ def render_pdf_to_web_preview(
     except Exception as e:
         raise RuntimeError(f"Failed to fetch PDF from storage key {pdf_key}: {e}")
     
-    # Open PDF from memory
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    
-    try:
-        page = doc.load_page(0)
+    preview_key = preview_key_for(order_id, sign_size, layout_version)
+
+    def _render():
+        # Open PDF from memory
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            page = doc.load_page(0)
         
-        # Task A: Dynamic DPI Calculation
-        # Compute page size in inches
-        page_rect = page.rect
-        w_in = page_rect.width / 72.0
-        h_in = page_rect.height / 72.0
+            # Task A: Dynamic DPI Calculation
+            # Compute page size in inches
+            page_rect = page.rect
+            w_in = page_rect.width / 72.0
+            h_in = page_rect.height / 72.0
         
-        # Determine target DPI to hit MAX_PREVIEW_DIMENSION directly (or close to it)
-        # Avoid massive 300 DPI renders for 36x24 (which would be ~10800x7200)
-        # We want the larger dimension to differ little from MAX_PREVIEW_DIMENSION
+            # Determine target DPI to hit MAX_PREVIEW_DIMENSION directly (or close to it)
+            # Avoid massive 300 DPI renders for 36x24 (which would be ~10800x7200)
+            # We want the larger dimension to differ little from MAX_PREVIEW_DIMENSION
         
-        largest_dim_in = max(w_in, h_in)
-        if largest_dim_in > 0:
-            target_dpi = int(MAX_PREVIEW_DIMENSION / largest_dim_in)
-        else:
-            target_dpi = 150
+            largest_dim_in = max(w_in, h_in)
+            if largest_dim_in > 0:
+                target_dpi = int(MAX_PREVIEW_DIMENSION / largest_dim_in)
+            else:
+                target_dpi = 150
             
-        # Clamp DPI
-        # Min 96 (screen), Max 300 (print quality, usually overkill for web, but safe if small sign)
-        # Prefer slightly higher than screen for crispness on high-res displays
-        render_dpi = max(96, min(300, target_dpi))
+            # Clamp DPI
+            # Min 96 (screen), Max 300 (print quality, usually overkill for web, but safe if small sign)
+            # Prefer slightly higher than screen for crispness on high-res displays
+            render_dpi = max(96, min(300, target_dpi))
         
-        # Render
-        zoom = render_dpi / 72.0
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
+            # Render
+            zoom = render_dpi / 72.0
+            mat = fitz.Matrix(zoom, zoom)
+            pix = page.get_pixmap(matrix=mat, alpha=False)
         
-        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
         
-        # Crop bleed (Bleed is 0.125 inches)
-        bleed_px = int(round(bleed_in * render_dpi))
-        if bleed_px > 0 and img.width > 2 * bleed_px and img.height > 2 * bleed_px:
-            img = img.crop((bleed_px, bleed_px, img.width - bleed_px, img.height - bleed_px))
+            # Crop bleed (Bleed is 0.125 inches)
+            bleed_px = int(round(bleed_in * render_dpi))
+            if bleed_px > 0 and img.width > 2 * bleed_px and img.height > 2 * bleed_px:
+                img = img.crop((bleed_px, bleed_px, img.width - bleed_px, img.height - bleed_px))
             
-        # Log performance metrics (for verification)
-        # print(f"[Preview] Size: {sign_size}, Calc DPI: {render_dpi}, Rendered: {pix.width}x{pix.height}, Final Cropped: {img.width}x{img.height}")
+            # Log performance metrics (for verification)
+            # print(f"[Preview] Size: {sign_size}, Calc DPI: {render_dpi}, Rendered: {pix.width}x{pix.height}, Final Cropped: {img.width}x{img.height}")
 
         
-        # Scale to max dimension while preserving aspect ratio
-        new_width, new_height = _calculate_scaled_dimensions(
-            img.width, img.height, max_dimension
-        )
+            # Scale to max dimension while preserving aspect ratio
+            new_width, new_height = _calculate_scaled_dimensions(
+                img.width, img.height, max_dimension
+            )
         
-        if (new_width, new_height) != img.size:
-            # Task A: Use BOX or NEAREST for crisp QR edges, avoiding Lanczos ringing
-            img = img.resize((new_width, new_height), Image.Resampling.BOX)
+            if (new_width, new_height) != img.size:
+                # Task A: Use BOX or NEAREST for crisp QR edges, avoiding Lanczos ringing
+                img = img.resize((new_width, new_height), Image.Resampling.BOX)
         
-        # Save as WebP to buffer
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format="WEBP", quality=PREVIEW_QUALITY)
-        img_buffer.seek(0)
-        
-        # Determine output key
-        if order_id:
-            folder = f"previews/order_{order_id}"
-        else:
-            folder = "previews/tmp"
-            
-        basename = make_sign_asset_basename(order_id if order_id else 0, sign_size, layout_version)
-        preview_key = f"{folder}/{basename}.webp"
+            # Save as WebP to buffer
+            img_buffer = io.BytesIO()
+            img.save(img_buffer, format="WEBP", quality=PREVIEW_QUALITY)
+            img_buffer.seek(0)
         
-        # Upload to storage
-        storage.put_file(img_buffer, preview_key, content_type="image/webp")
-        
-        return preview_key
-        
-    finally:
-        doc.close()
+            return img_buffer
+        finally:
+            doc.close()
+
+    # Same PDF bytes + settings reuse the stored WebP instead of re-rasterizing
+    return render_cache.render_to_storage(
+        'preview', preview_key, _render, "image/webp",
+        fields={
+            'pdf_sha256': hashlib.sha256(pdf_bytes).hexdigest(),
+            'max_dimension': max_dimension,
+            'bleed_in': bleed_in,
+            'render_max_dimension': MAX_PREVIEW_DIMENSION,
+            'quality': PREVIEW_QUALITY,
+        },
+        storage=storage,
+    )
 
 
 def regenerate_order_preview(
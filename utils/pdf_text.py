@@ -9,9 +9,10 @@ Print Quality Rules:
 - Use registered fonts (from layout_utils.register_fonts)
 - Clamp line counts per block type
 """
-from reportlab.pdfbase.pdfmetrics import stringWidth
 from typing import List, Tuple, Optional
 
+from utils import text_metrics
+
 # Max lines per block type
 MAX_LINES_ADDRESS = 2
 MAX_LINES_BROKERAGE = 1
@@ -21,7 +22,7 @@ MAX_LINES_FEATURES = 1
 
 def measure_text_width(text: str, font_name: str, font_size: float) -> float:
     """
-    Measure text width in points using ReportLab's stringWidth.
+    Measure text width in points (ReportLab's stringWidth, memoized per string).
     
     Args:
         text: Text to measure
@@ -33,7 +34,7 @@ def measure_text_width(text: str, font_name: str, font_size: float) -> float:
     """
     if not text:
         return 0.0
-    return stringWidth(str(text), font_name, font_size)
+    return text_metrics.text_width(str(text), font_name, font_size)
 
 
 def fit_font_size_single_line(
@@ -60,15 +61,7 @@ def fit_font_size_single_line(
     """
     if not text:
         return max_font_size
-    
-    size = max_font_size
-    while size > min_font_size:
-        width = measure_text_width(text, font_name, size)
-        if width <= max_width_pts:
-            return size
-        size -= step
-    
-    return min_font_size
+    return text_metrics.fit_size(str(text), font_name, max_width_pts, max_font_size, min_font_size, step)
 
 
 def wrap_text(
@@ -6,6 +6,14 @@ Ensures QR codes are unique across ALL namespaces:
 - properties.qr_code
 - qr_variants.code
 
+Every allocated code is reserved in the `qr_codes` registry, whose primary key
+is the single namespace: a candidate is claimed with one
+INSERT ... ON CONFLICT DO NOTHING (retried with a new candidate on conflict),
+so two concurrent allocations can never hand out the same code. The insert
+also skips codes present in the three tables (rows written before the
+registry, or outside this module). The reservation commits with the caller's
+transaction, and registry rows are never released: printed codes are not reused.
+
 CRITICAL: No other file should implement its own uniqueness logic.
 """
 import secrets
@@ -15,31 +23,46 @@ from database import get_db
 # URL-safe alphabet for code generation (uppercase alphanumeric, no confusing chars)
 DEFAULT_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # No 0/O, 1/I/L
 
+_RESERVE_SQL = """
+    INSERT INTO qr_codes (code)
+    SELECT c.code FROM unnest(%s::text[]) AS c(code)
+    WHERE NOT EXISTS (SELECT 1 FROM sign_assets WHERE code = c.code)
+      AND NOT EXISTS (SELECT 1 FROM properties WHERE qr_code = c.code)
+      AND NOT EXISTS (SELECT 1 FROM qr_variants WHERE code = c.code)
+    ON CONFLICT (code) DO NOTHING
+    RETURNING code
+"""
+
 
 def is_code_taken(db, code: str) -> bool:
     """
     Check if a code exists in any QR namespace.
-    
+
     Args:
         db: Database connection
         code: The code to check
-        
+
     Returns:
-        True if code exists in sign_assets, properties, or qr_variants
+        True if code is registered or exists in sign_assets, properties, or qr_variants
     """
-    # Check sign_assets
-    if db.execute("SELECT 1 FROM sign_assets WHERE code = %s", (code,)).fetchone():
-        return True
-    
-    # Check properties
-    if db.execute("SELECT 1 FROM properties WHERE qr_code = %s", (code,)).fetchone():
-        return True
-    
-    # Check qr_variants
-    if db.execute("SELECT 1 FROM qr_variants WHERE code = %s", (code,)).fetchone():
-        return True
-    
-    return False
+    row = db.execute("""
+        SELECT EXISTS (SELECT 1 FROM qr_codes WHERE code = %(code)s)
+            OR EXISTS (SELECT 1 FROM sign_assets WHERE code = %(code)s)
+            OR EXISTS (SELECT 1 FROM properties WHERE qr_code = %(code)s)
+            OR EXISTS (SELECT 1 FROM qr_variants WHERE code = %(code)s) AS taken
+    """, {'code': code}).fetchone()
+    return bool(row['taken'])
+
+
+def _reserve(db, candidates):
+    """Claim the free candidates in one statement; returns the codes actually reserved."""
+    rows = db.execute(_RESERVE_SQL, (list(candidates),)).fetchall()
+    return [row['code'] for row in rows]
+
+
+def _random_code(length, alphabet):
+    # Use secrets for cryptographic randomness
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
 
 
 def generate_unique_code(
@@ -51,37 +74,77 @@ def generate_unique_code(
     _candidate_fn=None  # For testing: allows injecting deterministic candidates
 ) -> str:
     """
-    Generate a unique code that doesn't exist in any QR namespace.
-    
+    Generate and reserve a unique code that doesn't exist in any QR namespace.
+
     Args:
         db: Database connection. If None, get_db() is called.
         length: Length of the code (default 12)
         alphabet: Character set for code generation (default: URL-safe uppercase alnum)
         max_tries: Maximum attempts before raising (should never be reached)
         _candidate_fn: Optional test hook - callable that returns candidate codes
-        
+
     Returns:
-        A unique code string
-        
+        A unique code string (reserved in the caller's transaction)
+
     Raises:
         RuntimeError: If max_tries exceeded (should never happen in practice)
     """
     if db is None:
         db = get_db()
-    
+
     if alphabet is None:
         alphabet = DEFAULT_ALPHABET
-    
+
     for attempt in range(max_tries):
         # Generate candidate
         if _candidate_fn:
             code = _candidate_fn(attempt)
         else:
-            # Use secrets for cryptographic randomness
-            code = ''.join(secrets.choice(alphabet) for _ in range(length))
-        
-        # Check uniqueness
-        if not is_code_taken(db, code):
+            code = _random_code(length, alphabet)
+
+        # Claim it (one write; conflicts mean taken)
+        if _reserve(db, [code]):
             return code
-    
+
     raise RuntimeError(f"Failed to generate unique code after {max_tries} attempts")
+
+
+def allocate_codes(
+    db,
+    count: int,
+    *,
+    length: int = 12,
+    alphabet: str | None = None,
+    max_rounds: int = 10,
+    _candidate_fn=None  # For testing: callable(attempt) -> candidate code
+) -> list:
+    """
+    Bulk generate_unique_code: reserve `count` codes, normally in one round trip
+    (only colliding candidates are replaced, in further rounds).
+
+    Returns:
+        List of `count` distinct reserved codes
+
+    Raises:
+        RuntimeError: If max_rounds exceeded (should never happen in practice)
+    """
+    if count <= 0:
+        return []
+    if alphabet is None:
+        alphabet = DEFAULT_ALPHABET
+
+    codes = []
+    attempt = 0
+    for _ in range(max_rounds):
+        need = count - len(codes)
+        if need <= 0:
+            break
+        candidates = []
+        for _ in range(need):
+            candidates.append(_candidate_fn(attempt) if _candidate_fn else _random_code(length, alphabet))
+            attempt += 1
+        codes.extend(_reserve(db, dict.fromkeys(candidates)))
+
+    if len(codes) < count:
+        raise RuntimeError(f"Failed to allocate {count} unique codes after {max_rounds} rounds")
+    return codes
@@ -0,0 +1,123 @@
+"""
+Shared QR Engine.
+
+Encodes a value once into a module matrix (memoized by value, ECC and
+minimum version) and renders that matrix everywhere a QR is drawn:
+
+- PDF: one filled path built from merged horizontal runs of dark modules,
+  instead of one rect per module (ReportLab's QrCodeWidget).
+- PNG: a 1-module-per-pixel image scaled up with nearest-neighbour, instead
+  of the qrcode library drawing every box.
+
+NumPy is not a dependency here; the matrix is a tuple of row tuples and the
+raster path uses PIL's C resize, which is the same integer-scale operation.
+"""
+import functools
+import logging
+
+import qrcode
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+ECC_LEVELS = {
+    'L': qrcode.constants.ERROR_CORRECT_L,
+    'M': qrcode.constants.ERROR_CORRECT_M,
+    'Q': qrcode.constants.ERROR_CORRECT_Q,
+    'H': qrcode.constants.ERROR_CORRECT_H,
+}
+# QR spec quiet zone, in modules
+DEFAULT_BORDER = 4
+
+
+class QrMatrix:
+    """Encoded QR: dark-module rows plus their horizontal runs."""
+
+    __slots__ = ('value', 'ecc', 'version', 'rows', 'runs')
+
+    def __init__(self, value, ecc, version, rows):
+        self.value = value
+        self.ecc = ecc
+        self.version = version
+        self.rows = rows
+        self.runs = tuple(_row_runs(rows))
+
+    @property
+    def size(self):
+        return len(self.rows)
+
+
+def _row_runs(rows):
+    """(row, start_col, length) for every run of dark modules."""
+    for r, row in enumerate(rows):
+        start = None
+        for col, dark in enumerate(row):
+            if dark and start is None:
+                start = col
+            elif not dark and start is not None:
+                yield r, start, col - start
+                start = None
+        if start is not None:
+            yield r, start, len(row) - start
+
+
+@functools.lru_cache(maxsize=512)
+def encode(value, ecc='M', min_version=None):
+    """Encode once; repeated draws of the same URL reuse the matrix."""
+    qr = qrcode.QRCode(version=min_version, error_correction=ECC_LEVELS[ecc], border=0)
+    qr.add_data(value)
+    qr.make(fit=True)
+    rows = tuple(tuple(bool(m) for m in row) for row in qr.modules)
+    return QrMatrix(value, ecc, qr.version, rows)
+
+
+def draw_pdf(c, value, x, y, size, ecc='H', border=DEFAULT_BORDER):
+    """
+    Draw the QR as a single vector path at (x, y), `size` points square.
+    The `border` modules of quiet zone are inside `size` (not painted).
+    """
+    matrix = encode(value, ecc)
+    module = size / (matrix.size + 2 * border)
+
+    c.saveState()
+    # Module units with the origin at the top-left module: every rect is
+    # small integers, which keeps the content stream short.
+    c.translate(x + border * module, y + size - border * module)
+    c.scale(module, module)
+    c.setFillColorRGB(0, 0, 0)
+    path = c.beginPath()
+    for r, col, length in matrix.runs:
+        path.rect(col, -(r + 1), length, 1)
+    c.drawPath(path, stroke=0, fill=1)
+    c.restoreState()
+
+
+def module_image(matrix, box_size, border=DEFAULT_BORDER):
+    """Grayscale image with every module exactly box_size pixels, border included."""
+    total = matrix.size + 2 * border
+    pixels = bytearray(b'\xff' * (total * total))
+    for r, col, length in matrix.runs:
+        start = (border + r) * total + border + col
+        pixels[start:start + length] = b'\x00' * length
+    img = Image.frombytes('L', (total, total), bytes(pixels))
+    return img.resize((total * box_size, total * box_size), Image.NEAREST)
+
+
+def render_image(value, size_px, ecc='M', border=DEFAULT_BORDER):
+    """
+    size_px square RGB image: integer module scaling (crisp edges), centred
+    on white. The quiet zone is never cropped.
+    """
+    matrix = encode(value, ecc)
+    box_size = max(1, size_px // (matrix.size + 2 * border))
+    img = module_image(matrix, box_size, border).convert('RGB')
+    if img.size == (size_px, size_px):
+        return img
+    final = Image.new('RGB', (size_px, size_px), 'white')
+    final.paste(img, ((size_px - img.width) // 2, (size_px - img.height) // 2))
+    return final
+
+
+def stats():
+    info = encode.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'entries': info.currsize}
@@ -1,5 +1,5 @@
-import qrcode
 import io
+from utils import qr_engine
 from utils.storage import get_storage
 
 def generate_qr(url, filename_slug):
@@ -20,16 +20,9 @@ def generate_qr(url, filename_slug):
     # Standardize folder
     key = f"qr/{filename_slug}"
 
-    qr = qrcode.QRCode(
-        version=4,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=12,
-        border=2,
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
+    # Version 4 minimum, ECC H, 12px modules, 2-module border
+    matrix = qr_engine.encode(url, 'H', min_version=4)
+    img = qr_engine.module_image(matrix, box_size=12, border=2).convert('1')
     
     # Save to memory
     img_byte_arr = io.BytesIO()
@@ -1,9 +1,12 @@
-
+import hashlib
 import logging
 import io
-import qrcode
 from PIL import Image, ImageDraw
 
+import config
+from utils import qr_engine
+from utils.ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 # Try to import pyzbar (requires zbar shared library)
@@ -16,166 +19,142 @@ except (ImportError, OSError):
     ZBarSymbol = None
     # Log warning only once? Or relies on usage to log.
 
+# Logo size as a ratio of QR width. Start at 14%, drop down if decode fails.
+LOGO_RATIOS = [0.14, 0.12, 0.10, 0.08]
+
+# Verified logo renders: (data, logo sha256, size_px) -> (ratio or None, png).
+# Content-addressed, so a replaced logo can never be served stale from another
+# process; branding changes still forget the old logo here to free memory.
+_verified = TTLCache(maxsize=config.QR_LOGO_CACHE_MAXSIZE, ttl=config.QR_LOGO_CACHE_TTL)
+
+
+def logo_digest(logo_png: bytes) -> str:
+    return hashlib.sha256(logo_png).hexdigest()
+
+
+def forget_logo(logo_png: bytes) -> int:
+    """Drop cached renders for this logo. Returns the number removed."""
+    digest = logo_digest(logo_png)
+    return _verified.pop_matching(lambda key: key[1] == digest)
+
+
+def _png(img) -> bytes:
+    out = io.BytesIO()
+    img.save(out, format='PNG')
+    return out.getvalue()
+
+
+def _compose(qr_img, logo, ratio):
+    """Base QR with the logo centred on a white rounded backing, ratio of QR width."""
+    canvas = qr_img.copy()
+    width, height = canvas.size
+
+    # Keep aspect ratio of logo (it's 512x512 normalized usually, but be safe)
+    logo_w = int(width * ratio)
+    logo_h = int(logo_w / (logo.width / logo.height))
+    logo_resized = logo.resize((logo_w, logo_h), resample=Image.Resampling.LANCZOS)
+
+    # White backing: logo * 1.15, radius 10% of backing width
+    back_w = int(logo_w * 1.15)
+    back_h = int(logo_h * 1.15)
+    center_x = width // 2
+    center_y = height // 2
+    back_x = center_x - (back_w // 2)
+    back_y = center_y - (back_h // 2)
+    ImageDraw.Draw(canvas).rounded_rectangle(
+        [(back_x, back_y), (back_x + back_w, back_y + back_h)],
+        radius=back_w // 10,
+        fill="white"
+    )
+
+    # Paste with alpha
+    canvas.paste(logo_resized, (center_x - (logo_w // 2), center_y - (logo_h // 2)), mask=logo_resized)
+    return canvas
+
+
+def _decodes(img, data) -> bool:
+    return any(obj.data.decode('utf-8') == data for obj in decode(img, symbols=[ZBarSymbol.QRCODE]))
+
+
+def _choose_ratio(qr_img, logo, data):
+    """
+    Largest logo ratio whose composite still decodes to `data`, or None.
+
+    Candidates are verified on a downscaled copy first (a fraction of the
+    decode cost); full resolution is only tried when no ratio passes there.
+    """
+    composites = {}
+
+    def composite(ratio):
+        if ratio not in composites:
+            composites[ratio] = _compose(qr_img, logo, ratio)
+        return composites[ratio]
+
+    verify_px = config.QR_LOGO_VERIFY_PX
+    if verify_px and verify_px < qr_img.width:
+        for ratio in LOGO_RATIOS:
+            canvas = composite(ratio)
+            if _decodes(canvas.resize((verify_px, verify_px), Image.Resampling.BOX), data):
+                return ratio, canvas
+            logger.info(f"QR decode verification (downscaled) failed at ratio {ratio}.")
+    for ratio in LOGO_RATIOS:
+        canvas = composite(ratio)
+        if _decodes(canvas, data):
+            return ratio, canvas
+        logger.warning(f"QR Decode verification failed at ratio {ratio}. Retrying smaller...")
+    return None, None
+
+
 def render_qr_png(data: str, *, size_px: int = 1024, min_px: int = 1024, logo_png: bytes | None = None) -> bytes:
     """
     Render a high-res raster QR code, optionally with a logo overlay.
+    Logo renders are verified once and cached by (data, logo, size_px).
     """
-    
-    # 1. Base Setup
-    # Use ECC H if logo, else M
-    ecc = qrcode.constants.ERROR_CORRECT_H if logo_png else qrcode.constants.ERROR_CORRECT_M
-    
-    # Create QR object - Dynamic box_size to avoid fuzzy upscale
-    # Standard QR has 21 modules + 4*version. 
-    # Approx modules ~ 33 (V4) or higher. 
-    # Logic: Let qrcode library compute version, we just want output image to be large.
-    # We set box_size large enough so (modules * box_size) > min_px
-    # Init with minimal box_size to determine version/modules matches
-    qr = qrcode.QRCode(
-        version=None, # Auto
-        error_correction=ecc,
-        box_size=1, 
-        border=4, # Quiet zone
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-
-    # Calculate optimal integer box_size to fit within size_px
-    # This ensures every module is exactly N pixels (crisp edges)
-    # instead of fractional scaling which causes aliasing artifacts.
-    modules = qr.modules_count
-    # Correct sizing to include border in division (Fix: Never crop quiet zone)
-    # Total width in modules = modules + (border * 2)
-    total_modules = modules + (qr.border * 2)
-    box_size = size_px // total_modules
-    if box_size < 1: box_size = 1
-    
-    # Update QR instance
-    qr.box_size = box_size
-    
-    # Render Base QR to PIL Image
-    # fill_color="black", back_color="white"
-    qr_img = qr.make_image(fill_color="black", back_color="white").convert('RGB')
-    
-    # Pad to exact target size_px (Center the QR)
-    # Since box_size is integer floor, qr_img will be <= size_px
-    if qr_img.size != (size_px, size_px):
-        # Create white canvas
-        final_img = Image.new("RGB", (size_px, size_px), "white")
-        
-        # Calculate centering offset
-        actual_w, actual_h = qr_img.size
-        offset_x = (size_px - actual_w) // 2
-        offset_y = (size_px - actual_h) // 2
-        
-        final_img.paste(qr_img, (offset_x, offset_y))
-        qr_img = final_img
-    
-    # If no logo, we are done
     if not logo_png:
-        out = io.BytesIO()
-        qr_img.save(out, format='PNG')
-        return out.getvalue()
+        # 1. Base QR (shared engine: memoized encoding, integer module scaling)
+        return _png(qr_engine.render_image(data, size_px, ecc='M'))
+
+    key = (data, logo_digest(logo_png), size_px)
+    cached = _verified.get(key)
+    if cached is not None:
+        return cached[1]
+    ratio, png = _render_logo_qr(data, size_px, logo_png)
+    _verified.set(key, (ratio, png))
+    return png
+
+
+def _render_logo_qr(data, size_px, logo_png):
+    # 1. Base QR (shared engine: memoized encoding, integer module scaling)
+    # ECC H for logo overlays. Every module is exactly N pixels (crisp edges),
+    # the 4-module quiet zone is never cropped, and the result is centred on
+    # a white size_px canvas.
+    qr_img = qr_engine.render_image(data, size_px, ecc='H')
 
     # Safety: If pyzbar not available, we cannot verify logo safety.
-    # Fallback to no-logo to be safe (or proceed without verification? 
     # Requirement: "Scan reliability > aesthetics". Verify decode.
-    # So if we can't verify, we should NOT use logo.)
+    # So if we can't verify, we should NOT use logo.
     if not PYZBAR_AVAILABLE:
         logger.warning("pyzbar not available (missing DLL?). Falling back to standard QR.")
-        out = io.BytesIO()
-        qr_img.save(out, format='PNG')
-        return out.getvalue()
-        
+        return None, _png(qr_img)
+
     # 2. Logo Overlay Logic
     try:
         logo = Image.open(io.BytesIO(logo_png)).convert("RGBA")
-        
-        # Strategies: Ratio of QR width
-        # Start at 14% (0.14), drop down if fail
-        ratios = [0.14, 0.12, 0.10, 0.08]
-        
-        for ratio in ratios:
-            # Create a working copy of the base QR
-            canvas = qr_img.copy()
-            width, height = canvas.size
-            
-            # Calculate Logo Size
-            logo_w = int(width * ratio)
-            
-            # constrain aspects: logo is square-ish normalized
-            # Resize logo
-            # Keep aspect ratio of logo (it's 512x512 normalized usually, but be safe)
-            logo_aspect = logo.width / logo.height
-            logo_h = int(logo_w / logo_aspect)
-            
-            logo_resized = logo.resize((logo_w, logo_h), resample=Image.Resampling.LANCZOS)
-            
-            # Create White Backing (rounded rectangle preferred, or just rect)
-            # Size = logo * 1.15
-            back_w = int(logo_w * 1.15)
-            back_h = int(logo_h * 1.15)
-            
-            # Start drawing backing on canvas
-            # Center coordinates
-            center_x = width // 2
-            center_y = height // 2
-            
-            # Backing coords (top-left)
-            back_x = center_x - (back_w // 2)
-            back_y = center_y - (back_h // 2)
-            
-            draw = ImageDraw.Draw(canvas)
-            # Draw white rounded rect
-            # Radius = 10% of backing width
-            radius = back_w // 10
-            draw.rounded_rectangle(
-                [(back_x, back_y), (back_x + back_w, back_y + back_h)],
-                radius=radius,
-                fill="white"
-            )
-            
-            # Paste Logo
-            logo_x = center_x - (logo_w // 2)
-            logo_y = center_y - (logo_h // 2)
-            
-            # Paste with alpha
-            canvas.paste(logo_resized, (logo_x, logo_y), mask=logo_resized)
-            
-            # 3. VERIFICATION
-            # Attempt decode
-            decoded_objects = decode(canvas, symbols=[ZBarSymbol.QRCODE])
-            
-            success = False
-            for obj in decoded_objects:
-                if obj.data.decode('utf-8') == data:
-                    success = True
-                    break
-            
-            if success:
-                # Good! Return this image
-                out = io.BytesIO()
-                canvas.save(out, format='PNG')
-                return out.getvalue()
-            else:
-                logger.warning(f"QR Decode verification failed at ratio {ratio}. Retrying smaller...")
-                continue
-                
-        # If loop finishes without return, fallback
+
+        # 3. VERIFICATION
+        ratio, canvas = _choose_ratio(qr_img, logo, data)
+        if canvas is not None:
+            return ratio, _png(canvas)
+
+        # Fallback: the base ECC H QR (no logo) is safe
         logger.warning("QR Decode failed at all logo sizes. Falling back to no-logo.")
-        out = io.BytesIO()
-        # Re-render or just use the base qr_img (which was ECC H)?
-        # If we fallback, we might prefer ECC M for cleaner look if we regenerate?
-        # But for simplicity, returning the base ECC H (no logo) is safe.
-        qr_img.save(out, format='PNG')
-        return out.getvalue()
-        
+        return None, _png(qr_img)
+
     except Exception as e:
         logger.error(f"Logo overlay failed: {e}. Falling back to standard QR.")
-        # Fallback to no-logo
-        out = io.BytesIO()
         # Create fresh no-logo QR to be safe
-        qr_safe = qrcode.make(data, border=4, box_size=10, error_correction=qrcode.constants.ERROR_CORRECT_M)
-        qr_safe = qr_safe.resize((size_px, size_px))
-        qr_safe.save(out, format='PNG')
-        return out.getvalue()
+        return None, _png(qr_engine.render_image(data, size_px, ecc='M'))
+
+
+def stats():
+    return _verified.stats()
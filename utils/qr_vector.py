@@ -1,19 +1,17 @@
 """
 Vector QR Code Drawing for ReportLab PDFs.
 
-Uses ReportLab's QrCodeWidget for true vector QR rendering.
+Uses the shared QR engine (utils.qr_engine) for true vector QR rendering:
+memoized encoding, one path of merged module runs per code.
 No raster scaling - QR is rendered as vector paths.
 """
-from reportlab.graphics.barcode.qr import QrCodeWidget
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics import renderPDF
-from reportlab.lib import colors
+from utils import qr_engine
 
 
 def draw_vector_qr(c, qr_value: str, x: float, y: float, size: float, 
                    quiet: float = 0, ecc_level: str = "H") -> None:
     """
-    Draw a QR code as vector paths on a ReportLab canvas using QrCodeWidget.
+    Draw a QR code as vector paths on a ReportLab canvas.
     
     Args:
         c: ReportLab canvas object
@@ -25,7 +23,7 @@ def draw_vector_qr(c, qr_value: str, x: float, y: float, size: float,
         ecc_level: Error correction level ('L', 'M', 'Q', 'H')
     
     Notes:
-        - Uses ReportLab's QrCodeWidget for true vector output
+        - A 4-module quiet zone is kept inside `size` (as QrCodeWidget did)
         - Quiet zone is drawn as white background first
         - QR modules are black on white
     """
@@ -38,27 +36,10 @@ def draw_vector_qr(c, qr_value: str, x: float, y: float, size: float,
         c.rect(x - quiet, y - quiet, size + 2 * quiet, size + 2 * quiet, 
                stroke=0, fill=1)
     
-    # Create QR widget with specified error correction
-    qr = QrCodeWidget(qr_value, barLevel=ecc_level)
-    
-    # Get widget bounds to calculate scale
-    bounds = qr.getBounds()
-    qr_width = bounds[2] - bounds[0]
-    qr_height = bounds[3] - bounds[1]
-    
-    if qr_width <= 0 or qr_height <= 0:
+    if size <= 0:
         return
-    
-    # Create a Drawing with transform to scale to target size
-    scale_x = size / qr_width
-    scale_y = size / qr_height
-    
-    d = Drawing(size, size)
-    d.add(qr)
-    d.transform = [scale_x, 0, 0, scale_y, -bounds[0] * scale_x, -bounds[1] * scale_y]
-    
-    # Render the Drawing onto the canvas
-    renderPDF.draw(d, c, x, y)
+
+    qr_engine.draw_pdf(c, qr_value, x, y, size, ecc=ecc_level)
 
 
 # Legacy alias for compatibility
@@ -1,23 +1,87 @@
 import os
+import shutil
+import threading
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
 from werkzeug.utils import secure_filename
-from flask import current_app
+from flask import current_app, redirect, request, send_file, stream_with_context
 from io import BytesIO
 
+from utils.ttl_cache import TTLCache
+
 class StorageBackend:
     def put_file(self, file_storage, key, content_type=None):
         raise NotImplementedError
+
+    def put_stream(self, stream, key, content_type=None):
+        """
+        Store a forward-only readable (no seek) without holding it all in memory.
+        read(n) must return n bytes until EOF (S3 multipart depends on it).
+        Nothing is left under `key` if reading the stream raises.
+        """
+        return self.put_file(stream.read(), key, content_type=content_type)
     
     def get_url(self, key, expires_seconds=3600):
         raise NotImplementedError
 
+    def get_urls(self, keys, expires_seconds=3600):
+        """Bulk get_url: {key: url} for the non-empty keys."""
+        return {key: self.get_url(key, expires_seconds) for key in dict.fromkeys(keys) if key}
+
     def get_file(self, key):
         """Returns file content as bytes-like object (BytesIO)."""
         raise NotImplementedError
 
+    def open_stream(self, key):
+        """Returns a readable file-like object for the key (caller closes it)."""
+        return self.get_file(key)
+
+    def iter_chunks(self, key, chunk_size=256 * 1024):
+        """Yield the object in chunks without holding it all in memory."""
+        stream = self.open_stream(key)
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            stream.close()
+
+    def local_path(self, key):
+        """Filesystem path for the key, or None if the backend is not on local disk."""
+        return None
+
+    def etag(self, key):
+        """Cheap version tag for the stored object (changes when it is rewritten), or None if missing."""
+        return None
+
     def delete(self, key):
         raise NotImplementedError
 
+    def delete_many(self, keys):
+        """
+        Bulk delete; missing keys are not an error.
+        Returns the keys that could not be deleted.
+        """
+        failed = []
+        for key in dict.fromkeys(keys):
+            if not key:
+                continue
+            try:
+                self.delete(key)
+            except Exception:
+                failed.append(key)
+        return failed
+
     def exists(self, key):
         raise NotImplementedError
 
@@ -25,9 +89,10 @@ class StorageBackend:
         raise NotImplementedError
 
 class LocalStorage(StorageBackend):
-    def __init__(self, base_dir, base_url):
+    def __init__(self, base_dir, base_url, delete_workers=8):
         self.base_dir = os.path.abspath(base_dir)
         self.base_url = base_url
+        self.delete_workers = delete_workers
         os.makedirs(self.base_dir, exist_ok=True)
 
     def _get_abs_path(self, key):
@@ -69,6 +134,21 @@ class LocalStorage(StorageBackend):
                     f.write(file_storage)
         return key
 
+    def put_stream(self, stream, key, content_type=None, chunk_size=256 * 1024):
+        abs_path = self._get_abs_path(key)
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        # Write beside the target and rename, so readers never see a partial file
+        tmp_path = f"{abs_path}.part-{uuid.uuid4().hex[:8]}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(stream, f, chunk_size)
+            os.replace(tmp_path, abs_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
     def get_url(self, key, expires_seconds=3600):
         # Return root-relative path to match app.py routes (/uploads/, /qr/)
         # Using relative path fixes issues when accessing via IP vs localhost
@@ -80,11 +160,42 @@ class LocalStorage(StorageBackend):
         with open(abs_path, 'rb') as f:
             return BytesIO(f.read())
 
+    def open_stream(self, key):
+        return open(self._get_abs_path(key), 'rb')
+
+    def local_path(self, key):
+        return self._get_abs_path(key)
+
+    def etag(self, key):
+        try:
+            st = os.stat(self._get_abs_path(key))
+        except (OSError, ValueError):
+            return None
+        return f"{st.st_size}-{st.st_mtime_ns}"
+
     def delete(self, key):
         abs_path = self._get_abs_path(key)
         if os.path.exists(abs_path):
             os.remove(abs_path)
 
+    def delete_many(self, keys):
+        keys = [key for key in dict.fromkeys(keys) if key]
+        if len(keys) <= 1 or self.delete_workers <= 1:
+            return super().delete_many(keys)
+
+        def unlink(key):
+            try:
+                os.remove(self._get_abs_path(key))
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError):
+                return key
+            return None
+
+        # unlink releases the GIL; a few threads hide filesystem latency
+        with ThreadPoolExecutor(max_workers=min(self.delete_workers, len(keys))) as pool:
+            return [key for key in pool.map(unlink, keys) if key]
+
     def exists(self, key):
         return os.path.exists(self._get_abs_path(key))
 
@@ -99,16 +210,36 @@ class LocalStorage(StorageBackend):
         import shutil
         shutil.copy2(src_path, dest_path)
 
+
+# DeleteObjects accepts at most 1000 keys per request
+S3_DELETE_BATCH = 1000
+
+
 class S3Storage(StorageBackend):
-    def __init__(self, bucket_name, region, access_key, secret_key, prefix=""):
-        self.s3 = boto3.client(
-            's3',
+    def __init__(self, bucket_name, region, access_key, secret_key, prefix="",
+                 max_pool_connections=10, url_cache_maxsize=10000,
+                 multipart_chunk_bytes=8 * 1024 * 1024):
+        # One session + client per process: boto3 clients are thread-safe,
+        # sessions are not, so neither is created per request.
+        session = boto3.session.Session(
             region_name=region,
             aws_access_key_id=access_key,
             aws_secret_access_key=secret_key
         )
+        self.s3 = session.client(
+            's3',
+            config=BotoConfig(max_pool_connections=max_pool_connections)
+        )
         self.bucket = bucket_name
         self.prefix = prefix
+        # put_stream: multipart above one part; parts are buffered one or two at a time
+        self._transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunk_bytes,
+            multipart_chunksize=multipart_chunk_bytes,
+            max_concurrency=2,
+        )
+        # Presigned URLs keyed by (key, expires_seconds, expiry bucket)
+        self._url_cache = TTLCache(maxsize=url_cache_maxsize, ttl=expires_window(3600))
 
     def _get_s3_key(self, key):
         # Use provided key directly, assuming caller handles prefix/structure
@@ -143,12 +274,55 @@ class S3Storage(StorageBackend):
         )
         return key
 
+    def put_stream(self, stream, key, content_type=None):
+        # upload_fileobj aborts the multipart upload if the stream raises
+        self.s3.upload_fileobj(
+            stream, self.bucket, self._get_s3_key(key),
+            ExtraArgs={'ContentType': content_type or "application/octet-stream"},
+            Config=self._transfer_config,
+        )
+        return key
+
     def get_url(self, key, expires_seconds=3600):
+        """
+        Presigned GET URL. Signatures are reused within an expiry bucket
+        (half the URL lifetime), so a cached URL always has at least half its
+        validity left and browsers see a stable URL they can cache.
+        """
+        window = expires_window(expires_seconds)
+        bucket = int(time.time() // window)
+        cache_key = (key, expires_seconds, bucket)
+        url = self._url_cache.get(cache_key)
+        if url is not None:
+            return url
+
+        url = self._presign(key, expires_seconds)
+        if url:
+            remaining = window - (time.time() % window)
+            self._url_cache.set(cache_key, url, ttl=remaining)
+        return url
+
+    def get_urls(self, keys, expires_seconds=3600):
+        return {key: self.get_url(key, expires_seconds) for key in dict.fromkeys(keys) if key}
+
+    def get_download_url(self, key, expires_seconds=300, content_type=None, content_disposition=None):
+        """
+        Presigned GET URL with response header overrides (not cached: the
+        overrides vary per download and signing is a local HMAC).
+        """
+        extra = {}
+        if content_type:
+            extra['ResponseContentType'] = content_type
+        if content_disposition:
+            extra['ResponseContentDisposition'] = content_disposition
+        return self._presign(key, expires_seconds, extra)
+
+    def _presign(self, key, expires_seconds, extra_params=None):
         full_key = self._get_s3_key(key)
         try:
             url = self.s3.generate_presigned_url(
                 'get_object',
-                Params={'Bucket': self.bucket, 'Key': full_key},
+                Params={'Bucket': self.bucket, 'Key': full_key, **(extra_params or {})},
                 ExpiresIn=expires_seconds
             )
             # Debug log for S3 URL generation
@@ -164,10 +338,46 @@ class S3Storage(StorageBackend):
         obj = self.s3.get_object(Bucket=self.bucket, Key=full_key)
         return BytesIO(obj['Body'].read())
 
+    def get_object(self, key, byte_range=None):
+        """Raw get_object response (Body is a StreamingBody); byte_range is an HTTP Range value."""
+        params = {'Bucket': self.bucket, 'Key': self._get_s3_key(key)}
+        if byte_range:
+            params['Range'] = byte_range
+        return self.s3.get_object(**params)
+
+    def open_stream(self, key):
+        return self.get_object(key)['Body']
+
+    def etag(self, key):
+        try:
+            return self.s3.head_object(Bucket=self.bucket, Key=self._get_s3_key(key)).get('ETag')
+        except ClientError:
+            return None
+
     def delete(self, key):
         full_key = self._get_s3_key(key)
         self.s3.delete_object(Bucket=self.bucket, Key=full_key)
 
+    def delete_many(self, keys):
+        """DeleteObjects in batches of S3_DELETE_BATCH (the API maximum)."""
+        keys = [key for key in dict.fromkeys(keys) if key]
+        failed = []
+        for start in range(0, len(keys), S3_DELETE_BATCH):
+            batch = keys[start:start + S3_DELETE_BATCH]
+            by_full_key = {self._get_s3_key(key): key for key in batch}
+            try:
+                resp = self.s3.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={'Objects': [{'Key': k} for k in by_full_key], 'Quiet': True},
+                )
+            except ClientError as e:
+                print(f"[S3] ERROR deleting batch of {len(batch)} objects: {e}")
+                failed.extend(batch)
+                continue
+            # Quiet mode only reports failures
+            failed.extend(by_full_key.get(err.get('Key'), err.get('Key')) for err in resp.get('Errors', []))
+        return failed
+
     def exists(self, key):
         full_key = self._get_s3_key(key)
         try:
@@ -186,20 +396,180 @@ class S3Storage(StorageBackend):
         }
         self.s3.copy_object(CopySource=copy_source, Bucket=self.bucket, Key=dest_full_key)
 
-def get_storage():
-    """Factory to return the configured storage backend."""
-    from config import STORAGE_BACKEND, S3_BUCKET, AWS_REGION, INSTANCE_DIR, BASE_URL, S3_PREFIX
-    
-    if STORAGE_BACKEND == 's3':
-        access_key = os.environ.get('AWS_ACCESS_KEY_ID')
-        secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
-        
+def content_disposition(as_attachment, download_name=None):
+    """Content-Disposition value with an ASCII fallback and RFC 5987 filename* for non-ASCII names."""
+    disposition = 'attachment' if as_attachment else 'inline'
+    if not download_name:
+        return disposition
+    ascii_name = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+    ascii_name = ascii_name.replace('"', '').replace('\\', '') or 'download'
+    value = f'{disposition}; filename="{ascii_name}"'
+    if ascii_name != download_name:
+        value += f"; filename*=UTF-8''{quote(download_name, safe='')}"
+    return value
+
+
+def send_stored_file(key, mimetype=None, as_attachment=False, download_name=None, storage=None):
+    """
+    Response serving a stored object without buffering it in the worker.
+
+    - LocalStorage: X-Accel-Redirect when STORAGE_X_ACCEL_REDIRECT_PREFIX is set
+      (nginx serves the file), else send_file on the path (Range/ETag handled
+      by werkzeug, body streamed from disk).
+    - S3Storage: 302 to a short-lived presigned URL when
+      STORAGE_S3_REDIRECT_DOWNLOADS is on, else the object body is streamed
+      in chunks with single-range passthrough.
+    - Anything else: buffered send_file(get_file()) as before.
+
+    Callers do their own authorization first. Raises FileNotFoundError for a
+    missing local file and ValueError for an invalid key.
+    """
+    import config
+
+    storage = storage or get_storage()
+    mimetype = mimetype or 'application/octet-stream'
+
+    if isinstance(storage, LocalStorage):
+        path = storage.local_path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(key)
+        if config.STORAGE_X_ACCEL_REDIRECT_PREFIX:
+            response = current_app.response_class(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = (
+                config.STORAGE_X_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(key.lstrip('/'))
+            )
+            if as_attachment or download_name:
+                response.headers['Content-Disposition'] = content_disposition(as_attachment, download_name)
+            return response
+        return send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+        )
+
+    if isinstance(storage, S3Storage):
+        disposition = content_disposition(as_attachment, download_name)
+        if config.STORAGE_S3_REDIRECT_DOWNLOADS:
+            url = storage.get_download_url(
+                key,
+                expires_seconds=config.STORAGE_DOWNLOAD_URL_EXPIRES,
+                content_type=mimetype,
+                content_disposition=disposition,
+            )
+            if url:
+                return redirect(url, code=302)
+        return _stream_s3_object(storage, key, mimetype, disposition, config.STORAGE_STREAM_CHUNK_SIZE)
+
+    return send_file(
+        storage.get_file(key),
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+    )
+
+
+def _stream_s3_object(storage, key, mimetype, disposition, chunk_size):
+    byte_range = None
+    if request.range is not None and request.range.units == 'bytes' and len(request.range.ranges) == 1:
+        byte_range = request.range.to_header()
+
+    try:
+        obj = storage.get_object(key, byte_range=byte_range)
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code')
+        if code == 'InvalidRange':
+            return current_app.response_class(status=416)
+        if code in ('NoSuchKey', '404'):
+            raise FileNotFoundError(key) from e
+        raise
+
+    body = obj['Body']
+
+    def generate():
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    response = current_app.response_class(
+        stream_with_context(generate()),
+        status=206 if obj.get('ContentRange') else 200,
+        mimetype=mimetype,
+        direct_passthrough=True,
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Content-Disposition'] = disposition
+    if obj.get('ContentLength') is not None:
+        response.headers['Content-Length'] = str(obj['ContentLength'])
+    if obj.get('ContentRange'):
+        response.headers['Content-Range'] = obj['ContentRange']
+    if obj.get('ETag'):
+        response.headers['ETag'] = obj['ETag']
+    return response
+
+
+def expires_window(expires_seconds):
+    """Reuse window for a presigned URL of the given lifetime (half of it, min 1s)."""
+    return max(1, int(expires_seconds) // 2)
+
+
+_storage = None
+_storage_config = None
+_storage_lock = threading.Lock()
+
+
+def _build_storage(storage_config):
+    backend, bucket, region, prefix, instance_dir, base_url, access_key, secret_key = storage_config
+    if backend == 's3':
+        from config import S3_MAX_POOL_CONNECTIONS, STORAGE_URL_CACHE_MAXSIZE, UPLOAD_MULTIPART_CHUNK_BYTES
         if not access_key or not secret_key:
              # If we are in production and missing keys, we should probably warn or fail
              print("[Storage] WARNING: S3 backend selected but AWS credentials missing from environment.")
         
-        return S3Storage(S3_BUCKET, AWS_REGION, access_key, secret_key, prefix=S3_PREFIX)
+        return S3Storage(
+            bucket, region, access_key, secret_key, prefix=prefix,
+            max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+            url_cache_maxsize=STORAGE_URL_CACHE_MAXSIZE,
+            multipart_chunk_bytes=UPLOAD_MULTIPART_CHUNK_BYTES,
+        )
     else:
         # Local Storage (Fallback)
         # Serving files: We need to match Flask's STATIC serving or a dedicated Route.
-        return LocalStorage(INSTANCE_DIR, f"{BASE_URL}") 
+        from config import CLEANUP_DELETE_WORKERS
+        return LocalStorage(instance_dir, f"{base_url}", delete_workers=CLEANUP_DELETE_WORKERS)
+
+
+def get_storage():
+    """
+    Process-wide configured storage backend.
+    Built once and reused (S3 client, connection pool and URL cache included);
+    rebuilt only if the storage configuration changes.
+    """
+    global _storage, _storage_config
+    import config
+
+    storage_config = (
+        config.STORAGE_BACKEND, config.S3_BUCKET, config.AWS_REGION, config.S3_PREFIX,
+        config.INSTANCE_DIR, config.BASE_URL,
+        os.environ.get('AWS_ACCESS_KEY_ID'), os.environ.get('AWS_SECRET_ACCESS_KEY'),
+    )
+    storage = _storage
+    if storage is not None and _storage_config == storage_config:
+        return storage
+
+    with _storage_lock:
+        if _storage is None or _storage_config != storage_config:
+            _storage = _build_storage(storage_config)
+            _storage_config = storage_config
+        return _storage
+
+
+def reset_storage():
+    """Drop the cached backend (tests / credential rotation)."""
+    global _storage, _storage_config
+    with _storage_lock:
+        _storage = None
+        _storage_config = None
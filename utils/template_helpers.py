@@ -11,3 +11,12 @@ def get_storage_url(key):
     # Ensure key is treated as relative if needed, but storage handles it.
     # Just pass the key.
     return storage.get_url(key)
+
+
+def get_storage_urls(keys):
+    """
+    Bulk form of get_storage_url: list of URLs in the order of `keys`.
+    Uses the backend's cached bulk signer (one lookup pass for a whole gallery).
+    """
+    urls = get_storage().get_urls(keys)
+    return [urls.get(key, "") if key else "" for key in keys]
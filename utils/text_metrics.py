@@ -0,0 +1,141 @@
+"""
+Text metrics engine for the sign layouts.
+
+Glyph advance widths scale linearly with font size, so a string is measured
+once per font and its width at any size is a single multiplication (the same
+float operations ReportLab's stringWidth performs, so results are identical).
+On top of that:
+
+- fit_size: largest size on the max_size, max_size - step, ... ladder whose
+  single line fits max_width. Solved from the unit width, then confirmed with
+  an exact check, instead of measuring every rung.
+- fit_wrapped: largest size on the ladder whose greedy word wrap needs at most
+  max_lines lines, by binary search (the line count never drops as size grows).
+
+Widths and fits are memoized per (text, font, constraints) in bounded LRU
+caches (TEXT_METRICS_CACHE_SIZE). Registered font metrics never change within
+a process (the first registration of a face name wins).
+"""
+import functools
+import math
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+import config
+
+_CACHE_SIZE = config.TEXT_METRICS_CACHE_SIZE
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _unit(text, font_name):
+    """(is_ttf, base width) such that text_width() reproduces stringWidth exactly."""
+    font = pdfmetrics.getFont(font_name)
+    if isinstance(font, TTFont):
+        # TTF: 0.001 * size * glyph_sum; at 1000pt that is exactly glyph_sum
+        return True, font.stringWidth(text, 1000)
+    # Type 1: glyph_sum * 0.001 * size; at 1pt that is glyph_sum * 0.001
+    return False, font.stringWidth(text, 1)
+
+
+def text_width(text, font_name, size):
+    """Width of text in points; equal to pdfmetrics.stringWidth(text, font_name, size)."""
+    if not text:
+        return 0.0
+    is_ttf, base = _unit(str(text), font_name)
+    return 0.001 * size * base if is_ttf else base * size
+
+
+def _ladder_count(max_size, min_size, step):
+    """Number of rungs max_size - k*step that stay >= min_size (0 if none)."""
+    if max_size < min_size:
+        return 0
+    k = int((max_size - min_size) // step)
+    while max_size - (k + 1) * step >= min_size:
+        k += 1
+    while k >= 0 and max_size - k * step < min_size:
+        k -= 1
+    return k + 1
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def fit_size(text, font_name, max_width, max_size, min_size, step=1):
+    """
+    Largest of max_size, max_size - step, ... (not below min_size) at which
+    text fits max_width on one line; min_size when none does.
+    """
+    if not text:
+        return max_size
+    rungs = _ladder_count(max_size, min_size, step)
+    if rungs == 0:
+        return min_size
+    per_point = text_width(text, font_name, 1)
+    if per_point <= 0:
+        return max_size
+
+    def fits(k):
+        return text_width(text, font_name, max_size - k * step) <= max_width
+
+    # Analytic first guess, then settle on the exact rung (at most a step or two)
+    k = min(rungs - 1, max(0, math.ceil((max_size - max_width / per_point) / step)))
+    while k > 0 and fits(k - 1):
+        k -= 1
+    while k < rungs and not fits(k):
+        k += 1
+    return max_size - k * step if k < rungs else min_size
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def wrap_words(text, font_name, size, max_width):
+    """Greedy word wrap; words wider than max_width get a line of their own. Returns a tuple."""
+    lines = []
+    current = []
+    for word in text.split():
+        test_line = " ".join(current + [word])
+        if text_width(test_line, font_name, size) <= max_width:
+            current.append(word)
+        else:
+            if current:
+                lines.append(" ".join(current))
+            current = [word]
+    if current:
+        lines.append(" ".join(current))
+    return tuple(lines)
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def fit_wrapped(text, font_name, max_size, min_size, max_width, max_lines, step=2):
+    """
+    Largest of max_size, max_size - step, ... (not below min_size) whose
+    wrap_words() needs at most max_lines lines, as (size, lines); None if none.
+    """
+    rungs = _ladder_count(max_size, min_size, step)
+
+    def fits(k):
+        return len(wrap_words(text, font_name, max_size - k * step, max_width)) <= max_lines
+
+    lo, hi = 0, rungs
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if fits(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    if lo == rungs:
+        return None
+    size = max_size - lo * step
+    return size, wrap_words(text, font_name, size, max_width)
+
+
+def stats():
+    return {
+        "widths": _unit.cache_info()._asdict(),
+        "fits": fit_size.cache_info()._asdict(),
+        "wraps": wrap_words.cache_info()._asdict(),
+        "wrapped_fits": fit_wrapped.cache_info()._asdict(),
+    }
+
+
+def clear():
+    for cached in (_unit, fit_size, wrap_words, fit_wrapped):
+        cached.cache_clear()
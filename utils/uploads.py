@@ -2,15 +2,20 @@
 File upload security and handling utilities.
 Provides validation, sanitization, and secure storage for uploaded files.
 """
+import hashlib
 import os
 import uuid
 import io
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 from PIL import Image
+
+import config
 from utils.storage import get_storage
 
 # Allowed file extensions for image uploads
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB (Matching config)
 
 def allowed_file(filename):
     """Check if filename has an allowed extension."""
@@ -28,18 +33,81 @@ def get_extension_from_filename(filename):
         return f'.{ext}'
     return ''
 
-def save_image_upload(file_storage, folder, base_name, validate_image=True):
+class UploadResult:
+    """Outcome of one streamed upload: key/sha256/size on success, error otherwise."""
+
+    __slots__ = ('filename', 'key', 'sha256', 'size', 'error')
+
+    def __init__(self, filename, key=None, sha256=None, size=0, error=None):
+        self.filename = filename
+        self.key = key
+        self.sha256 = sha256
+        self.size = size
+        self.error = error
+
+
+class _HashingReader:
     """
-    Save uploaded file to the configured storage backend.
-    
-    Args:
-        file_storage: FileStorage object from Flask request.files
-        folder: Relative folder path (e.g. 'uploads/properties')
-        base_name: Base name for file
-        validate_image: If True, validate image content
-        
+    Forward-only reader over (already read prefix + rest of stream) that
+    hashes and counts as the storage backend pulls chunks, and fails the
+    upload once MAX_FILE_SIZE is exceeded.
+    """
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunk = self._prefix + self._stream.read()
+            self._prefix = b''
+        else:
+            # Full reads until EOF: s3transfer takes a short first read for a
+            # small body and sends it with one in-memory put_object.
+            parts = []
+            if self._prefix:
+                parts.append(self._prefix[:size])
+                self._prefix = self._prefix[size:]
+            missing = size - sum(len(p) for p in parts)
+            while missing > 0:
+                data = self._stream.read(missing)
+                if not data:
+                    break
+                parts.append(data)
+                missing -= len(data)
+            chunk = b''.join(parts)
+
+        self.size += len(chunk)
+        if self.size > MAX_FILE_SIZE:
+            raise ValueError(f"File too large. Maximum size is 16MB, got more than {MAX_FILE_SIZE / 1024 / 1024:.0f}MB")
+        self._sha256.update(chunk)
+        return chunk
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+
+def _validate_image_prefix(prefix):
+    """Identify the image from its leading bytes (header only; no full decode)."""
+    try:
+        # open() parses the header and applies PIL's decompression bomb limit
+        Image.open(io.BytesIO(prefix)).close()
+    except Exception as e:
+        raise ValueError(f"Invalid image file: {str(e)}")
+
+
+def stream_image_upload(file_storage, folder, base_name, validate_image=True, storage=None):
+    """
+    Stream an uploaded file to storage without buffering it in memory.
+
+    Only the first UPLOAD_VALIDATE_PREFIX_BYTES are held to identify the
+    image; the rest goes from the request stream to storage in chunks
+    (S3 multipart above one part), hashed (sha256) on the way.
+
     Returns:
-        str: The storage key (relative path including filename)
+        UploadResult (error is always None; failures raise ValueError)
     """
     if not file_storage or not file_storage.filename:
         raise ValueError("No file provided")
@@ -48,32 +116,20 @@ def save_image_upload(file_storage, folder, base_name, validate_image=True):
     if not allowed_file(file_storage.filename):
         raise ValueError(f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}")
     
-    # Read file into memory for validation and size check
-    # We do not rely on filesystem temp files to avoid ephemeral storage issues (though temp is usually fine)
-    # 10MB limit is manageable in RAM
-    file_bytes = file_storage.read()
-    file_size = len(file_bytes)
-    
-    MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB (Matching config)
-    if file_size > MAX_FILE_SIZE:
-        raise ValueError(f"File too large. Maximum size is 16MB, got {file_size / 1024 / 1024:.1f}MB")
-    
     # Determine extension
     ext = get_extension_from_filename(file_storage.filename)
     if not ext:
         raise ValueError("Invalid file extension")
     
-    # Validate image content
+    stream = file_storage.stream
+    prefix = stream.read(config.UPLOAD_VALIDATE_PREFIX_BYTES)
+    if not prefix:
+        raise ValueError("No file provided")
+
+    # Validate image content (header only; photos are fully decoded later
+    # when variants are derived)
     if validate_image:
-        try:
-            # Validate using PIL from memory
-            with Image.open(io.BytesIO(file_bytes)) as img:
-                img.verify()
-                
-            # Re-open to confirm format or valid
-            # (verify consumes the stream in some PIL versions, safer to just trust verify() or re-open if needed later)
-        except Exception as e:
-            raise ValueError(f"Invalid image file: {str(e)}")
+        _validate_image_prefix(prefix)
 
     # Generate unique filename
     unique_id = uuid.uuid4().hex[:8]
@@ -86,12 +142,51 @@ def save_image_upload(file_storage, folder, base_name, validate_image=True):
     key = f"{folder}/{filename}"
     
     # Upload to storage
-    # We pass BytesIO(file_bytes) to ensure clean read
-    storage = get_storage()
-    storage.put_file(
-        io.BytesIO(file_bytes),
+    reader = _HashingReader(prefix, stream)
+    storage = storage or get_storage()
+    storage.put_stream(
+        reader,
         key,
         content_type=file_storage.content_type or 'application/octet-stream'
     )
+    return UploadResult(file_storage.filename, key=key, sha256=reader.hexdigest(), size=reader.size)
+
+
+def save_image_upload(file_storage, folder, base_name, validate_image=True):
+    """
+    Save uploaded file to the configured storage backend.
     
-    return key
+    Args:
+        file_storage: FileStorage object from Flask request.files
+        folder: Relative folder path (e.g. 'uploads/properties')
+        base_name: Base name for file
+        validate_image: If True, validate image content
+        
+    Returns:
+        str: The storage key (relative path including filename)
+    """
+    return stream_image_upload(file_storage, folder, base_name, validate_image=validate_image).key
+
+
+def save_image_uploads(files, folder, base_name, validate_image=True, storage=None):
+    """
+    Stream several uploads concurrently (UPLOAD_PARALLELISM at a time).
+
+    Returns one UploadResult per file, in input order. Per-file failures are
+    returned in `error` rather than raised, so one bad photo does not sink
+    the rest of a submission.
+    """
+    storage = storage or get_storage()
+
+    def upload(file_storage):
+        try:
+            return stream_image_upload(file_storage, folder, base_name, validate_image, storage=storage)
+        except Exception as e:
+            return UploadResult(getattr(file_storage, 'filename', None), error=e)
+
+    files = list(files)
+    workers = min(config.UPLOAD_PARALLELISM, len(files))
+    if workers <= 1:
+        return [upload(f) for f in files]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload") as pool:
+        return list(pool.map(upload, files))